@@ -8,10 +8,14 @@ See ruff configuration in pyproject.toml for exact rules: pre-commit checks and
 # Imports
 #######################################################################################################################
 
+import argparse
+
 import uvicorn
 
 from src.config import settings
 from src.controller.app import get_app
+from src.controller.shard_router import get_router_app
+from src.controller.sharding import local_shards, start_local_shards
 
 #######################################################################################################################
 # Globals
@@ -26,17 +30,44 @@ def entry_point() -> None:
     """Starts the FastAPI application using Uvicorn.
 
     The controller is a single-worker application that spawns tasks for each AP/RT but stores state centrally in
-    memory, so multiple workers would not work. This should be OK, as all the real work is done in the
-    worker subprocesses: the controller should not be a bottleneck.
+    memory, so multiple uvicorn workers would not work. To scale out, run several controllers as shards instead (see
+    src.controller.sharding), each a single-worker process that owns some of the Networks, behind a front router:
+
+    - `--shards N` starts N shards on this host, on the ports after APP_PORT, and runs the front router on APP_PORT.
+      The shards are stopped when the router exits.
+    - `--router` runs only the front router, for the shards already running at the URLs in SHARDS.
+    - A shard is an ordinary controller started with SHARD_NAME and SHARDS set.
+
+    With `--scenario PATH`, the Networks described in a scenario file (see src.controller.scenario) are created once
+    the application has started.
     """
+    parser = argparse.ArgumentParser(description="NMS network simulator")
+    parser.add_argument("--scenario", help="Scenario file (YAML, JSON or JSON Lines) to load at startup")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--shards", type=int, metavar="N", help="Start N controller shards behind a front router")
+    mode.add_argument("--router", action="store_true", help="Run the front router for the shards in SHARDS")
+    args = parser.parse_args()
+    if args.scenario and (args.shards or args.router):
+        parser.error("--scenario loads into one controller: load it through the front router instead")
 
-    uvicorn.run(
-        get_app(),
-        port=settings.APP_PORT,
-        host=settings.APP_HOST,
-        workers=1,
-        log_level=settings.LOG_LEVEL.lower(),
-    )
+    shards = []
+    if args.shards:
+        envs = local_shards(args.shards)
+        settings.SHARDS = {name: f"http://127.0.0.1:{env['APP_PORT']}" for name, env in envs.items()}
+        shards = start_local_shards(envs)
+    try:
+        uvicorn.run(
+            get_router_app() if args.shards or args.router else get_app(scenario=args.scenario),
+            port=settings.APP_PORT,
+            host=settings.APP_HOST,
+            workers=1,
+            log_level=settings.LOG_LEVEL.lower(),
+        )
+    finally:
+        for shard in shards:
+            shard.terminate()
+        for shard in shards:
+            shard.wait()
 
 
 if __name__ == "__main__":
@@ -5,6 +5,9 @@ Configuration settings for the NMS network simulator and API services.
 #######################################################################################################################
 # Imports
 #######################################################################################################################
+import tempfile
+from typing import Literal
+
 from pydantic import Field
 from pydantic_core import Url
 from pydantic_settings import BaseSettings
@@ -42,6 +45,58 @@ class Settings(BaseSettings):
 
     PUB_PORT: int = Field(12501, description="Port for publishing commands to AP simulators")
     PULL_PORT: int = Field(12502, description="Port for receiving messages from AP simulators")
+    ZMQ_TRANSPORT: Literal["tcp", "ipc"] = Field(
+        "tcp", description="ZeroMQ transport to local workers: tcp (loopback) or ipc (Unix-domain sockets)"
+    )
+    ZMQ_IPC_DIR: str = Field(default_factory=tempfile.gettempdir, description="Directory for ipc:// socket files")
+
+    WORKER_START_METHOD: Literal["popen", "zygote", "agent"] = Field(
+        "zygote",
+        description="Start hub workers as new processes (popen), fork them from a pre-imported zygote, or have host "
+        "agents start them (agent)",
+    )
+    AGENT_NAME: str | None = Field(None, description="Name a host agent registers under (None: the host name)")
+    AGENT_MAX_WORKERS: int | None = Field(None, description="Most hub workers a host agent runs (None: one per core)")
+    AGENT_HEARTBEAT_SECONDS: float = Field(2.0, description="Interval in seconds between host agent registrations")
+    AGENT_TIMEOUT: float = Field(10.0, description="Seconds without a registration before a host agent is down")
+    AGENT_SPAWN_TIMEOUT: float = Field(10.0, description="Seconds the controller waits for an agent to start a worker")
+
+    NODE_STORE_BACKEND: Literal["memory", "sqlite"] = Field(
+        "memory", description="Keep RT state in memory, or in a local SQLite database (see src.controller.node_db)"
+    )
+    NODE_STORE_SQLITE_PATH: str = Field("node_store.sqlite3", description="SQLite database file for RT state")
+    NODE_STORE_FLUSH_INTERVAL: float = Field(0.5, description="Seconds between batched writes to the node database")
+    NODE_STORE_FLUSH_BATCH: int = Field(10000, description="Pending node database writes that trigger an early flush")
+
+    EVENT_LOG_PATH: str | None = Field(
+        None, description="Append-only log of topology changes, replayed to recover after a restart (None: disabled)"
+    )
+    EVENT_LOG_FLUSH_INTERVAL: float = Field(0.2, description="Seconds between writes of buffered events to the log")
+    EVENT_LOG_COMPACT_EVENTS: int = Field(100000, description="Events appended to the log before it is compacted")
+    RESYNC_TIMEOUT: float = Field(5.0, description="Seconds a recovered hub worker has to answer before it is replaced")
+
+    SUPERVISOR_INTERVAL: float = Field(1.0, description="Seconds between checks of the hub workers' health")
+    SUPERVISOR_STALL_TIMEOUT: float = Field(
+        30.0, description="Seconds without a status report (or, when starting, a connection) before a worker is hung"
+    )
+    SUPERVISOR_BACKOFF: float = Field(1.0, description="Seconds before restarting a failed worker, doubling each time")
+    SUPERVISOR_BACKOFF_MAX: float = Field(
+        60.0, description="Most seconds before restarting a failed worker; one that ran this long restarts promptly"
+    )
+
+    SCENARIO_MAX_CONCURRENT_HUBS: int = Field(8, description="Hubs a scenario load creates concurrently")
+    SCENARIO_MAX_CONCURRENT_APS: int = Field(64, description="APs a scenario load creates concurrently")
+    SCENARIO_AP_RATE: float = Field(100.0, description="Maximum APs per second a scenario load creates (0: unlimited)")
+
+    JOB_MAX_CONCURRENT: int = Field(4, description="Background jobs run at once; further jobs are queued")
+    JOB_MAX_CONCURRENT_HUBS: int = Field(8, description="Hubs created concurrently across all background jobs")
+    JOB_MAX_CONCURRENT_APS: int = Field(64, description="APs created concurrently across all background jobs")
+
+    LIST_PAGE_SIZE: int = Field(1000, description="Entries returned by a list route when no limit is given")
+    LIST_MAX_PAGE_SIZE: int = Field(100000, description="Maximum entries a list route returns in one page")
+    READ_CACHE_ENTRIES: int = Field(4096, description="Routes whose latest read response is cached")
+    READ_CACHE_MAX_BYTES: int = Field(64 * 1024 * 1024, description="Total size of cached read responses in bytes")
+    LIVE_STATUS_INTERVAL: float = Field(1.0, description="Seconds between batches of deltas on a live status stream")
 
     SECRET_KEY: str = Field("Hello", description="Secret key for authentication")
     SECRET_KEY_RT: str = Field("Hello", description="Secret key for RT authentication")
@@ -62,10 +117,33 @@ class Settings(BaseSettings):
 
     HTTPX_TIMEOUT: int = Field(10, description="Timeout for HTTPX requests in seconds")
     WORKER_HTTPX_POOLSIZE: int = Field(256, description="Connection pool size for HTTPX")
+    NBAPI_MAX_CONNECTIONS: int = Field(100, description="Connection pool size for the controller's NBAPI client")
+    NBAPI_MAX_KEEPALIVE_CONNECTIONS: int = Field(20, description="Idle NBAPI connections kept open for reuse")
+    NBAPI_KEEPALIVE_EXPIRY: float = Field(30.0, description="Seconds an idle NBAPI connection is kept open")
 
     MAX_CONCURRENT_WORKER_COMMANDS: int = Field(16, description="Maximum concurrent requests a worker can handle")
 
-    REPORTER_INTERVAL: int = Field(10, description="Interval in seconds for reporting worker status")
+    REPORTER_INTERVAL: float = Field(1.0, description="Interval in seconds for reporting worker status")
+    WORKER_KEEPALIVE_SECONDS: float = Field(5.0, description="Longest a worker goes without a status report")
+    ALARM_BATCH_SIZE: int = Field(500, description="Alarm events a worker sends to the NMS in one request")
+    ALARM_FLUSH_INTERVAL: float = Field(0.1, description="Maximum time in seconds a worker holds back alarm events")
+    ALARM_MAX_IN_FLIGHT: int = Field(4, description="Alarm batches a worker has outstanding with the NMS at once")
+    ALARM_MAX_PENDING: int = Field(100000, description="Alarm events a worker queues before dropping new ones")
+    TEARDOWN_MAX_CONCURRENT: int = Field(64, description="NMS removals a worker has outstanding at once in a teardown")
+    TEARDOWN_TIMEOUT: float = Field(300.0, description="Seconds the controller waits for a worker to finish a teardown")
+
+    SHARD_NAME: str | None = Field(None, description="This controller's name in SHARDS, if it is one shard of several")
+    SHARDS: dict[str, str] = Field(
+        default_factory=dict, description="Every controller shard of a sharded deployment: name -> base URL of its API"
+    )
+    SHARD_VNODES: int = Field(64, description="Points each shard has on the consistent hash ring")
+    SHARD_PORT_STRIDE: int = Field(10, description="Port spacing between shards started on one host")
+    ROUTER_TIMEOUT: float = Field(600.0, description="Seconds the front router waits for a shard to answer")
+
+    COMMAND_WINDOW_SIZE: int = Field(1024, description="Maximum unacknowledged commands outstanding per hub")
+    COMMAND_RETRANSMIT_SECONDS: float = Field(2.0, description="Time before an unacknowledged command is resent")
+    COMMAND_ACK_BATCH_SIZE: int = Field(64, description="Number of command acks a worker batches before sending")
+    COMMAND_ACK_INTERVAL: float = Field(0.05, description="Maximum time in seconds a worker holds back command acks")
 
 
 settings = Settings()  # Load settings from environment variables or .env file if present'
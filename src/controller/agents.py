@@ -0,0 +1,291 @@
+"""
+agents.py
+
+Controller-side pool of host agents (see src.worker.agent), which start hub workers on other machines.
+
+With `WORKER_START_METHOD=agent`, HubManager.start_worker asks the pool for a worker instead of starting one itself.
+The pool places the hub on the least loaded agent that is up and has room (fewest workers for its capacity, with ties
+going to the agent with the lowest name), asks it to start the worker, and repeats the request until the agent answers
+or AGENT_SPAWN_TIMEOUT runs out. The worker connects back to the controller like any other, and is represented by a
+RemoteWorker handle that offers the parts of the subprocess.Popen interface that HubManager uses.
+
+Agents register themselves, and stay registered by repeating the registration every AGENT_HEARTBEAT_SECONDS. An agent
+that has not registered for AGENT_TIMEOUT seconds is down: no more hubs are placed on it, and its workers are presumed
+gone. Each registration lists the hubs the agent is running, which the pool takes as the hubs placed on it, except
+for those it has been asked to stop: the request to stop them is repeated with each registration that still lists them,
+in case it was lost.
+
+Usage:
+    worker = await agents.spawn(hub_address)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import itertools
+import logging
+import time
+
+from src.config import settings
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import AgentStatus
+from src.worker.worker_api import (
+    Address,
+    AgentKillReq,
+    AgentRegisterInd,
+    AgentSpawnReq,
+    AgentSpawnRsp,
+    BaseMessageBody,
+    MessageTypes,
+)
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+AGENT_MESSAGE_TYPES = {MessageTypes.AGENT_REGISTER_IND, MessageTypes.AGENT_SPAWN_RSP}  # Agent -> controller
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class Agent:
+    """
+    The controller's record of one host agent.
+
+    Args:
+        registration (AgentRegisterInd): The agent's latest registration.
+    """
+
+    def __init__(self, registration: AgentRegisterInd):
+        self.registration = registration
+        self.last_seen = time.monotonic()
+        self.hubs: set[Address] = set(registration.hubs)  # Hubs whose workers it is running
+        self.pending: set[Address] = set()  # Hubs it has been asked to start, not yet answered
+        self.stopping: set[Address] = set()  # Hubs it has been asked to stop, until it no longer reports them
+
+    @property
+    def name(self) -> str:
+        """
+        Returns:
+            str: The agent's name.
+        """
+        return self.registration.agent
+
+    @property
+    def up(self) -> bool:
+        """
+        Returns:
+            bool: Whether the agent has registered within AGENT_TIMEOUT.
+        """
+        return time.monotonic() - self.last_seen < settings.AGENT_TIMEOUT
+
+    @property
+    def placed(self) -> int:
+        """
+        Returns:
+            int: The number of hubs placed on the agent, including those it is starting.
+        """
+        return len(self.hubs | self.pending)
+
+    def status(self) -> AgentStatus:
+        """
+        Returns:
+            AgentStatus: The agent's capacity, placements and liveness.
+        """
+        reg = self.registration
+        return AgentStatus(
+            name=reg.agent,
+            host=reg.host,
+            cores=reg.cores,
+            memory_mb=reg.memory_mb,
+            max_workers=reg.max_workers,
+            hubs=sorted(address.tag for address in self.hubs),
+            up=self.up,
+            last_seen=time.monotonic() - self.last_seen,
+        )
+
+
+class RemoteWorker:
+    """
+    Handle for a hub worker started by a host agent.
+
+    Args:
+        pool (AgentPool): The pool of the agent running the worker.
+        address (Address): Address of the worker's hub.
+        pid (int): Process ID of the worker on the agent's host.
+    """
+
+    def __init__(self, pool: "AgentPool", address: Address, pid: int):
+        self.pool = pool
+        self.address = address
+        self.pid = pid
+
+    def poll(self) -> int | None:
+        """
+        Returns:
+            int | None: None while an agent that is up reports the worker running, else 0.
+        """
+        agent = self.pool.agent_of(self.address)
+        return None if agent is not None and agent.up else 0
+
+    def terminate(self) -> None:
+        """
+        Ask the agent to stop the worker.
+        """
+        self.pool.kill(self.address)
+
+    def wait(self, timeout: float | None = None) -> int:
+        """
+        Returns:
+            int: 0 at once. The agent waits for the worker to exit.
+        """
+        return 0
+
+
+class AgentPool:
+    """
+    The host agents that have registered with the controller, and the hubs placed on them.
+    """
+
+    def __init__(self):
+        self.agents: dict[str, Agent] = {}
+        self._requests = itertools.count()
+        self._spawns: dict[int, asyncio.Future[AgentSpawnRsp]] = {}
+
+    def on_message(self, msg: BaseMessageBody) -> None:
+        """
+        Handle a message from a host agent.
+
+        Args:
+            msg (BaseMessageBody): An AgentRegisterInd or AgentSpawnRsp.
+        """
+        if isinstance(msg, AgentRegisterInd):
+            self.on_register_ind(msg)
+        elif isinstance(msg, AgentSpawnRsp):
+            future = self._spawns.get(msg.request)
+            if future is not None and not future.done():
+                future.set_result(msg)
+
+    def on_register_ind(self, msg: AgentRegisterInd) -> None:
+        """
+        Record an agent's registration: its capacity, and the hubs it is running. Hubs it still reports after being
+        asked to stop them are not counted, and it is asked again.
+
+        Args:
+            msg (AgentRegisterInd): The registration.
+        """
+        agent = self.agents.get(msg.agent)
+        if agent is None or not agent.up:
+            logging.info(f"Agent {msg.agent} on {msg.host} up: {msg.cores} cores, up to {msg.max_workers} workers")
+        if agent is None:
+            self.agents[msg.agent] = Agent(msg)
+            return
+        agent.registration = msg
+        agent.last_seen = time.monotonic()
+        agent.stopping &= set(msg.hubs)
+        agent.hubs = set(msg.hubs) - agent.stopping
+        for address in agent.stopping:
+            logging.warning(f"Agent {agent.name} still running hub {address.tag} worker: asking again to stop it")
+            worker_ctrl.publish(AgentKillReq(address=address, agent=agent.name))
+
+    def agent_of(self, address: Address) -> Agent | None:
+        """
+        Returns:
+            Agent | None: The agent running the worker of a hub, if any.
+        """
+        return next((agent for agent in self.agents.values() if address in agent.hubs), None)
+
+    def place(self) -> Agent:
+        """
+        Choose the agent to start the next worker: the least loaded for its capacity of those that are up and have
+        room.
+
+        Returns:
+            Agent: The agent.
+
+        Raises:
+            RuntimeError: If no agent that is up has room.
+        """
+        candidates = [
+            agent for agent in self.agents.values() if agent.up and agent.placed < agent.registration.max_workers
+        ]
+        if not candidates:
+            raise RuntimeError(f"No host agent has room for another hub worker ({len(self.agents)} registered)")
+        return min(candidates, key=lambda agent: (agent.placed / agent.registration.max_workers, agent.name))
+
+    async def spawn(self, address: Address) -> RemoteWorker:
+        """
+        Start the worker of a hub on the agent chosen by `place`.
+
+        Args:
+            address (Address): Address of the hub.
+
+        Returns:
+            RemoteWorker: Handle for the worker.
+
+        Raises:
+            RuntimeError: If no agent has room, or the agent did not start the worker.
+        """
+        agent = self.place()
+        loop = asyncio.get_running_loop()
+        request = next(self._requests)
+        future = self._spawns[request] = loop.create_future()
+        agent.pending.add(address)
+        deadline = loop.time() + settings.AGENT_SPAWN_TIMEOUT
+        try:
+            while not future.done():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise RuntimeError(f"Agent {agent.name} did not start hub {address.tag} worker in time")
+                worker_ctrl.publish(AgentSpawnReq(address=address, agent=agent.name, request=request))
+                await asyncio.wait({future}, timeout=min(remaining, settings.COMMAND_RETRANSMIT_SECONDS))
+        finally:
+            del self._spawns[request]
+            agent.pending.discard(address)
+        rsp = future.result()
+        if rsp.pid is None:
+            raise RuntimeError(f"Agent {agent.name} could not start hub {address.tag} worker: {rsp.error}")
+        agent.stopping.discard(address)  # The worker it reports from now on is this one
+        agent.hubs.add(address)
+        logging.info(f"Hub {address.tag} placed on agent {agent.name} (worker {rsp.pid})")
+        return RemoteWorker(self, address, rsp.pid)
+
+    def kill(self, address: Address) -> None:
+        """
+        Ask the agent running the worker of a hub to stop it. If no agent is known to be running it, every agent is
+        asked, in case one is and has not said so yet. The request is repeated while the agent still reports the hub
+        (see `on_register_ind`).
+
+        Args:
+            address (Address): Address of the hub.
+        """
+        agent = self.agent_of(address)
+        for target in [agent] if agent is not None else list(self.agents.values()):
+            target.hubs.discard(address)
+            target.stopping.add(address)
+            worker_ctrl.publish(AgentKillReq(address=address, agent=target.name))
+
+    def stop_workers(self) -> None:
+        """
+        Ask the agents to stop every worker they are running for this controller.
+        """
+        for agent in self.agents.values():
+            for address in list(agent.hubs):
+                self.kill(address)
+
+    def status(self) -> list[AgentStatus]:
+        """
+        Returns:
+            list[AgentStatus]: Each agent that has registered, by name.
+        """
+        return [self.agents[name].status() for name in sorted(self.agents)]
+
+
+agents = AgentPool()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
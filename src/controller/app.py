@@ -20,11 +20,28 @@ from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
 
 from src.config import settings
+from src.controller.agents import agents
 from src.controller.comms import worker_ctrl
+from src.controller.jobs import job_runner
+from src.controller.nbapi import nbapi
+from src.controller.node_db import node_db
+from src.controller.read_cache import read_cache
+from src.controller.recovery import Recovery
+from src.controller.routes_action import action_router
+from src.controller.routes_agent import agent_router
 from src.controller.routes_ap import ap_router
 from src.controller.routes_hub import hub_router
+from src.controller.routes_jobs import job_router
+from src.controller.routes_live import live_router
+from src.controller.routes_metrics import metrics_router
 from src.controller.routes_network import network_router
+from src.controller.routes_rt import rt_router
+from src.controller.routes_scenario import scenario_router
+from src.controller.routes_snapshot import snapshot_router
+from src.controller.scenario import start_scenario
+from src.controller.supervisor import supervisor
 from src.controller.worker_ctrl import simulator
+from src.controller.zygote import zygote
 
 #######################################################################################################################
 # Globals
@@ -53,24 +70,67 @@ async def lifespan(app: FastAPI):
     Yields:
         None
     """
-    worker_ctrl.setup_zmq(app, settings.PUB_PORT, settings.PULL_PORT)
+    flush_task = None
+    if settings.NODE_STORE_BACKEND == "sqlite":
+        node_db.open()
+        flush_task = asyncio.create_task(node_db.flush_loop())
+    recovery = None
+    if settings.EVENT_LOG_PATH:
+        recovery = Recovery(settings.EVENT_LOG_PATH)
+        await recovery.replay()
+    app.state.recovery = recovery
+    worker_ctrl.setup_zmq(app, settings.PUB_PORT, settings.PULL_PORT, ipc_id=recovery and recovery.ipc_id)
+    nbapi.open()
+    job_runner.open()
     listener_task = asyncio.create_task(simulator.listener(worker_ctrl))
+    retransmit_task = asyncio.create_task(worker_ctrl.retransmit_loop())
+    supervisor.start()
+    if recovery is not None:
+        recovery.start()
+    if app.state.scenario is not None:
+        start_scenario(app.state.scenario)
     yield
+    supervisor.stop()
+    job_runner.close()
+    read_cache.clear()
+    if recovery is not None:
+        recovery.stop()
+    retransmit_task.cancel()
     listener_task.cancel()
+    if flush_task is not None:
+        flush_task.cancel()
+        node_db.close()
+    await nbapi.aclose()
+    await zygote.stop()
+    if not settings.EVENT_LOG_PATH:  # Else they are left running for the next controller, as the zygote's are
+        agents.stop_workers()
     worker_ctrl.teardown_zmq(app)
 
 
-def get_app() -> FastAPI:
+def get_app(scenario: str | None = None) -> FastAPI:
     """
     Create and configure the FastAPI application instance.
 
+    Args:
+        scenario (str | None): Scenario file to load once the application has started.
+
     Returns:
         FastAPI: The configured FastAPI app.
     """
     app = FastAPI(lifespan=lifespan, title="NMS network simulator", version="0.0.1")
+    app.state.scenario = scenario
+    app.state.recovery = None
     app.include_router(network_router)
     app.include_router(hub_router)
     app.include_router(ap_router)
+    app.include_router(rt_router)
+    app.include_router(metrics_router)
+    app.include_router(job_router)
+    app.include_router(live_router)
+    app.include_router(action_router)
+    app.include_router(scenario_router)
+    app.include_router(snapshot_router)
+    app.include_router(agent_router)
 
     @app.get("/", include_in_schema=False)
     def root():
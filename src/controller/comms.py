@@ -8,6 +8,18 @@ workers and receiving status updates from workers, respectively. The PUB socket
 nodes, and the PULL socket is used to receive status updates from them. The class also provides methods for setting
 up and tearing down the ZeroMQ context and sockets.
 
+PUB/SUB does not guarantee delivery (a worker that has only just subscribed can miss the first few messages), so each
+command is given a per-hub sequence number and held in a CommandChannel until the worker acknowledges it. Commands that
+are not acknowledged in time are retransmitted by `retransmit_loop`.
+
+Each time the sockets are set up, sequence numbers start from a new base taken from the clock. A controller that has
+restarted and reattached to running workers (see src.controller.recovery) therefore never reuses a sequence number the
+workers have already seen, and stray acks meant for the previous controller match nothing.
+
+Workers on the same host can be reached over loopback TCP or, with `ZMQ_TRANSPORT=ipc`, over Unix-domain sockets. IPC
+socket paths include the controller's process ID so that several controllers can share a host; a restarted controller
+binds the paths of the one it replaces, so that its workers reconnect.
+
 Usage:
     Used internally by the controller process to communicate with worker nodes via ZeroMQ.
 """
@@ -15,18 +27,148 @@ Usage:
 # Imports
 #######################################################################################################################
 
+import asyncio
+import contextlib
 import logging
+import os
+import time
+from collections import deque
 
 import zmq
 import zmq.asyncio
 
-from src.worker.worker_api import Message
+from src.config import settings
+from src.worker.worker_api import BaseMessageBody, CommandAck, Message, decode_message, encode_message
 
 #######################################################################################################################
 # Body
 #######################################################################################################################
 
 
+def make_endpoints(
+    transport: str, port: int, name: str, ipc_dir: str | None = None, ipc_id: int | None = None
+) -> tuple[str, str]:
+    """
+    Build the bind and connect endpoints for one controller socket.
+
+    Args:
+        transport (str): "tcp" or "ipc".
+        port (int): TCP port (used for tcp only).
+        name (str): Socket name, used to build the ipc socket path (e.g. "pub", "pull").
+        ipc_dir (str | None): Directory for ipc socket files, defaults to settings.ZMQ_IPC_DIR.
+        ipc_id (int | None): Controller ID in the ipc socket path, defaults to the process ID.
+
+    Returns:
+        tuple[str, str]: (bind endpoint for the controller, connect endpoint for local workers).
+
+    Raises:
+        ValueError: If the transport is not supported.
+    """
+    match transport:
+        case "tcp":
+            return f"tcp://*:{port}", f"tcp://127.0.0.1:{port}"
+        case "ipc":
+            path = os.path.join(ipc_dir or settings.ZMQ_IPC_DIR, f"sim_poc-{ipc_id or os.getpid()}-{name}.ipc")
+            endpoint = f"ipc://{path}"
+            return endpoint, endpoint
+        case _:
+            raise ValueError(f"Unsupported ZeroMQ transport: {transport}")
+
+
+class CommandChannel:
+    """
+    Sequencing and retransmission state for the commands sent to a single hub worker.
+
+    At most `window_size` commands are outstanding (sent but not acknowledged) at once. Further commands are queued in
+    a backlog and released as acknowledgements free up space in the window.
+
+    Args:
+        window_size (int): Maximum number of unacknowledged commands.
+        first_seq (int): Sequence number of the first command.
+    """
+
+    def __init__(self, window_size: int, first_seq: int = 0):
+        self.window_size = window_size
+        self.seq = first_seq
+        self.outstanding: dict[int, tuple[float, list[bytes]]] = {}  # seq -> (time last sent, frames), oldest first
+        self.backlog: deque[tuple[int, list[bytes]]] = deque()
+        self.retransmits = 0
+
+    def next_seq(self) -> int:
+        """
+        Allocate the next sequence number for this channel.
+
+        Returns:
+            int: The sequence number.
+        """
+        seq = self.seq
+        self.seq += 1
+        return seq
+
+    def submit(self, seq: int, payload: list[bytes], now: float) -> bool:
+        """
+        Queue a command for delivery.
+
+        Args:
+            seq (int): Sequence number of the command.
+            payload (list[bytes]): The encoded command frames, exactly as they are sent on the wire.
+            now (float): Current monotonic time.
+
+        Returns:
+            bool: True if the command fits in the window and should be sent now, False if it was put in the backlog.
+        """
+        if len(self.outstanding) < self.window_size and not self.backlog:
+            self.outstanding[seq] = (now, payload)
+            return True
+        self.backlog.append((seq, payload))
+        return False
+
+    def ack(self, seqs: list[int], now: float) -> list[list[bytes]]:
+        """
+        Remove acknowledged commands from the window and release backlogged commands into the space freed.
+
+        Args:
+            seqs (list[int]): Acknowledged sequence numbers. Unknown (e.g. already acked) values are ignored.
+            now (float): Current monotonic time.
+
+        Returns:
+            list[list[bytes]]: Payloads of backlogged commands that should now be sent.
+        """
+        for seq in seqs:
+            self.outstanding.pop(seq, None)
+
+        released = []
+        while self.backlog and len(self.outstanding) < self.window_size:
+            seq, payload = self.backlog.popleft()
+            self.outstanding[seq] = (now, payload)
+            released.append(payload)
+        return released
+
+    def expired(self, now: float, timeout: float) -> list[list[bytes]]:
+        """
+        Collect the commands that have been outstanding for longer than `timeout` and mark them as resent.
+
+        Args:
+            now (float): Current monotonic time.
+            timeout (float): Retransmission timeout in seconds.
+
+        Returns:
+            list[list[bytes]]: Payloads to be retransmitted.
+        """
+        due = []
+        for seq, (sent_at, payload) in self.outstanding.items():
+            if now - sent_at < timeout:
+                break  # Entries are kept in send order, so everything after this is newer
+            due.append((seq, payload))
+
+        for seq, payload in due:
+            del self.outstanding[seq]  # Re-insert at the end to keep the dict ordered by send time
+            self.outstanding[seq] = (now, payload)
+
+        self.retransmits += len(due)
+        return [payload for _, payload in due]
+
+
 class ControllerComms:
     """
     Manages communication between the controller and worker nodes using ZeroMQ.
@@ -39,53 +181,142 @@ class ControllerComms:
 
     def __init__(self):
         self.zmq_ctx = self.zmq_pub = self.zmq_pull = None
+        self.pub_endpoint = self.pull_endpoint = None  # Endpoints for local workers to connect to
+        self.channels: dict[str, CommandChannel] = {}  # Keyed by hub tag
+        self.seq_base = 0  # First sequence number of every channel
+        self.ipc_id: int | None = None  # Controller ID in ipc socket paths
 
-    async def get_message(self) -> Message | None:
+    async def get_message(self) -> BaseMessageBody | None:
         """
-        Receive a message from a worker node via the PULL socket.
+        Receive a message from a worker node via the PULL socket. Only the payload frame is decoded.
+
+        Frames are received as bytes: for messages this small that is faster than zero-copy frames, whose payload
+        pydantic would have to copy out of the frame anyway.
 
         Returns:
-            Message: The received message.
+            BaseMessageBody | None: The received message, or None if it could not be decoded.
         """
-        msg_bytes = await self.zmq_pull.recv()
-        tag, msg_bytes = msg_bytes.split(b" ", 1)
+        frames = await self.zmq_pull.recv_multipart()
+        payload = frames[-1]
 
         try:
-            msg = Message.model_validate_json(msg_bytes)
-            msg = msg.root  # This is the actual message inside the wrapper.
-            logging.debug("Rx %s->ctrl: %r", str(tag), msg)
+            msg = decode_message(payload)
+            logging.debug("Rx %s->ctrl: %r", msg.address.tag, msg)
             return msg
         except Exception as e:
-            logging.warning(f"Unable to decode message: {msg_bytes!r} ({e})")
+            logging.warning(f"Unable to decode message: {payload!r} ({e})")
             return None
 
+    def get_channel(self, hub_tag: str) -> CommandChannel:
+        """
+        Get the command channel for a hub, creating it if necessary.
+
+        Args:
+            hub_tag (str): Tag of the hub address.
+
+        Returns:
+            CommandChannel: The channel for this hub.
+        """
+        channel = self.channels.get(hub_tag)
+        if channel is None:
+            channel = self.channels[hub_tag] = CommandChannel(settings.COMMAND_WINDOW_SIZE, self.seq_base)
+        return channel
+
+    def reset_channel(self, hub_tag: str) -> None:
+        """
+        Discard the sequencing state for a hub, e.g. because its worker is being (re)started.
+
+        Args:
+            hub_tag (str): Tag of the hub address.
+        """
+        self.channels.pop(hub_tag, None)
+
     def send(self, msg) -> None:
         """
-        Send a message to a worker node via the PUB socket.
+        Send a command to a worker node via the PUB socket.
+
+        The command is given the next sequence number for its hub and is held until acknowledged. If the hub already
+        has a full window of unacknowledged commands, it is queued and sent once acks arrive.
 
         Args:
             msg: The message to send - this could be a Message, or one of the message subtypes.
         """
         msg = msg if isinstance(msg, Message) else Message(msg)
-        tag = msg.root.address.tag
-        logging.debug("Tx ctrl->%s: %r", tag, msg)
-        pub_message = f"{tag} {msg.model_dump_json()}"
-        self.zmq_pub.send_string(pub_message)
+        address = msg.root.address
+        channel = self.get_channel(address.hub_address.tag)
+        msg.root.seq = channel.next_seq()
+        logging.debug("Tx ctrl->%s: %r", address.tag, msg)
+        frames = encode_message(msg)
+        if channel.submit(msg.root.seq, frames, time.monotonic()):
+            self.zmq_pub.send_multipart(frames)
+
+    def publish(self, msg) -> None:
+        """
+        Send a message via the PUB socket without sequencing it. For commands to host agents (see
+        src.controller.agents), which are not acknowledged but repeated until they are answered.
+
+        Args:
+            msg: The message to send - this could be a Message, or one of the message subtypes.
+        """
+        logging.debug("Tx ctrl->%s: %r", msg.topic, msg)
+        self.zmq_pub.send_multipart(encode_message(msg))
 
-    def setup_zmq(self, app, pub_port: int, pull_port: int) -> None:
+    def on_command_ack(self, msg: CommandAck) -> None:
         """
-        Sets up ZeroMQ PUB and PULL sockets and binds them to the specified ports.
+        Handle a batch of command acknowledgements from a worker, sending any commands released from the backlog.
+
+        Args:
+            msg (CommandAck): The acknowledgement message.
+        """
+        channel = self.channels.get(msg.address.tag)
+        if channel is None:
+            logging.debug(f"Ignoring acks from {msg.address.tag}: no command channel")
+            return
+        for frames in channel.ack(msg.seqs, time.monotonic()):
+            self.zmq_pub.send_multipart(frames)
+
+    async def retransmit_loop(self, timeout: float = settings.COMMAND_RETRANSMIT_SECONDS) -> None:
+        """
+        Periodically resend commands that have not been acknowledged within `timeout` seconds.
+
+        Args:
+            timeout (float): Retransmission timeout in seconds.
+        """
+        while True:
+            await asyncio.sleep(timeout / 2)
+            now = time.monotonic()
+            for hub_tag, channel in list(self.channels.items()):
+                payloads = channel.expired(now, timeout)
+                if payloads:
+                    logging.info(f"Retransmitting {len(payloads)} unacknowledged commands to {hub_tag}")
+                for frames in payloads:
+                    self.zmq_pub.send_multipart(frames)
+
+    def setup_zmq(
+        self, app, pub_port: int, pull_port: int, transport: str = settings.ZMQ_TRANSPORT, ipc_id: int | None = None
+    ) -> None:
+        """
+        Sets up ZeroMQ PUB and PULL sockets and binds them to the specified ports (or ipc socket files).
 
         Args:
             app: FastAPI application instance
             pub_port (int): Port number for the PUB socket
             pull_port (int): Port number for the PULL socket
+            transport (str): "tcp" or "ipc"
+            ipc_id (int | None): Controller ID for the ipc socket paths: that of a previous controller whose workers
+                should reconnect, or None for this process's ID.
         """
+        self.channels.clear()
+        self.seq_base = time.time_ns() // 1000  # Microseconds: well ahead of any sequence a previous controller reached
+        self.ipc_id = ipc_id or os.getpid()
+        pub_bind, self.pub_endpoint = make_endpoints(transport, pub_port, "pub", ipc_id=self.ipc_id)
+        pull_bind, self.pull_endpoint = make_endpoints(transport, pull_port, "pull", ipc_id=self.ipc_id)
         self.zmq_ctx = zmq.asyncio.Context()
         self.zmq_pub = self.zmq_ctx.socket(zmq.PUB)
-        self.zmq_pub.bind(f"tcp://*:{pub_port}")
+        self.zmq_pub.bind(pub_bind)
         self.zmq_pull = self.zmq_ctx.socket(zmq.PULL)
-        self.zmq_pull.bind(f"tcp://*:{pull_port}")
+        self.zmq_pull.bind(pull_bind)
+        logging.info(f"Controller ZeroMQ endpoints: PUB {self.pub_endpoint}, PULL {self.pull_endpoint}")
         app.state.zmq_ctx = self.zmq_ctx
         app.state.zmq_pub = self.zmq_pub
         app.state.zmq_pull = self.zmq_pull
@@ -109,6 +340,12 @@ class ControllerComms:
             self.zmq_ctx.term()
             app.state.zmq_ctx = self.zmq_ctx = None
 
+        for endpoint in (self.pub_endpoint, self.pull_endpoint):
+            if endpoint and endpoint.startswith("ipc://"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(endpoint.removeprefix("ipc://"))
+        self.pub_endpoint = self.pull_endpoint = None
+
 
 worker_ctrl = ControllerComms()
 
@@ -3,14 +3,24 @@ API request/response models for controller endpoints.
 """
 
 from enum import StrEnum, auto
+from typing import Literal
 
 #######################################################################################################################
 # Imports
 #######################################################################################################################
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from src.config import settings
-from src.worker.worker_api import Address
+from src.worker.worker_api import (
+    MAX_HEARTBEAT_SECONDS,
+    Address,
+    AlarmSpec,
+    AlarmStats,
+    AlarmStorm,
+    HeartbeatStats,
+    NodeAction,
+    TeardownStats,
+)
 
 #######################################################################################################################
 # Globals
@@ -32,6 +42,20 @@ class Result(BaseModel):
     message: str
 
 
+class TeardownResult(Result):
+    """
+    Response model for the removal of a Network, Hub or AP and everything under it.
+
+    Args:
+        message (str): The result message.
+        stats (TeardownStats): What was torn down, across all the hubs involved.
+        incomplete (list[str]): Hubs, by tag, whose workers did not report finishing their teardown in time.
+    """
+
+    stats: TeardownStats = Field(default_factory=TeardownStats, description="What was torn down")
+    incomplete: list[str] = Field(default_factory=list, description="Hubs whose workers did not finish in time")
+
+
 class RTCreateRequest(BaseModel):
     """
     Request model for creating an AP.
@@ -194,6 +218,529 @@ class APRead(BaseModel):
     hub_auid: str = Field(description="The auid of the parent AP")
 
 
+class RTRead(BaseModel):
+    """
+    Response model for reading an RT.
+
+    Args:
+        address (Address): Address of the RT.
+        state (RTState): Registration state.
+        heartbeat_seconds (int): Heartbeat interval.
+        auid (str): AUID of the RT.
+    """
+
+    address: Address = Field(..., description="RT address")
+    state: RTState = RTState.UNREGISTERED
+    heartbeat_seconds: int = settings.DEFAULT_HEARTBEAT_SECONDS
+    auid: str = Field(..., description="AUID of the RT")
+
+
+class ListQuery(BaseModel):
+    """
+    Query parameters for the list routes.
+
+    Args:
+        cursor (int | None): Return entries with indices after this one.
+        limit (int): Maximum number of entries to return.
+        fields (str | None): Comma-separated fields to include in each entry.
+        format (str): "json" for one object keyed by index, or "ndjson" for one entry per line.
+    """
+
+    cursor: int | None = Field(
+        None, description="Return entries with indices after this one: the X-Next-Cursor header of the previous page"
+    )
+    limit: int = Field(
+        settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE, description="Maximum entries to return"
+    )
+    fields: str | None = Field(None, description="Comma-separated fields to include in each entry (default: all)")
+    format: Literal["json", "ndjson"] = Field(
+        "json", description="json: one object keyed by index; ndjson: one entry per line, with its index"
+    )
+
+    @property
+    def start(self) -> int:
+        """
+        The lowest index on the requested page.
+        """
+        return 0 if self.cursor is None else self.cursor + 1
+
+
+class LiveQuery(BaseModel):
+    """
+    Query parameters for the live status streams: the subtree to follow.
+
+    Args:
+        net (int | None): Network index, or None for every Network.
+        hub (int | None): Hub index within the Network, or None for the whole Network.
+        ap (int | None): AP index within the Hub, or None for the whole Hub.
+        rts (bool): Whether to include RTs.
+    """
+
+    net: int | None = Field(None, description="Network index (default: every Network)")
+    hub: int | None = Field(None, description="Hub index within the Network (default: the whole Network)")
+    ap: int | None = Field(None, description="AP index within the Hub (default: the whole Hub)")
+    rts: bool = Field(False, description="Include RTs in the snapshot and deltas")
+
+    @property
+    def address(self) -> Address:
+        """
+        Address of the root of the subtree.
+        """
+        return Address(net=self.net, hub=self.hub, ap=self.ap)
+
+
+class StatusUpdate(BaseModel):
+    """
+    The status of one node in a live status stream. In a delta, only the fields that have changed are set.
+
+    Args:
+        address (Address): Address of the node.
+        state (str | None): Registration state.
+        removed (bool | None): True once the node has been removed.
+        heartbeats (HeartbeatStats | None): Heartbeats sent by the node itself.
+        child_heartbeats (HeartbeatStats | None): Heartbeats sent by its descendants.
+    """
+
+    address: Address = Field(..., description="Address of the node")
+    state: str | None = Field(None, description="Registration state")
+    removed: bool | None = Field(None, description="True once the node has been removed")
+    heartbeats: HeartbeatStats | None = Field(None, description="Heartbeats sent by the node itself")
+    child_heartbeats: HeartbeatStats | None = Field(None, description="Heartbeats sent by its descendants")
+
+
+class StatusMessage(BaseModel):
+    """
+    One message of a live status stream: the snapshot of the subtree, then batches of deltas.
+
+    Args:
+        kind (str): "snapshot" or "delta".
+        seq (int): Position of the message in the stream, from 0.
+        coalesced (int): Updates merged into others for the same node since the last message.
+        updates (list[StatusUpdate]): The nodes, or the changes to them.
+    """
+
+    kind: Literal["snapshot", "delta"] = Field(..., description="snapshot: the whole subtree; delta: changes since")
+    seq: int = Field(..., description="Position of the message in the stream, from 0")
+    coalesced: int = Field(0, description="Updates merged into others for the same node since the last message")
+    updates: list[StatusUpdate] = Field(default_factory=list, description="The nodes, or the changes to them")
+
+
+class NodeLevel(StrEnum):
+    """
+    Enum for the level of node a bulk selection picks.
+    """
+
+    HUB = auto()
+    AP = auto()
+    RT = auto()
+
+
+class Selection(BaseModel):
+    """
+    The nodes a bulk action applies to (see src.controller.selection): nodes of one level within a subtree, in the given
+    states, picked by index or sampled.
+
+    Args:
+        net (int): Network index.
+        hub (int | None): Hub index, to narrow the subtree to one Hub.
+        ap (int | None): AP index, to narrow the subtree to one AP.
+        target (NodeLevel): Level of the nodes to pick.
+        states (list[str] | None): Registration states to pick from, or None for any.
+        ids (list[int] | None): Indices of the nodes to pick (within their parent), or None.
+        percent (float | None): Percentage of the candidates to sample, or None.
+        seed (int | None): Seed for the sample, so that it can be drawn again. Random if None.
+    """
+
+    net: int = Field(..., description="Network index")
+    hub: int | None = Field(None, description="Hub index, to narrow the subtree to one Hub")
+    ap: int | None = Field(None, description="AP index, to narrow the subtree to one AP")
+    target: NodeLevel = Field(..., description="Level of the nodes to pick")
+    states: list[str] | None = Field(None, description="Registration states to pick from (default: any)")
+    ids: list[int] | None = Field(None, description="Indices of the nodes to pick, within their parent")
+    percent: float | None = Field(None, gt=0, le=100, description="Percentage of the candidates to sample")
+    seed: int | None = Field(None, description="Seed for the sample (default: random)")
+
+    @model_validator(mode="after")
+    def check_ids_or_percent(self):
+        """
+        Raises:
+            ValueError: If both ids and percent are given.
+        """
+        if self.ids is not None and self.percent is not None:
+            raise ValueError("Give either 'ids' or 'percent', not both")
+        return self
+
+    @property
+    def address(self) -> Address:
+        """
+        Address of the root of the subtree.
+
+        Raises:
+            ValueError: If an AP is given without a Hub.
+        """
+        return Address(net=self.net, hub=self.hub, ap=self.ap)
+
+
+class ActionRequest(Selection):
+    """
+    Request to apply an action to a selection of nodes.
+
+    Args:
+        action (NodeAction): The action.
+        alarm (AlarmSpec | None): The alarm to raise or clear, for raise_alarm and clear_alarm.
+        storm (AlarmStorm | None): The storm to run across the nodes of each hub, for start_alarm_storm.
+        heartbeat_seconds (int | None): The new heartbeat interval, for set_heartbeat.
+    """
+
+    action: NodeAction = Field(..., description="The action to apply")
+    alarm: AlarmSpec | None = Field(None, description="The alarm to raise or clear (raise_alarm, clear_alarm)")
+    storm: AlarmStorm | None = Field(None, description="The alarm storm to run in each hub (start_alarm_storm)")
+    heartbeat_seconds: int | None = Field(
+        None, gt=0, le=MAX_HEARTBEAT_SECONDS, description="The new heartbeat interval (set_heartbeat)"
+    )
+
+    @model_validator(mode="after")
+    def check_action_params(self):
+        """
+        Raises:
+            ValueError: If the action needs an alarm, storm or heartbeat interval and none is given.
+        """
+        if self.action in (NodeAction.RAISE_ALARM, NodeAction.CLEAR_ALARM) and self.alarm is None:
+            raise ValueError(f"'{self.action}' needs an 'alarm'")
+        if self.action == NodeAction.START_ALARM_STORM and self.storm is None:
+            raise ValueError(f"'{self.action}' needs a 'storm'")
+        if self.action == NodeAction.SET_HEARTBEAT and self.heartbeat_seconds is None:
+            raise ValueError(f"'{self.action}' needs 'heartbeat_seconds'")
+        return self
+
+
+class SelectionSummary(BaseModel):
+    """
+    Response model for a selection: how many nodes it picked, and the first few.
+
+    Args:
+        candidates (int): Nodes of the target level and states in the subtree.
+        selected (int): Nodes picked.
+        hubs (int): Hubs whose nodes were picked.
+        seed (int | None): Seed of the sample, if one was drawn.
+        sample (list[Address]): The first few nodes picked.
+        elapsed_ms (float): Time taken to make the selection.
+    """
+
+    candidates: int = Field(0, description="Nodes of the target level and states in the subtree")
+    selected: int = Field(0, description="Nodes picked")
+    hubs: int = Field(0, description="Hubs whose nodes were picked")
+    seed: int | None = Field(None, description="Seed of the sample, if one was drawn")
+    sample: list[Address] = Field(default_factory=list, description="The first few nodes picked")
+    elapsed_ms: float = Field(0.0, description="Time taken to make the selection")
+
+
+class ActionResult(SelectionSummary):
+    """
+    Response model for a bulk action.
+
+    Args:
+        action (NodeAction): The action.
+        commands (int): Commands sent to hub workers, one per hub.
+    """
+
+    action: NodeAction = Field(..., description="The action applied")
+    commands: int = Field(0, description="Commands sent to hub workers, one per hub")
+
+
+class APSpec(APCreateRequest):
+    """
+    Scenario file entry for a group of identical APs.
+
+    Args:
+        count (int): Number of APs in the group.
+    """
+
+    count: int = Field(1, description="Number of APs in the group", ge=0)
+
+
+class HubSpec(HubCreateRequest):
+    """
+    Scenario file entry for a group of identical Hubs.
+
+    Args:
+        count (int): Number of Hubs in the group.
+        ap_groups (list[APSpec]): Explicit AP groups. If empty, `num_aps` APs are created from the Hub defaults.
+    """
+
+    count: int = Field(1, description="Number of Hubs in the group", ge=0)
+    ap_groups: list[APSpec] = Field(default_factory=list, description="Explicit AP groups, replacing num_aps")
+
+
+class NetworkSpec(NetworkCreateRequest):
+    """
+    Scenario file record for one Network.
+
+    Args:
+        hub_groups (list[HubSpec]): Explicit Hub groups. If empty, `hubs` Hubs are created from the Network defaults.
+    """
+
+    hub_groups: list[HubSpec] = Field(default_factory=list, description="Explicit Hub groups, replacing hubs")
+
+
+class ScenarioState(StrEnum):
+    """
+    Enum for scenario load state.
+    """
+
+    RUNNING = auto()
+    COMPLETED = auto()
+    FAILED = auto()
+
+
+class ScenarioProgress(BaseModel):
+    """
+    Response model for the progress of a scenario load.
+
+    Totals are not known in advance, because the scenario file is read as the load proceeds.
+
+    Args:
+        load_id (str): Scenario load ID.
+        state (ScenarioState): Current state of the load.
+        records (int): Network records read from the file so far.
+        networks (int): Networks created.
+        hubs (int): Hubs created.
+        aps (int): APs created.
+        rts (int): RTs registered.
+        failed (int): Hubs, APs and RTs that failed to create or register.
+        errors (list[str]): The most recent error messages.
+        elapsed_seconds (float): Time since the load started (or its duration, once finished).
+    """
+
+    load_id: str = Field(..., description="Scenario load ID")
+    state: ScenarioState = Field(ScenarioState.RUNNING, description="Current state of the load")
+    records: int = Field(0, description="Network records read from the file so far")
+    networks: int = Field(0, description="Networks created")
+    hubs: int = Field(0, description="Hubs created")
+    aps: int = Field(0, description="APs created")
+    rts: int = Field(0, description="RTs registered")
+    failed: int = Field(0, description="Hubs, APs and RTs that failed to create or register")
+    errors: list[str] = Field(default_factory=list, description="The most recent error messages")
+    elapsed_seconds: float = Field(0.0, description="Time since the load started, or its duration once finished")
+
+
+class JobState(StrEnum):
+    """
+    Enum for background job state.
+    """
+
+    QUEUED = auto()
+    RUNNING = auto()
+    COMPLETED = auto()
+    FAILED = auto()
+    CANCELLED = auto()
+
+
+class JobProgress(BaseModel):
+    """
+    Response model for the progress of a background job.
+
+    Args:
+        job_id (str): Job ID.
+        kind (str): What the job creates: "network", "hub" or "ap".
+        state (JobState): Current state of the job.
+        address (Address | None): Address of the Network, Hub or AP being created, once it is known.
+        hubs (int): Hubs created.
+        aps (int): APs created.
+        rts (int): RTs registered.
+        failed (int): Hubs, APs and RTs that failed to create or register.
+        total_hubs (int): Hubs the job will create.
+        total_aps (int): APs the job will create.
+        total_rts (int): RTs the job will create.
+        nodes_per_second (float): Hubs, APs and RTs completed per second since the job started running.
+        eta_seconds (float | None): Estimated time to completion, if there is a rate to estimate it from.
+        phases (dict[str, float]): Seconds spent in each phase, from its first start to its last finish.
+        errors (list[str]): The most recent error messages.
+        elapsed_seconds (float): Time since the job was accepted (or its duration, once finished).
+    """
+
+    job_id: str = Field(..., description="Job ID")
+    kind: str = Field(..., description='What the job creates: "network", "hub" or "ap"')
+    state: JobState = Field(JobState.QUEUED, description="Current state of the job")
+    address: Address | None = Field(None, description="Address of the node being created, once it is known")
+    hubs: int = Field(0, description="Hubs created")
+    aps: int = Field(0, description="APs created")
+    rts: int = Field(0, description="RTs registered")
+    failed: int = Field(0, description="Hubs, APs and RTs that failed to create or register")
+    total_hubs: int = Field(0, description="Hubs the job will create")
+    total_aps: int = Field(0, description="APs the job will create")
+    total_rts: int = Field(0, description="RTs the job will create")
+    nodes_per_second: float = Field(0.0, description="Hubs, APs and RTs completed per second while running")
+    eta_seconds: float | None = Field(None, description="Estimated seconds to completion, if it can be estimated")
+    phases: dict[str, float] = Field(default_factory=dict, description="Seconds spent in each phase of the job")
+    errors: list[str] = Field(default_factory=list, description="The most recent error messages")
+    elapsed_seconds: float = Field(0.0, description="Time since the job was accepted, or its duration once finished")
+
+
+class NbapiPoolStats(BaseModel):
+    """
+    Response model for the controller's NBAPI client pool metrics.
+
+    Args:
+        open (bool): Whether the pooled client is open.
+        max_connections (int): Configured pool size.
+        connections (int): Connections currently open.
+        idle_connections (int): Open connections not serving a request.
+        in_flight (int): Requests in progress.
+        peak_in_flight (int): Highest number of concurrent requests seen.
+        requests (int): Total requests made.
+        errors (int): Requests that failed or returned an error status.
+    """
+
+    open: bool = Field(..., description="Whether the pooled client is open")
+    max_connections: int = Field(..., description="Configured pool size")
+    connections: int = Field(..., description="Connections currently open")
+    idle_connections: int = Field(..., description="Open connections not serving a request")
+    in_flight: int = Field(..., description="Requests in progress")
+    peak_in_flight: int = Field(..., description="Highest number of concurrent requests seen")
+    requests: int = Field(..., description="Total requests made")
+    errors: int = Field(..., description="Requests that failed or returned an error status")
+
+
+class RecoveryStats(BaseModel):
+    """
+    Response model for crash recovery: replay of the event log and reattachment to hub workers at startup, and the
+    log since.
+
+    Args:
+        enabled (bool): Whether the event log is enabled.
+        events_replayed (int): Events read from the log at startup.
+        events_skipped (int): Replayed events that could not be applied.
+        hubs_reattached (int): Hubs whose running worker answered and was resynced.
+        hubs_restarted (int): Hubs whose worker did not answer, and was replaced.
+        hubs_pending (int): Hubs still being reattached or restarted.
+        events_since_compaction (int): Events appended to the log since it was last compacted.
+    """
+
+    enabled: bool = Field(..., description="Whether the event log is enabled")
+    events_replayed: int = Field(0, description="Events read from the log at startup")
+    events_skipped: int = Field(0, description="Replayed events that could not be applied")
+    hubs_reattached: int = Field(0, description="Hubs whose running worker answered and was resynced")
+    hubs_restarted: int = Field(0, description="Hubs whose worker did not answer, and was replaced")
+    hubs_pending: int = Field(0, description="Hubs still being reattached or restarted")
+    events_since_compaction: int = Field(0, description="Events appended to the log since it was last compacted")
+
+
+class WorkerRestarts(BaseModel):
+    """
+    Response model for the restarts of one hub's worker by the supervisor.
+
+    Args:
+        restarts (int): Times the worker was replaced and the hub's nodes set up again.
+        failures (int): Attempts to replace it that failed, and were retried.
+        downtime_seconds (float): Total time from the worker's last report before each failure until its replacement
+            had set up the hub's nodes.
+        last_reason (str | None): Why the worker was last replaced.
+        restarting (bool): Whether the worker is being replaced now.
+    """
+
+    restarts: int = Field(0, description="Times the worker was replaced and the hub's nodes set up again")
+    failures: int = Field(0, description="Attempts to replace it that failed, and were retried")
+    downtime_seconds: float = Field(0.0, description="Total time the hub was without a working worker")
+    last_reason: str | None = Field(None, description="Why the worker was last replaced")
+    restarting: bool = Field(False, description="Whether the worker is being replaced now")
+
+
+class SupervisorStats(BaseModel):
+    """
+    Response model for the supervision of the hub workers.
+
+    Args:
+        restarts (int): Workers replaced, across all hubs.
+        failures (int): Attempts to replace a worker that failed, across all hubs.
+        downtime_seconds (float): Total downtime across all hubs.
+        restarting (int): Hubs whose worker is being replaced now.
+        hubs (dict[str, WorkerRestarts]): Each hub whose worker has been replaced, by hub tag.
+    """
+
+    restarts: int = Field(0, description="Workers replaced, across all hubs")
+    failures: int = Field(0, description="Attempts to replace a worker that failed, across all hubs")
+    downtime_seconds: float = Field(0.0, description="Total downtime across all hubs")
+    restarting: int = Field(0, description="Hubs whose worker is being replaced now")
+    hubs: dict[str, WorkerRestarts] = Field(default_factory=dict, description="Hubs whose worker was replaced, by tag")
+
+
+class ReadCacheStats(BaseModel):
+    """
+    Response model for the read response cache.
+
+    Args:
+        entries (int): Routes with a cached response.
+        bytes (int): Total size of the cached responses.
+        hits (int): Requests answered from the cache.
+        misses (int): Requests whose response had to be built.
+        not_modified (int): Requests answered with 304 Not Modified.
+        evictions (int): Responses dropped to keep the cache in bounds.
+    """
+
+    entries: int = Field(0, description="Routes with a cached response")
+    bytes: int = Field(0, description="Total size of the cached responses")
+    hits: int = Field(0, description="Requests answered from the cache")
+    misses: int = Field(0, description="Requests whose response had to be built")
+    not_modified: int = Field(0, description="Requests answered with 304 Not Modified")
+    evictions: int = Field(0, description="Responses dropped to keep the cache in bounds")
+
+
+class AlarmMetrics(BaseModel):
+    """
+    Response model for the alarm engines of the hub workers, as last reported.
+
+    Args:
+        total (AlarmStats): Totals across all hubs.
+        hubs (dict[str, AlarmStats]): Counters of each hub that has reported, by hub tag.
+    """
+
+    total: AlarmStats = Field(default_factory=AlarmStats, description="Totals across all hubs")
+    hubs: dict[str, AlarmStats] = Field(default_factory=dict, description="Counters of each hub, by hub tag")
+
+
+class ShardStatus(BaseModel):
+    """
+    Response model for one controller shard of a sharded deployment, as seen by the front router.
+
+    Args:
+        name (str): Shard name.
+        url (str): Base URL of the shard's API.
+        up (bool): Whether the shard answered.
+        networks (list[int]): Indices of the Networks the shard holds.
+    """
+
+    name: str = Field(..., description="Shard name")
+    url: str = Field(..., description="Base URL of the shard's API")
+    up: bool = Field(False, description="Whether the shard answered")
+    networks: list[int] = Field(default_factory=list, description="Indices of the Networks the shard holds")
+
+
+class AgentStatus(BaseModel):
+    """
+    Response model for one host agent (see src.worker.agent), as last registered.
+
+    Args:
+        name (str): Agent name.
+        host (str): Host name of the agent's machine.
+        cores (int): CPU cores of the machine.
+        memory_mb (int): Memory of the machine in MiB.
+        max_workers (int): Most hub workers the agent will run at once.
+        hubs (list[str]): Tags of the hubs placed on the agent.
+        up (bool): Whether the agent has registered within AGENT_TIMEOUT.
+        last_seen (float): Seconds since the agent last registered.
+    """
+
+    name: str = Field(..., description="Agent name")
+    host: str = Field(..., description="Host name of the agent's machine")
+    cores: int = Field(..., description="CPU cores of the machine")
+    memory_mb: int = Field(..., description="Memory of the machine in MiB")
+    max_workers: int = Field(..., description="Most hub workers the agent will run at once")
+    hubs: list[str] = Field(default_factory=list, description="Tags of the hubs placed on the agent")
+    up: bool = Field(False, description="Whether the agent has registered within AGENT_TIMEOUT")
+    last_seen: float = Field(0.0, description="Seconds since the agent last registered")
+
+
 #######################################################################################################################
 # End of file
 #######################################################################################################################
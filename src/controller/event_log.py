@@ -0,0 +1,165 @@
+"""
+event_log.py
+
+Append-only log of topology changes and registration results, from which a restarted controller rebuilds its state
+(see src.controller.recovery).
+
+Each event is one JSON line: a "type", the address fields of the node it concerns ("net", "hub", "ap", "rt") and any
+other values. Events are buffered in memory and appended to the file in batches, so recording one costs a dict and a
+json.dumps. The log survives a controller crash but not a host crash, since it is not fsynced.
+
+    {"type": "add_ap", "net": 0, "hub": 1, "ap": 3, "heartbeat": 30, "azimuth": 90}
+    {"type": "rt_state", "net": 0, "hub": 1, "ap": 3, "rt": 7, "state": "registered"}
+
+The log would otherwise grow without bound, so it is periodically compacted: rewritten as a snapshot of the current
+state (see src.controller.snapshot), after which new events are appended as before.
+
+Usage:
+    event_log.open("events.jsonl")
+    event_log.record("remove", address)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TextIO
+
+from src.worker.worker_api import Address
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class EventLog:
+    """
+    The controller's event log. Recording is a no-op until the log is opened, so nothing is logged while the log
+    itself is being replayed.
+    """
+
+    def __init__(self):
+        self.path: Path | None = None
+        self.events = 0  # Events recorded since the log was last compacted
+        self._file: TextIO | None = None
+        self._pending: list[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        """
+        True if events are being recorded.
+        """
+        return self._file is not None
+
+    def open(self, path: str | Path) -> None:
+        """
+        Start appending events to a log file.
+
+        Args:
+            path (str | Path): The log file. It is created if it does not exist.
+        """
+        self.close()
+        self.path = Path(path)
+        self._file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115 - held open until close()
+        logging.info(f"Recording events to {self.path}")
+
+    def close(self) -> None:
+        """
+        Write any buffered events and close the log.
+        """
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def record(self, kind: str, address: Address | None = None, **fields) -> None:
+        """
+        Record an event.
+
+        Args:
+            kind (str): Event type.
+            address (Address | None): The node the event concerns.
+            **fields: Other values of the event. They must be JSON serialisable.
+        """
+        if self._file is None:
+            return
+        event = {"type": kind}
+        if address is not None:
+            for key in ("net", "hub", "ap", "rt"):
+                value = getattr(address, key)
+                if value is not None:
+                    event[key] = value
+        event.update(fields)
+        self.append(event)
+
+    def append(self, event: dict) -> None:
+        """
+        Record an event that has already been built, e.g. a snapshot record.
+
+        Args:
+            event (dict): The event, including its "type". It must be JSON serialisable.
+        """
+        if self._file is None:
+            return
+        self._pending.append(json.dumps(event))
+        self.events += 1
+
+    def flush(self) -> None:
+        """
+        Append the buffered events to the file.
+        """
+        if self._file is None or not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    def rewrite(self, lines: Iterable[str]) -> None:
+        """
+        Compact the log: atomically replace its contents with `lines`, which must describe the whole current state.
+        Buffered events are discarded, since that state already includes them.
+
+        Args:
+            lines (Iterable[str]): The new contents, one JSON record per item, without newlines.
+        """
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            for line in lines:
+                tmp.write(line + "\n")
+        self._pending.clear()
+        if self._file is not None:
+            self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115
+        self.events = 0
+
+
+def iter_log(path: str | Path) -> Iterator[dict]:
+    """
+    Read the records of a log file. A truncated last line, left by a crash part way through a write, is skipped.
+
+    Args:
+        path (str | Path): The log file.
+
+    Yields:
+        dict: One record.
+    """
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping unreadable event log line: {line[:80]!r}")
+
+
+event_log = EventLog()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,413 @@
+"""
+jobs.py
+
+Background jobs for bulk creation of Networks, Hubs and APs.
+
+Creating a Network with its Hubs, APs and RTs takes as long as registering every one of them with the NMS, which for a
+large Network is far longer than an HTTP client will wait. A job does the same work in the background: the request
+returns a job ID straight away, and the job's progress (counts against known totals, throughput, an ETA and the time
+spent in each phase) can be polled until it finishes. A job can be cancelled, which stops it creating anything more;
+nodes it has already created are left in place.
+
+Any number of jobs can be submitted. Up to JOB_MAX_CONCURRENT run at once and the rest wait their turn, and the Hubs
+and APs being created are bounded across all running jobs by JOB_MAX_CONCURRENT_HUBS and JOB_MAX_CONCURRENT_APS, so
+that several large jobs cannot between them swamp the NMS or the host.
+
+The phases of a job are:
+
+- queued: waiting for a job slot.
+- register_network: registering the Network with the northbound API.
+- start_workers: starting Hub worker processes.
+- register_hubs: registering Hubs with the northbound API.
+- register_aps: registering APs and their RTs.
+
+Phases overlap, since Hubs are created concurrently; each is timed from its first start to its last finish.
+
+Usage:
+    job = job_runner.start(NetworkJob(job_runner.next_id(), req))
+    ...
+    job.progress()
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections.abc import Iterable, Iterator
+
+from src.config import settings
+from src.controller.ctrl_api import (
+    APCreateRequest,
+    HubCreateRequest,
+    JobProgress,
+    JobState,
+    NetworkCreateRequest,
+)
+from src.controller.managers import APManager, HubManager, NetworkManager, ap_requests, hub_requests
+from src.controller.worker_ctrl import simulator
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+MAX_ERRORS = 20  # Number of recent error messages kept in the progress report
+MAX_FINISHED_JOBS = 100  # Finished jobs kept for progress reporting; older ones are forgotten
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class Job:
+    """
+    Base class for a background job. Subclasses set `kind` and the totals, and implement `work`.
+
+    Args:
+        job_id (str): ID of this job.
+    """
+
+    kind = ""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.task: asyncio.Task | None = None
+        self._progress = JobProgress(job_id=job_id, kind=self.kind)
+        self._accepted = time.monotonic()
+        self._started: float | None = None
+        self._finished: float | None = None
+        self._phases: dict[str, list] = {}  # Name -> [first start, last finish, number in progress]
+
+    @property
+    def finished(self) -> bool:
+        """
+        True once the job has completed, failed or been cancelled.
+        """
+        return self._finished is not None
+
+    def progress(self) -> JobProgress:
+        """
+        Returns:
+            JobProgress: A snapshot of the job's progress.
+        """
+        now = time.monotonic()
+        progress = self._progress
+        end = self._finished if self._finished is not None else now
+        running = end - self._started if self._started is not None else 0.0
+        created = progress.hubs + progress.aps + progress.rts
+        processed = created + progress.failed
+        total = progress.total_hubs + progress.total_aps + progress.total_rts
+        eta = None
+        if self.finished:
+            eta = 0.0
+        elif processed and running > 0:
+            eta = max(total - processed, 0) * running / processed
+        phases = {
+            name: (now if active or finish is None else finish) - start
+            for name, (start, finish, active) in self._phases.items()
+        }
+        return progress.model_copy(
+            update={
+                "elapsed_seconds": end - self._accepted,
+                "nodes_per_second": created / running if running > 0 else 0.0,
+                "eta_seconds": eta,
+                "phases": phases,
+            },
+            deep=True,
+        )
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a step of the job as part of a phase.
+
+        Args:
+            name (str): Phase name.
+        """
+        entry = self._phases.setdefault(name, [time.monotonic(), None, 0])
+        entry[2] += 1
+        try:
+            yield
+        finally:
+            entry[2] -= 1
+            entry[1] = time.monotonic()
+
+    def _error(self, message: str) -> None:
+        logging.error(f"Job {self.job_id}: {message}")
+        self._progress.errors = [*self._progress.errors[-(MAX_ERRORS - 1) :], message]
+
+    async def run(self, runner: "JobRunner") -> None:
+        """
+        Wait for a job slot, then do the job.
+
+        Args:
+            runner (JobRunner): The runner, for its concurrency limits.
+        """
+        progress = self._progress
+        try:
+            with self.phase("queued"):
+                await runner.job_slots.acquire()
+            try:
+                progress.state = JobState.RUNNING
+                self._started = time.monotonic()
+                await self.work(runner)
+            finally:
+                runner.job_slots.release()
+            progress.state = JobState.COMPLETED
+            logging.info(f"Job {self.job_id} completed: {self.progress()}")
+        except asyncio.CancelledError:
+            progress.state = JobState.CANCELLED
+            logging.info(f"Job {self.job_id} cancelled")
+            raise
+        except Exception as e:
+            progress.state = JobState.FAILED
+            self._error(f"Job failed: {e}")
+        finally:
+            self._finished = time.monotonic()
+
+    async def work(self, runner: "JobRunner") -> None:
+        """
+        Do the job. Implemented by subclasses.
+
+        Args:
+            runner (JobRunner): The runner, for its concurrency limits.
+        """
+        raise NotImplementedError
+
+    async def _start_hub(self, net: NetworkManager) -> HubManager:
+        """
+        Create a Hub, start its worker and register it.
+        """
+        with self.phase("start_workers"):
+            hub = await net.start_hub()
+        with self.phase("register_hubs"):
+            await net.register_hub(hub)
+        self._progress.hubs += 1
+        return hub
+
+    async def _create_ap(self, runner: "JobRunner", hub: HubManager, req: APCreateRequest) -> APManager:
+        """
+        Create one AP and its RTs, waiting for the RTs to register.
+        """
+        async with runner.ap_slots:
+            with self.phase("register_aps"):
+                ap = await hub.add_ap(req)
+        tracker = ap.tracker
+        self._progress.aps += 1
+        self._progress.rts += tracker.succeeded
+        self._progress.failed += tracker.failed
+        return ap
+
+    async def _create_aps(self, runner: "JobRunner", hub: HubManager, reqs: Iterable[APCreateRequest]) -> None:
+        """
+        Create a Hub's APs, counting any that fail, then start the Hub's heartbeats.
+        """
+
+        async def create(req: APCreateRequest) -> None:
+            try:
+                await self._create_ap(runner, hub, req)
+            except Exception as e:
+                self._progress.failed += 1
+                self._error(f"AP creation on hub {hub.address.tag} failed: {e}")
+
+        await asyncio.gather(*(create(req) for req in reqs))
+        hub.start_heartbeats()
+
+
+class NetworkJob(Job):
+    """
+    Creates a Network with its Hubs, APs and RTs. Hubs that fail are counted, and the rest are still created.
+
+    Args:
+        job_id (str): ID of this job.
+        req (NetworkCreateRequest): Network creation request.
+    """
+
+    kind = "network"
+
+    def __init__(self, job_id: str, req: NetworkCreateRequest):
+        super().__init__(job_id)
+        self.req = req
+        progress = self._progress
+        progress.total_hubs = req.hubs
+        progress.total_aps = req.hubs * req.aps_per_hub
+        progress.total_rts = progress.total_aps * req.rts_per_ap
+
+    async def work(self, runner: "JobRunner") -> None:
+        with self.phase("register_network"):
+            net = await simulator.register_network(self.req)
+        self._progress.address = net.address
+        await asyncio.gather(*(self._create_hub(runner, net, hub_req) for hub_req in hub_requests(self.req)))
+
+    async def _create_hub(self, runner: "JobRunner", net: NetworkManager, req: HubCreateRequest) -> None:
+        try:
+            async with runner.hub_slots:
+                hub = await self._start_hub(net)
+                await self._create_aps(runner, hub, ap_requests(req))
+        except Exception as e:
+            self._progress.failed += 1
+            self._error(f"Hub creation on network {net.address.tag} failed: {e}")
+
+
+class HubJob(Job):
+    """
+    Creates a Hub in an existing Network, with its APs and RTs.
+
+    Args:
+        job_id (str): ID of this job.
+        net (NetworkManager): The Network.
+        req (HubCreateRequest): Hub creation request.
+    """
+
+    kind = "hub"
+
+    def __init__(self, job_id: str, net: NetworkManager, req: HubCreateRequest):
+        super().__init__(job_id)
+        self.net = net
+        self.req = req
+        progress = self._progress
+        progress.total_hubs = 1
+        progress.total_aps = req.num_aps
+        progress.total_rts = req.num_aps * req.num_rts_per_ap
+
+    async def work(self, runner: "JobRunner") -> None:
+        async with runner.hub_slots:
+            hub = await self._start_hub(self.net)
+            self._progress.address = hub.address
+            await self._create_aps(runner, hub, ap_requests(self.req))
+
+
+class APJob(Job):
+    """
+    Creates an AP in an existing Hub, with its RTs.
+
+    Args:
+        job_id (str): ID of this job.
+        hub (HubManager): The Hub.
+        req (APCreateRequest): AP creation request.
+    """
+
+    kind = "ap"
+
+    def __init__(self, job_id: str, hub: HubManager, req: APCreateRequest):
+        super().__init__(job_id)
+        self.hub = hub
+        self.req = req
+        self._progress.total_aps = 1
+        self._progress.total_rts = req.num_rts
+
+    async def work(self, runner: "JobRunner") -> None:
+        ap = await self._create_ap(runner, self.hub, self.req)
+        self._progress.address = ap.address
+        ap.start_heartbeats(recursive=True)
+
+
+class JobRunner:
+    """
+    Runs background jobs under controller-wide concurrency limits, and keeps them for progress reporting.
+    """
+
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}  # Job ID -> job, oldest first
+        self._ids = itertools.count()
+        self._job_slots: asyncio.Semaphore | None = None
+        self._hub_slots: asyncio.Semaphore | None = None
+        self._ap_slots: asyncio.Semaphore | None = None
+
+    def open(self) -> None:
+        """
+        Create the concurrency limits for this event loop.
+        """
+        self._job_slots = asyncio.Semaphore(settings.JOB_MAX_CONCURRENT)
+        self._hub_slots = asyncio.Semaphore(settings.JOB_MAX_CONCURRENT_HUBS)
+        self._ap_slots = asyncio.Semaphore(settings.JOB_MAX_CONCURRENT_APS)
+
+    def close(self) -> None:
+        """
+        Cancel every unfinished job.
+        """
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        self._job_slots = self._hub_slots = self._ap_slots = None
+
+    @property
+    def job_slots(self) -> asyncio.Semaphore:
+        """
+        Limit on the number of jobs running at once.
+        """
+        if self._job_slots is None:
+            self.open()
+        return self._job_slots
+
+    @property
+    def hub_slots(self) -> asyncio.Semaphore:
+        """
+        Limit on the number of Hubs being created at once, across all jobs.
+        """
+        if self._hub_slots is None:
+            self.open()
+        return self._hub_slots
+
+    @property
+    def ap_slots(self) -> asyncio.Semaphore:
+        """
+        Limit on the number of APs being created at once, across all jobs.
+        """
+        if self._ap_slots is None:
+            self.open()
+        return self._ap_slots
+
+    def next_id(self) -> str:
+        """
+        Returns:
+            str: A new job ID, unique within this controller.
+        """
+        return str(next(self._ids))
+
+    def start(self, job: Job) -> Job:
+        """
+        Run a job in the background, registering it for progress reporting.
+
+        Args:
+            job (Job): The job.
+
+        Returns:
+            Job: The job, queued or running.
+        """
+        finished = [job_id for job_id, old in self.jobs.items() if old.finished]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS + 1, 0)]:
+            del self.jobs[job_id]
+        self.jobs[job.job_id] = job
+        job.task = asyncio.create_task(self._run(job))
+        logging.info(f"Accepted {type(job).__name__} {job.job_id}")
+        return job
+
+    async def _run(self, job: Job) -> None:
+        with contextlib.suppress(asyncio.CancelledError):
+            await job.run(self)
+
+    def cancel(self, job: Job) -> bool:
+        """
+        Cancel a job. Nodes it has already created are left in place.
+
+        Args:
+            job (Job): The job.
+
+        Returns:
+            bool: True if the job was cancelled, False if it had already finished.
+        """
+        if job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+
+job_runner = JobRunner()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,141 @@
+"""
+listing.py
+
+Paginated, projected and streamed responses for the list routes.
+
+A Hub can hold tens of thousands of RTs, and validating and serialising a whole level of the tree into one response
+would build every entry in memory before the first byte is sent. Instead, a list route returns one page of entries,
+in ascending index order, and writes them out as it goes:
+
+- Pagination: at most `limit` entries after `cursor` are returned. If there are more, the X-Next-Cursor response
+  header holds the cursor for the next page.
+- Projection: `fields` names the fields to include in each entry. Only those are read from the node store.
+- Format: `json` gives one object keyed by index, as the list routes always have; `ndjson` gives one entry per line,
+  with its "index" added, so that clients can process entries as they arrive.
+
+Usage:
+    return list_response(hub.store.aps.indices(query.start), hub.get_ap, APRead, query)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import itertools
+from collections.abc import AsyncIterator, Callable, Iterable
+from typing import Any
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from src.controller.ctrl_api import ListQuery
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+CHUNK_ENTRIES = 256  # Entries serialised per chunk written to the response
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def projected_fields(model: type[BaseModel], query: ListQuery) -> tuple[str, ...]:
+    """
+    Work out which fields of a model a query asks for.
+
+    Args:
+        model (type[BaseModel]): The response model for each entry.
+        query (ListQuery): The query.
+
+    Returns:
+        tuple[str, ...]: The field names, in the model's order.
+
+    Raises:
+        HTTPException: If the query names a field the model does not have.
+    """
+    if not query.fields:
+        return tuple(model.model_fields)
+    requested = {name.strip() for name in query.fields.split(",") if name.strip()}
+    unknown = requested - model.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields {sorted(unknown)}: expected some of {list(model.model_fields)}",
+        )
+    return tuple(name for name in model.model_fields if name in requested)
+
+
+def sorted_after(keys: Iterable[int], query: ListQuery) -> list[int]:
+    """
+    Returns:
+        list[int]: The keys on or after the query's page, in ascending order. For small collections held in dicts.
+    """
+    return sorted(key for key in keys if key >= query.start)
+
+
+def list_response(
+    indices: Iterable[int], get: Callable[[int], Any], model: type[BaseModel], query: ListQuery
+) -> StreamingResponse:
+    """
+    Build the response for one page of a list route.
+
+    Args:
+        indices (Iterable[int]): Indices of the entries from the start of the page (see ListQuery.start) onwards, in
+            ascending order. Only as many as are needed are consumed.
+        get (Callable[[int], Any]): Returns the node at an index. Its attributes are read for each field of `model`.
+        model (type[BaseModel]): The response model for each entry.
+        query (ListQuery): Pagination, projection and format.
+
+    Returns:
+        StreamingResponse: The page, serialised as it is sent.
+
+    Raises:
+        HTTPException: If the query names a field the model does not have.
+    """
+    fields = projected_fields(model, query)
+    include = set(fields)
+    page = list(itertools.islice(indices, query.limit + 1))
+    headers = {}
+    if len(page) > query.limit:
+        page.pop()
+        headers[NEXT_CURSOR_HEADER] = str(page[-1])
+    ndjson = query.format == "ndjson"
+
+    def serialise(index: int) -> str | None:
+        try:
+            node = get(index)
+            values = {name: getattr(node, name) for name in fields}
+        except (KeyError, IndexError, HTTPException):
+            return None  # Removed since the page was listed
+        entry = model.model_construct(**values).model_dump_json(include=include)
+        if ndjson:
+            return f'{{"index":{index}{"," if len(entry) > 2 else ""}{entry[1:]}\n'  # noqa: PLR2004 - "{}"
+        return f'"{index}":{entry}'
+
+    async def body() -> AsyncIterator[str]:
+        first = True
+        if not ndjson:
+            yield "{"
+        for start in range(0, len(page), CHUNK_ENTRIES):
+            entries = [entry for entry in map(serialise, page[start : start + CHUNK_ENTRIES]) if entry is not None]
+            if not entries:
+                continue
+            if ndjson:
+                yield "".join(entries)
+            else:
+                yield ("" if first else ",") + ",".join(entries)
+            first = False
+        if not ndjson:
+            yield "}"
+
+    media_type = "application/x-ndjson" if ndjson else "application/json"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
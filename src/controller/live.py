@@ -0,0 +1,173 @@
+"""
+live.py
+
+Live status streams: a subscriber follows a subtree (everything, a Network, a Hub or an AP) and is sent a snapshot of
+it, then batches of deltas every LIVE_STATUS_INTERVAL seconds.
+
+Deltas are fed by the managers as registration states change and nodes are added and removed, and by the hub workers'
+periodic status reports (HubStatusInd), which carry heartbeat counters for the hub and its APs. Updates pending for a
+subscriber are kept one per node: a later update for a node is merged into the one already waiting. A subscriber
+that is slow to read therefore never holds more than one entry per node in its subtree, however far behind it falls,
+and the number merged is reported in each delta.
+
+Subscribers are indexed by the address of their subtree, so publishing an update costs at most four dict lookups
+whatever the number of subscribers, and nothing at all when there are none.
+
+Usage:
+    with live_status.subscription(node, rts=False) as sub:
+        async for message in sub.messages():
+            ...
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from src.config import settings
+from src.controller.ctrl_api import StatusMessage, StatusUpdate
+from src.worker.worker_api import Address
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def subtree_key(address: Address) -> tuple[int, ...]:
+    """
+    Returns:
+        tuple[int, ...]: The indices of the Network, Hub and AP of an address, as far as they are set.
+    """
+    key = []
+    for index in (address.net, address.hub, address.ap):
+        if index is None:
+            break
+        key.append(index)
+    return tuple(key)
+
+
+class Subscription:
+    """
+    One subscriber's view of a subtree: its snapshot, and the updates waiting to be sent.
+
+    Args:
+        node (Any): Root of the subtree, with a `status_updates` method.
+        rts (bool): Whether to include RTs.
+    """
+
+    def __init__(self, node: Any, rts: bool):
+        self.address: Address = node.address
+        self.rts = rts
+        self.snapshot = StatusMessage(kind="snapshot", seq=0, updates=list(node.status_updates(rts)))
+        self._pending: dict[Address, dict[str, Any]] = {}
+        self._coalesced = 0
+        self._seq = 0
+
+    def offer(self, address: Address, fields: dict[str, Any]) -> None:
+        """
+        Queue an update, merging it into any already waiting for the same node.
+
+        Args:
+            address (Address): Address of the node.
+            fields (dict[str, Any]): The fields of StatusUpdate that changed.
+        """
+        if address.rt is not None and not self.rts:
+            return
+        pending = self._pending.get(address)
+        if pending is None:
+            self._pending[address] = fields.copy()
+        else:
+            pending.update(fields)
+            self._coalesced += 1
+
+    def take(self) -> StatusMessage | None:
+        """
+        Returns:
+            StatusMessage | None: A delta with the updates waiting, or None if there are none.
+        """
+        if not self._pending:
+            return None
+        pending, self._pending = self._pending, {}
+        self._seq += 1
+        updates = [StatusUpdate(address=address, **fields) for address, fields in pending.items()]
+        message = StatusMessage(kind="delta", seq=self._seq, coalesced=self._coalesced, updates=updates)
+        self._coalesced = 0
+        return message
+
+    async def messages(self) -> AsyncIterator[StatusMessage]:
+        """
+        Yields:
+            StatusMessage: The snapshot, then a delta every LIVE_STATUS_INTERVAL seconds in which anything changed.
+        """
+        yield self.snapshot
+        while True:
+            await asyncio.sleep(settings.LIVE_STATUS_INTERVAL)
+            message = self.take()
+            if message is not None:
+                yield message
+
+
+class LiveStatus:
+    """
+    The controller's live status subscribers.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[tuple[int, ...], set[Subscription]] = {}  # Subtree key -> its subscribers
+
+    @property
+    def active(self) -> bool:
+        """
+        True if anyone is subscribed, so that publishers can skip building updates nobody will see.
+        """
+        return bool(self._subscribers)
+
+    @contextlib.contextmanager
+    def subscription(self, node: Any, rts: bool = False) -> Iterator[Subscription]:
+        """
+        Subscribe to a subtree for the duration of the context.
+
+        The snapshot is taken as the subscriber is registered, so that the deltas take up exactly where it leaves off.
+
+        Args:
+            node (Any): Root of the subtree, with an `address` and a `status_updates` method.
+            rts (bool): Whether to include RTs.
+
+        Yields:
+            Subscription: The subscription.
+        """
+        sub = Subscription(node, rts)
+        key = subtree_key(sub.address)
+        self._subscribers.setdefault(key, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            subscribers = self._subscribers[key]
+            subscribers.discard(sub)
+            if not subscribers:
+                del self._subscribers[key]
+
+    def publish(self, address: Address, **fields: Any) -> None:
+        """
+        Pass an update to every subscriber whose subtree contains the node.
+
+        Args:
+            address (Address): Address of the node.
+            **fields: The fields of StatusUpdate that changed.
+        """
+        if not self._subscribers:
+            return
+        key = subtree_key(address)
+        for depth in range(len(key) + 1):
+            for sub in self._subscribers.get(key[:depth], ()):
+                sub.offer(address, fields)
+
+
+live_status = LiveStatus()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
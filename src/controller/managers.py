@@ -1,5 +1,18 @@
 """
 Controller node and manager classes for the NMS network simulator.
+
+Networks and hubs are pydantic managers. Every one is entered in the flat `node_index` (keyed by address tag) when it
+is added to its parent, and removed along with its whole subtree when its parent drops it. APs and RTs are far more
+numerous, so they are stored as rows in their hub's columnar HubStore (see src.controller.node_store) and APManager and
+RTManager are lightweight views over those rows. Worker messages are resolved to their hub via `node_index` and then
+to an AP/RT row by index.
+
+Registration progress is tracked with one CompletionTracker per AP (for its RTs), chained to one per hub. A bulk create
+awaits a single future per AP rather than holding an event and a suspended coroutine for every RT.
+
+Every change to the topology or to a registration state goes through a manager method that also records it in the
+event log (see src.controller.event_log), so that a restarted controller can rebuild the tree by calling the same
+methods (see src.controller.recovery).
 """
 
 #######################################################################################################################
@@ -7,8 +20,11 @@ Controller node and manager classes for the NMS network simulator.
 #######################################################################################################################
 import asyncio
 import contextlib
+import itertools
 import logging
 import subprocess
+import time
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 import httpx
@@ -17,24 +33,153 @@ from pydantic import BaseModel, Field, PrivateAttr
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 
 from src.config import settings
+from src.controller.agents import RemoteWorker, agents
 from src.controller.comms import worker_ctrl
 from src.controller.ctrl_api import (
     APCreateRequest,
     APState,
     HubCreateRequest,
     HubState,
+    NetworkCreateRequest,
     NetworkState,
     RTCreateRequest,
     RTState,
+    StatusUpdate,
+    TeardownResult,
+)
+from src.controller.event_log import event_log
+from src.controller.live import live_status
+from src.controller.nbapi import nbapi
+from src.controller.node_db import node_db
+from src.controller.node_store import (
+    AP_STATE_CODES,
+    MAX_INDEX,
+    RT_STATE_CODES,
+    HubStore,
+    IndexAllocator,
+    NodeColumns,
+    next_version,
 )
-from src.nms_api import NmsAuthInfo, NmsHubCreateRequest
-from src.worker.worker_api import Address, APRegisterReq, APRegisterRsp, HubConnectInd, RTRegisterReq, StartHeartbeatReq
+from src.controller.zygote import ForkedWorker, zygote
+from src.nms_api import NmsHubCreateRequest
+from src.worker.worker_api import (
+    Address,
+    AlarmStats,
+    APCredentials,
+    APRegisterReq,
+    APRegisterRsp,
+    APSync,
+    HeartbeatStats,
+    HubConnectInd,
+    HubHelloReq,
+    HubResyncRsp,
+    HubStatusInd,
+    NodeHeartbeats,
+    NodeSet,
+    RTRegisterReq,
+    RTRegisterRsp,
+    StartHeartbeatReq,
+    SubtreeDeleteReq,
+    SubtreeDeleteRsp,
+    TeardownStats,
+    node_digest,
+)
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+node_index: dict[str, "ParentNode"] = {}  # Address tag -> manager, for every network and hub
+teardown_ids = itertools.count()  # Identifies each SubtreeDeleteReq, to match it with its response
 
 #######################################################################################################################
 # Body
 #######################################################################################################################
 
 
+class CompletionTracker:
+    """
+    Counts expected and received responses, resolving a single future once every expected response has arrived.
+
+    Trackers can be chained: anything expected or recorded on a tracker is also expected or recorded on its parent, so
+    e.g. a hub's tracker aggregates the counts of all its APs.
+
+    Args:
+        parent (CompletionTracker | None): Tracker to propagate counts to.
+    """
+
+    def __init__(self, parent: "CompletionTracker | None" = None):
+        self.parent = parent
+        self.expected = self.succeeded = self.failed = 0
+        self._future: asyncio.Future | None = None
+
+    @property
+    def outstanding(self) -> int:
+        """
+        Number of expected responses that have not yet arrived.
+        """
+        return self.expected - self.succeeded - self.failed
+
+    def expect(self, count: int = 1) -> None:
+        """
+        Increase the number of expected responses.
+
+        Args:
+            count (int): Number of additional responses to expect.
+        """
+        self.expected += count
+        if self.parent:
+            self.parent.expect(count)
+
+    def record(self, success: bool) -> None:
+        """
+        Record the arrival of a response, resolving the future if it was the last one outstanding.
+
+        Args:
+            success (bool): Whether the response reported success.
+        """
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self._resolve()
+        if self.parent:
+            self.parent.record(success)
+
+    def drop(self, count: int | None = None) -> None:
+        """
+        Stop expecting responses that will never arrive, e.g. for nodes that have been removed or whose worker has
+        gone, resolving the future if none are left outstanding.
+
+        Args:
+            count (int | None): Number of responses to stop expecting, or None for all those outstanding.
+        """
+        count = self.outstanding if count is None else min(count, self.outstanding)
+        if count <= 0:
+            return
+        self.expected -= count
+        self._resolve()
+        if self.parent:
+            self.parent.drop(count)
+
+    def _resolve(self) -> None:
+        """
+        Resolve the future if every expected response has arrived.
+        """
+        if self.outstanding <= 0 and self._future is not None and not self._future.done():
+            self._future.set_result(None)
+
+    async def wait(self) -> None:
+        """
+        Wait until every expected response has arrived. All waiters share the same future.
+        """
+        if self.outstanding <= 0:
+            return
+        if self._future is None or self._future.done():
+            self._future = asyncio.get_running_loop().create_future()
+        await asyncio.shield(self._future)
+
+
 class ParentNode(BaseModel):
     """
     Mixin class for parent nodes that manage child nodes.
@@ -44,13 +189,29 @@ class ParentNode(BaseModel):
     address: Address = Field(description="The address of this node - sort of a fully qualified name")
     auid_prefix: str = Field(default="", description="Prefix for child AP AUIDs")
 
+    _alloc: IndexAllocator = PrivateAttr(default_factory=IndexAllocator)
+    _version: int = PrivateAttr(default_factory=next_version)
+
     @property
     def auid(self):
         return f"{self.auid_prefix}{self.address.tag}"
 
+    @property
+    def version(self) -> int:
+        """
+        Version of this node and all its descendants, bumped on any change to any of them.
+        """
+        return max(self._version, max((child.version for child in self.children.values()), default=0))
+
+    def touch(self) -> None:
+        """
+        Bump this node's version after a change to it.
+        """
+        self._version = next_version()
+
     def get_index(self, requested: int = -1) -> int:
         """
-        Returns the lowest non-negative integer not in used_indices, or the requested index if available.
+        Returns the lowest free child index, or the requested index if available.
 
         Args:
             requested (int): Requested index, or -1 for auto-assignment.
@@ -62,11 +223,7 @@ class ParentNode(BaseModel):
             HTTPException: If requested index is already in use.
         """
         if requested < 0:
-            used_indices = set(self.children.keys())
-            idx = 0
-            while idx in used_indices:
-                idx += 1
-            return idx
+            return self._alloc.lowest_free()
         elif requested in self.children:
             raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Index {requested} already in use")
         else:
@@ -90,9 +247,23 @@ class ParentNode(BaseModel):
         except KeyError as err:
             raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"index {index} not found") from err
 
+    def add_child(self, index: int, child: "ParentNode") -> None:
+        """
+        Add a child node at the given index and enter it in the node index.
+
+        Args:
+            index (int): Child index.
+            child (ParentNode): The child node.
+        """
+        self._alloc.reserve(index)
+        self.children[index] = child
+        node_index[child.address.tag] = child
+        self.touch()
+        live_status.publish(child.address, state=child.state, removed=False)
+
     def remove_child(self, index: int) -> None:
         """
-        Stop and remove a child node by index.
+        Stop and remove a child node by index, dropping it and all its descendants from the node index.
 
         Args:
             index (int): Child index.
@@ -102,114 +273,327 @@ class ParentNode(BaseModel):
         """
         try:
             logging.info(f"{self.__class__.__name__}:{self.address}: Removing child {index}")
-            del self.children[index]
+            child = self.children.pop(index)
         except KeyError as err:
             raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Child not found") from err
+        self._alloc.release(index)
+        child.unindex()
+        self.touch()
+        live_status.publish(child.address, removed=True)
+        event_log.record("remove", child.address)
+
+    def clear_children(self) -> None:
+        """
+        Drop all child nodes, and their descendants, without stopping them.
+        """
+        for child in self.children.values():
+            child.unindex()
+        self.children.clear()
+        self._alloc = IndexAllocator()
+        self.touch()
+
+    def unindex(self) -> None:
+        """
+        Remove this node and all its descendants from the node index.
+        """
+        node_index.pop(self.address.tag, None)
+        for child in self.children.values():
+            child.unindex()
+
+    def status_updates(self, rts: bool = False) -> Iterator[StatusUpdate]:
+        """
+        Status of this node's descendants, for a live status snapshot (see src.controller.live).
+
+        Args:
+            rts (bool): Whether to include RTs.
+
+        Yields:
+            StatusUpdate: One per node.
+        """
+        for child in self.children.values():
+            yield from child.status_updates(rts)
 
 
-class RTManager(ParentNode):
+def hub_requests(req: NetworkCreateRequest) -> Iterator[HubCreateRequest]:
     """
-    Manager for RT nodes.
+    Generate the creation request for each Hub of a Network.
 
     Args:
-        state (src.controller.ctrl_api.RTState): Registration state.
-        heartbeat_seconds (int): Heartbeat interval.
+        req (NetworkCreateRequest): Network creation request.
+
+    Yields:
+        HubCreateRequest: One request per Hub.
     """
+    for _ in range(req.hubs):
+        yield HubCreateRequest(
+            num_aps=req.aps_per_hub,
+            num_rts_per_ap=req.rts_per_ap,
+            ap_heartbeat_seconds=req.ap_heartbeat_seconds,
+            rt_heartbeat_seconds=req.rt_heartbeat_seconds,
+        )
 
-    ap_auid: str = Field(description="The auid of the parent AP")
 
-    state: RTState = RTState.UNREGISTERED
-    heartbeat_seconds: int = settings.DEFAULT_HEARTBEAT_SECONDS
-    azimuth_deg: int = Field(default=0, ge=0, le=360)
+def ap_requests(req: HubCreateRequest) -> Iterator[APCreateRequest]:
+    """
+    Generate the creation request for each AP of a Hub, with the APs' azimuths spread evenly around the Hub.
 
-    _registered_event: asyncio.Event = PrivateAttr()
+    Args:
+        req (HubCreateRequest): Hub creation request.
 
-    def model_post_init(self, __context):
-        self._registered_event = asyncio.Event()
+    Yields:
+        APCreateRequest: One request per AP.
+    """
+    for i in range(req.num_aps):
+        yield APCreateRequest(
+            num_rts=req.num_rts_per_ap,
+            heartbeat_seconds=req.ap_heartbeat_seconds,
+            rt_heartbeat_seconds=req.rt_heartbeat_seconds,
+            azimuth_deg=round(i * (360.0 / req.num_aps)),
+        )
 
-    async def register(self):
-        """
-        Wait until the AP is registered or registration failed.
 
-        Returns:
-            asyncio.Event: Event that is set when registration completes.
-        """
-        register_req = RTRegisterReq(
-            address=self.address,
-            heartbeat_seconds=self.heartbeat_seconds,
-            ap_auid=self.ap_auid,
-            auid=self.auid,
-        )
-        worker_ctrl.send(register_req)
+def allocate_index(columns: NodeColumns, requested: int = -1) -> int:
+    """
+    Returns the lowest free index in a columnar table, or the requested index if available.
 
-        await self._registered_event.wait()
+    Args:
+        columns (NodeColumns): The table to allocate from.
+        requested (int): Requested index, or -1 for auto-assignment.
 
-    def on_rt_register_rsp(self, msg: APRegisterRsp):
-        """
-        Handle APRegisterRsp message from worker.
+    Returns:
+        int: Assigned index.
 
-        Args:
-            msg (APRegisterRsp): The AP registration response message.
-        """
-        self.state = RTState.REGISTERED if msg.success else RTState.REGISTRATION_FAILED
-        if msg.success:
-            logging.debug(f"RT {self.address.tag} registered successfully.")
-        else:
-            logging.error(f"RT {self.address.tag} registration failed.")
+    Raises:
+        HTTPException: If the requested index is already in use, or no index is available.
+    """
+    if requested < 0:
+        requested = columns.alloc.lowest_free()
+    elif requested in columns:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Index {requested} already in use")
+    if requested > MAX_INDEX:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Index {requested} exceeds {MAX_INDEX}")
+    return requested
+
+
+def allocate_range(columns: NodeColumns, count: int) -> int:
+    """
+    Returns the start of the lowest run of `count` free indices in a columnar table.
+
+    Args:
+        columns (NodeColumns): The table to allocate from.
+        count (int): Number of consecutive indices required.
+
+    Returns:
+        int: First index of the run.
+
+    Raises:
+        HTTPException: If the run would exceed the maximum index.
+    """
+    start = columns.alloc.find_range(count)
+    if start + count - 1 > MAX_INDEX:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Index {start + count - 1} exceeds {MAX_INDEX}")
+    return start
+
+
+class RTManager:
+    """
+    View of one RT in its hub's columnar store.
+
+    RTManagers hold no state of their own: they are created on demand (e.g. for REST responses) and read through to
+    the hub's HubStore, so they stay valid only as long as the RT exists.
+
+    Args:
+        hub (HubManager): The hub the RT belongs to.
+        ap (int): Index of the parent AP.
+        index (int): RT index.
+    """
+
+    __slots__ = ("ap", "hub", "index")
+
+    def __init__(self, hub: "HubManager", ap: int, index: int):
+        self.hub = hub
+        self.ap = ap
+        self.index = index
 
-        self._registered_event.set()
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, RTManager) and (other.hub, other.ap, other.index) == (self.hub, self.ap, self.index)
+
+    def __hash__(self) -> int:
+        return hash((id(self.hub), self.ap, self.index))
+
+    @property
+    def address(self) -> Address:
+        return Address(net=self.hub.address.net, hub=self.hub.address.hub, ap=self.ap, rt=self.index)
+
+    @property
+    def state(self) -> RTState:
+        return self.hub.store.rt_state(self.ap, self.index)
+
+    @property
+    def heartbeat_seconds(self) -> int:
+        return self.hub.store.rts[self.ap].heartbeat[self.index]
+
+    @property
+    def azimuth_deg(self) -> int:
+        return self.hub.store.rts[self.ap].azimuth[self.index]
+
+    @property
+    def ap_auid(self) -> str:
+        return f"{self.hub.auid_prefix}{Address(net=self.hub.address.net, hub=self.hub.address.hub, ap=self.ap).tag}"
+
+    @property
+    def auid(self) -> str:
+        return f"{self.hub.auid_prefix}{self.address.tag}"
+
+    @property
+    def version(self) -> int:
+        """
+        Version of this RT: that of its AP.
+        """
+        return self.hub.store.ap_versions[self.ap]
 
     def start_heartbeats(self):
         """
-        Start heartbeat tasks for all APs and RTs in the hub
+        Start the heartbeat task for this RT.
         """
         msg = StartHeartbeatReq(address=self.address)
         worker_ctrl.send(msg)
 
 
-class APManager(ParentNode):
+class APManager:
     """
-    Manager for AP nodes.
+    View of one AP in its hub's columnar store.
+
+    Like RTManager, this holds no state of its own beyond its position in the tree.
 
     Args:
-        state (src.controller.ctrl_api.APState): Registration state.
-        heartbeat_seconds (int): Heartbeat interval.
-        hub_auid (str): AUID of parent Hub.
+        hub (HubManager): The hub the AP belongs to.
+        index (int): AP index.
     """
 
-    children: dict[int, RTManager] = Field(default_factory=dict)
-    state: APState = APState.UNREGISTERED
-    heartbeat_seconds: int = settings.DEFAULT_HEARTBEAT_SECONDS
-    hub_auid: str = Field(description="The auid of the parent AP")
+    __slots__ = ("hub", "index")
+
+    def __init__(self, hub: "HubManager", index: int):
+        self.hub = hub
+        self.index = index
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, APManager) and (other.hub, other.index) == (self.hub, self.index)
+
+    def __hash__(self) -> int:
+        return hash((id(self.hub), self.index))
+
+    @property
+    def address(self) -> Address:
+        return Address(net=self.hub.address.net, hub=self.hub.address.hub, ap=self.index)
+
+    @property
+    def state(self) -> APState:
+        return self.hub.store.ap_state(self.index)
+
+    @property
+    def heartbeat_seconds(self) -> int:
+        return self.hub.store.aps.heartbeat[self.index]
+
+    @property
+    def azimuth_deg(self) -> int:
+        return self.hub.store.aps.azimuth[self.index]
+
+    @property
+    def hub_auid(self) -> str:
+        return self.hub.auid
+
+    @property
+    def auid(self) -> str:
+        return f"{self.hub.auid_prefix}{self.address.tag}"
 
-    _registered_event: asyncio.Event = PrivateAttr()
+    @property
+    def version(self) -> int:
+        """
+        Version of this AP and its RTs, bumped on any change to any of them.
+        """
+        return self.hub.store.ap_versions[self.index]
 
-    def model_post_init(self, __context):
-        self._registered_event = asyncio.Event()
+    @property
+    def tracker(self) -> CompletionTracker:
+        """
+        Registration tracker for this AP's RTs.
+        """
+        return self.hub.ap_trackers[self.index]
+
+    def get_index(self, requested: int = -1) -> int:
+        """
+        Allocate an RT index on this AP. See allocate_index.
+        """
+        return allocate_index(self.hub.store.rts[self.index], requested)
 
     async def add_rt(self, req: RTCreateRequest, rt_idx: int = -1) -> RTManager:
         """
-        Create & start an AP (optionally with initial RTs).
+        Create an RT and wait for it to register.
 
         Args:
-            req (APCreateRequest): AP creation request.
-            ap_idx (int): AP index, or -1 for auto-assignment.
+            req (RTCreateRequest): RT creation request.
+            rt_idx (int): RT index, or -1 for auto-assignment.
 
         Returns:
-            APManager: The created AP object.
+            RTManager: The created RT.
 
         Raises:
             HTTPException: If the specified index already exists.
         """
-        rt_idx = self.get_index(rt_idx)
+        (rt,) = await self.add_rts(req, [rt_idx])
+        return rt
+
+    async def add_rts(self, req: RTCreateRequest, indices: list[int]) -> list[RTManager]:
+        """
+        Create a batch of RTs, send all their registration requests, and wait once for every response.
+
+        Args:
+            req (RTCreateRequest): RT creation request, applied to every RT.
+            indices (list[int]): RT indices, or -1 for auto-assignment.
+
+        Returns:
+            list[RTManager]: The created RTs.
+
+        Raises:
+            HTTPException: If a specified index already exists, or the AP was removed before the RTs were set up.
+        """
+        store = self.hub.store
+        if indices and all(requested < 0 for requested in indices):  # Bulk create: one contiguous range
+            start = allocate_range(store.rts[self.index], len(indices))
+            self.create_rts(start, req.heartbeat_seconds, count=len(indices))
+            rt_indices = list(range(start, start + len(indices)))
+        else:
+            rt_indices = []
+            for requested in indices:
+                rt_idx = self.get_index(requested)
+                self.create_rts(rt_idx, req.heartbeat_seconds)
+                rt_indices.append(rt_idx)
+
+        self.register_rts(rt_indices)
+        await self.tracker.wait()
+        if self.index not in store.aps:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"AP {self.address.tag} was removed")
+        logging.info(f"Created {len(rt_indices)} RTs on AP {self.address.tag}")
+        return [RTManager(self.hub, self.index, rt_idx) for rt_idx in rt_indices]
+
+    def create_rts(self, rt_idx: int, heartbeat: int, count: int = 1) -> None:
+        """
+        Add unregistered RTs to the hub's store, without registering them.
 
-        rt_address = Address(net=self.address.net, hub=self.address.hub, ap=self.address.ap, rt=rt_idx)
-        self.children[rt_idx] = rt = RTManager(
-            address=rt_address, heartbeat_seconds=req.heartbeat_seconds, ap_auid=self.auid, auid_prefix=self.auid_prefix
+        Args:
+            rt_idx (int): RT index (the first, if count > 1).
+            heartbeat (int): Heartbeat interval in seconds.
+            count (int): Number of RTs, at consecutive indices.
+        """
+        self.hub.store.add_rt(self.index, rt_idx, heartbeat, count=count)
+        net, hub = self.hub.address.net, self.hub.address.hub
+        if live_status.active:
+            for index in range(rt_idx, rt_idx + count):
+                live_status.publish(Address(net=net, hub=hub, ap=self.index, rt=index), state=RTState.UNREGISTERED)
+        event_log.record(
+            "add_rts", Address(net=net, hub=hub, ap=self.index, rt=rt_idx), count=count, heartbeat=heartbeat
         )
-        await rt.register()
-        logging.info(f"Created RT {rt.address}")
-        return rt
 
     def get_rt(self, index: int) -> RTManager:
         """
@@ -220,59 +604,181 @@ class APManager(ParentNode):
 
         Returns:
             RTManager: The RTManager instance.
+
+        Raises:
+            HTTPException: If there is no such RT.
         """
-        return self.get_child_or_404(index)
+        if index not in self.hub.store.rts[self.index]:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"index {index} not found")
+        return RTManager(self.hub, self.index, index)
 
-    def on_ap_register_rsp(self, msg: APRegisterRsp):
+    def get_rts(self) -> dict[int, RTManager]:
         """
-        Handle APRegisterRsp message from worker.
+        Get all RTs on this AP.
+
+        Returns:
+            dict[int, RTManager]: RTManagers keyed by RT index.
+        """
+        return {rt: RTManager(self.hub, self.index, rt) for rt in self.hub.store.rts[self.index].indices()}
+
+    def status_updates(self, rts: bool = False) -> Iterator[StatusUpdate]:
+        """
+        Status of this AP and, optionally, its RTs, for a live status snapshot (see src.controller.live).
 
         Args:
-            msg (APRegisterRsp): The AP registration response message.
+            rts (bool): Whether to include RTs.
+
+        Yields:
+            StatusUpdate: One per node.
         """
-        self.state = APState.REGISTERED if msg.success else APState.REGISTRATION_FAILED
-        if msg.success:
-            logging.debug(f"AP {self.address.tag} registered successfully.")
-        else:
-            logging.error(f"AP {self.address.tag} registration failed.")
+        counters = self.hub.ap_heartbeats.get(self.index)
+        yield StatusUpdate(
+            address=self.address,
+            state=self.state,
+            heartbeats=counters and counters.local,
+            child_heartbeats=counters and counters.children,
+        )
+        if rts:
+            for rt in self.get_rts().values():
+                yield StatusUpdate(address=rt.address, state=rt.state)
 
-    async def register(self):
+    def register_rts(self, indices: Iterable[int], restore: bool = False) -> None:
         """
-        Wait until the AP is registered or registration failed.
+        Send the registration requests for RTs of this AP that are already in the hub's store. The responses are
+        counted on this AP's tracker.
 
-        Returns:
-            asyncio.Event: Event that is set when registration completes.
+        Args:
+            indices (Iterable[int]): RT indices.
+            restore (bool): The RTs are already registered with the NMS, so the worker only needs to set them up.
+        """
+        tracker = self.tracker
+        ap_auid = self.auid
+        heartbeat = self.hub.store.rts[self.index].heartbeat
+        net, hub = self.hub.address.net, self.hub.address.hub
+        for rt_idx in indices:
+            rt_address = Address(net=net, hub=hub, ap=self.index, rt=rt_idx)
+            register_req = RTRegisterReq(
+                address=rt_address,
+                heartbeat_seconds=heartbeat[rt_idx],
+                ap_auid=ap_auid,
+                auid=f"{self.hub.auid_prefix}{rt_address.tag}",
+                restore=restore,
+            )
+            tracker.expect()
+            worker_ctrl.send(register_req)
+
+    def register(self, restore: APCredentials | None = None) -> None:
+        """
+        Send the registration request for this AP. The response is counted on the hub's tracker.
+
+        Args:
+            restore (APCredentials | None): Credentials of an AP already registered with the NMS. The worker sets it up
+                from them rather than registering it again.
         """
+        self.hub.tracker.expect()
         ap_req = APRegisterReq(
             address=self.address,
             heartbeat_seconds=self.heartbeat_seconds,
             hub_auid=self.hub_auid,
             auid=self.auid,
+            azimuth_deg=self.azimuth_deg,
+            restore=restore,
         )
         worker_ctrl.send(ap_req)
 
     def start_heartbeats(self, recursive: bool = False):
         """
-        Start heartbeat tasks for all APs and RTs in the hub
+        Start the heartbeat task for this AP, and optionally for all its RTs.
         """
         msg = StartHeartbeatReq(address=self.address)
         worker_ctrl.send(msg)
         if recursive:
-            for rt in self.children.values():
+            for rt in self.get_rts().values():
                 rt.start_heartbeats()
 
 
 class HubManager(ParentNode):
     """
     Manager for Hub nodes.
+
+    The hub's APs and RTs are not held as child managers but as rows in its HubStore; `get_ap`/`get_aps` return views
+    onto them. Registration responses for them are therefore handled here.
     """
 
     state: HubState = HubState.UNREGISTERED
-    children: dict[int, APManager] = Field(default_factory=dict)
     auid_prefix: str = Field(default="", description="Prefix for child AP AUIDs")
 
-    _worker: subprocess.Popen | None = PrivateAttr(default=None)
+    _worker: subprocess.Popen | ForkedWorker | RemoteWorker | None = PrivateAttr(default=None)
     _connected_event: asyncio.Event = PrivateAttr(default_factory=asyncio.Event)
+    _tracker: CompletionTracker = PrivateAttr(default_factory=CompletionTracker)
+    _store: HubStore = PrivateAttr()
+    _ap_trackers: dict[int, CompletionTracker] = PrivateAttr(default_factory=dict)
+    _heartbeats: HeartbeatStats | None = PrivateAttr(default=None)
+    _ap_heartbeats: dict[int, NodeHeartbeats] = PrivateAttr(default_factory=dict)
+    _alarm_stats: AlarmStats | None = PrivateAttr(default=None)
+    _teardowns: dict[int, asyncio.Future] = PrivateAttr(default_factory=dict)  # Request -> future for its stats
+    _last_report: float = PrivateAttr(default=0.0)  # Monotonic time the worker last connected or reported
+
+    def model_post_init(self, context):
+        rt_table = (
+            node_db.rt_tables(self.address, self.auid_prefix) if settings.NODE_STORE_BACKEND == "sqlite" else None
+        )
+        self._store = HubStore(self.auid_prefix, rt_table)
+
+    @property
+    def store(self) -> HubStore:
+        """
+        Columnar state of every AP and RT in this hub.
+        """
+        return self._store
+
+    @property
+    def version(self) -> int:
+        """
+        Version of this hub and all its APs and RTs, bumped on any change to any of them.
+        """
+        return max(self._version, self._store.version)
+
+    @property
+    def ap_heartbeats(self) -> dict[int, NodeHeartbeats]:
+        """
+        Heartbeat counters of the hub's APs from the worker's last status report, by AP index.
+        """
+        return self._ap_heartbeats
+
+    @property
+    def alarm_stats(self) -> AlarmStats | None:
+        """
+        Counters of the worker's alarm engine from its last status report that changed them, if any.
+        """
+        return self._alarm_stats
+
+    @property
+    def last_report(self) -> float:
+        """
+        Monotonic time the worker last connected or sent a status report.
+        """
+        return self._last_report
+
+    @property
+    def tracker(self) -> CompletionTracker:
+        """
+        Registration tracker aggregating every AP and RT registration in this hub.
+        """
+        return self._tracker
+
+    @property
+    def ap_trackers(self) -> dict[int, CompletionTracker]:
+        """
+        Per-AP registration trackers for their RTs, keyed by AP index.
+        """
+        return self._ap_trackers
+
+    def get_index(self, requested: int = -1) -> int:
+        """
+        Allocate an AP index in this hub. See allocate_index.
+        """
+        return allocate_index(self._store.aps, requested)
 
     async def add_ap(self, req: APCreateRequest, ap_idx: int = -1) -> APManager:
         """
@@ -283,38 +789,134 @@ class HubManager(ParentNode):
             ap_idx (int): AP index, or -1 for auto-assignment.
 
         Returns:
-            APManager: The created AP object.
+            APManager: The created AP.
 
         Raises:
             HTTPException: If the specified index already exists.
         """
         ap_idx = self.get_index(ap_idx)
-        ap_address = Address(net=self.address.net, hub=self.address.hub, ap=ap_idx)
-        new_ap = APManager(
-            address=ap_address,
-            heartbeat_seconds=req.heartbeat_seconds,
-            hub_auid=self.auid,
-            auid_prefix=self.auid_prefix,
-        )
-        self.children[ap_idx] = new_ap
-        await new_ap.register()
+        new_ap = self.create_ap(ap_idx, req.heartbeat_seconds, req.azimuth_deg)
+        new_ap.register()
 
         req_params = RTCreateRequest(heartbeat_seconds=req.rt_heartbeat_seconds)
-        # Batch the add_rt calls using asyncio.gather for concurrency
-        rt_add_tasks = [new_ap.add_rt(req_params, i) for i in range(req.num_rts)]
-        await asyncio.gather(*rt_add_tasks)
+        await new_ap.add_rts(req_params, list(range(req.num_rts)))
         logging.info(f"Created AP {ap_idx} with {req.num_rts} RTs")
         return new_ap
 
-    async def remove_ap(self, id: int) -> None:
+    def create_ap(self, ap_idx: int, heartbeat: int, azimuth: int = 0) -> APManager:
         """
-        Stop and remove an AP and all underlying RTs.
+        Add an unregistered AP with no RTs to the hub's store, without registering it.
+
+        Args:
+            ap_idx (int): AP index.
+            heartbeat (int): Heartbeat interval in seconds.
+            azimuth (int): Azimuth in degrees.
+
+        Returns:
+            APManager: The new AP.
+        """
+        self._store.add_ap(ap_idx, heartbeat, azimuth)
+        self._ap_trackers[ap_idx] = CompletionTracker(self._tracker)
+        new_ap = APManager(self, ap_idx)
+        live_status.publish(new_ap.address, state=APState.UNREGISTERED, removed=False)
+        event_log.record("add_ap", new_ap.address, heartbeat=heartbeat, azimuth=azimuth)
+        return new_ap
+
+    async def remove_ap(self, id: int, deregister: bool = True) -> TeardownResult:
+        """
+        Stop and remove an AP and all underlying RTs: the worker stops them and, unless told not to, removes them from
+        the NMS (see teardown).
 
         Args:
             id (int): AP index.
+            deregister (bool): Whether to remove the AP and its RTs from the NMS.
+
+        Returns:
+            TeardownResult: What was torn down.
+
+        Raises:
+            HTTPException: If there is no such AP.
         """
         logging.info(f"Removing AP {id}")
-        self.remove_child(id)
+        if id not in self._store.aps:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Child not found")
+        result = TeardownResult(message=f"AP {id} deleted")
+        await self.teardown(result, [id], deregister)
+        try:
+            unregistered = self._store.ap_state(id) == APState.UNREGISTERED
+            self._store.remove_ap(id)
+        except KeyError as err:  # Removed by another request while the worker tore it down
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Child not found") from err
+        tracker = self._ap_trackers.pop(id, None)
+        if tracker is not None:
+            tracker.drop()  # Responses for the AP's RTs are no longer counted
+        if unregistered:
+            self._tracker.drop(1)  # Nor is the response to the AP's own registration
+        self._ap_heartbeats.pop(id, None)
+        address = Address(net=self.address.net, hub=self.address.hub, ap=id)
+        live_status.publish(address, removed=True)
+        event_log.record("remove", address)
+        return result
+
+    async def teardown(self, result: TeardownResult, aps: list[int] | None = None, deregister: bool = True) -> None:
+        """
+        Have the hub's worker tear down some or all of its APs and their RTs, and add what it reports to a result. The
+        worker is sent one command for the whole subtree (see Hub.on_subtree_delete_req); if it has not reported back
+        within TEARDOWN_TIMEOUT the hub is listed in the result as incomplete. Does nothing if the hub has no worker.
+
+        Args:
+            result (TeardownResult): The result to add to.
+            aps (list[int] | None): AP indices, in ascending order, or None for every AP.
+            deregister (bool): Whether the worker should remove the nodes from the NMS.
+        """
+        if self._worker is None:
+            return
+        request = next(teardown_ids)
+        self._teardowns[request] = future = asyncio.get_running_loop().create_future()
+        worker_ctrl.send(
+            SubtreeDeleteReq(
+                address=self.address,
+                request=request,
+                aps=None if aps is None else NodeSet.of(aps),
+                deregister=deregister,
+            )
+        )
+        try:
+            stats = await asyncio.wait_for(future, settings.TEARDOWN_TIMEOUT)
+        except TimeoutError:
+            logging.warning(
+                f"Hub {self.address.tag}: worker did not finish its teardown in {settings.TEARDOWN_TIMEOUT}s"
+            )
+            result.incomplete.append(self.address.tag)
+            return
+        finally:
+            self._teardowns.pop(request, None)
+        result.stats = TeardownStats.combine((result.stats, stats))
+
+    def on_subtree_delete_rsp(self, msg: SubtreeDeleteRsp) -> None:
+        """
+        Handle the worker's report that it has finished a teardown.
+
+        Args:
+            msg (SubtreeDeleteRsp): The report.
+        """
+        future = self._teardowns.get(msg.request)
+        if future is not None and not future.done():
+            future.set_result(msg.stats)
+
+    async def deregister(self, result: TeardownResult) -> None:
+        """
+        Remove the hub from the NMS, counting the outcome in a result.
+
+        Args:
+            result (TeardownResult): The result to count it in.
+        """
+        try:
+            await nbapi.delete(f"{settings.NBAPI_URL}/api/v1/node/hub/{self.auid}")
+            result.stats.deregistered += 1
+        except httpx.HTTPError as e:
+            logging.warning(f"Hub {self.address.tag}: Not removed from the NMS: {e!r}")
+            result.stats.failed += 1
 
     def get_ap(self, index: int) -> APManager:
         """
@@ -325,8 +927,202 @@ class HubManager(ParentNode):
 
         Returns:
             APManager: The APManager instance.
+
+        Raises:
+            HTTPException: If there is no such AP.
         """
-        return self.get_child_or_404(index)
+        if index not in self._store.aps:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"index {index} not found")
+        return APManager(self, index)
+
+    def get_aps(self) -> dict[int, APManager]:
+        """
+        Get all APs in this hub.
+
+        Returns:
+            dict[int, APManager]: APManagers keyed by AP index.
+        """
+        return {ap: APManager(self, ap) for ap in self._store.aps.indices()}
+
+    def load_nodes(self, aps: NodeColumns, rts: dict[int, NodeColumns], credentials: dict[int, APCredentials]) -> None:
+        """
+        Replace this hub's APs and RTs with the given tables, states included, without involving the worker.
+
+        Args:
+            aps (NodeColumns): The hub's AP table.
+            rts (dict[int, NodeColumns]): RT tables keyed by AP index.
+            credentials (dict[int, APCredentials]): Credentials of the registered APs, keyed by AP index.
+        """
+        self._store.load(aps, rts)
+        self._store.ap_credentials.update(credentials)
+        self._ap_trackers = {ap: CompletionTracker(self._tracker) for ap in aps.indices()}
+
+    async def restore_nodes(
+        self, aps: NodeColumns, rts: dict[int, NodeColumns], credentials: dict[int, APCredentials]
+    ) -> None:
+        """
+        Recreate this hub's APs and RTs from a snapshot (see src.controller.snapshot), and wait until the worker has
+        set them all up (see replay_ap).
+
+        Args:
+            aps (NodeColumns): The hub's AP table.
+            rts (dict[int, NodeColumns]): RT tables keyed by AP index.
+            credentials (dict[int, APCredentials]): Credentials of the registered APs, keyed by AP index.
+        """
+        self.load_nodes(aps, rts, credentials)
+        await self.replay_nodes()
+        logging.info(f"Restored {len(aps)} APs and {self._store.num_rts()} RTs on hub {self.address.tag}")
+
+    async def replay_nodes(self) -> None:
+        """
+        Have a new worker set up every AP and RT in the store (see replay_ap), and wait until it has. Responses still
+        outstanding from an earlier worker are no longer waited for (see drop_registrations), so anything waiting for
+        them returns, and the replay waits only for the new worker.
+        """
+        self.drop_registrations()
+        for ap_idx in list(self._store.aps.indices()):
+            self.replay_ap(ap_idx)
+        await self._tracker.wait()
+
+    def drop_registrations(self) -> None:
+        """
+        Stop expecting the registration responses still outstanding for the hub's nodes, because its worker has gone
+        and will not send them. Anything waiting for them returns.
+        """
+        for tracker in self._ap_trackers.values():
+            tracker.drop()
+        self._tracker.drop()
+
+    def replay_ap(self, ap_idx: int) -> None:
+        """
+        Send the worker what it needs to set up an AP and its RTs as they are recorded in the store, e.g. because the
+        worker is new or never received the original requests.
+
+        Nodes that were registered are set up by the worker from their stored AUIDs (and, for the AP, credentials)
+        without contacting the NMS. Any others are registered as normal, as are all the RTs of an AP that has to be
+        registered afresh. Every node is UNREGISTERED until the worker responds.
+
+        Args:
+            ap_idx (int): AP index.
+        """
+        store = self._store
+        restore = store.ap_credentials.get(ap_idx) if store.ap_state(ap_idx) == APState.REGISTERED else None
+        table = store.rts[ap_idx]
+        rt_registered, rt_unregistered = RT_STATE_CODES[RTState.REGISTERED], RT_STATE_CODES[RTState.UNREGISTERED]
+        registered, others = [], []
+        for rt_idx in table.indices():
+            (registered if table.state[rt_idx] == rt_registered else others).append(rt_idx)
+            table.state[rt_idx] = rt_unregistered
+        store.set_ap_state(ap_idx, APState.UNREGISTERED)  # Bumps the AP's version for the RT writes too
+
+        ap = APManager(self, ap_idx)
+        ap.register(restore)
+        ap.register_rts(registered, restore=restore is not None)  # An AP registered afresh needs new RTs too
+        ap.register_rts(others)
+
+    def set_state(self, state: HubState) -> None:
+        """
+        Set the hub's registration state.
+
+        Args:
+            state (HubState): The new state.
+        """
+        self.state = state
+        self.touch()
+        live_status.publish(self.address, state=state)
+        event_log.record("hub_state", self.address, state=state)
+
+    def set_ap_state(self, ap_idx: int, state: APState, credentials: APCredentials | None = None) -> None:
+        """
+        Set an AP's registration state.
+
+        Args:
+            ap_idx (int): AP index.
+            state (APState): The new state.
+            credentials (APCredentials | None): The AP's credentials, if it has been registered.
+
+        Raises:
+            KeyError: If there is no such AP.
+        """
+        self._store.set_ap_state(ap_idx, state)
+        if credentials is not None:
+            self._store.ap_credentials[ap_idx] = credentials
+        address = Address(net=self.address.net, hub=self.address.hub, ap=ap_idx)
+        live_status.publish(address, state=state)
+        event_log.record("ap_state", address, state=state, credentials=credentials and credentials.model_dump())
+
+    def set_rt_state(self, ap_idx: int, rt_idx: int, state: RTState) -> None:
+        """
+        Set an RT's registration state.
+
+        Args:
+            ap_idx (int): AP index.
+            rt_idx (int): RT index.
+            state (RTState): The new state.
+
+        Raises:
+            KeyError: If there is no such RT.
+        """
+        self._store.set_rt_state(ap_idx, rt_idx, state)
+        address = Address(net=self.address.net, hub=self.address.hub, ap=ap_idx, rt=rt_idx)
+        live_status.publish(address, state=state)
+        event_log.record("rt_state", address, state=state)
+
+    def set_heartbeat(self, seconds: int, aps: list[int], rts: dict[int, list[int]]) -> None:
+        """
+        Record a change to the heartbeat interval of some of the hub's APs and RTs, made by a bulk action (see
+        src.controller.selection). Any that no longer exist are skipped.
+
+        Args:
+            seconds (int): Heartbeat interval in seconds.
+            aps (list[int]): AP indices.
+            rts (dict[int, list[int]]): RT indices, by AP index.
+        """
+        self._store.set_heartbeat(seconds, aps, rts)
+        event_log.record("heartbeat", self.address, seconds=seconds, aps=aps, rts=rts)
+
+    def on_status_ind(self, msg: HubStatusInd) -> None:
+        """
+        Handle a HubStatusInd from the worker: keep the heartbeat and alarm counters, and pass the heartbeat counters
+        on to live status subscribers.
+
+        Args:
+            msg (HubStatusInd): The status report.
+        """
+        self._last_report = time.monotonic()
+        self._heartbeats = msg.hub
+        if msg.alarms is not None:
+            self._alarm_stats = msg.alarms
+        live_status.publish(self.address, child_heartbeats=msg.hub)
+        net, hub = self.address.net, self.address.hub
+        for ap_idx, counters in msg.aps.items():
+            if ap_idx not in self._store.aps:
+                continue  # Removed since the report was sent
+            self._ap_heartbeats[ap_idx] = counters
+            live_status.publish(
+                Address(net=net, hub=hub, ap=ap_idx), heartbeats=counters.local, child_heartbeats=counters.children
+            )
+
+    def status_updates(self, rts: bool = False) -> Iterator[StatusUpdate]:
+        """
+        Status of this hub and its APs and, optionally, RTs, for a live status snapshot (see src.controller.live).
+
+        Args:
+            rts (bool): Whether to include RTs.
+
+        Yields:
+            StatusUpdate: One per node.
+        """
+        yield StatusUpdate(address=self.address, state=self.state, child_heartbeats=self._heartbeats)
+        for ap_idx in self._store.aps.indices():
+            yield from APManager(self, ap_idx).status_updates(rts)
+
+    def unindex(self) -> None:
+        """
+        Remove this hub from the node index, and release the storage of its APs and RTs.
+        """
+        super().unindex()
+        self._store.clear()
 
     def on_connect_ind(self, msg: HubConnectInd) -> None:
         """
@@ -336,24 +1132,176 @@ class HubManager(ParentNode):
             msg (HubConnectInd): The hub connect indication message.
         """
         logging.info(f"Worker connected: {msg.address}")
+        self._last_report = time.monotonic()
+        self._connected_event.set()
+
+    def on_ap_register_rsp(self, msg: APRegisterRsp) -> None:
+        """
+        Handle APRegisterRsp message from worker.
+
+        Args:
+            msg (APRegisterRsp): The AP registration response message.
+
+        Raises:
+            KeyError: If the AP no longer exists.
+        """
+        ap = msg.address.ap
+        if self._store.ap_state(ap) != APState.UNREGISTERED:
+            logging.debug(f"AP {msg.address.tag}: ignoring repeated registration response.")
+            return
+
+        if msg.success:
+            self.set_ap_state(ap, APState.REGISTERED, msg.credentials)
+            logging.debug(f"AP {msg.address.tag} registered successfully.")
+        else:
+            self.set_ap_state(ap, APState.REGISTRATION_FAILED)
+            logging.error(f"AP {msg.address.tag} registration failed.")
+        self._tracker.record(msg.success)  # AP registrations are counted on the hub only
+
+    def on_rt_register_rsp(self, msg: RTRegisterRsp) -> None:
+        """
+        Handle RTRegisterRsp message from worker.
+
+        Args:
+            msg (RTRegisterRsp): The RT registration response message.
+
+        Raises:
+            KeyError: If the RT no longer exists.
+        """
+        ap, rt = msg.address.ap, msg.address.rt
+        if self._store.rt_state(ap, rt) != RTState.UNREGISTERED:
+            logging.debug(f"RT {msg.address.tag}: ignoring repeated registration response.")
+            return
+
+        self.set_rt_state(ap, rt, RTState.REGISTERED if msg.success else RTState.REGISTRATION_FAILED)
+        if msg.success:
+            logging.debug(f"RT {msg.address.tag} registered successfully.")
+        else:
+            logging.error(f"RT {msg.address.tag} registration failed.")
+        self._ap_trackers[ap].record(msg.success)
+
+    def ap_digests(self) -> dict[int, int]:
+        """
+        Returns:
+            dict[int, int]: The `node_digest` of every AP in the store, keyed by AP index.
+        """
+        store = self._store
+        ap_registered, rt_registered = AP_STATE_CODES[APState.REGISTERED], RT_STATE_CODES[RTState.REGISTERED]
+        digests = {}
+        for ap_idx in store.aps.indices():
+            table = store.rts[ap_idx]
+            rts = ((rt_idx, table.state[rt_idx] == rt_registered) for rt_idx in table.indices())
+            digests[ap_idx] = node_digest(store.aps.state[ap_idx] == ap_registered, rts)
+        return digests
+
+    async def reattach(self, timeout: float = settings.RESYNC_TIMEOUT) -> bool:
+        """
+        After a controller restart, ask the hub's worker, which should still be running, for the state that differs
+        from the store, and wait for it to answer (see on_resync_rsp).
+
+        Args:
+            timeout (float): Seconds to wait for the worker.
+
+        Returns:
+            bool: True if the worker answered, False if it is presumed gone.
+        """
+        self._connected_event.clear()
+        worker_ctrl.send(HubHelloReq(address=self.address, digests=self.ap_digests()))
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def on_resync_rsp(self, msg: HubResyncRsp) -> None:
+        """
+        Handle the worker's answer to HubHelloReq: take over its process, bring the store up to date with the APs and
+        RTs that differ, and replay anything the worker never received.
+
+        The worker's view of a node wins, since it reflects the requests that were actually carried out: nodes it has
+        that the store lacks are added, and nodes it has registered are marked registered.
+
+        Args:
+            msg (HubResyncRsp): The resync response.
+        """
+        if self._connected_event.is_set():
+            logging.debug(f"Hub {self.address.tag}: ignoring repeated resync response.")
+            return
+        if settings.WORKER_START_METHOD == "agent":
+            self._worker = RemoteWorker(agents, self.address, msg.pid)
+        else:
+            self._worker = ForkedWorker(msg.pid)
+        for ap_idx, sync in msg.aps.items():
+            self._resync_ap(ap_idx, sync)
+        for ap_idx in msg.missing:
+            if ap_idx in self._store.aps:
+                self.replay_ap(ap_idx)
+        logging.info(f"Reattached to hub {self.address.tag} worker {msg.pid}: {len(msg.aps)} APs resynced")
+        self._last_report = time.monotonic()
         self._connected_event.set()
 
+    def _resync_ap(self, ap_idx: int, sync: APSync) -> None:
+        store = self._store
+        if ap_idx not in store.aps:
+            self.create_ap(ap_idx, sync.heartbeat_seconds, sync.azimuth_deg)
+        state = store.ap_state(ap_idx)
+        if sync.registered and state != APState.REGISTERED:
+            self.set_ap_state(ap_idx, APState.REGISTERED, sync.credentials)
+        elif not sync.registered and state == APState.REGISTERED:
+            self.set_ap_state(ap_idx, APState.REGISTRATION_FAILED)
+
+        ap, table = APManager(self, ap_idx), store.rts[ap_idx]
+        for rt_idx, rt_sync in sync.rts.items():
+            if rt_idx not in table:
+                ap.create_rts(rt_idx, rt_sync.heartbeat_seconds)
+            rt_state = store.rt_state(ap_idx, rt_idx)
+            if rt_sync.registered and rt_state != RTState.REGISTERED:
+                self.set_rt_state(ap_idx, rt_idx, RTState.REGISTERED)
+            elif not rt_sync.registered and rt_state == RTState.REGISTERED:
+                self.set_rt_state(ap_idx, rt_idx, RTState.REGISTRATION_FAILED)
+
+        # RTs the worker never received: replay their registration
+        rt_registered, rt_unregistered = RT_STATE_CODES[RTState.REGISTERED], RT_STATE_CODES[RTState.UNREGISTERED]
+        registered, others = [], []
+        for rt_idx in table.indices():
+            if rt_idx not in sync.rts:
+                (registered if table.state[rt_idx] == rt_registered else others).append(rt_idx)
+                table.state[rt_idx] = rt_unregistered
+        store.touch(ap_idx)
+        ap.register_rts(registered, restore=True)
+        ap.register_rts(others)
+
+    def detach_worker(self) -> None:
+        """
+        Forget the hub's worker process without stopping it, so that a restarted controller can reattach to it.
+        """
+        self._worker = None
+
     async def start_worker(self) -> None:
         """
         Start the hub worker process and wait for it to connect back.
         """
-        self._worker = subprocess.Popen(
-            [
-                "python",
-                "-u",
-                "-m",
-                "src.worker.worker",
-                str(self.address.net),
-                str(self.address.hub),
-                f"tcp://127.0.0.1:{settings.PUB_PORT}",
-                f"tcp://127.0.0.1:{settings.PULL_PORT}",
-            ]
-        )
+        worker_ctrl.reset_channel(self.address.tag)  # A new worker process expects to start a fresh command sequence
+        self._connected_event.clear()  # Set again by the new worker's HubConnectInd
+        if settings.WORKER_START_METHOD == "agent":
+            self._worker = await agents.spawn(self.address)
+        elif settings.WORKER_START_METHOD == "zygote":
+            self._worker = await zygote.spawn(
+                self.address.net, self.address.hub, worker_ctrl.pub_endpoint, worker_ctrl.pull_endpoint
+            )
+        else:
+            self._worker = subprocess.Popen(
+                [
+                    "python",
+                    "-u",
+                    "-m",
+                    "src.worker.worker",
+                    str(self.address.net),
+                    str(self.address.hub),
+                    worker_ctrl.pub_endpoint,
+                    worker_ctrl.pull_endpoint,
+                ]
+            )
         logging.info(f"Hub {self.address.tag} Worker started.")
         await self._connected_event.wait()
 
@@ -370,11 +1318,48 @@ class HubManager(ParentNode):
                 logging.warning(f"Worker process for hub {self.index} did not exit cleanly: {e}")
             self._worker = None
 
+    def worker_fault(self, now: float) -> str | None:
+        """
+        Check the health of the hub's worker (see src.controller.supervisor).
+
+        Args:
+            now (float): Current monotonic time.
+
+        Returns:
+            str | None: Why the worker needs replacing: it has exited, or has not reported for SUPERVISOR_STALL_TIMEOUT
+                seconds. None if it is healthy, or not running (not yet connected, or stopped).
+        """
+        if self._worker is None or not self._connected_event.is_set():
+            return None
+        code = self._worker.poll()
+        if code is not None:
+            return f"exited ({code})"
+        if now - self._last_report > settings.SUPERVISOR_STALL_TIMEOUT:
+            return f"no report for {now - self._last_report:.0f}s"
+        return None
+
+    async def restart_worker(self, timeout: float) -> None:
+        """
+        Replace the hub's worker: stop it if it is still running, start a new one, and have it set up the hub's nodes
+        again (see replay_nodes), re-using the AUIDs and credentials of those that were registered. Heartbeats are
+        started once they are set up.
+
+        Args:
+            timeout (float): Seconds the new worker has to connect, and then to set up the nodes.
+
+        Raises:
+            TimeoutError: If the new worker does not connect, or set up the nodes, in time.
+        """
+        self.stop_worker()
+        await asyncio.wait_for(self.start_worker(), timeout)
+        await asyncio.wait_for(self.replay_nodes(), timeout)
+        self.start_heartbeats()
+
     def start_heartbeats(self):
         """
         Start heartbeat tasks for all APs and RTs in the hub
         """
-        for ap in self.children.values():
+        for ap in self.get_aps().values():
             ap.start_heartbeats(recursive=True)
 
     def __del__(self) -> None:
@@ -398,6 +1383,19 @@ class NetworkManager(ParentNode):
     state: NetworkState = NetworkState.UNREGISTERED
     children: dict[int, HubManager] = Field(default_factory=dict)
 
+    def status_updates(self, rts: bool = False) -> Iterator[StatusUpdate]:
+        """
+        Status of this network and its descendants, for a live status snapshot (see src.controller.live).
+
+        Args:
+            rts (bool): Whether to include RTs.
+
+        Yields:
+            StatusUpdate: One per node.
+        """
+        yield StatusUpdate(address=self.address, state=self.state)
+        yield from super().status_updates(rts)
+
     async def add_hub(self, req: HubCreateRequest, index: int = -1) -> HubManager:
         """
         Add a Hub to the network and start its worker process.
@@ -409,46 +1407,86 @@ class NetworkManager(ParentNode):
         Returns:
             int: The index of the created Hub.
         """
+        hub_mgr = await self.start_hub(index)
+        await self.register_hub(hub_mgr)
+        await asyncio.gather(*(hub_mgr.add_ap(ap_req) for ap_req in ap_requests(req)))
+        return hub_mgr
+
+    async def start_hub(self, index: int = -1) -> HubManager:
+        """
+        Add an unregistered Hub with no APs to the network and start its worker process.
+
+        Args:
+            index (int): Hub index, or -1 for auto-assignment.
+
+        Returns:
+            HubManager: The new Hub.
+        """
+        hub_mgr = self.create_hub(index)
+        await hub_mgr.start_worker()
+        return hub_mgr
+
+    def create_hub(self, index: int = -1) -> HubManager:
+        """
+        Add an unregistered Hub with no APs to the network, without starting a worker.
+
+        Args:
+            index (int): Hub index, or -1 for auto-assignment.
+
+        Returns:
+            HubManager: The new Hub.
+        """
         index = self.get_index(index)
         hub_address = Address(net=self.address.net, hub=index)
         hub_mgr = HubManager(address=hub_address, auid_prefix=f"{self.csni}_")
-        self.children[index] = hub_mgr
-        await hub_mgr.start_worker()
+        self.add_child(index, hub_mgr)
+        event_log.record("add_hub", hub_address)
+        return hub_mgr
+
+    async def register_hub(self, hub_mgr: HubManager) -> None:
+        """
+        Register a Hub with the northbound API, removing it from the network if that fails.
+
+        Args:
+            hub_mgr (HubManager): The Hub.
+
+        Raises:
+            HTTPException: If the northbound API request fails.
+        """
         hub_req = NmsHubCreateRequest(csni=self.csni, auid=hub_mgr.auid)
         url = f"{settings.NBAPI_URL}/api/v1/node/hub/{hub_req.auid}"
-        async with httpx.AsyncClient(headers=NmsAuthInfo().auth_header(), timeout=settings.HTTPX_TIMEOUT) as client:
-            try:
-                resp = await client.post(url, json=hub_req.model_dump())
-                resp.raise_for_status()
-            except httpx.HTTPError as e:
-                del self.children[index]
-                raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e)) from e
-
-        hub_mgr.state = HubState.REGISTERED
-
-        ap_add_requests = [
-            hub_mgr.add_ap(
-                APCreateRequest(
-                    num_rts=req.num_rts_per_ap,
-                    heartbeat_seconds=req.ap_heartbeat_seconds,
-                    rt_heartbeat_seconds=req.rt_heartbeat_seconds,
-                    azimuth_deg=round(i * (360.0 / req.num_aps)),
-                ),
-            )
-            for i in range(req.num_aps)
-        ]
-        await asyncio.gather(*ap_add_requests)
-        return hub_mgr
+        try:
+            await nbapi.post(url, json=hub_req.model_dump())
+        except httpx.HTTPError as e:
+            self.remove_child(hub_mgr.address.hub)
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e)) from e
 
-    async def remove_hub(self, index: int) -> None:
+        hub_mgr.set_state(HubState.REGISTERED)
+
+    async def remove_hub(self, index: int, deregister: bool = True) -> TeardownResult:
         """
-        Remove a Hub from the network.
+        Stop and remove a Hub: its worker tears down its APs and RTs and is stopped, and unless told not to the Hub and
+        everything under it is removed from the NMS.
 
         Args:
             index (int): Hub index.
+            deregister (bool): Whether to remove the Hub and its APs and RTs from the NMS.
+
+        Returns:
+            TeardownResult: What was torn down.
         """
         logging.info(f"Removing Hub {index} from Network {self.address}")
+        hub = self.get_hub(index)
+        result = TeardownResult(message=f"Hub {index} deleted")
+        await hub.teardown(result, deregister=deregister)
+        hub.stop_worker()
+        worker_ctrl.reset_channel(hub.address.tag)  # Or its unacknowledged commands are retransmitted forever
+        hub.drop_registrations()
+        if deregister and hub.state == HubState.REGISTERED:
+            await hub.deregister(result)
         self.remove_child(index)
+        result.stats.nodes += 1
+        return result
 
     def get_hub(self, index: int) -> HubManager:
         """
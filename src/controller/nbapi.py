@@ -0,0 +1,174 @@
+"""
+nbapi.py
+
+Shared HTTP client for the controller's calls to the NMS northbound API.
+
+Creating networks and hubs makes one NBAPI call per node, and many hubs are created concurrently. Rather than opening a
+new client (and connection, and possibly TLS session) for every call, the controller uses one pooled, keep-alive
+`httpx.AsyncClient` for its whole lifetime. It is opened in the FastAPI lifespan and closed on shutdown, and counts
+requests and pool usage so that pool sizing can be checked (see `stats`).
+
+Usage:
+    resp = await nbapi.post(f"{settings.NBAPI_URL}/api/v1/...", json=body)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from src.config import settings
+from src.controller.ctrl_api import NbapiPoolStats
+from src.nms_api import NmsAuthInfo
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class NbapiClient:
+    """
+    Pooled NBAPI client with request and connection pool metrics.
+
+    The bearer token is regenerated once half its lifetime has passed, so the client can stay open indefinitely.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._token_refresh_at = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The underlying client, opened on first use if the lifespan has not already opened it.
+        """
+        if self._client is None:
+            self.open()
+        now = time.monotonic()
+        if now >= self._token_refresh_at:
+            self._client.headers.update(NmsAuthInfo().auth_header())
+            self._token_refresh_at = now + settings.TOKEN_EXPIRY_SECONDS / 2
+        return self._client
+
+    def open(self) -> None:
+        """
+        Create the pooled client. Does nothing if it is already open.
+        """
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            timeout=settings.HTTPX_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.NBAPI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.NBAPI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.NBAPI_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._token_refresh_at = 0.0
+        logging.info(f"Opened NBAPI client pool (max {settings.NBAPI_MAX_CONNECTIONS} connections)")
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled client and all its connections.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, url: str, json: dict) -> httpx.Response:
+        """
+        POST to the NBAPI, raising for error responses.
+
+        Args:
+            url (str): Full request URL.
+            json (dict): Request body.
+
+        Returns:
+            httpx.Response: The successful response.
+
+        Raises:
+            httpx.HTTPError: If the request fails or returns an error status.
+        """
+        return await self.request("POST", url, json=json)
+
+    async def delete(self, url: str) -> httpx.Response:
+        """
+        DELETE on the NBAPI, raising for error responses.
+
+        Args:
+            url (str): Full request URL.
+
+        Returns:
+            httpx.Response: The successful response.
+
+        Raises:
+            httpx.HTTPError: If the request fails or returns an error status.
+        """
+        return await self.request("DELETE", url)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a request to the NBAPI, counting it in the pool metrics and raising for error responses.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Full request URL.
+            **kwargs: Passed on to httpx.
+
+        Returns:
+            httpx.Response: The successful response.
+
+        Raises:
+            httpx.HTTPError: If the request fails or returns an error status.
+        """
+        client = self.client
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            resp = await client.request(method, url, **kwargs)
+            resp.raise_for_status()
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return resp
+
+    def stats(self) -> NbapiPoolStats:
+        """
+        Returns:
+            NbapiPoolStats: Current request counts and connection pool utilisation.
+        """
+        connections = idle = 0
+        if self._client is not None:
+            # httpx does not expose pool state publicly; read it from the httpcore pool if it is there
+            pool = getattr(self._client._transport, "_pool", None)
+            for conn in getattr(pool, "connections", []):
+                connections += 1
+                idle += conn.is_idle()
+        return NbapiPoolStats(
+            open=self._client is not None,
+            max_connections=settings.NBAPI_MAX_CONNECTIONS,
+            connections=connections,
+            idle_connections=idle,
+            in_flight=self.in_flight,
+            peak_in_flight=self.peak_in_flight,
+            requests=self.requests,
+            errors=self.errors,
+        )
+
+
+nbapi = NbapiClient()  # Controller-wide singleton, opened and closed by the app lifespan
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
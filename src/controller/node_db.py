@@ -0,0 +1,442 @@
+"""
+node_db.py
+
+SQLite backend for RT state.
+
+With `NODE_STORE_BACKEND=sqlite` each hub's RT tables (see src.controller.node_store) are rows in a local SQLite
+database rather than arrays in memory. The controller keeps only what it needs on hot paths in memory: the AP tables,
+and an IndexAllocator per AP (a high-water mark and any free gaps) that answers membership, counts and index
+allocation without touching the database. RT state, heartbeat interval and azimuth are read from the database when a
+REST response or registration response needs them.
+
+Writes are not made one at a time. Creating, updating and removing RTs queues row changes in a pending buffer, which
+is written in a single transaction every NODE_STORE_FLUSH_INTERVAL seconds, or as soon as NODE_STORE_FLUSH_BATCH rows
+are waiting. Reads check the pending buffer first, so they always see the latest value. The database is recreated
+empty when the controller starts: it holds the live topology, not a persistent record (see src.controller.snapshot).
+
+RTs are keyed by address (net, hub, ap, rt), and state and AUID are indexed, so filtered queries across the whole
+topology can be answered with SQL (see `NodeDatabase.select_rts`).
+
+Usage:
+    node_db.open()
+    store = HubStore(prefix, node_db.rt_tables(hub_address, prefix))
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import logging
+from array import array
+from collections.abc import Iterator
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Engine,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    create_engine,
+    delete,
+    event,
+    select,
+)
+
+from src.config import settings
+from src.controller.ctrl_api import RTState
+from src.controller.node_store import ABSENT, MAX_INDEX, RT_STATE_CODES, IndexAllocator, NodeColumns, RTTableFactory
+from src.worker.worker_api import Address
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+Key = tuple[int, int, int]  # (net, hub, ap): the RTs of one AP
+Row = tuple[int, int, int]  # (state code, heartbeat, azimuth)
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class NodeDatabase:
+    """
+    The SQLite database of RT rows, with a buffer of pending writes.
+    """
+
+    def __init__(self):
+        self.metadata = MetaData()
+        self.table = Table(
+            "rt",
+            self.metadata,
+            Column("net", Integer, primary_key=True),
+            Column("hub", Integer, primary_key=True),
+            Column("ap", Integer, primary_key=True),
+            Column("rt", Integer, primary_key=True),
+            Column("auid", String, nullable=False, index=True),
+            Column("state", Integer, nullable=False, index=True),
+            Column("heartbeat", Integer, nullable=False),
+            Column("azimuth", Integer, nullable=False),
+        )
+        t = self.table
+        key = (t.c.net == bindparam("k_net")) & (t.c.hub == bindparam("k_hub")) & (t.c.ap == bindparam("k_ap"))
+        self._select_row = select(t.c.state, t.c.heartbeat, t.c.azimuth).where(key & (t.c.rt == bindparam("k_rt")))
+        self._select_rows = select(t.c.rt, t.c.state, t.c.heartbeat, t.c.azimuth).where(key).order_by(t.c.rt)
+        self._delete_row = delete(t).where(key & (t.c.rt == bindparam("k_rt")))
+        self._delete_ap = delete(t).where(key)
+        self._upsert = t.insert().prefix_with("OR REPLACE")
+
+        self._engine: Engine | None = None
+        self._conn: Connection | None = None
+        self._pending: dict[Key, dict[int, Row | None]] = {}  # Row changes not yet written; None deletes the row
+        self._pending_rows = 0
+        self._cleared: set[Key] = set()  # APs whose rows are all to be deleted before the pending changes are written
+        self._auid_prefixes: dict[tuple[int, int], str] = {}  # (net, hub) -> AUID prefix
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def connection(self) -> Connection:
+        """
+        The database connection, opened on first use.
+        """
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def open(self, url: str | None = None) -> None:
+        """
+        Create an empty database. Does nothing if it is already open.
+
+        Args:
+            url (str | None): SQLAlchemy database URL. Defaults to the NODE_STORE_SQLITE_PATH file.
+        """
+        if self._conn is not None:
+            return
+        self._engine = create_engine(url or f"sqlite:///{settings.NODE_STORE_SQLITE_PATH}")
+
+        @event.listens_for(self._engine, "connect")
+        def configure(dbapi_conn, _):
+            # The database is rebuilt on every start, so durability is not worth an fsync per flush
+            dbapi_conn.execute("PRAGMA journal_mode=WAL")
+            dbapi_conn.execute("PRAGMA synchronous=OFF")
+
+        self.metadata.drop_all(self._engine)
+        self.metadata.create_all(self._engine)
+        self._conn = self._engine.connect()
+        logging.info(f"Opened node database {self._engine.url}")
+
+    def close(self) -> None:
+        """
+        Write any pending changes and close the database.
+        """
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._engine.dispose()
+        self._conn = self._engine = None
+
+    def rt_tables(self, hub: Address, auid_prefix: str) -> RTTableFactory:
+        """
+        Returns a HubStore RT table factory that keeps a hub's RTs in this database.
+
+        Args:
+            hub (Address): Address of the hub.
+            auid_prefix (str): Prefix for the hub's RT AUIDs.
+
+        Returns:
+            RTTableFactory: The factory.
+        """
+        self._auid_prefixes[(hub.net, hub.hub)] = auid_prefix
+
+        def rt_table(ap: int, initial: NodeColumns | None = None) -> "SqliteColumns":
+            table = SqliteColumns(self, (hub.net, hub.hub, ap))
+            if initial is not None:
+                table.copy_from(initial)
+            return table
+
+        return rt_table
+
+    def read(self, key: Key, rt: int) -> Row:
+        """
+        Read one RT row.
+
+        Args:
+            key (Key): The AP.
+            rt (int): RT index.
+
+        Returns:
+            Row: The RT's state code, heartbeat and azimuth.
+
+        Raises:
+            KeyError: If there is no such row.
+        """
+        rows = self._pending.get(key)
+        if rows is not None and rt in rows:
+            row = rows[rt]
+            if row is None:
+                raise KeyError(rt)
+            return row
+        if key in self._cleared:
+            raise KeyError(rt)
+        params = {"k_net": key[0], "k_hub": key[1], "k_ap": key[2], "k_rt": rt}
+        row = self.connection.execute(self._select_row, params).first()
+        if row is None:
+            raise KeyError(rt)
+        return tuple(row)
+
+    def write(self, key: Key, rt: int, row: Row | None) -> None:
+        """
+        Queue a change to one RT row.
+
+        Args:
+            key (Key): The AP.
+            rt (int): RT index.
+            row (Row | None): The new row, or None to delete it.
+        """
+        self._pending.setdefault(key, {})[rt] = row
+        self._pending_rows += 1
+        if self._pending_rows >= settings.NODE_STORE_FLUSH_BATCH:
+            self.flush()
+
+    def clear(self, key: Key) -> None:
+        """
+        Queue the deletion of every RT row of an AP.
+
+        Args:
+            key (Key): The AP.
+        """
+        self._pending_rows -= len(self._pending.pop(key, ()))
+        self._cleared.add(key)
+
+    def rows(self, key: Key) -> Iterator[tuple[int, int, int, int]]:
+        """
+        Read every RT row of an AP, in index order. Pending changes are written first.
+
+        Args:
+            key (Key): The AP.
+
+        Yields:
+            tuple[int, int, int, int]: RT index, state code, heartbeat and azimuth.
+        """
+        self.flush()
+        params = {"k_net": key[0], "k_hub": key[1], "k_ap": key[2]}
+        yield from self.connection.execute(self._select_rows, params)
+
+    def flush(self) -> None:
+        """
+        Write all pending changes in one transaction.
+        """
+        if not self._pending and not self._cleared:
+            return
+        conn = self.connection
+        if self._cleared:
+            conn.execute(self._delete_ap, [{"k_net": n, "k_hub": h, "k_ap": a} for n, h, a in self._cleared])
+        upserts, deletes = [], []
+        for (net, hub, ap), rows in self._pending.items():
+            tag = Address(net=net, hub=hub, ap=ap).tag
+            prefix = f"{self._auid_prefixes.get((net, hub), '')}{tag}R"
+            for rt, row in rows.items():
+                if row is None:
+                    deletes.append({"k_net": net, "k_hub": hub, "k_ap": ap, "k_rt": rt})
+                else:
+                    state, heartbeat, azimuth = row
+                    upserts.append(
+                        {
+                            "net": net,
+                            "hub": hub,
+                            "ap": ap,
+                            "rt": rt,
+                            "auid": f"{prefix}{rt:02x}",
+                            "state": state,
+                            "heartbeat": heartbeat,
+                            "azimuth": azimuth,
+                        }
+                    )
+        if deletes:
+            conn.execute(self._delete_row, deletes)
+        if upserts:
+            conn.execute(self._upsert, upserts)
+        conn.commit()
+        self.flushes += 1
+        self.rows_written += len(upserts) + len(deletes)
+        self._pending.clear()
+        self._cleared.clear()
+        self._pending_rows = 0
+
+    async def flush_loop(self, interval: float = settings.NODE_STORE_FLUSH_INTERVAL) -> None:
+        """
+        Write pending changes periodically, until cancelled.
+
+        Args:
+            interval (float): Time between flushes in seconds.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logging.error("Node database flush failed", exc_info=True)
+
+    def select_rts(
+        self,
+        net: int | None = None,
+        hub: int | None = None,
+        state: RTState | None = None,
+        auid: str | None = None,
+        limit: int | None = None,
+    ) -> list[Address]:
+        """
+        Find RTs matching every given filter, in address order. Pending changes are written first.
+
+        Args:
+            net (int | None): Network index.
+            hub (int | None): Hub index.
+            state (RTState | None): Registration state.
+            auid (str | None): AUID.
+            limit (int | None): Maximum number of results.
+
+        Returns:
+            list[Address]: Addresses of the matching RTs.
+        """
+        self.flush()
+        t = self.table
+        query = select(t.c.net, t.c.hub, t.c.ap, t.c.rt).order_by(t.c.net, t.c.hub, t.c.ap, t.c.rt).limit(limit)
+        if net is not None:
+            query = query.where(t.c.net == net)
+        if hub is not None:
+            query = query.where(t.c.hub == hub)
+        if state is not None:
+            query = query.where(t.c.state == RT_STATE_CODES[state])
+        if auid is not None:
+            query = query.where(t.c.auid == auid)
+        return [Address(net=n, hub=h, ap=a, rt=r) for n, h, a, r in self.connection.execute(query)]
+
+
+class SqlColumn:
+    """
+    One column of an SqliteColumns table, indexable by RT index like the arrays of NodeColumns.
+
+    Args:
+        table (SqliteColumns): The table.
+        field (int): Position of the column in a Row.
+    """
+
+    __slots__ = ("field", "table")
+
+    def __init__(self, table: "SqliteColumns", field: int):
+        self.table = table
+        self.field = field
+
+    def __getitem__(self, rt: int) -> int:
+        table = self.table
+        return table.db.read(table.key, rt)[self.field]
+
+    def __setitem__(self, rt: int, value: int) -> None:
+        table = self.table
+        row = list(table.db.read(table.key, rt))
+        row[self.field] = value
+        table.db.write(table.key, rt, tuple(row))
+
+
+class SqliteColumns:
+    """
+    The RTs of one AP, stored as rows in the node database. Stands in for NodeColumns in a HubStore.
+
+    Only the index allocator is kept in memory.
+
+    Args:
+        db (NodeDatabase): The database.
+        key (Key): The AP.
+    """
+
+    __slots__ = ("alloc", "azimuth", "db", "heartbeat", "key", "state")
+
+    def __init__(self, db: NodeDatabase, key: Key):
+        self.db = db
+        self.key = key
+        self.alloc = IndexAllocator()
+        self.state = SqlColumn(self, 0)
+        self.heartbeat = SqlColumn(self, 1)
+        self.azimuth = SqlColumn(self, 2)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.alloc
+
+    def __len__(self) -> int:
+        return len(self.alloc)
+
+    def indices(self, start: int = 0) -> Iterator[int]:
+        """
+        Iterate over the indices of the RTs present, in ascending order. See NodeColumns.indices.
+        """
+        return self.alloc.indices(start)
+
+    def matching(self, codes: frozenset[int] | None = None) -> list[int]:
+        """
+        Find the RTs in given states. See NodeColumns.matching.
+        """
+        return [rt for rt, code, _, _ in self.db.rows(self.key) if codes is None or code in codes]
+
+    def add(self, index: int, state: int, heartbeat: int, azimuth: int = 0, count: int = 1) -> None:
+        """
+        Store one RT, or `count` RTs with the same values at consecutive indices. See NodeColumns.add.
+        """
+        end = index + count
+        if end - 1 > MAX_INDEX:
+            raise IndexError(f"Index {end - 1} exceeds maximum of {MAX_INDEX}")
+        self.alloc.reserve(index, count)
+        row = (state, heartbeat, azimuth)
+        for rt in range(index, end):
+            self.db.write(self.key, rt, row)
+
+    def remove(self, index: int) -> None:
+        """
+        Delete the RT at the given index.
+
+        Raises:
+            KeyError: If there is no RT at this index.
+        """
+        self.alloc.release(index)
+        self.db.write(self.key, index, None)
+
+    def clear(self) -> None:
+        """
+        Delete every RT.
+        """
+        self.db.clear(self.key)
+        self.alloc = IndexAllocator()
+
+    def copy_from(self, columns: NodeColumns) -> None:
+        """
+        Add every RT of an in-memory table.
+
+        Args:
+            columns (NodeColumns): The table to copy.
+        """
+        for rt in columns.indices():
+            self.add(rt, columns.state[rt], columns.heartbeat[rt], columns.azimuth[rt])
+
+    def dump(self) -> tuple[bytes, bytes, bytes]:
+        """
+        Returns:
+            tuple[bytes, bytes, bytes]: The raw state, heartbeat and azimuth columns, as NodeColumns.dump.
+        """
+        size = max(self.alloc, default=-1) + 1
+        state = bytearray([ABSENT]) * size
+        heartbeat = array("i", [0]) * size
+        azimuth = array("H", [0]) * size
+        for rt, code, rt_heartbeat, rt_azimuth in self.db.rows(self.key):
+            state[rt], heartbeat[rt], azimuth[rt] = code, rt_heartbeat, rt_azimuth
+        return bytes(state), heartbeat.tobytes(), azimuth.tobytes()
+
+
+node_db = NodeDatabase()  # Controller-wide singleton, opened by the app lifespan when NODE_STORE_BACKEND=sqlite
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,521 @@
+"""
+Columnar storage for the APs and RTs of a hub.
+
+A full network has up to 153,600 RTs, so the controller does not keep a Python object per AP or RT. Instead each hub
+owns a HubStore holding one NodeColumns table for its APs and one per AP for that AP's RTs. A table is a set of
+parallel typed arrays (state code, heartbeat interval, azimuth) indexed directly by the node's index within its
+parent, so a node costs a few bytes rather than a pydantic model, an Address and an asyncio.Event. AUIDs are not
+stored at all: they are derived from the hub's interned AUID prefix and the node's address tag on demand.
+
+Child indices are handed out by an IndexAllocator per parent, which finds the lowest free index (or a free contiguous
+range, for bulk creates) without scanning the parent's children.
+
+Views over individual rows (see src.controller.managers.APManager and RTManager) are created on demand for REST
+responses and command handling.
+
+Every change to a hub's contents bumps its store's version, and that of the AP concerned, from a clock shared by all
+nodes (see next_version). Read responses are cached against these versions (see src.controller.read_cache).
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import heapq
+import itertools
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+
+from src.controller.ctrl_api import APState, RTState
+from src.worker.worker_api import APCredentials
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+ABSENT = 0xFF  # State code marking an unused slot
+MAX_INDEX = 0xFFFF  # Highest AP/RT index that can be stored
+
+AP_STATES: tuple[APState, ...] = tuple(APState)
+RT_STATES: tuple[RTState, ...] = tuple(RTState)
+AP_STATE_CODES: dict[APState, int] = {state: code for code, state in enumerate(AP_STATES)}
+RT_STATE_CODES: dict[RTState, int] = {state: code for code, state in enumerate(RT_STATES)}
+
+_versions = itertools.count(1)
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def next_version() -> int:
+    """
+    Returns:
+        int: A version number higher than any handed out before. Every node's version comes from this one clock, so the
+            version of a subtree is the highest of the versions of the nodes in it.
+    """
+    return next(_versions)
+
+
+class IndexAllocator:
+    """
+    Allocates the child indices of one parent node.
+
+    Indices at or above a high-water mark are all free; freed indices below it are kept in a set, with a min-heap over
+    them for lowest-free lookups. Entries in the heap that have since been re-reserved are discarded lazily. Freeing the
+    highest index in use lowers the high-water mark, so a parent that is emptied returns to allocating from zero.
+    """
+
+    __slots__ = ("_free", "_heap", "_next")
+
+    def __init__(self):
+        self._next = 0
+        self._free: set[int] = set()
+        self._heap: list[int] = []
+
+    def __contains__(self, index: int) -> bool:
+        return 0 <= index < self._next and index not in self._free
+
+    def __len__(self) -> int:
+        return self._next - len(self._free)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.indices()
+
+    def indices(self, start: int = 0) -> Iterator[int]:
+        """
+        Iterate over the indices in use, in ascending order.
+
+        Args:
+            start (int): Skip indices below this one.
+        """
+        return (index for index in range(max(start, 0), self._next) if index not in self._free)
+
+    def lowest_free(self) -> int:
+        """
+        Returns:
+            int: The lowest free index. It is not reserved until `reserve` is called.
+        """
+        heap = self._heap
+        while heap:
+            if heap[0] in self._free:
+                return heap[0]
+            heapq.heappop(heap)
+        return self._next
+
+    def find_range(self, count: int) -> int:
+        """
+        Find the lowest run of `count` consecutive free indices.
+
+        Args:
+            count (int): Length of the run.
+
+        Returns:
+            int: The first index of the run. It is not reserved until `reserve` is called.
+        """
+        run_start = run_length = 0
+        for index in sorted(self._free):
+            if run_length and index == run_start + run_length:
+                run_length += 1
+            else:
+                run_start, run_length = index, 1
+            if run_length >= count:
+                return run_start
+        return self._next  # The highest index in use is never free, so no run continues into the unused space
+
+    def reserve(self, index: int, count: int = 1) -> None:
+        """
+        Mark `count` indices starting at `index` as in use.
+
+        Args:
+            index (int): First index to reserve.
+            count (int): Number of consecutive indices to reserve.
+
+        Raises:
+            ValueError: If any of the indices is already in use.
+        """
+        end = index + count
+        if any(i in self for i in range(index, min(end, self._next))):
+            raise ValueError(f"Index range {index}-{end - 1} overlaps indices in use")
+        self._free.difference_update(range(index, min(end, self._next)))
+        if index > self._next:  # Skipped-over indices become free
+            self._free.update(range(self._next, index))
+            for i in range(self._next, index):
+                heapq.heappush(self._heap, i)
+        self._next = max(self._next, end)
+
+    def release(self, index: int) -> None:
+        """
+        Mark an index as free.
+
+        Args:
+            index (int): The index to free.
+
+        Raises:
+            KeyError: If the index is not in use.
+        """
+        if index not in self:
+            raise KeyError(index)
+        if index == self._next - 1:
+            self._next -= 1
+            while self._next and self._next - 1 in self._free:
+                self._next -= 1
+                self._free.discard(self._next)
+        else:
+            self._free.add(index)
+            heapq.heappush(self._heap, index)
+        if len(self._heap) > 2 * len(self._free) + 64:  # Drop stale entries left by reservations and trimming
+            self._heap = list(self._free)
+            heapq.heapify(self._heap)
+
+
+class NodeColumns:
+    """
+    Columnar storage for a set of sibling nodes: the APs of a hub, or the RTs of an AP.
+
+    Each column is indexed directly by node index, and a slot whose state code is ABSENT is unused. `alloc` tracks the
+    same slots for index allocation.
+    """
+
+    __slots__ = ("alloc", "azimuth", "heartbeat", "state")
+
+    def __init__(self):
+        self.state = bytearray()
+        self.heartbeat = array("i")
+        self.azimuth = array("H")
+        self.alloc = IndexAllocator()
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.alloc
+
+    def __len__(self) -> int:
+        return len(self.alloc)
+
+    def indices(self, start: int = 0) -> Iterator[int]:
+        """
+        Iterate over the indices of the nodes present, in ascending order.
+
+        Args:
+            start (int): Skip indices below this one, e.g. to resume a paginated listing.
+        """
+        state = self.state
+        return (index for index in range(max(start, 0), len(state)) if state[index] != ABSENT)
+
+    def matching(self, codes: frozenset[int] | None = None) -> list[int]:
+        """
+        Find the nodes in given states, for bulk selections (see src.controller.selection).
+
+        Args:
+            codes (frozenset[int] | None): State codes to match, or None for any.
+
+        Returns:
+            list[int]: Indices of the matching nodes, in ascending order.
+        """
+        if codes is None:
+            return [index for index, code in enumerate(self.state) if code != ABSENT]
+        return [index for index, code in enumerate(self.state) if code in codes]
+
+    def add(self, index: int, state: int, heartbeat: int, azimuth: int = 0, count: int = 1) -> None:
+        """
+        Store one node, or `count` nodes with the same values at consecutive indices, growing the columns if necessary.
+
+        Args:
+            index (int): Node index (the first, if count > 1).
+            state (int): State code.
+            heartbeat (int): Heartbeat interval in seconds.
+            azimuth (int): Azimuth in degrees.
+            count (int): Number of nodes.
+
+        Raises:
+            IndexError: If the indices exceed MAX_INDEX.
+            ValueError: If any of the indices is already in use.
+        """
+        end = index + count
+        if end - 1 > MAX_INDEX:
+            raise IndexError(f"Index {end - 1} exceeds maximum of {MAX_INDEX}")
+        self.alloc.reserve(index, count)
+        grow = end - len(self.state)
+        if grow > 0:
+            self.state.extend(b"\xff" * grow)
+            self.heartbeat.extend([0] * grow)
+            self.azimuth.extend([0] * grow)
+        self.state[index:end] = bytes([state]) * count
+        self.heartbeat[index:end] = array("i", [heartbeat]) * count
+        self.azimuth[index:end] = array("H", [azimuth]) * count
+
+    def clear(self) -> None:
+        """
+        Remove every node.
+        """
+        self.__init__()
+
+    def dump(self) -> tuple[bytes, bytes, bytes]:
+        """
+        Returns:
+            tuple[bytes, bytes, bytes]: The raw state, heartbeat and azimuth columns, in native byte order.
+        """
+        return bytes(self.state), self.heartbeat.tobytes(), self.azimuth.tobytes()
+
+    @classmethod
+    def load(cls, state: bytes, heartbeat: bytes, azimuth: bytes, byteswap: bool = False) -> "NodeColumns":
+        """
+        Rebuild a table from columns returned by `dump`.
+
+        Args:
+            state (bytes): Raw state column.
+            heartbeat (bytes): Raw heartbeat column.
+            azimuth (bytes): Raw azimuth column.
+            byteswap (bool): The columns were dumped on a machine of the other byte order.
+
+        Returns:
+            NodeColumns: The table.
+
+        Raises:
+            ValueError: If the columns are not all the same length, or too long.
+        """
+        columns = cls()
+        columns.state = bytearray(state.rstrip(b"\xff"))
+        columns.heartbeat.frombytes(heartbeat)
+        columns.azimuth.frombytes(azimuth)
+        if byteswap:
+            columns.heartbeat.byteswap()
+            columns.azimuth.byteswap()
+        size = len(columns.state)
+        if size - 1 > MAX_INDEX or len(columns.heartbeat) < size or len(columns.azimuth) < size:
+            raise ValueError("Inconsistent column lengths")
+        del columns.heartbeat[size:]
+        del columns.azimuth[size:]
+        columns.alloc.reserve(0, size)
+        for index, code in enumerate(columns.state):
+            if code == ABSENT:
+                columns.alloc.release(index)
+        return columns
+
+    def remove(self, index: int) -> None:
+        """
+        Free the slot at the given index, trimming unused slots from the end of the columns.
+
+        Args:
+            index (int): Node index.
+
+        Raises:
+            KeyError: If there is no node at this index.
+        """
+        self.alloc.release(index)
+        self.state[index] = ABSENT
+        end = len(self.state)
+        while end and self.state[end - 1] == ABSENT:
+            end -= 1
+        if end < len(self.state):
+            del self.state[end:]
+            del self.heartbeat[end:]
+            del self.azimuth[end:]
+
+
+RTTableFactory = Callable[[int, NodeColumns | None], NodeColumns]  # (AP index, initial contents) -> RT table
+
+
+def memory_rt_table(ap: int, initial: NodeColumns | None = None) -> NodeColumns:
+    """
+    Default HubStore RT table factory: RTs are kept in memory, in NodeColumns.
+
+    Args:
+        ap (int): AP index.
+        initial (NodeColumns | None): Initial contents, used as the table itself.
+
+    Returns:
+        NodeColumns: The table.
+    """
+    return initial if initial is not None else NodeColumns()
+
+
+class HubStore:
+    """
+    All AP and RT state for one hub.
+
+    The credentials of registered APs, which are needed to restore them from a snapshot without registering them
+    again, are kept in a plain dict: there are far fewer APs than RTs.
+
+    The RT tables are created by `rt_table`, so that they can be kept somewhere other than memory (see
+    src.controller.node_db). Anything standing in for NodeColumns must provide its `alloc`, its item-indexable
+    `state`, `heartbeat` and `azimuth` columns, and its methods.
+
+    Args:
+        auid_prefix (str): Prefix for AP and RT AUIDs. Interned, so every hub in a network shares one string.
+        rt_table (RTTableFactory | None): Creates the RT table for an AP. By default RTs are kept in memory.
+    """
+
+    __slots__ = ("_rt_table", "ap_credentials", "ap_versions", "aps", "auid_prefix", "rts", "version")
+
+    def __init__(self, auid_prefix: str, rt_table: RTTableFactory | None = None):
+        self.auid_prefix = sys.intern(auid_prefix)
+        self.aps = NodeColumns()
+        self.rts: dict[int, NodeColumns] = {}  # AP index -> that AP's RTs
+        self.ap_credentials: dict[int, APCredentials] = {}  # AP index -> credentials, for registered APs
+        self.ap_versions: dict[int, int] = {}  # AP index -> version of that AP and its RTs
+        self.version = next_version()  # Version of the whole hub's contents
+        self._rt_table = rt_table or memory_rt_table
+
+    def touch(self, ap: int | None = None) -> None:
+        """
+        Bump the hub's version, and that of an AP, after a change. The mutators below do this themselves; it is only
+        needed after writing to the tables directly.
+
+        Args:
+            ap (int | None): Index of the AP that changed, with its RTs, if any.
+        """
+        self.version = next_version()
+        if ap is not None:
+            self.ap_versions[ap] = self.version
+
+    def load(self, aps: NodeColumns, rts: dict[int, NodeColumns]) -> None:
+        """
+        Replace the hub's contents with the given tables, e.g. from a snapshot.
+
+        Args:
+            aps (NodeColumns): The AP table.
+            rts (dict[int, NodeColumns]): RT tables keyed by AP index. APs with no table get an empty one.
+        """
+        self.clear()
+        self.aps = aps
+        self.rts = {ap: self._rt_table(ap, rts.get(ap)) for ap in aps.indices()}
+        self.touch()
+        self.ap_versions = dict.fromkeys(self.rts, self.version)
+
+    def clear(self) -> None:
+        """
+        Remove every AP and RT.
+        """
+        for rts in self.rts.values():
+            rts.clear()
+        self.rts.clear()
+        self.aps = NodeColumns()
+        self.ap_credentials.clear()
+        self.ap_versions.clear()
+        self.touch()
+
+    def add_ap(self, ap: int, heartbeat: int, azimuth: int = 0) -> None:
+        """
+        Add an unregistered AP with no RTs.
+
+        Args:
+            ap (int): AP index.
+            heartbeat (int): Heartbeat interval in seconds.
+            azimuth (int): Azimuth in degrees.
+        """
+        self.aps.add(ap, AP_STATE_CODES[APState.UNREGISTERED], heartbeat, azimuth)
+        self.rts[ap] = self._rt_table(ap, None)
+        self.touch(ap)
+
+    def remove_ap(self, ap: int) -> int:
+        """
+        Remove an AP and all of its RTs.
+
+        Args:
+            ap (int): AP index.
+
+        Returns:
+            int: The number of RTs removed with it.
+
+        Raises:
+            KeyError: If there is no such AP.
+        """
+        self.aps.remove(ap)
+        self.ap_credentials.pop(ap, None)
+        self.ap_versions.pop(ap, None)
+        rts = self.rts.pop(ap)
+        count = len(rts)
+        rts.clear()
+        self.touch()
+        return count
+
+    def add_rt(self, ap: int, rt: int, heartbeat: int, count: int = 1) -> None:
+        """
+        Add an unregistered RT to an AP, or `count` RTs at consecutive indices.
+
+        Args:
+            ap (int): AP index.
+            rt (int): RT index (the first, if count > 1).
+            heartbeat (int): Heartbeat interval in seconds.
+            count (int): Number of RTs.
+
+        Raises:
+            KeyError: If there is no such AP.
+        """
+        self.rts[ap].add(rt, RT_STATE_CODES[RTState.UNREGISTERED], heartbeat, count=count)
+        self.touch(ap)
+
+    def ap_state(self, ap: int) -> APState:
+        """
+        Raises:
+            KeyError: If there is no such AP.
+        """
+        if ap not in self.aps:
+            raise KeyError(ap)
+        return AP_STATES[self.aps.state[ap]]
+
+    def rt_state(self, ap: int, rt: int) -> RTState:
+        """
+        Raises:
+            KeyError: If there is no such RT.
+        """
+        rts = self.rts[ap]
+        if rt not in rts:
+            raise KeyError(rt)
+        return RT_STATES[rts.state[rt]]
+
+    def set_ap_state(self, ap: int, state: APState) -> None:
+        """
+        Raises:
+            KeyError: If there is no such AP.
+        """
+        if ap not in self.aps:
+            raise KeyError(ap)
+        self.aps.state[ap] = AP_STATE_CODES[state]
+        self.touch(ap)
+
+    def set_rt_state(self, ap: int, rt: int, state: RTState) -> None:
+        """
+        Raises:
+            KeyError: If there is no such RT.
+        """
+        rts = self.rts[ap]
+        if rt not in rts:
+            raise KeyError(rt)
+        rts.state[rt] = RT_STATE_CODES[state]
+        self.touch(ap)
+
+    def set_heartbeat(self, seconds: int, aps: Iterable[int] = (), rts: dict[int, Iterable[int]] | None = None) -> None:
+        """
+        Set the heartbeat interval of some APs and RTs. Any that do not exist are skipped.
+
+        Args:
+            seconds (int): Heartbeat interval in seconds.
+            aps (Iterable[int]): AP indices.
+            rts (dict[int, Iterable[int]] | None): RT indices, by AP index.
+        """
+        for ap in aps:
+            if ap in self.aps:
+                self.aps.heartbeat[ap] = seconds
+                self.touch(ap)
+        for ap, indices in (rts or {}).items():
+            table = self.rts.get(ap)
+            if table is None:
+                continue
+            for rt in indices:
+                if rt in table:
+                    table.heartbeat[rt] = seconds
+            self.touch(ap)
+
+    def num_rts(self) -> int:
+        """
+        Returns:
+            int: The total number of RTs in the hub.
+        """
+        return sum(len(rts) for rts in self.rts.values())
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,242 @@
+"""
+read_cache.py
+
+Versioned cache of serialised read responses, with ETag / If-None-Match support.
+
+Dashboards poll the same status routes every few seconds, and most of the time nothing under the node they ask about
+has changed. Every node carries a version (see src.controller.node_store.next_version) that is bumped on any change to
+it or its descendants, so a response can be reused for as long as the version of the node it describes is unchanged:
+
+- Each response carries an ETag derived from the node's version. A request whose If-None-Match header matches it gets
+  304 Not Modified with no body.
+- Otherwise, the last response for the route (path and query) is returned if it was made at the current version, and
+  is built, sent and cached if not.
+
+The cache holds the latest response for at most READ_CACHE_ENTRIES routes and READ_CACHE_MAX_BYTES of bodies, least
+recently used first out. List pages are cached as they stream, unless the node changes before the page is finished.
+
+Usage:
+    return read_cache.respond(request, network, NetworkRead)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from typing import Any, NamedTuple, Protocol
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from src.config import settings
+from src.controller.ctrl_api import ReadCacheStats
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+EPOCH = f"{time.time_ns():x}"  # Distinguishes ETags from those of earlier controller runs, whose versions restarted
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class Versioned(Protocol):
+    """
+    A node whose version is bumped on any change to it or its descendants.
+    """
+
+    @property
+    def version(self) -> int: ...
+
+
+class CachedResponse(NamedTuple):
+    """
+    A serialised response, and the version of the node it was made from.
+    """
+
+    version: int
+    body: bytes
+    media_type: str
+    headers: dict[str, str]
+
+
+def etag(version: int) -> str:
+    """
+    Returns:
+        str: The ETag of responses made at a version.
+    """
+    return f'"{EPOCH}-{version:x}"'
+
+
+def not_modified(request: Request, tag: str) -> bool:
+    """
+    Returns:
+        bool: True if the request's If-None-Match header matches the ETag.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    return any(candidate.strip().removeprefix("W/") in (tag, "*") for candidate in header.split(","))
+
+
+class ReadCache:
+    """
+    Least recently used cache of the latest response for each route, bounded by entries and bytes.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()  # Route -> response, least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def clear(self) -> None:
+        """
+        Drop every cached response.
+        """
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> ReadCacheStats:
+        """
+        Returns:
+            ReadCacheStats: Cache size and hit rates.
+        """
+        return ReadCacheStats(
+            entries=len(self._entries),
+            bytes=self._bytes,
+            hits=self.hits,
+            misses=self.misses,
+            not_modified=self.not_modified,
+            evictions=self.evictions,
+        )
+
+    def get(self, route: str, version: int) -> CachedResponse | None:
+        """
+        Look up the response for a route, if it was made at the given version.
+
+        Args:
+            route (str): Route path and query.
+            version (int): Current version of the node the route describes.
+
+        Returns:
+            CachedResponse | None: The response, or None on a miss.
+        """
+        entry = self._entries.get(route)
+        if entry is None or entry.version != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(route)
+        self.hits += 1
+        return entry
+
+    def put(self, route: str, entry: CachedResponse) -> None:
+        """
+        Cache the response for a route, replacing any older one and evicting the least recently used to stay in
+        bounds. Responses too large to fit at all are not cached.
+
+        Args:
+            route (str): Route path and query.
+            entry (CachedResponse): The response.
+        """
+        old = self._entries.pop(route, None)
+        if old is not None:
+            self._bytes -= len(old.body)
+        if len(entry.body) > settings.READ_CACHE_MAX_BYTES:
+            return
+        self._entries[route] = entry
+        self._bytes += len(entry.body)
+        while len(self._entries) > settings.READ_CACHE_ENTRIES or self._bytes > settings.READ_CACHE_MAX_BYTES:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self.evictions += 1
+
+    def _cached(self, request: Request, node: Versioned) -> tuple[str, int, Response | None]:
+        """
+        Answer a request from the cache if possible.
+
+        Returns:
+            tuple[str, int, Response | None]: The route, the node's version, and the response if the client's copy is
+                current or the cache holds one; otherwise None.
+        """
+        route = f"{request.url.path}?{request.url.query}"
+        version = node.version
+        tag = etag(version)
+        if not_modified(request, tag):
+            self.not_modified += 1
+            return route, version, Response(status_code=HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+        entry = self.get(route, version)
+        if entry is None:
+            return route, version, None
+        headers = entry.headers | {"ETag": tag}
+        return route, version, Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+    def respond(self, request: Request, node: Any, model: type[BaseModel]) -> Response:
+        """
+        Build the response for a route that reads a single node.
+
+        Args:
+            request (Request): The request.
+            node (Any): The node, with a `version` and the attributes of `model`.
+            model (type[BaseModel]): The response model.
+
+        Returns:
+            Response: 304 if the client's copy is current, else the node serialised as `model`.
+        """
+        route, version, response = self._cached(request, node)
+        if response is not None:
+            return response
+        body = model.model_validate(node, from_attributes=True).model_dump_json().encode()
+        self.put(route, CachedResponse(version, body, "application/json", {}))
+        return Response(content=body, media_type="application/json", headers={"ETag": etag(version)})
+
+    def respond_list(self, request: Request, node: Versioned, build: Callable[[], StreamingResponse]) -> Response:
+        """
+        Build the response for a list route (see src.controller.listing), caching the page as it streams.
+
+        Args:
+            request (Request): The request.
+            node (Versioned): The node whose children are listed.
+            build (Callable[[], StreamingResponse]): Builds the page.
+
+        Returns:
+            Response: 304 if the client's copy is current, the cached page, or the page as it streams.
+        """
+        route, version, response = self._cached(request, node)
+        if response is not None:
+            return response
+        page = build()
+        headers = {name: value for name, value in page.headers.items() if name.lower().startswith("x-")}
+        page.headers["ETag"] = etag(version)
+
+        async def body(chunks: AsyncIterator[str | bytes]) -> AsyncIterator[str | bytes]:
+            kept: list[bytes] | None = []
+            size = 0
+            async for chunk in chunks:
+                yield chunk
+                if kept is None:
+                    continue
+                kept.append(chunk if isinstance(chunk, bytes) else chunk.encode())
+                size += len(kept[-1])
+                if size > settings.READ_CACHE_MAX_BYTES:
+                    kept = None  # Too large to cache, but still sent
+            if kept is not None and node.version == version:  # Not if entries changed while the page was sent
+                self.put(route, CachedResponse(version, b"".join(kept), page.media_type, headers))
+
+        page.body_iterator = body(page.body_iterator)
+        return page
+
+
+read_cache = ReadCache()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
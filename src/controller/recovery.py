@@ -0,0 +1,260 @@
+"""
+recovery.py
+
+Crash recovery: rebuilding the controller's state from the event log (see src.controller.event_log), and reattaching to
+the hub workers that kept running while it was down, so that restarting the control plane does not mean provisioning
+every node again.
+
+With EVENT_LOG_PATH set, startup goes:
+
+1. `Recovery.replay` reads the log, which is a snapshot (see src.controller.snapshot) followed by events, and rebuilds
+   every Network, Hub, AP and RT through the same manager methods that recorded them. Nothing is sent to the workers
+   or the NMS.
+2. The ZeroMQ sockets are bound at the endpoints recorded in the log, so that the running workers reconnect.
+3. `Recovery.start` compacts the log and sends each Hub a HubHelloReq carrying a digest of each of its APs. A live
+   worker answers with only the APs whose state differs; those are brought up to date, and anything the worker never
+   received is sent again (see HubManager.on_resync_rsp). A Hub whose worker does not answer within RESYNC_TIMEOUT is
+   given a new worker, which sets up the recorded nodes without registering them with the NMS again.
+
+From then on buffered events are appended to the log every EVENT_LOG_FLUSH_INTERVAL seconds, and the log is compacted
+once EVENT_LOG_COMPACT_EVENTS events have been appended. On shutdown the workers are left running for the next
+controller.
+
+Usage:
+    recovery = Recovery(settings.EVENT_LOG_PATH)
+    await recovery.replay()
+    worker_ctrl.setup_zmq(app, ..., ipc_id=recovery.ipc_id)
+    recovery.start()
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from src.config import settings
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import APState, HubState, RecoveryStats, RTState
+from src.controller.event_log import event_log, iter_log
+from src.controller.managers import HubManager
+from src.controller.snapshot import ColumnDecoder, hub_record, network_record, snapshot_header
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import Address, APCredentials
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def compact() -> None:
+    """
+    Rewrite the event log as a snapshot of the current state, preceded by the controller's ipc socket ID.
+    """
+    lines = [json.dumps(snapshot_header()), json.dumps({"type": "controller", "ipc_id": worker_ctrl.ipc_id})]
+    for net in simulator.children.values():
+        lines.append(json.dumps(network_record(net)))
+        lines.extend(json.dumps(hub_record(hub)) for hub in net.children.values())
+    event_log.rewrite(lines)
+    logging.info(f"Compacted event log {event_log.path} to {len(lines)} records")
+
+
+def all_hubs() -> list[HubManager]:
+    """
+    Returns:
+        list[HubManager]: Every Hub in every Network.
+    """
+    return [hub for net in simulator.children.values() for hub in net.children.values()]
+
+
+class Recovery:
+    """
+    Rebuilds the topology from the event log and reattaches to the hub workers, then keeps the log up to date.
+
+    Args:
+        path (str | Path): The event log file.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.ipc_id: int | None = None  # ipc socket ID of the controller that wrote the log
+        self.replayed = self.skipped = 0
+        self.reattached = self.restarted = self.pending = 0
+        self._decoder: ColumnDecoder | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def stats(self) -> RecoveryStats:
+        """
+        Returns:
+            RecoveryStats: Progress of the recovery, and the state of the log.
+        """
+        return RecoveryStats(
+            enabled=event_log.enabled,
+            events_replayed=self.replayed,
+            events_skipped=self.skipped,
+            hubs_reattached=self.reattached,
+            hubs_restarted=self.restarted,
+            hubs_pending=self.pending,
+            events_since_compaction=event_log.events,
+        )
+
+    async def replay(self) -> None:
+        """
+        Rebuild the topology recorded in the log, if there is one. Events that cannot be applied (e.g. for a node
+        whose creation was never flushed to the log) are counted and skipped.
+        """
+        if not self.path.exists():
+            logging.info(f"No event log at {self.path}: starting empty")
+            return
+        for record in iter_log(self.path):
+            self.replayed += 1
+            try:
+                await self._apply(record)
+            except (HTTPException, KeyError, ValueError, IndexError) as e:
+                self.skipped += 1
+                logging.debug(f"Skipping event {record}: {e!r}")
+        hubs = all_hubs()
+        rts = sum(hub.store.num_rts() for hub in hubs)
+        logging.info(
+            f"Replayed {self.replayed} events from {self.path} ({self.skipped} skipped): "
+            f"{len(simulator.children)} networks, {len(hubs)} hubs, {rts} RTs"
+        )
+
+    async def _apply(self, record: dict) -> None:
+        """
+        Apply one log record.
+        """
+        address = Address(**{key: record[key] for key in ("net", "hub", "ap", "rt") if key in record})
+        match record["type"]:
+            case "snapshot":
+                self._decoder = ColumnDecoder(record)
+            case "controller":
+                self.ipc_id = record["ipc_id"]
+            case "network":
+                simulator.restore_network(record["index"], record["csi"], record["csni"])
+            case "hub":
+                self._load_hub(record)
+            case "add_hub":
+                simulator.get_network(address.net).create_hub(address.hub)
+            case "hub_state" | "ap_state" | "rt_state" | "heartbeat":
+                self._apply_state(address, record)
+            case "add_ap":
+                simulator.get_node(address.hub_address).create_ap(address.ap, record["heartbeat"], record["azimuth"])
+            case "add_rts":
+                simulator.get_node(address.parent).create_rts(address.rt, record["heartbeat"], record["count"])
+            case "remove":
+                await self._remove(address)
+            case kind:
+                raise ValueError(f"Unknown event type {kind!r}")
+
+    @staticmethod
+    def _apply_state(address: Address, record: dict) -> None:
+        """
+        Apply a change to the state of a node: a "hub_state", "ap_state", "rt_state" or "heartbeat" event.
+        """
+        hub = simulator.get_node(address.hub_address)
+        match record["type"]:
+            case "hub_state":
+                hub.set_state(HubState(record["state"]))
+            case "ap_state":
+                credentials = record.get("credentials")
+                credentials = APCredentials(**credentials) if credentials else None
+                hub.set_ap_state(address.ap, APState(record["state"]), credentials)
+            case "rt_state":
+                hub.set_rt_state(address.ap, address.rt, RTState(record["state"]))
+            case "heartbeat":
+                rts = {int(ap): indices for ap, indices in record["rts"].items()}
+                hub.set_heartbeat(record["seconds"], record["aps"], rts)
+
+    @staticmethod
+    async def _remove(address: Address) -> None:
+        """
+        Apply a "remove" event, for an AP, a Hub or a Network. The NMS already saw it before the restart.
+        """
+        if address.ap is not None:
+            await simulator.get_node(address.hub_address).remove_ap(address.ap, deregister=False)
+        elif address.hub is not None:
+            await simulator.get_network(address.net).remove_hub(address.hub, deregister=False)
+        else:
+            await simulator.remove_network(address.net, deregister=False)
+
+    def _load_hub(self, record: dict) -> None:
+        """
+        Apply a snapshot Hub record, replacing the Hub's APs and RTs.
+        """
+        if self._decoder is None:
+            raise ValueError("Hub record before the snapshot header")
+        net = simulator.get_network(record["net"])
+        hub = net.children.get(record["index"]) or net.create_hub(record["index"])
+        hub.set_state(HubState(record["state"]))
+        hub.load_nodes(*self._decoder.decode_hub(record))
+
+    def start(self) -> None:
+        """
+        Start recording events, compacting what has been replayed, then reattach to the workers in the background.
+        Call once the ZeroMQ sockets are set up and the listener is running.
+        """
+        event_log.open(self.path)
+        compact()
+        self._tasks = [asyncio.create_task(self.reattach()), asyncio.create_task(self.maintain_log())]
+
+    def stop(self) -> None:
+        """
+        Stop the background tasks, write out the log, and leave the workers running for the next controller.
+        """
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        event_log.close()
+        for hub in all_hubs():
+            hub.detach_worker()
+
+    async def reattach(self) -> None:
+        """
+        Reattach to every recovered Hub's worker, replacing those that do not answer.
+        """
+        hubs = all_hubs()
+        self.pending = len(hubs)
+        restart_slots = asyncio.Semaphore(settings.SCENARIO_MAX_CONCURRENT_HUBS)
+        await asyncio.gather(*(self._reattach_hub(hub, restart_slots) for hub in hubs))
+        logging.info(f"Recovery complete: {self.reattached} hubs reattached, {self.restarted} restarted")
+
+    async def _reattach_hub(self, hub: HubManager, restart_slots: asyncio.Semaphore) -> None:
+        """
+        Reattach to one Hub's worker, or start a new one and have it set up the Hub's nodes.
+        """
+        try:
+            if await hub.reattach(settings.RESYNC_TIMEOUT):
+                self.reattached += 1
+            else:
+                logging.warning(f"Hub {hub.address.tag} worker did not answer: starting a new one")
+                async with restart_slots:
+                    await hub.start_worker()
+                    await hub.replay_nodes()
+                self.restarted += 1
+            await hub.tracker.wait()  # For anything resent to the worker
+            hub.start_heartbeats()
+        except Exception:
+            logging.error(f"Failed to recover hub {hub.address.tag}", exc_info=True)
+        finally:
+            self.pending -= 1
+
+    async def maintain_log(self) -> None:
+        """
+        Periodically append buffered events to the log, compacting it once it has grown enough.
+        """
+        while True:
+            await asyncio.sleep(settings.EVENT_LOG_FLUSH_INTERVAL)
+            if event_log.events >= settings.EVENT_LOG_COMPACT_EVENTS:
+                compact()
+            else:
+                event_log.flush()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,65 @@
+"""
+Bulk action API routes: select nodes across a subtree by level, state, index or percentage, and act on them (see
+src.controller.selection).
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+import logging
+from typing import Annotated
+
+from fastapi import APIRouter, Body
+
+from src.controller.ctrl_api import ActionRequest, ActionResult, Selection, SelectionSummary
+from src.controller.selection import select, send_action
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+action_router = APIRouter(prefix="/action", tags=["Bulk Actions"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+@action_router.post("/preview")
+async def preview_selection(req: Annotated[Selection, Body(description="Nodes to select")]) -> SelectionSummary:
+    """
+    Make a selection without acting on it, to see how many nodes it picks. Pass the seed reported back in a later
+    request to pick the same nodes.
+
+    Args:
+        req (Selection): The selection.
+
+    Returns:
+        SelectionSummary: What the selection picked.
+    """
+    return select(req).summary()
+
+
+@action_router.post("/")
+async def apply_action(
+    req: Annotated[ActionRequest, Body(description="Action and the nodes to apply it to")],
+) -> ActionResult:
+    """
+    Apply an action to the nodes of a selection. The hub workers are sent one command each, naming the nodes to act on.
+
+    Args:
+        req (ActionRequest): The action and selection.
+
+    Returns:
+        ActionResult: What the selection picked, and the commands sent.
+    """
+    picked = select(req)
+    commands = send_action(
+        picked, req.action, alarm=req.alarm, storm=req.storm, heartbeat_seconds=req.heartbeat_seconds
+    )
+    logging.info(f"{req.action} sent to {len(picked)} {req.target} nodes in {commands} commands")
+    return ActionResult(**picked.summary().model_dump(), action=req.action, commands=commands)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,36 @@
+"""
+Host agent API routes.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+from fastapi import APIRouter
+
+from src.controller.agents import agents
+from src.controller.ctrl_api import AgentStatus
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+agent_router = APIRouter(prefix="/agent", tags=["Agents"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+@agent_router.get("/")
+async def list_agents() -> list[AgentStatus]:
+    """
+    List the host agents that have registered, with their capacity, the hubs placed on them, and whether they are up.
+
+    Returns:
+        list[AgentStatus]: One entry per agent, by name.
+    """
+    return agents.status()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -8,10 +8,12 @@ AP Management API routes.
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Path
+from fastapi import APIRouter, Body, Path, Query, Request, Response
 from starlette.status import HTTP_202_ACCEPTED
 
-from src.controller.ctrl_api import APCreateRequest, APRead, Result
+from src.controller.ctrl_api import APCreateRequest, APRead, ListQuery, TeardownResult
+from src.controller.listing import list_response
+from src.controller.read_cache import read_cache
 from src.controller.worker_ctrl import simulator
 from src.worker.worker_api import Address
 
@@ -51,46 +53,54 @@ async def create_ap(
     return ap_obj
 
 
-@ap_router.get("/")
+@ap_router.get("/", response_model=dict[int, APRead])
 async def list_aps(
+    request: Request,
     network_idx: Annotated[int, Path(description="Network index")],
     hub_idx: Annotated[int, Path(description="Hub index")],
-) -> dict[int, APRead]:
+    query: Annotated[ListQuery, Query()],
+) -> Response:
     """
-    List all APs in a Hub.
+    List the APs in a Hub, a page at a time (see src.controller.listing). Cached until anything in the Hub changes.
 
     Args:
+        request (Request): The incoming request, for caching.
         network_idx (int): Index of the network.
         hub_idx (int): Index of the Hub.
+        query (ListQuery): Pagination, projection and format.
 
     Returns:
-        dict[int, APManager]: Dictionary of APManagers keyed by AP ID.
+        Response: APRead entries keyed by AP index, or one per line.
     """
     address = Address(net=network_idx, hub=hub_idx)
     hub = simulator.get_node(address)
-    logging.info(f"Listing all {len(hub.children)} APs for hub {address}")
-    return hub.children
+    logging.info(f"Listing {len(hub.store.aps)} APs for hub {address.tag} from {query.start}")
+    return read_cache.respond_list(
+        request, hub, lambda: list_response(hub.store.aps.indices(query.start), hub.get_ap, APRead, query)
+    )
 
 
-@ap_router.get("/{idx}")
+@ap_router.get("/{idx}", response_model=APRead)
 async def get_ap(
+    request: Request,
     network_idx: Annotated[int, Path(description="Network index")],
     hub_idx: Annotated[int, Path(description="Hub index")],
     idx: Annotated[int, Path(description="AP index")],
-) -> APRead:
+) -> Response:
     """
-    Get status for a single AP.
+    Get status for a single AP. Cached until the AP or any of its RTs changes.
 
     Args:
+        request (Request): The incoming request, for caching.
         network_idx (int): Index of the network.
         hub_idx (int): Index of the Hub.
         idx (int): Index of the AP.
 
     Returns:
-        APManager: The APManager instance.
+        Response: The AP, as APRead.
     """
     address = Address(net=network_idx, hub=hub_idx, ap=idx)
-    return simulator.get_node(address)
+    return read_cache.respond(request, simulator.get_node(address), APRead)
 
 
 @ap_router.delete("/{idx}")
@@ -98,23 +108,26 @@ async def delete_ap(
     network_idx: Annotated[int, Path(description="Network index")],
     hub_idx: Annotated[int, Path(description="Hub index")],
     idx: Annotated[int, Path(description="AP index")],
-) -> Result:
+    deregister: Annotated[bool, Query(description="Remove the nodes from the NMS too")] = True,
+) -> TeardownResult:
     """
-    Stop and remove an AP and all underlying RTs.
+    Stop and remove an AP and all underlying RTs. The hub worker stops their heartbeats, drops them and removes them
+    from the NMS.
 
     Args:
         network_idx (int): Index of the network.
         hub_idx (int): Index of the Hub.
         idx (int): Index of the AP.
+        deregister (bool): Whether to remove the AP and RTs from the NMS.
 
     Returns:
-        Result: Result message.
+        TeardownResult: Result message, and what was torn down.
     """
     address = Address(net=network_idx, hub=hub_idx)
     hub = simulator.get_node(address)
-    await hub.remove_ap(idx)
-    logging.info(f"Deleted AP {idx} from hub {hub.address}")
-    return Result(message=f"AP {idx} deleted")
+    result = await hub.remove_ap(idx, deregister)
+    logging.info(f"Deleted AP {idx} from hub {hub.address}: {result.stats}")
+    return result
 
 
 #######################################################################################################################
@@ -8,10 +8,12 @@ Hub Management API routes.
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Path
+from fastapi import APIRouter, Body, Path, Query, Request, Response
 from starlette.status import HTTP_201_CREATED
 
-from src.controller.ctrl_api import HubCreateRequest, HubRead, Result
+from src.controller.ctrl_api import HubCreateRequest, HubRead, ListQuery, TeardownResult
+from src.controller.listing import list_response, sorted_after
+from src.controller.read_cache import read_cache
 from src.controller.worker_ctrl import simulator
 
 #######################################################################################################################
@@ -45,61 +47,75 @@ async def create_hub(
     return hub
 
 
-@hub_router.get("/")
+@hub_router.get("/", response_model=dict[int, HubRead])
 async def list_hubs(
+    request: Request,
     network_idx: Annotated[int, Path(description="Network index")],
-) -> dict[int, HubRead]:
+    query: Annotated[ListQuery, Query()],
+) -> Response:
     """
-    List all Hubs in a network.
+    List the Hubs in a network, a page at a time (see src.controller.listing). Cached until anything in the network
+    changes.
 
     Args:
+        request (Request): The incoming request, for caching.
         network_idx (int): Index of the network.
+        query (ListQuery): Pagination, projection and format.
 
     Returns:
-        dict[int, HubManager]: Dictionary of HubManagers keyed by Hub ID.
+        Response: HubRead entries keyed by Hub index, or one per line.
     """
     network = simulator.get_network(network_idx)
-    logging.info(f"Listing all {len(network.children)} Hubs for network {network_idx}")
-    return network.get_hubs()
+    logging.info(f"Listing {len(network.children)} Hubs for network {network_idx} from {query.start}")
+    return read_cache.respond_list(
+        request,
+        network,
+        lambda: list_response(sorted_after(network.children, query), network.children.__getitem__, HubRead, query),
+    )
 
 
-@hub_router.get("/{idx}")
+@hub_router.get("/{idx}", response_model=HubRead)
 async def get_hub(
+    request: Request,
     network_idx: Annotated[int, Path(description="Network index")],
     idx: Annotated[int, Path(description="Hub index")],
-) -> HubRead:
+) -> Response:
     """
-    Get status for a single Hub.
+    Get status for a single Hub. Cached until anything in the Hub changes.
 
     Args:
+        request (Request): The incoming request, for caching.
         network_idx (int): Index of the network.
         idx (int): Index of the Hub.
 
     Returns:
-        HubManager: The HubManager instance.
+        Response: The Hub, as HubRead.
     """
-    return simulator.get_network(network_idx).get_hub(idx)
+    return read_cache.respond(request, simulator.get_network(network_idx).get_hub(idx), HubRead)
 
 
 @hub_router.delete("/{idx}")
 async def delete_hub(
     network_idx: Annotated[int, Path(description="Network index")],
     idx: Annotated[int, Path(description="Hub index")],
-) -> Result:
+    deregister: Annotated[bool, Query(description="Remove the nodes from the NMS too")] = True,
+) -> TeardownResult:
     """
-    Stop and remove a Hub and all underlying APs and RTs.
+    Stop and remove a Hub and all underlying APs and RTs. The hub worker stops their heartbeats, drops them and removes
+    them from the NMS before it is stopped.
 
     Args:
         network_idx (int): Index of the network.
         idx (int): Index of the Hub.
+        deregister (bool): Whether to remove the Hub, APs and RTs from the NMS.
 
     Returns:
-        Result: Result message.
+        TeardownResult: Result message, and what was torn down.
     """
     network = simulator.get_network(network_idx)
-    await network.remove_hub(idx)
-    logging.info(f"Deleted Hub {idx} from network {network_idx}")
-    return Result(message=f"Hub {idx} deleted")
+    result = await network.remove_hub(idx, deregister)
+    logging.info(f"Deleted Hub {idx} from network {network_idx}: {result.stats}")
+    return result
 
 
 #######################################################################################################################
@@ -0,0 +1,155 @@
+"""
+Background job API routes.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+import logging
+from typing import Annotated
+
+from fastapi import APIRouter, Body, HTTPException, Path
+from starlette.status import HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND, HTTP_409_CONFLICT
+
+from src.controller.ctrl_api import APCreateRequest, HubCreateRequest, JobProgress, NetworkCreateRequest
+from src.controller.jobs import APJob, HubJob, Job, NetworkJob, job_runner
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import Address
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+job_router = APIRouter(prefix="/job", tags=["Jobs"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def get_job(job_id: str) -> Job:
+    """
+    Look up a job.
+
+    Args:
+        job_id (str): Job ID.
+
+    Returns:
+        Job: The job.
+
+    Raises:
+        HTTPException: If there is no such job.
+    """
+    job = job_runner.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@job_router.post("/network", status_code=HTTP_202_ACCEPTED)
+async def create_network_job(
+    req: Annotated[NetworkCreateRequest, Body(description="Network creation request")],
+) -> JobProgress:
+    """
+    Start creating a Network (optionally with initial Hubs, APs and RTs) in the background. Poll GET /job/{job_id}
+    for progress.
+
+    Args:
+        req (NetworkCreateRequest): Network creation request body.
+
+    Returns:
+        JobProgress: The initial progress of the job, including its ID.
+    """
+    job = job_runner.start(NetworkJob(job_runner.next_id(), req))
+    return job.progress()
+
+
+@job_router.post("/network/{network_idx}/hub", status_code=HTTP_202_ACCEPTED)
+async def create_hub_job(
+    network_idx: Annotated[int, Path(description="Network index")],
+    req: Annotated[HubCreateRequest, Body(description="Hub creation request")],
+) -> JobProgress:
+    """
+    Start creating a Hub (optionally with initial APs and RTs) in the background. Poll GET /job/{job_id} for
+    progress.
+
+    Args:
+        network_idx (int): Index of the network.
+        req (HubCreateRequest): Hub creation request body.
+
+    Returns:
+        JobProgress: The initial progress of the job, including its ID.
+    """
+    network = simulator.get_network(network_idx)
+    job = job_runner.start(HubJob(job_runner.next_id(), network, req))
+    return job.progress()
+
+
+@job_router.post("/network/{network_idx}/hub/{hub_idx}/ap", status_code=HTTP_202_ACCEPTED)
+async def create_ap_job(
+    network_idx: Annotated[int, Path(description="Network index")],
+    hub_idx: Annotated[int, Path(description="Hub index")],
+    req: Annotated[APCreateRequest, Body(description="AP creation request")],
+) -> JobProgress:
+    """
+    Start creating an AP (optionally with initial RTs) in the background. Poll GET /job/{job_id} for progress.
+
+    Args:
+        network_idx (int): Index of the network.
+        hub_idx (int): Index of the Hub.
+        req (APCreateRequest): AP creation request body.
+
+    Returns:
+        JobProgress: The initial progress of the job, including its ID.
+    """
+    hub = simulator.get_node(Address(net=network_idx, hub=hub_idx))
+    job = job_runner.start(APJob(job_runner.next_id(), hub, req))
+    return job.progress()
+
+
+@job_router.get("/")
+async def list_jobs() -> list[JobProgress]:
+    """
+    List all jobs, oldest first. Only the most recent finished jobs are kept.
+
+    Returns:
+        list[JobProgress]: The progress of each job.
+    """
+    return [job.progress() for job in job_runner.jobs.values()]
+
+
+@job_router.get("/{job_id}")
+async def get_job_progress(job_id: Annotated[str, Path(description="Job ID")]) -> JobProgress:
+    """
+    Get the progress of a job.
+
+    Args:
+        job_id (str): Job ID.
+
+    Returns:
+        JobProgress: Counts of the nodes created so far, throughput, ETA, phase timings and any errors.
+    """
+    return get_job(job_id).progress()
+
+
+@job_router.delete("/{job_id}")
+async def cancel_job(job_id: Annotated[str, Path(description="Job ID")]) -> JobProgress:
+    """
+    Cancel a queued or running job. Nodes it has already created are left in place.
+
+    Args:
+        job_id (str): Job ID.
+
+    Returns:
+        JobProgress: The final progress of the job.
+    """
+    job = get_job(job_id)
+    if not job_runner.cancel(job):
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail=f"Job {job_id} has already finished")
+    await job.task
+    logging.info(f"Cancelled job {job_id}")
+    return job.progress()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
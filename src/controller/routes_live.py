@@ -0,0 +1,110 @@
+"""
+Live status streaming routes, over WebSocket or Server-Sent Events (see src.controller.live).
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.status import HTTP_400_BAD_REQUEST, WS_1008_POLICY_VIOLATION
+
+from src.controller.ctrl_api import LiveQuery
+from src.controller.live import live_status
+from src.controller.worker_ctrl import simulator
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+live_router = APIRouter(prefix="/live", tags=["Live Status"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def live_root(query: LiveQuery) -> Any:
+    """
+    Find the root of the subtree a live status query asks for.
+
+    Args:
+        query (LiveQuery): The query.
+
+    Returns:
+        Any: The simulator, a NetworkManager, a HubManager or an APManager.
+
+    Raises:
+        HTTPException: If the query skips a level, or there is no such node.
+    """
+    try:
+        address = query.address
+    except ValidationError as err:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="hub needs net, and ap needs hub") from err
+    return simulator if address.net is None else simulator.get_node(address)
+
+
+@live_router.websocket("/ws")
+async def live_ws(websocket: WebSocket, query: Annotated[LiveQuery, Query()]) -> None:
+    """
+    Stream the status of a subtree over a WebSocket: a snapshot, then batches of deltas, as JSON StatusMessages.
+
+    Args:
+        websocket (WebSocket): The connection.
+        query (LiveQuery): The subtree to follow.
+    """
+    try:
+        root = live_root(query)
+    except HTTPException as e:
+        await websocket.close(code=WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    await websocket.accept()
+
+    async def send() -> None:
+        with live_status.subscription(root, query.rts) as sub:
+            async for message in sub.messages():
+                await websocket.send_text(message.model_dump_json(exclude_none=True))
+
+    sender = asyncio.create_task(send())
+    try:
+        while not sender.done():  # Anything the client sends is ignored; this is to notice it going away
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        logging.debug(f"Live status subscriber for {query.address.tag} disconnected")
+    finally:
+        sender.cancel()
+        with contextlib.suppress(Exception, asyncio.CancelledError):
+            await sender
+
+
+@live_router.get("/sse")
+async def live_sse(query: Annotated[LiveQuery, Query()]) -> StreamingResponse:
+    """
+    Stream the status of a subtree as Server-Sent Events: a "snapshot" event, then "delta" events, each with a JSON
+    StatusMessage as its data.
+
+    Args:
+        query (LiveQuery): The subtree to follow.
+
+    Returns:
+        StreamingResponse: The event stream, which runs until the client disconnects.
+    """
+    root = live_root(query)
+
+    async def events() -> AsyncIterator[str]:
+        with live_status.subscription(root, query.rts) as sub:
+            async for message in sub.messages():
+                yield f"event: {message.kind}\ndata: {message.model_dump_json(exclude_none=True)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,94 @@
+"""
+Controller metrics API routes.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+from fastapi import APIRouter, Request
+
+from src.controller.ctrl_api import AlarmMetrics, NbapiPoolStats, ReadCacheStats, RecoveryStats, SupervisorStats
+from src.controller.nbapi import nbapi
+from src.controller.read_cache import read_cache
+from src.controller.recovery import all_hubs
+from src.controller.supervisor import supervisor
+from src.worker.worker_api import AlarmStats
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+@metrics_router.get("/nbapi")
+async def get_nbapi_stats() -> NbapiPoolStats:
+    """
+    Get request counts and connection pool utilisation for the controller's NBAPI client.
+
+    Returns:
+        NbapiPoolStats: The current pool metrics.
+    """
+    return nbapi.stats()
+
+
+@metrics_router.get("/recovery")
+async def get_recovery_stats(request: Request) -> RecoveryStats:
+    """
+    Get the progress of crash recovery (replaying the event log and reattaching to hub workers) and the state of the
+    event log.
+
+    Args:
+        request (Request): The incoming request, for the application's recovery state.
+
+    Returns:
+        RecoveryStats: The current recovery metrics.
+    """
+    recovery = request.app.state.recovery
+    if recovery is None:
+        return RecoveryStats(enabled=False)
+    return recovery.stats()
+
+
+@metrics_router.get("/read_cache")
+async def get_read_cache_stats() -> ReadCacheStats:
+    """
+    Get the size and hit rates of the cache of read responses.
+
+    Returns:
+        ReadCacheStats: The current cache metrics.
+    """
+    return read_cache.stats()
+
+
+@metrics_router.get("/alarms")
+async def get_alarm_stats() -> AlarmMetrics:
+    """
+    Get the counters of the hub workers' alarm engines, as last reported: alarms raised, cleared and active, events
+    sent to the NMS, and how quickly it answered.
+
+    Returns:
+        AlarmMetrics: The totals, and the counters of each hub.
+    """
+    hubs = {hub.address.tag: hub.alarm_stats for hub in all_hubs() if hub.alarm_stats is not None}
+    return AlarmMetrics(total=AlarmStats.combine(hubs.values()), hubs=hubs)
+
+
+@metrics_router.get("/supervisor")
+async def get_supervisor_stats() -> SupervisorStats:
+    """
+    Get how often the supervisor has replaced failed hub workers, how many attempts failed, and how long the hubs were
+    down.
+
+    Returns:
+        SupervisorStats: The totals, and the restarts of each hub.
+    """
+    return supervisor.stats()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -8,10 +8,12 @@ Network Management API routes.
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Path
+from fastapi import APIRouter, Body, Path, Query, Request, Response
 from starlette.status import HTTP_201_CREATED
 
-from src.controller.ctrl_api import NetworkCreateRequest, NetworkRead, Result
+from src.controller.ctrl_api import ListQuery, NetworkCreateRequest, NetworkRead, TeardownResult
+from src.controller.listing import list_response, sorted_after
+from src.controller.read_cache import read_cache
 from src.controller.worker_ctrl import simulator
 
 #######################################################################################################################
@@ -45,48 +47,63 @@ async def create_network(
     return net_mgr
 
 
-@network_router.get("/")
-async def list_networks() -> dict[int, NetworkRead]:
+@network_router.get("/", response_model=dict[int, NetworkRead])
+async def list_networks(request: Request, query: Annotated[ListQuery, Query()]) -> Response:
     """
-    List all Networks.
+    List Networks, a page at a time (see src.controller.listing). Cached until any Network changes.
+
+    Args:
+        request (Request): The incoming request, for caching.
+        query (ListQuery): Pagination, projection and format.
 
     Returns:
-        dict[int, NetworkManager]: Dictionary of NetworkManagers keyed by Network ID.
+        Response: NetworkRead entries keyed by Network index, or one per line.
     """
-    logging.info(f"Listing all {len(simulator.children)} Networks")
-    # result = {idx: NetworkRead.model_validate(net) for idx, net in simulator.children.items()}
-    return simulator.children
-
-
-@network_router.get("/{idx}")
-async def get_network(idx: Annotated[int, Path(description="Network index")]) -> NetworkRead:
+    logging.info(f"Listing {len(simulator.children)} Networks from {query.start}")
+    return read_cache.respond_list(
+        request,
+        simulator,
+        lambda: list_response(
+            sorted_after(simulator.children, query), simulator.children.__getitem__, NetworkRead, query
+        ),
+    )
+
+
+@network_router.get("/{idx}", response_model=NetworkRead)
+async def get_network(request: Request, idx: Annotated[int, Path(description="Network index")]) -> Response:
     """
-    Get status for a single Network.
+    Get status for a single Network. Cached until anything in the Network changes.
 
     Args:
+        request (Request): The incoming request, for caching.
         idx (int): Index of the Network.
 
     Returns:
-        NetworkManager: The NetworkManager instance.
+        Response: The Network, as NetworkRead.
     """
     network = simulator.get_network(idx)
-    return network
+    return read_cache.respond(request, network, NetworkRead)
 
 
 @network_router.delete("/{idx}")
-async def delete_network(idx: Annotated[int, Path(description="Network index")]) -> Result:
+async def delete_network(
+    idx: Annotated[int, Path(description="Network index")],
+    deregister: Annotated[bool, Query(description="Remove the nodes from the NMS too")] = True,
+) -> TeardownResult:
     """
-    Stop and remove a Network and all underlying Hubs, APs, and RTs.
+    Stop and remove a Network and all underlying Hubs, APs, and RTs. The Hubs are torn down side by side, each by its
+    worker, as for DELETE /network/{network_idx}/hub/{idx}.
 
     Args:
         idx (int): Index of the Network.
+        deregister (bool): Whether to remove the Hubs, APs and RTs from the NMS.
 
     Returns:
-        Result: Result message.
+        TeardownResult: Result message, and what was torn down.
     """
-    await simulator.remove_network(idx)
-    logging.info(f"Deleted Network {idx}")
-    return Result(message=f"Network {idx} deleted")
+    result = await simulator.remove_network(idx, deregister)
+    logging.info(f"Deleted Network {idx}: {result.stats}")
+    return result
 
 
 #######################################################################################################################
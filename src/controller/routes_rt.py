@@ -0,0 +1,87 @@
+"""
+RT API routes.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+import logging
+from typing import Annotated
+
+from fastapi import APIRouter, Path, Query, Request, Response
+
+from src.controller.ctrl_api import ListQuery, RTRead
+from src.controller.listing import list_response
+from src.controller.read_cache import read_cache
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import Address
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+rt_router = APIRouter(prefix="/network/{network_idx}/hub/{hub_idx}/ap/{ap_idx}/rt", tags=["RT Management"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+@rt_router.get("/", response_model=dict[int, RTRead])
+async def list_rts(
+    request: Request,
+    network_idx: Annotated[int, Path(description="Network index")],
+    hub_idx: Annotated[int, Path(description="Hub index")],
+    ap_idx: Annotated[int, Path(description="AP index")],
+    query: Annotated[ListQuery, Query()],
+) -> Response:
+    """
+    List the RTs on an AP, a page at a time (see src.controller.listing). Cached until the AP or any of its RTs
+    changes.
+
+    Args:
+        request (Request): The incoming request, for caching.
+        network_idx (int): Index of the network.
+        hub_idx (int): Index of the Hub.
+        ap_idx (int): Index of the AP.
+        query (ListQuery): Pagination, projection and format.
+
+    Returns:
+        Response: RTRead entries keyed by RT index, or one per line.
+    """
+    ap = simulator.get_node(Address(net=network_idx, hub=hub_idx, ap=ap_idx))
+    table = ap.hub.store.rts[ap_idx]
+    logging.info(f"Listing {len(table)} RTs for AP {ap.address.tag} from {query.start}")
+    return read_cache.respond_list(
+        request, ap, lambda: list_response(table.indices(query.start), ap.get_rt, RTRead, query)
+    )
+
+
+@rt_router.get("/{idx}", response_model=RTRead)
+async def get_rt(
+    request: Request,
+    network_idx: Annotated[int, Path(description="Network index")],
+    hub_idx: Annotated[int, Path(description="Hub index")],
+    ap_idx: Annotated[int, Path(description="AP index")],
+    idx: Annotated[int, Path(description="RT index")],
+) -> Response:
+    """
+    Get status for a single RT. Cached until its AP or any of the AP's RTs changes.
+
+    Args:
+        request (Request): The incoming request, for caching.
+        network_idx (int): Index of the network.
+        hub_idx (int): Index of the Hub.
+        ap_idx (int): Index of the AP.
+        idx (int): Index of the RT.
+
+    Returns:
+        Response: The RT, as RTRead.
+    """
+    return read_cache.respond(
+        request, simulator.get_node(Address(net=network_idx, hub=hub_idx, ap=ap_idx, rt=idx)), RTRead
+    )
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
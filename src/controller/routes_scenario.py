@@ -0,0 +1,95 @@
+"""
+Scenario loading API routes.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+import logging
+import tempfile
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Path, Request
+from starlette.status import HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND
+
+from src.controller.ctrl_api import ScenarioProgress
+from src.controller.scenario import scenario_loads, start_scenario
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+scenario_router = APIRouter(prefix="/scenario", tags=["Scenario Loading"])
+
+CONTENT_TYPE_FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/yaml": "yaml",
+    "application/x-yaml": "yaml",
+    "text/yaml": "yaml",
+}
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+async def spool_body(request: Request, suffix: str) -> str:
+    """
+    Write a request body to a temporary file as it arrives, so that a large upload is never held in memory.
+
+    Args:
+        request (Request): The request.
+        suffix (str): File name suffix.
+
+    Returns:
+        str: Path of the file. The caller is responsible for deleting it.
+    """
+    with tempfile.NamedTemporaryFile("wb", suffix=suffix, prefix="upload-", delete=False) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+    return spool.name
+
+
+@scenario_router.post("/", status_code=HTTP_202_ACCEPTED)
+async def load_scenario(request: Request) -> ScenarioProgress:
+    """
+    Start loading a scenario file, sent as the request body.
+
+    The format is taken from the Content-Type: application/json, application/x-ndjson (JSON Lines) or YAML (the
+    default). The body is spooled to a temporary file as it arrives and then loaded in the background; poll
+    GET /scenario/{load_id} for progress.
+
+    Args:
+        request (Request): The request, whose body is the scenario file.
+
+    Returns:
+        ScenarioProgress: The initial progress of the load, including its ID.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = CONTENT_TYPE_FORMATS.get(content_type, "yaml")
+    loader = start_scenario(await spool_body(request, f".{fmt}"), fmt, delete_after=True)
+    logging.info(f"Accepted scenario load {loader.load_id} ({fmt})")
+    return loader.progress()
+
+
+@scenario_router.get("/{load_id}")
+async def get_scenario_progress(load_id: Annotated[str, Path(description="Scenario load ID")]) -> ScenarioProgress:
+    """
+    Get the progress of a scenario load.
+
+    Args:
+        load_id (str): Scenario load ID.
+
+    Returns:
+        ScenarioProgress: Counts of the nodes created so far, and any errors.
+    """
+    loader = scenario_loads.get(load_id)
+    if loader is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Scenario load not found")
+    return loader.progress()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,83 @@
+"""
+Snapshot export and restore API routes.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+import logging
+import time
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.responses import StreamingResponse
+from starlette.status import HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND
+
+from src.controller.ctrl_api import ScenarioProgress
+from src.controller.routes_scenario import spool_body
+from src.controller.scenario import scenario_loads
+from src.controller.snapshot import SnapshotLoader, iter_snapshot, start_restore
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+snapshot_router = APIRouter(prefix="/snapshot", tags=["Snapshots"])
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+@snapshot_router.get("/")
+async def export_snapshot() -> StreamingResponse:
+    """
+    Stream a snapshot of every Network, Hub, AP and RT, with their indices, heartbeat settings and registration state.
+
+    Returns:
+        StreamingResponse: The snapshot, as JSON Lines.
+    """
+    filename = time.strftime("snapshot-%Y%m%d-%H%M%S.jsonl")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(iter_snapshot(), media_type="application/x-ndjson", headers=headers)
+
+
+@snapshot_router.post("/", status_code=HTTP_202_ACCEPTED)
+async def restore_snapshot(request: Request) -> ScenarioProgress:
+    """
+    Start restoring a snapshot, sent as the request body, on top of the current topology.
+
+    Nodes that were registered when the snapshot was taken are not registered with the NMS again. The indices in the
+    snapshot must be free: a Network or Hub whose index is already in use fails to restore. Poll
+    GET /snapshot/{load_id} for progress.
+
+    Args:
+        request (Request): The request, whose body is the snapshot.
+
+    Returns:
+        ScenarioProgress: The initial progress of the restore, including its ID.
+    """
+    loader = start_restore(await spool_body(request, ".jsonl"), delete_after=True)
+    logging.info(f"Accepted snapshot restore {loader.load_id}")
+    return loader.progress()
+
+
+@snapshot_router.get("/{load_id}")
+async def get_restore_progress(load_id: Annotated[str, Path(description="Snapshot restore ID")]) -> ScenarioProgress:
+    """
+    Get the progress of a snapshot restore.
+
+    Args:
+        load_id (str): Snapshot restore ID.
+
+    Returns:
+        ScenarioProgress: Counts of the nodes restored so far, and any errors.
+    """
+    loader = scenario_loads.get(load_id)
+    if not isinstance(loader, SnapshotLoader):
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Snapshot restore not found")
+    return loader.progress()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
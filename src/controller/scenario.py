@@ -0,0 +1,339 @@
+"""
+scenario.py
+
+Bulk creation of Networks, Hubs, APs and RTs from a scenario file.
+
+A scenario file is a stream of Network records (see src.controller.ctrl_api.NetworkSpec). Each record either gives
+counts and defaults for its Hubs, APs and RTs, or lists explicit Hub and AP groups. Supported formats:
+
+- YAML (`.yaml`/`.yml`): one record per document (`---` separated), or documents holding a list of records or a
+  `networks:` list.
+- JSON Lines (`.jsonl`/`.ndjson`): one record per line.
+- JSON (`.json`): a record, a list of records or a `{"networks": [...]}` object. This is loaded in one go, so use one
+  of the formats above for very large explicit scenarios.
+
+The file is read one record at a time, and each record's Hubs and APs are generated lazily as capacity frees up. The
+request tree for the whole scenario is therefore never built in memory. Creation is pipelined: up to
+SCENARIO_MAX_CONCURRENT_HUBS Hubs and SCENARIO_MAX_CONCURRENT_APS APs are in progress at once. While one Hub's
+worker is starting, the APs of others are registering. AP creation is also rate-limited to SCENARIO_AP_RATE per
+second.
+
+Usage:
+    loader = start_scenario("scenario.yaml")
+    ...
+    loader.progress()
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import yaml
+
+from src.config import settings
+from src.controller.ctrl_api import (
+    APCreateRequest,
+    HubCreateRequest,
+    HubSpec,
+    NetworkSpec,
+    ScenarioProgress,
+    ScenarioState,
+)
+from src.controller.managers import HubManager, NetworkManager, ap_requests
+from src.controller.worker_ctrl import simulator
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+MAX_ERRORS = 20  # Number of recent error messages kept in the progress report
+
+scenario_loads: dict[str, "ScenarioLoader"] = {}  # Load ID -> loader, for progress reporting
+_load_ids = itertools.count()
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def scenario_format(path: str | Path) -> str:
+    """
+    Work out the format of a scenario file from its extension.
+
+    Args:
+        path (str | Path): Path of the scenario file.
+
+    Returns:
+        str: "yaml", "json" or "jsonl".
+    """
+    match Path(path).suffix.lower():
+        case ".json":
+            return "json"
+        case ".jsonl" | ".ndjson":
+            return "jsonl"
+        case _:
+            return "yaml"
+
+
+def iter_records(path: str | Path, fmt: str) -> Iterator[dict]:
+    """
+    Read Network records from a scenario file one at a time.
+
+    Args:
+        path (str | Path): Path of the scenario file.
+        fmt (str): "yaml", "json" or "jsonl".
+
+    Yields:
+        dict: One raw Network record.
+    """
+    with open(path, encoding="utf-8") as stream:
+        match fmt:
+            case "jsonl":
+                docs = (json.loads(line) for line in stream if line.strip())
+            case "json":
+                docs = iter([json.load(stream)])
+            case _:
+                docs = yaml.load_all(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        for doc in docs:
+            if isinstance(doc, dict) and "networks" in doc:
+                yield from doc["networks"]
+            elif isinstance(doc, list):
+                yield from doc
+            elif doc is not None:
+                yield doc
+
+
+def iter_hub_specs(spec: NetworkSpec) -> Iterator[HubSpec]:
+    """
+    Expand a Network record into one spec per Hub.
+
+    Args:
+        spec (NetworkSpec): The Network record.
+
+    Yields:
+        HubSpec: One spec per Hub, with count 1.
+    """
+    if not spec.hub_groups:
+        default = HubSpec(
+            num_aps=spec.aps_per_hub,
+            num_rts_per_ap=spec.rts_per_ap,
+            ap_heartbeat_seconds=spec.ap_heartbeat_seconds,
+            rt_heartbeat_seconds=spec.rt_heartbeat_seconds,
+        )
+        yield from itertools.repeat(default, spec.hubs)
+        return
+    for group in spec.hub_groups:
+        yield from itertools.repeat(group, group.count)
+
+
+def iter_ap_requests(spec: HubSpec) -> Iterator[APCreateRequest]:
+    """
+    Expand a Hub spec into one creation request per AP.
+
+    Args:
+        spec (HubSpec): The Hub spec.
+
+    Yields:
+        APCreateRequest: One request per AP.
+    """
+    if not spec.ap_groups:
+        yield from ap_requests(spec)
+        return
+    for group in spec.ap_groups:
+        yield from itertools.repeat(group, group.count)
+
+
+class RateLimiter:
+    """
+    Spaces out callers of `wait` to at most `rate` per second.
+
+    Args:
+        rate (float): Maximum rate per second. Zero or less means unlimited.
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        """
+        Wait for the next free slot.
+        """
+        if not self._interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ScenarioLoader:
+    """
+    Creates everything described by one scenario file, tracking progress as it goes.
+
+    Args:
+        load_id (str): ID of this load.
+        path (str | Path): Path of the scenario file.
+        fmt (str): "yaml", "json" or "jsonl".
+        delete_after (bool): Delete the file once the load has finished (e.g. for an uploaded file).
+    """
+
+    def __init__(self, load_id: str, path: str | Path, fmt: str, delete_after: bool = False):
+        self.path = Path(path)
+        self.fmt = fmt
+        self.delete_after = delete_after
+        self.load_id = load_id
+        self.task: asyncio.Task | None = None
+        self._progress = ScenarioProgress(load_id=load_id)
+        self._started = time.monotonic()
+        self._finished: float | None = None
+        self._hub_slots = asyncio.Semaphore(settings.SCENARIO_MAX_CONCURRENT_HUBS)
+        self._ap_slots = asyncio.Semaphore(settings.SCENARIO_MAX_CONCURRENT_APS)
+        self._rate = RateLimiter(settings.SCENARIO_AP_RATE)
+
+    def progress(self) -> ScenarioProgress:
+        """
+        Returns:
+            ScenarioProgress: A snapshot of the load's progress.
+        """
+        end = self._finished if self._finished is not None else time.monotonic()
+        return self._progress.model_copy(update={"elapsed_seconds": end - self._started}, deep=True)
+
+    def _error(self, message: str) -> None:
+        logging.error(f"Scenario {self._progress.load_id}: {message}")
+        self._progress.errors = [*self._progress.errors[-(MAX_ERRORS - 1) :], message]
+
+    @staticmethod
+    def _spawn(tasks: set[asyncio.Task], coro) -> None:
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def _finish(self) -> None:
+        self._finished = time.monotonic()
+        if self.delete_after:
+            with contextlib.suppress(OSError):
+                os.unlink(self.path)
+
+    async def run(self) -> None:
+        """
+        Read the scenario file and create everything in it.
+        """
+        progress = self._progress
+        hub_tasks: set[asyncio.Task] = set()
+        try:
+            for record in iter_records(self.path, self.fmt):
+                spec = NetworkSpec.model_validate(record)
+                progress.records += 1
+                net = await simulator.register_network(spec)
+                progress.networks += 1
+                for hub_spec in iter_hub_specs(spec):
+                    await self._hub_slots.acquire()
+                    self._spawn(hub_tasks, self._load_hub(net, hub_spec))
+                await asyncio.sleep(0)  # Let the file be read in step with creation rather than all up front
+            await asyncio.gather(*hub_tasks)
+            progress.state = ScenarioState.COMPLETED
+            logging.info(f"Scenario {progress.load_id} loaded: {self.progress()}")
+        except Exception as e:
+            for task in hub_tasks:
+                task.cancel()
+            progress.state = ScenarioState.FAILED
+            self._error(f"Load failed: {e}")
+        finally:
+            self._finish()
+
+    async def _load_hub(self, net: NetworkManager, spec: HubSpec) -> None:
+        """
+        Create one Hub, then its APs, then start its heartbeats.
+        """
+        try:
+            hub = await net.add_hub(
+                HubCreateRequest(
+                    num_aps=0,
+                    ap_heartbeat_seconds=spec.ap_heartbeat_seconds,
+                    rt_heartbeat_seconds=spec.rt_heartbeat_seconds,
+                )
+            )
+            self._progress.hubs += 1
+            ap_tasks = []
+            for ap_req in iter_ap_requests(spec):
+                await self._ap_slots.acquire()
+                await self._rate.wait()
+                ap_tasks.append(asyncio.create_task(self._load_ap(hub, ap_req)))
+            await asyncio.gather(*ap_tasks)
+            hub.start_heartbeats()
+        except Exception as e:
+            self._progress.failed += 1
+            self._error(f"Hub creation failed: {e}")
+        finally:
+            self._hub_slots.release()
+
+    async def _load_ap(self, hub: HubManager, req: APCreateRequest) -> None:
+        """
+        Create one AP and its RTs, waiting for the RTs to register.
+        """
+        try:
+            ap = await hub.add_ap(req)
+            self._progress.aps += 1
+            tracker = ap.tracker
+            self._progress.rts += tracker.succeeded
+            self._progress.failed += tracker.failed
+        except Exception as e:
+            self._progress.failed += 1
+            self._error(f"AP creation on hub {hub.address.tag} failed: {e}")
+        finally:
+            self._ap_slots.release()
+
+
+def next_load_id() -> str:
+    """
+    Returns:
+        str: A new load ID, unique within this controller.
+    """
+    return str(next(_load_ids))
+
+
+def start_load(loader: ScenarioLoader) -> ScenarioLoader:
+    """
+    Run a loader in the background, registering it for progress reporting.
+
+    Args:
+        loader (ScenarioLoader): The loader.
+
+    Returns:
+        ScenarioLoader: The running loader.
+    """
+    scenario_loads[loader.load_id] = loader
+    loader.task = asyncio.create_task(loader.run())
+    logging.info(f"Started {type(loader).__name__} {loader.load_id} from {loader.path}")
+    return loader
+
+
+def start_scenario(path: str | Path, fmt: str | None = None, delete_after: bool = False) -> ScenarioLoader:
+    """
+    Start loading a scenario file in the background.
+
+    Args:
+        path (str | Path): Path of the scenario file.
+        fmt (str | None): "yaml", "json" or "jsonl". Worked out from the file extension if not given.
+        delete_after (bool): Delete the file once the load has finished.
+
+    Returns:
+        ScenarioLoader: The running loader.
+    """
+    return start_load(ScenarioLoader(next_load_id(), path, fmt or scenario_format(path), delete_after))
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,298 @@
+"""
+selection.py
+
+Selection of the nodes a bulk action applies to, and the compact commands that carry the action to the hub workers.
+
+A selection (see src.controller.ctrl_api.Selection) names a subtree (a Network, a Hub or an AP), the level of node to
+act on (hub, ap or rt) and, optionally, the registration states to pick from. Of those candidates it then picks the
+ones with the given indices, a sample of a given percentage, or all of them.
+
+Candidates are gathered per parent straight from the state columns of the hub stores, without building a view per
+node. A sample is exactly round(percent * candidates / 100) of them, drawn uniformly without replacement by sampling
+positions in the run of all candidates (random.sample over a range costs time in proportion to the sample, not the
+range) and walking the parents once. The same seed picks the same nodes from the same tree.
+
+The picked nodes are grouped by hub, and each hub's worker is sent one NodeActionReq, whose AP and RT indices are
+NodeSets (runs or a bitmap), rather than a message per node.
+
+Usage:
+    picked = select(selection)
+    send_action(picked, NodeAction.START_HEARTBEAT)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import itertools
+import random
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import APState, HubState, NodeLevel, RTState, Selection, SelectionSummary
+from src.controller.managers import APManager, HubManager
+from src.controller.node_store import AP_STATE_CODES, RT_STATE_CODES
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import Address, NodeAction, NodeActionReq, NodeSet
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+SUMMARY_SAMPLE = 20  # Picked nodes listed in a SelectionSummary
+LEVEL_DEPTH = {NodeLevel.HUB: 1, NodeLevel.AP: 2, NodeLevel.RT: 3}  # Level -> depth below the Network
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class Picked:
+    """
+    The nodes picked by a selection: their indices grouped by parent, and how many candidates they were picked from.
+
+    Args:
+        target (NodeLevel): Level of the nodes.
+        parents (list[tuple[Address, list[int]]]): Address of each parent with picked children, and their indices in
+            ascending order.
+        candidates (int): Number of candidates.
+        seed (int | None): Seed of the sample, if one was drawn.
+    """
+
+    def __init__(self, target: NodeLevel, parents: list[tuple[Address, list[int]]], candidates: int, seed: int | None):
+        self.target = target
+        self.parents = parents
+        self.candidates = candidates
+        self.seed = seed
+        self.elapsed = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(indices) for _, indices in self.parents)
+
+    def addresses(self) -> Iterator[Address]:
+        """
+        Yields:
+            Address: The address of each node picked.
+        """
+        for parent, indices in self.parents:
+            for index in indices:
+                match self.target:
+                    case NodeLevel.HUB:
+                        yield Address(net=parent.net, hub=index)
+                    case NodeLevel.AP:
+                        yield Address(net=parent.net, hub=parent.hub, ap=index)
+                    case NodeLevel.RT:
+                        yield Address(net=parent.net, hub=parent.hub, ap=parent.ap, rt=index)
+
+    def commands(self, action: NodeAction, **params: Any) -> list[NodeActionReq]:
+        """
+        Build the commands that apply an action to the picked nodes: one per hub.
+
+        Args:
+            action (NodeAction): The action.
+            **params: Parameters of the action (the fields of NodeActionReq after `rts`).
+
+        Returns:
+            list[NodeActionReq]: The commands.
+        """
+        if self.target == NodeLevel.HUB:
+            return [
+                NodeActionReq(address=Address(net=parent.net, hub=hub), action=action, **params)
+                for parent, indices in self.parents
+                for hub in indices
+            ]
+        if self.target == NodeLevel.AP:
+            return [
+                NodeActionReq(address=parent, action=action, aps=NodeSet.of(aps), **params)
+                for parent, aps in self.parents
+            ]
+        return [
+            NodeActionReq(address=hub, action=action, rts={ap.ap: NodeSet.of(rts) for ap, rts in group}, **params)
+            for hub, group in itertools.groupby(self.parents, key=lambda entry: entry[0].hub_address)
+        ]
+
+    def summary(self) -> SelectionSummary:
+        """
+        Returns:
+            SelectionSummary: Counts, and the first few nodes picked.
+        """
+        hubs = {parent.hub_address for parent, _ in self.parents} if self.target != NodeLevel.HUB else None
+        return SelectionSummary(
+            candidates=self.candidates,
+            selected=len(self),
+            hubs=len(self) if hubs is None else len(hubs),
+            seed=self.seed,
+            sample=list(itertools.islice(self.addresses(), SUMMARY_SAMPLE)),
+            elapsed_ms=self.elapsed * 1000,
+        )
+
+
+def state_codes(target: NodeLevel, states: list[str] | None) -> frozenset | None:
+    """
+    Translate the states of a selection to what is held for nodes of its level: HubStates for hubs, else state codes.
+
+    Raises:
+        HTTPException: If a state is not one that nodes of the level can be in.
+    """
+    if states is None:
+        return None
+    enum, codes = {
+        NodeLevel.HUB: (HubState, None),
+        NodeLevel.AP: (APState, AP_STATE_CODES),
+        NodeLevel.RT: (RTState, RT_STATE_CODES),
+    }[target]
+    try:
+        members = [enum(state) for state in states]
+    except ValueError as err:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail=f"{target} states are {[str(state) for state in enum]}"
+        ) from err
+    return frozenset(members if codes is None else (codes[member] for member in members))
+
+
+def subtree_root(selection: Selection) -> Any:
+    """
+    Find the root of the subtree of a selection.
+
+    Returns:
+        Any: A NetworkManager, HubManager or APManager.
+
+    Raises:
+        HTTPException: If the subtree is malformed or does not exist, or is below the target level.
+    """
+    try:
+        address = selection.address
+    except ValidationError as err:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="ap needs hub") from err
+    depth = 1 + (selection.hub is not None) + (selection.ap is not None)
+    if LEVEL_DEPTH[selection.target] + 1 < depth:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"No {selection.target} nodes in {address.tag}")
+    return simulator.get_node(address)
+
+
+def candidates(root: Any, target: NodeLevel, codes: frozenset | None) -> list[tuple[Address, list[int]]]:
+    """
+    Gather the candidates for a selection.
+
+    Args:
+        root (Any): Root of the subtree.
+        target (NodeLevel): Level of the nodes.
+        codes (frozenset | None): States to pick from (see state_codes), or None for any.
+
+    Returns:
+        list[tuple[Address, list[int]]]: Address of each parent, and the indices of its candidate children in
+            ascending order, in address order.
+    """
+    if isinstance(root, APManager):
+        hubs, only_ap = [root.hub], root.index
+    elif isinstance(root, HubManager):
+        hubs, only_ap = [root], None
+    else:
+        hubs, only_ap = [root.children[index] for index in sorted(root.children)], None
+
+    if target == NodeLevel.HUB:
+        net = Address(net=hubs[0].address.net) if hubs else root.address
+        return [(net, [hub.address.hub for hub in hubs if codes is None or hub.state in codes])]
+
+    parents = []
+    for hub in hubs:
+        store = hub.store
+        net, hub_idx = hub.address.net, hub.address.hub
+        if target == NodeLevel.AP:
+            aps = store.aps.matching(codes)
+            parents.append((hub.address, aps if only_ap is None else [ap for ap in aps if ap == only_ap]))
+            continue
+        for ap in sorted(store.rts) if only_ap is None else [only_ap]:
+            parents.append((Address(net=net, hub=hub_idx, ap=ap), store.rts[ap].matching(codes)))
+    return parents
+
+
+def sample(
+    parents: list[tuple[Address, list[int]]], percent: float, rng: random.Random
+) -> list[tuple[Address, list[int]]]:
+    """
+    Sample a percentage of the candidates.
+
+    Args:
+        parents (list[tuple[Address, list[int]]]): The candidates, by parent.
+        percent (float): Percentage to pick.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        list[tuple[Address, list[int]]]: The picked candidates, by parent.
+    """
+    total = sum(len(indices) for _, indices in parents)
+    positions = sorted(rng.sample(range(total), round(total * percent / 100)))
+    picked, start, cursor = [], 0, 0
+    for parent, indices in parents:
+        end = start + len(indices)
+        chosen = []
+        while cursor < len(positions) and positions[cursor] < end:
+            chosen.append(indices[positions[cursor] - start])
+            cursor += 1
+        picked.append((parent, chosen))
+        start = end
+    return picked
+
+
+def select(selection: Selection) -> Picked:
+    """
+    Pick the nodes of a selection.
+
+    Args:
+        selection (Selection): The selection.
+
+    Returns:
+        Picked: The nodes picked.
+
+    Raises:
+        HTTPException: If the subtree does not exist, or the selection is malformed.
+    """
+    started = time.perf_counter()
+    root = subtree_root(selection)
+    parents = candidates(root, selection.target, state_codes(selection.target, selection.states))
+    total = sum(len(indices) for _, indices in parents)
+    seed = None
+    if selection.ids is not None:
+        wanted = set(selection.ids)
+        parents = [(parent, [index for index in indices if index in wanted]) for parent, indices in parents]
+    elif selection.percent is not None:
+        seed = selection.seed if selection.seed is not None else random.randrange(2**32)
+        parents = sample(parents, selection.percent, random.Random(seed))
+    picked = Picked(selection.target, [entry for entry in parents if entry[1]], total, seed)
+    picked.elapsed = time.perf_counter() - started
+    return picked
+
+
+def send_action(picked: Picked, action: NodeAction, **params: Any) -> int:
+    """
+    Send the commands that apply an action to the picked nodes. A new heartbeat interval is recorded in the
+    controller's own state for the nodes before any command is sent, so that the two cannot disagree.
+
+    Args:
+        picked (Picked): The nodes.
+        action (NodeAction): The action.
+        **params: Parameters of the action (see Picked.commands).
+
+    Returns:
+        int: The number of commands sent.
+    """
+    commands = picked.commands(action, **params)
+    if action == NodeAction.SET_HEARTBEAT:
+        for command in commands:
+            aps = list(command.aps.indices()) if command.aps is not None else []
+            rts = {ap: list(indices.indices()) for ap, indices in command.rts.items()}
+            simulator.get_node(command.address).set_heartbeat(command.heartbeat_seconds, aps, rts)
+    for command in commands:
+        worker_ctrl.send(command)
+    return len(commands)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
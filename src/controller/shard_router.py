@@ -0,0 +1,305 @@
+"""
+shard_router.py
+
+Front router of a sharded deployment (see src.controller.sharding): a small FastAPI app, with no simulator state of its
+own, that passes each request on to the controller shard that should handle it.
+
+- Requests about one Network (/network/{idx} and everything under it) and bulk actions (whose body names a Network) go
+  to the Network's owner on the hash ring. Responses are streamed back as they arrive.
+- Creating a Network goes to the owner of the lowest Network index not in use on any shard, which allocates it.
+- Listing Networks and the alarm metrics are scattered to every shard and gathered into one response.
+- /shard/ reports each shard and the Networks it holds, and /shard/{name}/... passes any other request (jobs,
+  snapshots, scenarios, live status, the other metrics) to the named shard.
+
+Usage:
+    uvicorn.run(get_router_app(), port=settings.APP_PORT)
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Annotated, Any
+
+import httpx
+from fastapi import APIRouter, FastAPI, HTTPException, Path, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.status import HTTP_404_NOT_FOUND, HTTP_422_UNPROCESSABLE_CONTENT, HTTP_502_BAD_GATEWAY
+
+from src.config import settings
+from src.controller.ctrl_api import AlarmMetrics, ListQuery, ShardStatus
+from src.controller.listing import NEXT_CURSOR_HEADER
+from src.controller.sharding import shard_ring
+from src.worker.worker_api import AlarmStats
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "host"}  # Not passed on
+METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+front_router = APIRouter()
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class ShardClient:
+    """
+    HTTP client for the shards of the deployment in SHARDS.
+
+    Args:
+        transport (httpx.AsyncBaseTransport | None): Transport for the client, for tests.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        self._client = httpx.AsyncClient(timeout=settings.ROUTER_TIMEOUT, transport=transport)
+
+    async def aclose(self) -> None:
+        """
+        Close the client and its connections.
+        """
+        await self._client.aclose()
+
+    @staticmethod
+    def url(shard: str, path: str) -> str:
+        """
+        Returns:
+            str: The URL of a path on a shard.
+
+        Raises:
+            HTTPException: If there is no such shard.
+        """
+        if shard not in settings.SHARDS:
+            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"Shard {shard} not found")
+        return f"{settings.SHARDS[shard].rstrip('/')}{path}"
+
+    async def forward(self, shard: str, request: Request, path: str, body: bytes | None = None) -> StreamingResponse:
+        """
+        Pass a request on to a shard, and stream its response back.
+
+        Args:
+            shard (str): Shard name.
+            request (Request): The request.
+            path (str): Path of the request on the shard.
+            body (bytes | None): The request body, if it has already been read.
+
+        Returns:
+            StreamingResponse: The shard's response.
+
+        Raises:
+            HTTPException: If the shard cannot be reached.
+        """
+        upstream = self._client.build_request(
+            request.method,
+            self.url(shard, path),
+            params=request.query_params,
+            headers={name: value for name, value in request.headers.items() if name not in HOP_HEADERS},
+            content=await request.body() if body is None else body,
+        )
+        try:
+            resp = await self._client.send(upstream, stream=True)
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=HTTP_502_BAD_GATEWAY, detail=f"Shard {shard}: {e!r}") from e
+        return StreamingResponse(
+            resp.aiter_raw(),
+            status_code=resp.status_code,
+            headers={name: value for name, value in resp.headers.items() if name not in HOP_HEADERS},
+            background=BackgroundTask(resp.aclose),
+        )
+
+    async def gather(self, path: str, params: Any = None) -> dict[str, httpx.Response | httpx.HTTPError]:
+        """
+        Make the same GET request of every shard at once.
+
+        Args:
+            path (str): Path of the request.
+            params (Any): Query parameters.
+
+        Returns:
+            dict[str, httpx.Response | httpx.HTTPError]: Each shard's response, or the error reaching it, by name.
+        """
+
+        async def get(shard: str) -> httpx.Response | httpx.HTTPError:
+            try:
+                return await self._client.get(self.url(shard, path), params=params)
+            except httpx.HTTPError as e:
+                return e
+
+        shards = sorted(settings.SHARDS)
+        return dict(zip(shards, await asyncio.gather(*map(get, shards)), strict=True))
+
+
+def checked(shard: str, resp: httpx.Response | httpx.HTTPError) -> httpx.Response:
+    """
+    Returns:
+        httpx.Response: A shard's successful response to a scattered request.
+
+    Raises:
+        HTTPException: With the shard's error, or 502 if it could not be reached.
+    """
+    if isinstance(resp, httpx.HTTPError):
+        raise HTTPException(status_code=HTTP_502_BAD_GATEWAY, detail=f"Shard {shard}: {resp!r}")
+    if resp.is_error:
+        raise HTTPException(status_code=resp.status_code, detail=f"Shard {shard}: {resp.text}")
+    return resp
+
+
+async def network_indices(shards: ShardClient) -> dict[str, list[int] | None]:
+    """
+    Returns:
+        dict[str, list[int] | None]: The Network indices each shard holds, or None if it could not be reached.
+    """
+    responses = await shards.gather("/network/", {"fields": "state", "limit": settings.LIST_MAX_PAGE_SIZE})
+    return {
+        shard: sorted(map(int, resp.json())) if isinstance(resp, httpx.Response) and resp.is_success else None
+        for shard, resp in responses.items()
+    }
+
+
+@front_router.get("/shard/", tags=["Shards"])
+async def list_shards(request: Request) -> list[ShardStatus]:
+    """
+    Report each shard of the deployment and the Networks it holds.
+
+    Returns:
+        list[ShardStatus]: One entry per shard.
+    """
+    indices = await network_indices(request.app.state.shards)
+    return [
+        ShardStatus(name=shard, url=settings.SHARDS[shard], up=networks is not None, networks=networks or [])
+        for shard, networks in indices.items()
+    ]
+
+
+@front_router.api_route("/shard/{name}/{path:path}", methods=METHODS, tags=["Shards"])
+async def to_shard(request: Request, name: Annotated[str, Path(description="Shard name")], path: str) -> Response:
+    """
+    Pass any request on to the named shard, e.g. GET /shard/shard0/metrics/nbapi.
+    """
+    return await request.app.state.shards.forward(name, request, f"/{path}")
+
+
+@front_router.post("/network/", tags=["Network Management"])
+async def create_network(request: Request) -> Response:
+    """
+    Create a Network on the shard that owns the lowest Network index not in use anywhere, which is the index that
+    shard allocates. See POST /network/ on a controller for the request and response.
+    """
+    indices = await network_indices(request.app.state.shards)
+    down = [shard for shard, networks in indices.items() if networks is None]
+    if down:  # One of them may hold the lowest free index already
+        raise HTTPException(status_code=HTTP_502_BAD_GATEWAY, detail=f"Shards {down} cannot be reached")
+    used = {index for networks in indices.values() for index in networks or ()}
+    index = next(index for index in range(len(used) + 1) if index not in used)
+    return await request.app.state.shards.forward(shard_ring().owner(index), request, "/network/")
+
+
+@front_router.get("/network/", tags=["Network Management"])
+async def list_networks(request: Request, query: Annotated[ListQuery, Query()]) -> Response:
+    """
+    List the Networks of every shard, a page at a time, as GET /network/ on a controller does. Each shard is asked for
+    the same page, and the pages are merged.
+    """
+    ndjson = query.format == "ndjson"
+    entries: dict[int, Any] = {}
+    more = False
+    for shard, result in (await request.app.state.shards.gather("/network/", request.query_params)).items():
+        resp = checked(shard, result)
+        more |= NEXT_CURSOR_HEADER in resp.headers
+        if ndjson:
+            entries.update((entry["index"], entry) for entry in map(json.loads, resp.text.splitlines()))
+        else:
+            entries.update((int(index), entry) for index, entry in resp.json().items())
+    page = sorted(entries)[: query.limit]
+    headers = {NEXT_CURSOR_HEADER: str(page[-1])} if more or len(entries) > query.limit else {}
+    if ndjson:
+        content = "".join(json.dumps(entries[index], separators=(",", ":")) + "\n" for index in page)
+        return Response(content, media_type="application/x-ndjson", headers=headers)
+    content = json.dumps({str(index): entries[index] for index in page}, separators=(",", ":"))
+    return Response(content, media_type="application/json", headers=headers)
+
+
+@front_router.api_route("/network/{idx}", methods=METHODS, tags=["Network Management"])
+@front_router.api_route("/network/{idx}/{path:path}", methods=METHODS, tags=["Network Management"])
+async def to_network(request: Request, idx: Annotated[int, Path(description="Network index")]) -> Response:
+    """
+    Pass a request about a Network, or anything in it, on to the shard that owns the Network.
+    """
+    return await request.app.state.shards.forward(shard_ring().owner(idx), request, request.url.path)
+
+
+@front_router.post("/action/", tags=["Bulk Actions"])
+@front_router.post("/action/preview", tags=["Bulk Actions"])
+async def to_action(request: Request) -> Response:
+    """
+    Pass a bulk action, or its preview, on to the shard that owns the Network it selects from.
+    """
+    body = await request.body()
+    try:
+        net = int(json.loads(body)["net"])
+    except (ValueError, KeyError, TypeError) as err:
+        raise HTTPException(status_code=HTTP_422_UNPROCESSABLE_CONTENT, detail="A selection needs a net") from err
+    return await request.app.state.shards.forward(shard_ring().owner(net), request, request.url.path, body)
+
+
+@front_router.get("/metrics/alarms", tags=["Metrics"])
+async def get_alarm_stats(request: Request) -> AlarmMetrics:
+    """
+    Gather the alarm metrics of every shard.
+
+    Returns:
+        AlarmMetrics: Totals across all hubs of all shards, and the counters of each hub.
+    """
+    metrics = AlarmMetrics()
+    for shard, resp in (await request.app.state.shards.gather("/metrics/alarms")).items():
+        metrics.hubs.update(AlarmMetrics.model_validate(checked(shard, resp).json()).hubs)
+    metrics.total = AlarmStats.combine(metrics.hubs.values())
+    return metrics
+
+
+def get_router_app(transport: httpx.AsyncBaseTransport | None = None) -> FastAPI:
+    """
+    Create the front router app for the shards in SHARDS.
+
+    Args:
+        transport (httpx.AsyncBaseTransport | None): Transport for requests to the shards, for tests.
+
+    Returns:
+        FastAPI: The app.
+
+    Raises:
+        ValueError: If SHARDS is empty.
+    """
+    if shard_ring() is None:
+        raise ValueError("The front router needs the shards in SHARDS")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.shards = ShardClient(transport)
+        yield
+        await app.state.shards.aclose()
+
+    app = FastAPI(lifespan=lifespan, title="NMS network simulator (front router)", version="0.0.1")
+    app.include_router(front_router)
+
+    @app.get("/", include_in_schema=False)
+    def root():
+        """
+        Redirects to API docs.
+
+        Returns:
+            RedirectResponse: Redirect to /docs.
+        """
+        return RedirectResponse(url="/docs")
+
+    return app
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
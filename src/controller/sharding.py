@@ -0,0 +1,172 @@
+"""
+sharding.py
+
+Sharded deployment: several controller instances ("shards") behind a thin front router (see
+src.controller.shard_router). Each shard is an ordinary controller that owns some of the Networks, along with their hub
+workers and its own ZeroMQ ports, so the in-process state of each stays private to it.
+
+Networks are assigned to shards by consistent hashing of their index. Each shard is placed at SHARD_VNODES points on a
+hash ring, and a Network belongs to the shard at the first point at or after the hash of its index. The router and
+every shard build the same ring from the names in SHARDS, so they agree on the owner of any index without asking each
+other: a shard only allocates Network indices that it owns, and the router sends requests about a Network straight to
+its owner. Adding a shard takes over only the indices that now hash to it, and the URLs of the shards can change
+without moving anything.
+
+For testing on one host, start_local_shards starts several shards as separate processes, each on its own block of
+ports.
+
+Usage:
+    ring = shard_ring()
+    if ring is not None and ring.owner(index) != settings.SHARD_NAME: ...
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import bisect
+import functools
+import hashlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+from collections.abc import Iterable, Iterator
+
+from src.config import settings
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def ring_hash(key: str) -> int:
+    """
+    Returns:
+        int: The position of a key on the ring.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """
+    Consistent hash ring of Network indices onto shards.
+
+    Args:
+        shards (Iterable[str]): Shard names.
+        vnodes (int): Points on the ring per shard. More points spread the Networks more evenly.
+    """
+
+    def __init__(self, shards: Iterable[str], vnodes: int = settings.SHARD_VNODES):
+        points = sorted((ring_hash(f"{shard}#{vnode}"), shard) for shard in shards for vnode in range(vnodes))
+        if not points:
+            raise ValueError("A hash ring needs at least one shard")
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+        self.shards = sorted(set(self._shards))
+
+    def owner(self, index: int) -> str:
+        """
+        Args:
+            index (int): Network index.
+
+        Returns:
+            str: The name of the shard that owns the Network.
+        """
+        position = bisect.bisect_left(self._hashes, ring_hash(f"network:{index}"))
+        return self._shards[position % len(self._shards)]
+
+    def owned(self, shard: str, start: int = 0) -> Iterator[int]:
+        """
+        Args:
+            shard (str): Shard name.
+            start (int): Lowest index to consider.
+
+        Yields:
+            int: The Network indices the shard owns, in ascending order from start.
+        """
+        return (index for index in itertools.count(start) if self.owner(index) == shard)
+
+
+@functools.cache
+def _ring(shards: tuple[str, ...], vnodes: int) -> HashRing:
+    return HashRing(shards, vnodes)
+
+
+def shard_ring() -> HashRing | None:
+    """
+    Returns:
+        HashRing | None: The ring of the deployment in SHARDS, or None if this controller is not sharded.
+    """
+    if not settings.SHARDS:
+        return None
+    return _ring(tuple(sorted(settings.SHARDS)), settings.SHARD_VNODES)
+
+
+def local_shards(count: int, base_port: int = settings.APP_PORT) -> dict[str, dict[str, str]]:
+    """
+    Work out the settings of several shards run on this host. Shard i listens on base_port + (i + 1) *
+    SHARD_PORT_STRIDE, with its PUB and PULL ports on the next two ports, and keeps any files of its own under a name
+    suffixed with its shard name.
+
+    Args:
+        count (int): Number of shards.
+        base_port (int): The front router's port.
+
+    Returns:
+        dict[str, dict[str, str]]: Environment variables for each shard, by shard name.
+    """
+    names = [f"shard{index}" for index in range(count)]
+    ports = {name: base_port + (index + 1) * settings.SHARD_PORT_STRIDE for index, name in enumerate(names)}
+    shards = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+    directory, filename = os.path.split(settings.NODE_STORE_SQLITE_PATH)
+    envs = {}
+    for name, port in ports.items():
+        env = {
+            "SHARD_NAME": name,
+            "SHARDS": json.dumps(shards),
+            "APP_PORT": str(port),
+            "PUB_PORT": str(port + 1),
+            "PULL_PORT": str(port + 2),
+            "NODE_STORE_SQLITE_PATH": os.path.join(directory, f"{name}-{filename}"),
+        }
+        if settings.EVENT_LOG_PATH:
+            env["EVENT_LOG_PATH"] = f"{settings.EVENT_LOG_PATH}.{name}"
+        envs[name] = env
+    return envs
+
+
+def start_local_shards(envs: dict[str, dict[str, str]]) -> list[subprocess.Popen]:
+    """
+    Start shards on this host, each as a controller process of its own.
+
+    Args:
+        envs (dict[str, dict[str, str]]): Environment variables for each shard (see local_shards).
+
+    Returns:
+        list[subprocess.Popen]: The shard processes.
+    """
+    return [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "src.controller.app:get_app",
+                "--factory",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                env["APP_PORT"],
+                "--log-level",
+                settings.LOG_LEVEL.lower(),
+            ],
+            env=os.environ | env,
+        )
+        for env in envs.values()
+    ]
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
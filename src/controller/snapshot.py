@@ -0,0 +1,270 @@
+"""
+snapshot.py
+
+Export and restore of the simulator's topology.
+
+A snapshot is a JSON Lines stream: a header record, then one record per Network, each followed by one record per Hub.
+A Hub record carries the hub's AP and RT tables as base64 of the raw HubStore columns (state, heartbeat, azimuth), so
+an RT costs around 10 bytes and a whole hub is dumped or loaded with a few bulk copies. Indices are positions in the
+columns and AUIDs are derived from the Network's CSNI, so neither is stored separately. Registered APs also carry the
+credentials the worker needs to run them (see src.worker.worker_api.APCredentials).
+
+    {"type": "snapshot", "version": 1, "byteorder": "little", "ap_states": [...], "rt_states": [...]}
+    {"type": "network", "index": 0, "csi": "...", "csni": "..."}
+    {"type": "hub", "net": 0, "index": 0, "state": "registered", "aps": [state, heartbeat, azimuth],
+     "credentials": {"0": {...}}, "rts": {"0": [state, heartbeat, azimuth]}}
+
+Restoring a snapshot recreates every Network, Hub, AP and RT at its original index. Networks, and any Hub, AP or RT
+that was registered, are not registered with the NMS again: the Hub workers set the APs and RTs up directly from their
+stored AUIDs and credentials, so a large test bed comes back at the rate workers can start rather than the rate the NMS
+can register nodes. Nodes that were not registered are registered as normal. Hubs are restored concurrently, bounded
+by SCENARIO_MAX_CONCURRENT_HUBS, and the restore reports progress like a scenario load (see src.controller.scenario).
+
+Usage:
+    async for line in iter_snapshot():
+        ...
+    loader = start_restore("snapshot.jsonl")
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import base64
+import json
+import sys
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from src.controller.ctrl_api import APState, HubState, RTState, ScenarioState
+from src.controller.event_log import event_log
+from src.controller.managers import HubManager, NetworkManager
+from src.controller.node_store import AP_STATE_CODES, AP_STATES, RT_STATE_CODES, RT_STATES, NodeColumns
+from src.controller.scenario import ScenarioLoader, next_load_id, start_load
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import APCredentials
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+SNAPSHOT_VERSION = 1
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def encode_columns(columns: NodeColumns) -> list[str]:
+    """
+    Returns:
+        list[str]: The table's state, heartbeat and azimuth columns, base64 encoded.
+    """
+    return [base64.b64encode(column).decode("ascii") for column in columns.dump()]
+
+
+def snapshot_header() -> dict:
+    """
+    Returns:
+        dict: The header record of a snapshot taken by this controller.
+    """
+    return {
+        "type": "snapshot",
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "ap_states": list(AP_STATES),
+        "rt_states": list(RT_STATES),
+    }
+
+
+def network_record(net: NetworkManager) -> dict:
+    """
+    Returns:
+        dict: The snapshot record for a Network, without its Hubs.
+    """
+    return {"type": "network", "index": net.address.net, "csi": net.csi, "csni": net.csni}
+
+
+def hub_record(hub: HubManager) -> dict:
+    """
+    Build the snapshot record for a Hub and all its APs and RTs.
+
+    Args:
+        hub (HubManager): The Hub.
+
+    Returns:
+        dict: The Hub record.
+    """
+    store = hub.store
+    return {
+        "type": "hub",
+        "net": hub.address.net,
+        "index": hub.address.hub,
+        "state": hub.state,
+        "aps": encode_columns(store.aps),
+        "credentials": {str(ap): creds.model_dump() for ap, creds in store.ap_credentials.items()},
+        "rts": {str(ap): encode_columns(rts) for ap, rts in store.rts.items() if len(rts)},
+    }
+
+
+async def iter_snapshot() -> AsyncIterator[str]:
+    """
+    Generate a snapshot of the current topology, one JSON line at a time.
+
+    Each Hub is dumped in one step, so every Hub record is consistent, but nodes may be added or removed elsewhere
+    while the snapshot is being streamed.
+
+    Yields:
+        str: One snapshot record, with a trailing newline.
+    """
+    yield json.dumps(snapshot_header()) + "\n"
+    for net in list(simulator.children.values()):
+        yield json.dumps(network_record(net)) + "\n"
+        for hub in list(net.children.values()):
+            yield json.dumps(hub_record(hub)) + "\n"
+            await asyncio.sleep(0)  # Let other requests and worker messages in between Hubs
+
+
+class ColumnDecoder:
+    """
+    Decodes the columns of a snapshot, converting state codes and byte order to this controller's.
+
+    Args:
+        header (dict): The snapshot's header record.
+
+    Raises:
+        ValueError: If the snapshot version or a state name is not recognised.
+    """
+
+    def __init__(self, header: dict):
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header.get('version')}")
+        self.byteswap = header["byteorder"] != sys.byteorder
+        self.ap_codes = self._translation(header["ap_states"], APState, AP_STATE_CODES)
+        self.rt_codes = self._translation(header["rt_states"], RTState, RT_STATE_CODES)
+
+    @staticmethod
+    def _translation(names: list[str], state_type: type, codes: dict) -> bytes:
+        table = bytearray(range(256))
+        for code, name in enumerate(names):
+            table[code] = codes[state_type(name)]
+        return bytes(table)
+
+    def decode(self, encoded: list[str], translation: bytes) -> NodeColumns:
+        """
+        Args:
+            encoded (list[str]): Encoded columns from `encode_columns`.
+            translation (bytes): State code translation table.
+
+        Returns:
+            NodeColumns: The decoded table.
+        """
+        state, heartbeat, azimuth = (base64.b64decode(column) for column in encoded)
+        return NodeColumns.load(state.translate(translation), heartbeat, azimuth, self.byteswap)
+
+    def decode_hub(self, record: dict) -> tuple[NodeColumns, dict[int, NodeColumns], dict[int, APCredentials]]:
+        """
+        Args:
+            record (dict): A Hub record from `hub_record`.
+
+        Returns:
+            tuple: The Hub's AP table, its RT tables and its AP credentials, the last two keyed by AP index.
+        """
+        aps = self.decode(record["aps"], self.ap_codes)
+        rts = {int(ap): self.decode(columns, self.rt_codes) for ap, columns in record["rts"].items()}
+        credentials = {int(ap): APCredentials(**creds) for ap, creds in record["credentials"].items()}
+        return aps, rts, credentials
+
+
+class SnapshotLoader(ScenarioLoader):
+    """
+    Restores the topology from a snapshot file, tracking progress as it goes.
+
+    Args:
+        load_id (str): ID of this load.
+        path (str | Path): Path of the snapshot file.
+        delete_after (bool): Delete the file once the restore has finished (e.g. for an uploaded file).
+    """
+
+    def __init__(self, load_id: str, path: str | Path, delete_after: bool = False):
+        super().__init__(load_id, path, "jsonl", delete_after)
+
+    async def run(self) -> None:
+        """
+        Read the snapshot file and recreate everything in it.
+        """
+        progress = self._progress
+        hub_tasks: set[asyncio.Task] = set()
+        decoder: ColumnDecoder | None = None
+        try:
+            with open(self.path, encoding="utf-8") as stream:
+                for line in stream:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    progress.records += 1
+                    match record.get("type"):
+                        case "snapshot":
+                            decoder = ColumnDecoder(record)
+                        case "network" if decoder is not None:
+                            simulator.restore_network(record["index"], record["csi"], record["csni"])
+                            progress.networks += 1
+                        case "hub" if decoder is not None:
+                            await self._hub_slots.acquire()
+                            self._spawn(hub_tasks, self._restore_hub(decoder, record))
+                        case _:
+                            raise ValueError(f"Unexpected snapshot record on line {progress.records}")
+            await asyncio.gather(*hub_tasks)
+            progress.state = ScenarioState.COMPLETED
+        except Exception as e:
+            for task in hub_tasks:
+                task.cancel()
+            progress.state = ScenarioState.FAILED
+            self._error(f"Restore failed: {e}")
+        finally:
+            self._finish()
+
+    async def _restore_hub(self, decoder: ColumnDecoder, record: dict) -> None:
+        """
+        Recreate one Hub, then its APs and RTs, then start its heartbeats.
+        """
+        try:
+            net = simulator.get_network(record["net"])
+            hub = await net.start_hub(record["index"])
+            if record["state"] == HubState.REGISTERED:
+                hub.set_state(HubState.REGISTERED)
+            else:
+                await net.register_hub(hub)
+            aps, rts, credentials = decoder.decode_hub(record)
+            await hub.restore_nodes(aps, rts, credentials)
+            if event_log.enabled:
+                event_log.append(hub_record(hub))  # The restored tables, which were never logged node by node
+            self._progress.hubs += 1
+            self._progress.aps += len(aps)
+            self._progress.rts += hub.store.num_rts()
+            self._progress.failed += hub.tracker.failed
+            hub.start_heartbeats()
+        except Exception as e:
+            self._progress.failed += 1
+            self._error(f"Hub {record.get('net')}/{record.get('index')} restore failed: {e}")
+        finally:
+            self._hub_slots.release()
+
+
+def start_restore(path: str | Path, delete_after: bool = False) -> SnapshotLoader:
+    """
+    Start restoring a snapshot file in the background.
+
+    Args:
+        path (str | Path): Path of the snapshot file.
+        delete_after (bool): Delete the file once the restore has finished.
+
+    Returns:
+        SnapshotLoader: The running loader.
+    """
+    return start_load(SnapshotLoader(next_load_id(), path, delete_after))
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
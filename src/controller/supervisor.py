@@ -0,0 +1,164 @@
+"""
+supervisor.py
+
+Supervision of the hub workers: noticing a worker that has died or hung, and replacing it without losing the hub's
+nodes.
+
+Every SUPERVISOR_INTERVAL seconds the supervisor checks each Hub whose worker has connected (see
+HubManager.worker_fault). A worker has failed if its process has exited, or if it has sent no status report for
+SUPERVISOR_STALL_TIMEOUT seconds; an idle worker still reports every WORKER_KEEPALIVE_SECONDS, so silence means it is
+hung or cut off. A failed worker is stopped and replaced (see HubManager.restart_worker), and the new worker sets up
+the hub's APs and RTs again with the AUIDs and credentials they were registered with, so the NMS sees the same nodes
+come back rather than new ones.
+
+Restarts back off: a worker that fails again within SUPERVISOR_BACKOFF_MAX seconds of being restarted waits twice as
+long as the last one before it is replaced, from SUPERVISOR_BACKOFF up to SUPERVISOR_BACKOFF_MAX, so that a worker
+that crashes at once does not spin. A replacement that does not connect, or set up the nodes, within
+SUPERVISOR_STALL_TIMEOUT seconds is retried the same way until the Hub is deleted. The restarts, failed attempts and
+downtime of each Hub are kept for /metrics/supervisor.
+
+Heartbeats paused by a bulk action or an alarm are running again on the new worker.
+
+Usage:
+    supervisor.start()
+    ...
+    supervisor.stop()
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import logging
+import time
+
+from src.config import settings
+from src.controller.ctrl_api import SupervisorStats, WorkerRestarts
+from src.controller.managers import HubManager, node_index
+from src.controller.recovery import all_hubs
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class Supervisor:
+    """
+    Watches the hub workers, and replaces those that have died or hung.
+    """
+
+    def __init__(self):
+        self.hubs: dict[str, WorkerRestarts] = {}
+        self._task: asyncio.Task | None = None
+        self._restarts: dict[str, asyncio.Task] = {}
+        self._backoff: dict[str, tuple[int, float]] = {}  # Hub tag -> (consecutive failures, time of last restart)
+
+    def start(self) -> None:
+        """
+        Start checking the workers every SUPERVISOR_INTERVAL seconds.
+        """
+        self._task = asyncio.create_task(self.run())
+
+    def stop(self) -> None:
+        """
+        Stop checking the workers, and abandon any restarts in progress.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._restarts.values():
+            task.cancel()
+        self._restarts.clear()
+
+    async def run(self) -> None:
+        """
+        Check the workers every SUPERVISOR_INTERVAL seconds, until cancelled.
+        """
+        while True:
+            await asyncio.sleep(settings.SUPERVISOR_INTERVAL)
+            self.check(time.monotonic())
+
+    def check(self, now: float) -> None:
+        """
+        Start replacing each worker that has failed, unless it is already being replaced.
+
+        Args:
+            now (float): Current monotonic time.
+        """
+        for hub in all_hubs():
+            tag = hub.address.tag
+            if tag in self._restarts:
+                continue
+            reason = hub.worker_fault(now)
+            if reason is not None:
+                logging.warning(f"Hub {tag} worker failed: {reason}")
+                record = self.hubs.setdefault(tag, WorkerRestarts())
+                record.restarting = True
+                record.last_reason = reason
+                self._restarts[tag] = asyncio.create_task(self.restart(hub, record))
+
+    def backoff(self, tag: str) -> float:
+        """
+        Returns:
+            float: Seconds to wait before replacing the worker of a hub: doubling with each failure within
+                SUPERVISOR_BACKOFF_MAX seconds of the last restart, up to SUPERVISOR_BACKOFF_MAX.
+        """
+        failures, last = self._backoff.get(tag, (0, time.monotonic()))
+        if time.monotonic() - last > settings.SUPERVISOR_BACKOFF_MAX:
+            failures = 0
+        self._backoff[tag] = (failures + 1, last)
+        return min(settings.SUPERVISOR_BACKOFF * 2**failures, settings.SUPERVISOR_BACKOFF_MAX)
+
+    async def restart(self, hub: HubManager, record: WorkerRestarts) -> None:
+        """
+        Replace the worker of a hub, retrying until it succeeds or the Hub is deleted.
+
+        Args:
+            hub (HubManager): The Hub.
+            record (WorkerRestarts): The Hub's restarts, to be updated.
+        """
+        tag = hub.address.tag
+        down_since = hub.last_report
+        try:
+            while node_index.get(tag) is hub:
+                await asyncio.sleep(self.backoff(tag))
+                if node_index.get(tag) is not hub:
+                    break
+                try:
+                    await hub.restart_worker(settings.SUPERVISOR_STALL_TIMEOUT)
+                except Exception as e:
+                    record.failures += 1
+                    logging.error(f"Failed to restart hub {tag} worker: {e!r}")
+                    continue
+                self._backoff[tag] = (self._backoff[tag][0], time.monotonic())
+                record.restarts += 1
+                record.downtime_seconds += time.monotonic() - down_since
+                logging.info(f"Restarted hub {tag} worker after {time.monotonic() - down_since:.1f}s")
+                break
+        finally:
+            record.restarting = False
+            self._restarts.pop(tag, None)
+
+    def stats(self) -> SupervisorStats:
+        """
+        Returns:
+            SupervisorStats: The restarts of each Hub that still exists, and their totals.
+        """
+        for tag in [tag for tag in self.hubs if tag not in node_index]:
+            del self.hubs[tag]
+            self._backoff.pop(tag, None)
+        records = self.hubs.values()
+        return SupervisorStats(
+            restarts=sum(record.restarts for record in records),
+            failures=sum(record.failures for record in records),
+            downtime_seconds=sum(record.downtime_seconds for record in records),
+            restarting=sum(record.restarting for record in records),
+            hubs=dict(sorted(self.hubs.items())),
+        )
+
+
+supervisor = Supervisor()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -1,5 +1,10 @@
 """
 Worker controller for managing communication with worker processes via ZeroMQ.
+
+Incoming worker messages are dispatched through a per-message-type handler registry. Every worker message is handled by
+the manager of the hub it came from, looked up in the flat node index; handlers for AP and RT messages then find the
+row in the hub's columnar store. A message for an unknown or already-removed node is counted and skipped rather than
+raising inside (and killing) the listener task.
 """
 
 import asyncio
@@ -8,17 +13,33 @@ import asyncio
 # Imports
 #######################################################################################################################
 import logging
+from collections import Counter
+from collections.abc import Callable
 
 import httpx
 from fastapi import HTTPException
+from pydantic import PrivateAttr
 from starlette import status
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 
 from src.config import settings
+from src.controller.agents import AGENT_MESSAGE_TYPES, agents
 from src.controller.comms import ControllerComms
-from src.controller.ctrl_api import HubCreateRequest, NetworkCreateRequest, NetworkState
-from src.controller.managers import APManager, HubManager, NetworkManager, ParentNode, RTManager
-from src.nms_api import NmsAuthInfo, NmsNetworkCreateRequest
-from src.worker.worker_api import Address, MessageTypes
+from src.controller.ctrl_api import NetworkCreateRequest, NetworkState, TeardownResult
+from src.controller.event_log import event_log
+from src.controller.managers import (
+    APManager,
+    HubManager,
+    NetworkManager,
+    ParentNode,
+    RTManager,
+    hub_requests,
+    node_index,
+)
+from src.controller.nbapi import nbapi
+from src.controller.sharding import shard_ring
+from src.nms_api import NmsNetworkCreateRequest
+from src.worker.worker_api import Address, BaseMessageBody, MessageTypes, TeardownStats
 
 #######################################################################################################################
 # Globals
@@ -37,58 +58,128 @@ class SimulatorManager(ParentNode):
     context and sockets for communication with worker processes (which are children of HubManager instances).
     """
 
+    _handlers: dict[MessageTypes, tuple[type, Callable]] = PrivateAttr(default_factory=dict)
+    _dropped: Counter = PrivateAttr(default_factory=Counter)
+
     def model_post_init(self, context):
         self.children: dict[int, NetworkManager] = {}
+        self.register_handler(MessageTypes.HUB_CONNECT_IND, HubManager, HubManager.on_connect_ind)
+        self.register_handler(MessageTypes.AP_REGISTER_RSP, HubManager, HubManager.on_ap_register_rsp)
+        self.register_handler(MessageTypes.RT_REGISTER_RSP, HubManager, HubManager.on_rt_register_rsp)
+        self.register_handler(MessageTypes.HUB_RESYNC_RSP, HubManager, HubManager.on_resync_rsp)
+        self.register_handler(MessageTypes.HUB_STATUS_IND, HubManager, HubManager.on_status_ind)
+        self.register_handler(MessageTypes.SUBTREE_DELETE_RSP, HubManager, HubManager.on_subtree_delete_rsp)
+
+    def get_index(self, requested: int = -1) -> int:
+        """
+        Returns the lowest free Network index, or the requested index if available. A shard of a sharded deployment
+        (see src.controller.sharding) only hands out the indices it owns.
+
+        Args:
+            requested (int): Requested index, or -1 for auto-assignment.
+
+        Returns:
+            int: Assigned index.
+
+        Raises:
+            HTTPException: If the requested index is already in use, or belongs to another shard.
+        """
+        ring = shard_ring() if settings.SHARD_NAME else None
+        if ring is None:
+            return super().get_index(requested)
+        if requested < 0:
+            return next(index for index in ring.owned(settings.SHARD_NAME) if index not in self.children)
+        owner = ring.owner(requested)
+        if owner != settings.SHARD_NAME:
+            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Network {requested} belongs to {owner}")
+        return super().get_index(requested)
 
     async def add_network(self, req: NetworkCreateRequest) -> NetworkManager:
         """
-        Add a Network to the NMS and register it with the northbound API.
+        Add a Network to the NMS and register it with the northbound API, then create its Hubs, APs and RTs.
+
+        Args:
+            req (NetworkCreateRequest): Network creation request.
+
+        Returns:
+            NetworkManager: The created Network.
+        """
+        net_mgr = await self.register_network(req)
+        await asyncio.gather(*(net_mgr.add_hub(hub_req) for hub_req in hub_requests(req)))
+        return net_mgr
+
+    async def register_network(self, req: NetworkCreateRequest) -> NetworkManager:
+        """
+        Add a Network to the NMS and register it with the northbound API, without creating any Hubs.
 
         Args:
             req (NetworkCreateRequest): Network creation request.
 
         Returns:
-            int: The index of the created Network.
+            NetworkManager: The created Network.
+
+        Raises:
+            HTTPException: If the northbound API request fails.
         """
         url = f"{settings.NBAPI_URL}/api/v1/network/csi/{req.csi}"
         create_req = NmsNetworkCreateRequest(customer_contact_email=f"tester@{req.email_domain}")
-        async with httpx.AsyncClient(headers=NmsAuthInfo().auth_header(), timeout=settings.HTTPX_TIMEOUT) as client:
-            try:
-                resp = await client.post(url, json=create_req.model_dump())
-                resp.raise_for_status()
-            except httpx.HTTPError as e:
-                raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"{e}") from e
+        try:
+            resp = await nbapi.post(url, json=create_req.model_dump())
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"{e}") from e
 
         result = resp.json()
         csni = result["csni"]
         index = self.get_index(-1)
         address = Address(net=index)
         net_mgr = NetworkManager(address=address, csi=req.csi, csni=csni, state=NetworkState.REGISTERED)
-        self.children[index] = net_mgr
+        self.add_child(index, net_mgr)
+        event_log.record("network", index=index, csi=req.csi, csni=csni)
         logging.info(f"Registered network {csni} to customer {req.csi} with northbound API")
-        hub_reqs = [
-            net_mgr.add_hub(
-                req=HubCreateRequest(
-                    num_aps=req.aps_per_hub,
-                    num_rts_per_ap=req.rts_per_ap,
-                    ap_heartbeat_seconds=req.ap_heartbeat_seconds,
-                    rt_heartbeat_seconds=req.rt_heartbeat_seconds,
-                )
-            )
-            for _ in range(req.hubs)
-        ]
-        await asyncio.gather(*hub_reqs)
         return net_mgr
 
-    async def remove_network(self, index: int) -> None:
+    def restore_network(self, index: int, csi: str, csni: str) -> NetworkManager:
         """
-        Remove a Network from the NMS.
+        Recreate a Network that is already registered with the northbound API, e.g. from a snapshot.
 
         Args:
             index (int): Network index.
+            csi (str): CSI (customer ID).
+            csni (str): CSNI assigned by the northbound API when the Network was registered.
+
+        Returns:
+            NetworkManager: The Network.
+
+        Raises:
+            HTTPException: If the index is already in use.
+        """
+        index = self.get_index(index)
+        net_mgr = NetworkManager(address=Address(net=index), csi=csi, csni=csni, state=NetworkState.REGISTERED)
+        self.add_child(index, net_mgr)
+        event_log.record("network", index=index, csi=csi, csni=csni)
+        logging.info(f"Restored network {csni} of customer {csi}")
+        return net_mgr
+
+    async def remove_network(self, index: int, deregister: bool = True) -> TeardownResult:
+        """
+        Stop and remove a Network, tearing down its Hubs side by side (see NetworkManager.remove_hub).
+
+        Args:
+            index (int): Network index.
+            deregister (bool): Whether to remove the Hubs, APs and RTs from the NMS.
+
+        Returns:
+            TeardownResult: What was torn down, across all the Hubs.
         """
         logging.info(f"Removing Network {index}")
+        network = self.get_network(index)
+        results = await asyncio.gather(*(network.remove_hub(hub, deregister) for hub in list(network.children)))
         self.remove_child(index)
+        return TeardownResult(
+            message=f"Network {index} deleted",
+            stats=TeardownStats.combine(result.stats for result in results),
+            incomplete=[tag for result in results for tag in result.incomplete],
+        )
 
     def get_network(self, index: int) -> NetworkManager:
         """
@@ -120,38 +211,94 @@ class SimulatorManager(ParentNode):
 
         Returns:
             Any: The object at this address.
+
+        Raises:
+            HTTPException: If there is no node at this address.
+        """
+        if address.ap is None:
+            try:
+                return node_index[address.tag]
+            except KeyError as err:
+                raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"{address.tag} not found") from err
+
+        ap = self.get_node(address.hub_address).get_ap(address.ap)
+        return ap if address.rt is None else ap.get_rt(address.rt)
+
+    @property
+    def dropped_messages(self) -> dict[str, int]:
+        """
+        Counts of worker messages that could not be dispatched, keyed by reason.
         """
-        instance: NetworkManager = self.get_network(address.net)
-        if address.hub is not None:
-            instance: HubManager = instance.get_hub(address.hub)
-            if address.ap is not None:
-                instance: APManager = instance.get_ap(address.ap)
-                if address.rt is not None:
-                    instance: RTManager = instance.get_rt(address.rt)
-        return instance
+        return dict(self._dropped)
+
+    def register_handler(self, msg_type: MessageTypes, node_type: type, handler: Callable) -> None:
+        """
+        Register the handler for a worker message type.
+
+        Args:
+            msg_type (MessageTypes): The message type to handle.
+            node_type (type): The manager class the message's hub address must resolve to.
+            handler (Callable): Called as handler(node, msg) with that manager and the message. Handlers raise KeyError
+                if the AP or RT addressed no longer exists.
+        """
+        self._handlers[msg_type] = (node_type, handler)
+
+    def dispatch(self, msg: BaseMessageBody) -> bool:
+        """
+        Route a worker message to the handler for its type, on the manager of the hub it is addressed to.
+
+        Messages of an unknown type, for an address with no matching manager (e.g. a node that has been deleted), or
+        whose handler fails are counted in `dropped_messages` and skipped.
+
+        Args:
+            msg (BaseMessageBody): The decoded message.
+
+        Returns:
+            bool: True if the message was handled.
+        """
+        entry = self._handlers.get(msg.msg_type)
+        if entry is None:
+            self._dropped["unknown_type"] += 1
+            logging.warning(f"Unknown event type: {msg.msg_type}")
+            return False
+
+        node_type, handler = entry
+        node = node_index.get(msg.address.hub_address.tag)
+        if not isinstance(node, node_type):
+            return self._drop_unknown(msg)
+
+        try:
+            handler(node, msg)
+        except KeyError:
+            return self._drop_unknown(msg)
+        except Exception:
+            self._dropped["handler_error"] += 1
+            logging.error(f"Error handling {msg.msg_type} for {msg.address.tag}", exc_info=True)
+            return False
+        return True
+
+    def _drop_unknown(self, msg: BaseMessageBody) -> bool:
+        self._dropped["unknown_address"] += 1
+        logging.debug(f"Dropping {msg.msg_type} for unknown address {msg.address.tag}")
+        return False
 
     async def listener(self, worker_ctrl: ControllerComms) -> None:
         """
         Listens for incoming messages from workers on the PULL socket and processes them.
 
         Args:
-            simulator: The SimulatorManager instance to route messages to the correct node.
+            worker_ctrl (ControllerComms): The comms instance to receive messages from.
         """
         while True:
             msg = await worker_ctrl.get_message()
-            if msg is not None:
-                address = msg.address
-                node = self.get_node(address)
-
-                match msg.msg_type:
-                    case MessageTypes.HUB_CONNECT_IND:
-                        node.on_connect_ind(msg)
-                    case MessageTypes.AP_REGISTER_RSP:
-                        node.on_ap_register_rsp(msg)
-                    case MessageTypes.RT_REGISTER_RSP:
-                        node.on_rt_register_rsp(msg)
-                    case _:
-                        logging.warning(f"Unknown event type: {msg.msg_type}")
+            if msg is None:
+                self._dropped["undecodable"] += 1
+            elif msg.msg_type == MessageTypes.COMMAND_ACK:
+                worker_ctrl.on_command_ack(msg)
+            elif msg.msg_type in AGENT_MESSAGE_TYPES:
+                agents.on_message(msg)
+            else:
+                self.dispatch(msg)
 
 
 simulator = SimulatorManager(
@@ -0,0 +1,160 @@
+"""
+zygote.py
+
+Controller-side client for the worker zygote (see src.worker.zygote).
+
+With `WORKER_START_METHOD=zygote` hub workers are forked from a single pre-imported zygote process instead of each
+being started as a fresh interpreter. The zygote is started on first use and stopped with the application. Workers
+forked from it are not children of the controller, so they are represented by a ForkedWorker handle that offers the
+parts of the subprocess.Popen interface that HubManager uses. The same handle is used for a worker that a restarted
+controller has reattached to (see src.controller.recovery).
+
+With the event log enabled, the zygote is told to leave its workers running when the controller exits, so that the
+next controller can reattach to them.
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import subprocess
+import time
+
+from src.config import settings
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class ForkedWorker:
+    """
+    Handle for a worker process that is not a child of the controller: forked by the zygote, or reattached to.
+
+    Args:
+        pid (int): Process ID of the worker.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+
+    def poll(self) -> int | None:
+        """
+        Returns:
+            int | None: None while the worker is running, else 0. The exit status is collected by the zygote.
+        """
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return 0
+        return None
+
+    def terminate(self) -> None:
+        """
+        Send SIGTERM to the worker.
+        """
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(self.pid, signal.SIGTERM)
+
+    def wait(self, timeout: float | None = None) -> int:
+        """
+        Wait for the worker to exit and be reaped by the zygote.
+
+        Args:
+            timeout (float | None): Maximum time to wait in seconds.
+
+        Returns:
+            int: 0.
+
+        Raises:
+            subprocess.TimeoutExpired: If the worker is still running after `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(f"pid {self.pid}", timeout)
+            time.sleep(0.01)
+        return 0
+
+
+class WorkerZygote:
+    """
+    Starts, talks to and stops the zygote process.
+    """
+
+    def __init__(self):
+        self._proc: asyncio.subprocess.Process | None = None
+        self._lock: asyncio.Lock | None = None
+
+    async def start(self) -> None:
+        """
+        Start the zygote if it is not already running.
+        """
+        if self._proc is not None and self._proc.returncode is None:
+            return
+        keep_workers = ["--keep-workers"] if settings.EVENT_LOG_PATH else []
+        self._proc = await asyncio.create_subprocess_exec(
+            "python",
+            "-u",
+            "-m",
+            "src.worker.zygote",
+            *keep_workers,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        logging.info(f"Started worker zygote {self._proc.pid}")
+
+    async def spawn(self, network_idx: int, hub_idx: int, pub_addr: str, pull_addr: str) -> ForkedWorker:
+        """
+        Fork a hub worker from the zygote, starting the zygote first if necessary.
+
+        Args:
+            network_idx (int): Network index for the hub address.
+            hub_idx (int): Hub index for the hub address.
+            pub_addr (str): Controller PUB endpoint.
+            pull_addr (str): Controller PULL endpoint.
+
+        Returns:
+            ForkedWorker: Handle for the new worker.
+
+        Raises:
+            RuntimeError: If the zygote could not fork the worker.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # One request/reply exchange on the pipe at a time
+            await self.start()
+            self._proc.stdin.write(f"{network_idx} {hub_idx} {pub_addr} {pull_addr}\n".encode())
+            await self._proc.stdin.drain()
+            reply = await self._proc.stdout.readline()
+        if not reply or int(reply) < 0:
+            raise RuntimeError(f"Worker zygote failed to fork worker for hub {network_idx}/{hub_idx}")
+        return ForkedWorker(int(reply))
+
+    async def stop(self) -> None:
+        """
+        Stop the zygote. It terminates any workers it forked that are still running, unless the event log is enabled.
+        """
+        if self._proc is None:
+            return
+        if self._proc.returncode is None:
+            self._proc.stdin.close()
+            try:
+                await asyncio.wait_for(self._proc.wait(), timeout=5)
+            except TimeoutError:
+                self._proc.kill()
+                await self._proc.wait()
+        logging.info(f"Stopped worker zygote {self._proc.pid}")
+        self._proc = None
+        self._lock = None
+
+
+zygote = WorkerZygote()  # Controller-wide singleton
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
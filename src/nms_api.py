@@ -1,8 +1,7 @@
 import time
 from datetime import UTC, datetime
+from typing import Literal
 
-import jwt
-import shortuuid
 from pydantic import BaseModel, Field, model_validator
 
 from src.config import settings
@@ -57,6 +56,8 @@ class NmsAuthInfo(BaseModel):
             "%Y-%m-%d %H:%M:%S"
         )
 
+        import jwt  # noqa: PLC0415 - imported on first use to keep it off the worker's import path
+
         return jwt.encode(self.model_dump(), settings.SECRET_KEY, settings.ALGORITHM)
 
     @staticmethod
@@ -70,6 +71,8 @@ class NmsAuthInfo(BaseModel):
             "expire_day": datetime.fromtimestamp(expiry_time, tz=UTC).strftime("%Y-%m-%d %H:%M:%S"),
         }
 
+        import jwt  # noqa: PLC0415
+
         return jwt.encode(payload, settings.SECRET_KEY_RT, settings.ALGORITHM)
 
 
@@ -119,9 +122,19 @@ class NmsNetworkCreateRequest(BaseModel):
     sw_version_auto_update: str | None = Field(default="")
 
 
+def new_auid() -> str:
+    """
+    Returns:
+        str: A new random AUID.
+    """
+    import shortuuid  # noqa: PLC0415 - imported on first use to keep it off the worker's import path
+
+    return shortuuid.uuid()
+
+
 class NmsCommonCreateRequest(BaseModel):
     id: str | None = None
-    auid: str = Field(default_factory=shortuuid.uuid)
+    auid: str = Field(default_factory=new_auid)
     name: str | None = None
     address: str = "None"
     node_status: str = Field(default="Planned")
@@ -210,3 +223,17 @@ class NmsRTRegisterParam(BaseModel):
 
 class NmsRTRegisterRequest(BaseModel):
     params: list[NmsRTRegisterParam]
+
+
+class NmsAlarm(BaseModel):
+    auid: str
+    category: str
+    code: str
+    severity: str
+    state: Literal["raised", "cleared"]
+    text: str = ""
+    event_time: float  # Epoch seconds when the node raised or cleared the alarm
+
+
+class NmsAlarmBatch(BaseModel):
+    alarms: list[NmsAlarm]
@@ -0,0 +1,257 @@
+"""
+agent.py
+
+Host agent: a small daemon, run on each machine that simulates hubs, that starts and stops hub workers for the
+controller (see src.controller.agents).
+
+The agent connects to the controller's ZeroMQ sockets like a hub worker does, but subscribes to its own topic (see
+agent_topic) rather than a hub's. It registers with an AgentRegisterInd giving its name and the host's capacity (CPU
+cores, memory, and the most workers it will run), and repeats it every AGENT_HEARTBEAT_SECONDS with the hubs it is
+running, so that the controller can place hubs across agents, notice agents that have gone, and learn of agents that
+were started before it. On an AgentSpawnReq it starts a worker process for the hub, connected to the same controller
+endpoints as the agent, and answers with its PID; on an AgentKillReq it stops it.
+
+Agent commands are not sequenced and acknowledged as hub commands are: the controller repeats an AgentSpawnReq until
+it is answered, and starting a hub that is already running just reports the running worker.
+
+Several agents can run on one machine, each under its own name, which is how placement across hosts is tested.
+
+Usage:
+    python -m src.worker.agent <pub_addr> <pull_addr> [--name NAME] [--max-workers N]
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+
+import zmq
+import zmq.asyncio
+
+from src.config import settings
+from src.worker.worker_api import (
+    Address,
+    AgentKillReq,
+    AgentRegisterInd,
+    AgentSpawnReq,
+    AgentSpawnRsp,
+    agent_topic,
+    decode_message,
+    encode_message,
+)
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+logging.basicConfig(
+    level=logging.getLevelName(settings.LOG_LEVEL),
+    format="%(levelname)s: %(asctime)s %(filename)s:%(lineno)d - %(message)s",
+)
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def host_memory_mb() -> int:
+    """
+    Returns:
+        int: The machine's physical memory in MiB, or 0 if it cannot be found.
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError):
+        return 0
+
+
+class HostAgent:
+    """
+    Starts and stops the hub workers of one host for the controller.
+
+    Args:
+        name (str): Name to register under, unique across the deployment.
+        pub_addr (str): Controller PUB endpoint, for commands. The agent's workers connect to it too.
+        pull_addr (str): Controller PULL endpoint, for registrations and responses. The agent's workers connect to it
+            too.
+        max_workers (int | None): Most workers to run at once, or None for one per CPU core.
+    """
+
+    def __init__(self, name: str, pub_addr: str, pull_addr: str, max_workers: int | None = None):
+        self.name = name
+        self.pub_addr = pub_addr
+        self.pull_addr = pull_addr
+        self.cores = os.cpu_count() or 1
+        self.max_workers = max_workers or self.cores
+        self.workers: dict[Address, subprocess.Popen] = {}
+        self.stopping: list[subprocess.Popen] = []  # Workers told to stop that may not have exited yet
+        self.ctx = zmq.asyncio.Context()
+        self.push_sock = self.ctx.socket(zmq.PUSH)
+        self.push_sock.connect(pull_addr)
+        self.sub_sock = self.ctx.socket(zmq.SUB)
+        self.sub_sock.connect(pub_addr)
+        self.sub_sock.setsockopt_string(zmq.SUBSCRIBE, agent_topic(name))
+
+    def registration(self) -> AgentRegisterInd:
+        """
+        Returns:
+            AgentRegisterInd: The agent's capacity and the hubs it is running.
+        """
+        self.reap()
+        return AgentRegisterInd(
+            agent=self.name,
+            host=socket.gethostname(),
+            cores=self.cores,
+            memory_mb=host_memory_mb(),
+            max_workers=self.max_workers,
+            hubs=sorted(self.workers, key=lambda address: (address.net, address.hub)),
+        )
+
+    def reap(self) -> None:
+        """
+        Forget workers that have exited.
+        """
+        for address, proc in list(self.workers.items()):
+            if proc.poll() is not None:
+                logging.info(f"Agent {self.name}: hub {address.tag} worker {proc.pid} exited ({proc.returncode})")
+                del self.workers[address]
+        self.stopping = [proc for proc in self.stopping if proc.poll() is None]
+
+    def on_spawn_req(self, msg: AgentSpawnReq) -> AgentSpawnRsp:
+        """
+        Start the worker of a hub, unless it is already running.
+
+        Args:
+            msg (AgentSpawnReq): The request.
+
+        Returns:
+            AgentSpawnRsp: The worker's PID, or why it could not be started.
+        """
+        rsp = AgentSpawnRsp(address=msg.address, agent=self.name, request=msg.request)
+        self.reap()
+        proc = self.workers.get(msg.address)
+        if proc is not None:
+            rsp.pid = proc.pid
+        elif len(self.workers) >= self.max_workers:
+            rsp.error = f"Agent {self.name} is already running {len(self.workers)} workers"
+        else:
+            try:
+                proc = subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-u",
+                        "-m",
+                        "src.worker.worker",
+                        str(msg.address.net),
+                        str(msg.address.hub),
+                        self.pub_addr,
+                        self.pull_addr,
+                    ]
+                )
+            except OSError as e:
+                rsp.error = repr(e)
+            else:
+                self.workers[msg.address] = proc
+                rsp.pid = proc.pid
+                logging.info(f"Agent {self.name}: started hub {msg.address.tag} worker {proc.pid}")
+        return rsp
+
+    def on_kill_req(self, msg: AgentKillReq) -> None:
+        """
+        Stop the worker of a hub, if it is running. It is no longer counted as the hub's worker, so a spawn request
+        that follows starts a new one, and it is reaped once it has exited.
+
+        Args:
+            msg (AgentKillReq): The request.
+        """
+        proc = self.workers.pop(msg.address, None)
+        if proc is not None:
+            logging.info(f"Agent {self.name}: stopping hub {msg.address.tag} worker {proc.pid}")
+            proc.terminate()
+            self.stopping.append(proc)
+
+    async def send(self, msg) -> None:
+        """
+        Send a message to the controller.
+        """
+        await self.push_sock.send_multipart(encode_message(msg))
+
+    async def heartbeat_loop(self) -> None:
+        """
+        Register with the controller now, and again every AGENT_HEARTBEAT_SECONDS.
+        """
+        while True:
+            await self.send(self.registration())
+            await asyncio.sleep(settings.AGENT_HEARTBEAT_SECONDS)
+
+    async def run(self) -> None:
+        """
+        Register with the controller and carry out its commands, until cancelled.
+        """
+        logging.info(f"Agent {self.name}: {self.cores} cores, up to {self.max_workers} workers")
+        heartbeats = asyncio.create_task(self.heartbeat_loop())
+        try:
+            while True:
+                frames = await self.sub_sock.recv_multipart()
+                try:
+                    msg = decode_message(frames[-1])
+                except Exception as e:
+                    logging.warning(f"Agent {self.name}: unable to decode command: {e}")
+                    continue
+                if isinstance(msg, AgentSpawnReq):
+                    await self.send(self.on_spawn_req(msg))
+                elif isinstance(msg, AgentKillReq):
+                    self.on_kill_req(msg)
+        finally:
+            heartbeats.cancel()
+
+    def close(self) -> None:
+        """
+        Stop every worker the agent is running, and close its sockets.
+        """
+        procs = [*self.workers.values(), *self.stopping]
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self.workers.clear()
+        self.stopping.clear()
+        self.push_sock.close(linger=0)
+        self.sub_sock.close(linger=0)
+        self.ctx.term()
+
+
+def main() -> None:
+    """Entry point for the host agent."""
+    parser = argparse.ArgumentParser(description="Hub worker host agent")
+    parser.add_argument("pub_addr", type=str, help="Controller PUB endpoint, e.g. tcp://controller:12501")
+    parser.add_argument("pull_addr", type=str, help="Controller PULL endpoint, e.g. tcp://controller:12502")
+    parser.add_argument("--name", default=settings.AGENT_NAME or socket.gethostname(), help="Name to register under")
+    parser.add_argument("--max-workers", type=int, default=settings.AGENT_MAX_WORKERS, help="Most workers to run")
+    args = parser.parse_args()
+    agent = HostAgent(args.name, args.pub_addr, args.pull_addr, args.max_workers)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Stop the workers on the way out
+    try:
+        asyncio.run(agent.run())
+    except KeyboardInterrupt:
+        logging.info(f"Agent {agent.name} stopped by user")
+    finally:
+        agent.close()
+
+
+if __name__ == "__main__":
+    main()
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
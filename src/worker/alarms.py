@@ -0,0 +1,280 @@
+"""
+alarms.py
+
+Alarm generation for a hub worker: raise and clear alarms on the hub and its APs and RTs, run alarm storms, and send
+the resulting events to the NMS in batches.
+
+Each node has at most one alarm of each category and code active. Raising an alarm that is already active, or clearing
+one that is not, is ignored (and counted as deduplicated), so the NMS only ever sees alternating raise and clear events
+for an alarm. Events wait in a queue, one per node and alarm, until they are sent: if an alarm is raised and cleared
+again before the raise was sent, the two cancel out and neither is sent.
+
+The queue is sent in batches of up to ALARM_BATCH_SIZE events, as soon as a batch is full or at the latest every
+ALARM_FLUSH_INTERVAL seconds, over the hub's shared HTTP client with up to ALARM_MAX_IN_FLIGHT batches outstanding. If
+the NMS falls so far behind that ALARM_MAX_PENDING events are waiting, further events are dropped rather than queued.
+The counters in AlarmStats, reported to the controller with the hub's status, show how the NMS coped.
+
+A storm (see AlarmStorm) raises or clears its alarm on random nodes, in bursts, at a given rate for a given time.
+
+Usage:
+    engine = AlarmEngine(hub)
+    asyncio.create_task(engine.run())
+    engine.raise_alarm(node, AlarmSpec(category=AlarmCategory.O1, code="link_down"))
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Literal
+
+from src.config import settings
+from src.worker.worker_api import Address, AlarmCategory, AlarmSeverity, AlarmSpec, AlarmStats, AlarmStorm
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+ALARM_BATCH_PATH = "/api/v1/alarm/batch"  # NBAPI route taking an NmsAlarmBatch
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class AlarmEngine:
+    """
+    The alarms of a hub's nodes, and the queue of events waiting to be sent to the NMS.
+
+    Args:
+        hub (Any): The hub worker, for its address and shared HTTP client.
+    """
+
+    def __init__(self, hub: Any):
+        self.hub = hub
+        self.active: dict[Address, dict[tuple[AlarmCategory, str], AlarmSeverity]] = {}  # Node -> its active alarms
+        self._pending: OrderedDict[tuple[Address, AlarmCategory, str], dict[str, Any]] = OrderedDict()  # NmsAlarms
+        self._ready = asyncio.Event()  # Set when a full batch is waiting
+        self._slots = asyncio.Semaphore(settings.ALARM_MAX_IN_FLIGHT)
+        self._sends: set[asyncio.Task] = set()
+        self._storms: dict[asyncio.Task, set[Address]] = {}  # Running storm -> the nodes it runs across
+        self._stats = AlarmStats()
+
+    def raise_alarm(self, node: Any, alarm: AlarmSpec) -> bool:
+        """
+        Raise an alarm on a node.
+
+        Args:
+            node (Any): The node, with an address and AUID.
+            alarm (AlarmSpec): The alarm.
+
+        Returns:
+            bool: True if the alarm was raised; False if it was already active, or the queue is full.
+        """
+        key = (alarm.category, alarm.code)
+        if key in self.active.get(node.address, ()):
+            self._stats.deduplicated += 1
+            return False
+        if not self._queue(node, alarm, "raised"):
+            return False
+        self.active.setdefault(node.address, {})[key] = alarm.severity
+        self._stats.raised += 1
+        return True
+
+    def clear_alarm(self, node: Any, alarm: AlarmSpec) -> bool:
+        """
+        Clear an alarm on a node.
+
+        Args:
+            node (Any): The node, with an address and AUID.
+            alarm (AlarmSpec): The alarm.
+
+        Returns:
+            bool: True if the alarm was cleared; False if it was not active, or the queue is full.
+        """
+        alarms = self.active.get(node.address)
+        key = (alarm.category, alarm.code)
+        if alarms is None or key not in alarms:
+            self._stats.deduplicated += 1
+            return False
+        if not self._queue(node, alarm, "cleared"):
+            return False
+        del alarms[key]
+        if not alarms:
+            del self.active[node.address]
+        self._stats.cleared += 1
+        return True
+
+    def toggle_alarm(self, node: Any, alarm: AlarmSpec) -> bool:
+        """
+        Clear an alarm on a node if it is active, else raise it.
+
+        Returns:
+            bool: True if the alarm changed state.
+        """
+        if (alarm.category, alarm.code) in self.active.get(node.address, ()):
+            return self.clear_alarm(node, alarm)
+        return self.raise_alarm(node, alarm)
+
+    def _queue(self, node: Any, alarm: AlarmSpec, state: Literal["raised", "cleared"]) -> bool:
+        """
+        Queue an event for the NMS, or cancel out the opposite event for the same alarm if that has not been sent.
+
+        Returns:
+            bool: False if the event was dropped because the queue is full.
+        """
+        key = (node.address, alarm.category, alarm.code)
+        if key in self._pending:
+            del self._pending[key]
+            self._stats.coalesced += 1
+            return True
+        if len(self._pending) >= settings.ALARM_MAX_PENDING:
+            self._stats.dropped += 1
+            return False
+        self._pending[key] = {
+            "auid": node.auid,
+            "category": alarm.category,
+            "code": alarm.code,
+            "severity": alarm.severity,
+            "state": state,
+            "text": alarm.text,
+            "event_time": time.time(),
+        }
+        if len(self._pending) >= settings.ALARM_BATCH_SIZE:
+            self._ready.set()
+        return True
+
+    def forget(self, addresses: set[Address]) -> int:
+        """
+        Drop the active alarms, and unsent events, of nodes that are being removed, and stop any storm running across
+        them. Nothing is sent to the NMS for them.
+
+        Args:
+            addresses (set[Address]): The nodes.
+
+        Returns:
+            int: The number of alarms and events dropped.
+        """
+        for task in [task for task, storm_nodes in self._storms.items() if not storm_nodes.isdisjoint(addresses)]:
+            task.cancel()
+            del self._storms[task]
+        dropped = sum(len(self.active.pop(address, ())) for address in addresses)
+        for key in [key for key in self._pending if key[0] in addresses]:
+            del self._pending[key]
+            dropped += 1
+        return dropped
+
+    def start_storm(self, nodes: list[Any], storm: AlarmStorm) -> None:
+        """
+        Start an alarm storm across some of the hub's nodes. It runs in the background until it has generated
+        rate * duration events, or is stopped.
+
+        Args:
+            nodes (list[Any]): The nodes.
+            storm (AlarmStorm): The storm.
+        """
+        if not nodes:
+            return
+        task = asyncio.create_task(self._storm(nodes, storm))
+        self._storms[task] = {node.address for node in nodes}
+        task.add_done_callback(lambda done: self._storms.pop(done, None))
+
+    async def _storm(self, nodes: list[Any], storm: AlarmStorm) -> None:
+        """
+        Generate the events of an alarm storm, a burst at a time, on a fixed schedule so that the rate holds however
+        long each burst takes.
+        """
+        loop = asyncio.get_running_loop()
+        interval = storm.burst / storm.rate
+        remaining = round(storm.rate * storm.duration)
+        tick = loop.time()
+        logging.info(f"Hub {self.hub.address.tag}: {remaining} event alarm storm across {len(nodes)} nodes")
+        while remaining > 0:
+            for node in random.choices(nodes, k=min(storm.burst, remaining)):
+                self.toggle_alarm(node, storm)
+            remaining -= storm.burst
+            tick += interval
+            await asyncio.sleep(max(0.0, tick - loop.time()))
+
+    def stop_storms(self) -> int:
+        """
+        Stop every alarm storm running. Alarms they raised stay active.
+
+        Returns:
+            int: The number of storms stopped.
+        """
+        storms, self._storms = self._storms, {}
+        for task in storms:
+            task.cancel()
+        return len(storms)
+
+    async def run(self) -> None:
+        """
+        Send queued events to the NMS for as long as the worker runs.
+        """
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._ready.wait(), settings.ALARM_FLUSH_INTERVAL)
+            self._ready.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Send every queued event, in batches, waiting for a free slot before taking each batch off the queue.
+        """
+        while self._pending:
+            await self._slots.acquire()
+            size = min(len(self._pending), settings.ALARM_BATCH_SIZE)
+            batch = [self._pending.popitem(last=False)[1] for _ in range(size)]
+            task = asyncio.create_task(self._submit(batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _submit(self, batch: list[dict[str, Any]]) -> None:
+        """
+        Send a batch of events to the NMS, recording how long it took and whether it was accepted.
+        """
+        from src.nms_api import NmsAlarmBatch, NmsAuthInfo  # noqa: PLC0415 - kept off the worker's import path
+
+        stats = self._stats
+        started = time.perf_counter()
+        try:
+            res = await self.hub.http_client.post(
+                f"{settings.NBAPI_URL}{ALARM_BATCH_PATH}",
+                json=NmsAlarmBatch(alarms=batch).model_dump(),
+                headers=NmsAuthInfo().auth_header(),
+            )
+            res.raise_for_status()
+            stats.submitted += len(batch)
+        except Exception as e:  # Counted, and logged without a traceback so that a storm does not flood the log
+            logging.warning(f"Hub {self.hub.address.tag}: {len(batch)} alarm events not accepted: {e!r}")
+            stats.failed += len(batch)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.batch_ms_mean = (stats.batch_ms_mean * stats.batches + elapsed_ms) / (stats.batches + 1)
+            stats.batch_ms_max = max(stats.batch_ms_max, elapsed_ms)
+            stats.batches += 1
+            self._slots.release()
+
+    def stats(self) -> AlarmStats:
+        """
+        Returns:
+            AlarmStats: A copy of the engine's counters.
+        """
+        return self._stats.model_copy(
+            update={
+                "active": sum(len(alarms) for alarms in self.active.values()),
+                "pending": len(self._pending),
+                "storms": len(self._storms),
+            }
+        )
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
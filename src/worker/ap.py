@@ -17,9 +17,7 @@ Usage:
 # Imports
 #######################################################################################################################
 
-import asyncio
 import logging
-from random import random
 
 import shortuuid
 
@@ -33,8 +31,7 @@ from src.nms_api import (
 )
 from src.worker.comms import WorkerComms
 from src.worker.node import Node
-from src.worker.utils import fix_execution_time
-from src.worker.worker_api import APRegisterReq, APRegisterRsp
+from src.worker.worker_api import APCredentials, APRegisterReq, APRegisterRsp
 
 #######################################################################################################################
 # Globals
@@ -71,24 +68,31 @@ class AP(Node):
         self.lon_deg = self.lat_deg = None
         self.heartbeat_task = None
 
-    async def heartbeat(self):
+    async def send_heartbeat(self):
         """
-        Send periodic heartbeat messages to the SBAPI to indicate the AP is alive.
+        Send one heartbeat to the SBAPI to indicate the AP is alive.
         """
-        await asyncio.sleep(self.heartbeat_secs * random())  # Avoids thundering herd
-        while True:
-            async with fix_execution_time(self.heartbeat_secs, f"AP {self.address.tag}", logging):
-                logging.debug(f"AP {self.address.tag}: {self.heartbeat_secs}s heartbeat")
-                try:
-                    secret_headers = NmsRegisterAPSecretHeaders(gnodebid=self.auid, secret=self.ap_secret)
-                    res = await self.http_client.post(
-                        f"{settings.SBAPI_URL}/ap/heartbeat", json={}, headers=secret_headers.model_dump()
-                    )
-                    res.raise_for_status()
-                    self.record_hb(True)
-                except Exception:
-                    logging.warning(f"AP {self.address.tag}: Heartbeat failed", exc_info=True)
-                    self.record_hb(False)
+        logging.debug(f"AP {self.address.tag}: {self.heartbeat_secs}s heartbeat")
+        try:
+            secret_headers = NmsRegisterAPSecretHeaders(gnodebid=self.auid, secret=self.ap_secret)
+            res = await self.http_client.post(
+                f"{settings.SBAPI_URL}/ap/heartbeat", json={}, headers=secret_headers.model_dump()
+            )
+            res.raise_for_status()
+            self.record_hb(True)
+        except Exception:
+            logging.warning(f"AP {self.address.tag}: Heartbeat failed", exc_info=True)
+            self.record_hb(False)
+
+    async def deregister(self):
+        """
+        Remove the AP from the NBAPI, under the AUID it was created with.
+        """
+        res = await self.http_client.delete(
+            f"{settings.NBAPI_URL}/api/v1/node/ap/T-{self.auid}", headers=NmsAuthInfo().auth_header()
+        )
+        res.raise_for_status()
+        logging.debug(f"{self.address.tag}: AP deregistered (AUID: {self.auid})")
 
     async def on_register_req(self, command: APRegisterReq) -> APRegisterRsp | None:
         """
@@ -103,6 +107,8 @@ class AP(Node):
             5. On success, the AP is considered registered and ready for further provisioning.
 
         This method performs the registration and sends an APRegisterInd message back to the controller on success.
+        If the request carries credentials from an earlier registration (e.g. when restoring a snapshot), the AP is set
+        up from them and no NMS calls are made.
 
         Args:
             command (APRegisterReq): The AP register request message.
@@ -114,6 +120,13 @@ class AP(Node):
         self.heartbeat_secs = command.heartbeat_seconds
         self.auid = command.auid
         self.azimuth_deg = command.azimuth_deg
+        if command.restore is not None:
+            self.ap_secret = command.restore.secret
+            self.lat_deg, self.lon_deg = command.restore.lat_deg, command.restore.lon_deg
+            self.registered = True
+            logging.debug(f"{self.address.tag}: AP restored (AUID: {self.auid})")
+            return APRegisterRsp(success=True, address=self.address, credentials=command.restore)
+
         self.ap_secret = shortuuid.uuid()
 
         temp_auid = f"T-{self.auid}"
@@ -158,7 +171,8 @@ class AP(Node):
             res.raise_for_status()
 
             self.registered = True
-            response = APRegisterRsp(success=True, address=self.address)
+            credentials = APCredentials(secret=self.ap_secret, lat_deg=self.lat_deg, lon_deg=self.lon_deg)
+            response = APRegisterRsp(success=True, address=self.address, credentials=credentials)
             logging.info(f"{self.address.tag}: AP registration successful (AUID: {self.auid})")
 
         except Exception:
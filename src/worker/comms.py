@@ -7,6 +7,9 @@ This module provides the WorkerComms class, which sets up ZeroMQ PUSH and SUB so
 the controller and receiving commands from the controller, respectively. The SUB socket subscribes to messages tagged
 with the address tag (e.g., "N01H02").
 
+Commands from the controller carry a per-hub sequence number. The worker acknowledges them in batches (see
+`flush_acks`/`ack_loop`) and drops any duplicates caused by controller retransmissions.
+
 Usage:
     Used internally by the worker process to send status and receive commands via ZeroMQ.
 """
@@ -14,12 +17,15 @@ Usage:
 # Imports
 #######################################################################################################################
 
+import asyncio
 import logging
+from collections import deque
 
 import zmq
 import zmq.asyncio
 
-from src.worker.worker_api import Address, Message
+from src.config import settings
+from src.worker.worker_api import Address, BaseMessageBody, CommandAck, decode_message, encode_message
 
 #######################################################################################################################
 # Globals
@@ -53,7 +59,7 @@ class WorkerComms:
             pull_addr (str): Address for the controller's PULL socket (for status updates).
             pub_addr (str): Address for the controller's PUB socket (for commands).
         """
-        ctx = zmq.asyncio.Context()
+        self.ctx = ctx = zmq.asyncio.Context()
         self.address = address
         # This is for sending status updates to the controller
         self.push_sock = ctx.socket(zmq.PUSH)
@@ -64,6 +70,12 @@ class WorkerComms:
         self.pub_sock.connect(pub_addr)
         self.pub_sock.setsockopt_string(zmq.SUBSCRIBE, self.address.tag)
 
+        # Command sequencing: acks waiting to be sent, plus a bounded history of seen sequence numbers for de-dup
+        self._pending_acks: list[int] = []
+        self._seen_seqs: set[int] = set()
+        self._seen_order: deque[int] = deque()
+        self._seen_limit = 4 * settings.COMMAND_WINDOW_SIZE
+
     def __enter__(self):
         return self
 
@@ -76,32 +88,79 @@ class WorkerComms:
         """
         Send a message to the controller.
 
-        Wraps the payload in a Message root model for correct encoding.
-
         Args:
             msg: The message or payload to send (Message or compatible type).
         """
-        msg = msg if isinstance(msg, Message) else Message(msg)
-        payload = f"{self.address.tag}: {msg.model_dump_json()}"
-        await self.push_sock.send_string(payload)
-        logging.debug("Tx %s->controller: %r", self.address.tag, msg.root)
+        await self.push_sock.send_multipart(encode_message(msg))
+        logging.debug("Tx %s->controller: %r", self.address.tag, msg)
 
-    async def recv_msg(self) -> Message | None:
+    async def recv_msg(self) -> BaseMessageBody | None:
         """
-        Receive and decode a command from the controller.
+        Receive and decode a command from the controller. Only the payload frame is decoded; the tag frame is there
+        for SUB prefix filtering.
 
         Returns:
-            Message | None: The decoded Message object, or None if decoding fails.
+            BaseMessageBody | None: The decoded message, or None if decoding fails or it is a duplicate.
         """
-        message = await self.pub_sock.recv_string()
+        frames = await self.pub_sock.recv_multipart()
+        payload = frames[-1]
         data = None
         try:
-            json_part = message.split(" ", 1)[1]
-            data = Message.model_validate_json(json_part).root
+            data = decode_message(payload)
         except Exception as e:
-            logging.error(f"[AP Worker {self.address.tag}] Error decoding message: {e} in message: {message}")
+            logging.error(f"[AP Worker {self.address.tag}] Error decoding message: {e} in message: {payload!r}")
+
+        if data is not None and data.seq is not None:
+            # Always ack, even duplicates: the controller resent it because it never saw our previous ack.
+            duplicate = self._check_duplicate(data.seq)
+            self._pending_acks.append(data.seq)
+            if len(self._pending_acks) >= settings.COMMAND_ACK_BATCH_SIZE:
+                await self.flush_acks()
+            if duplicate:
+                logging.debug(f"[AP Worker {self.address.tag}] Dropping duplicate command {data.seq}")
+                return None
         return data
 
+    def _check_duplicate(self, seq: int) -> bool:
+        """
+        Record a command sequence number and report whether it has been seen before.
+
+        Only the most recent sequence numbers are remembered: the controller only retransmits commands from its
+        bounded window, so anything older cannot be a duplicate we need to catch.
+
+        Args:
+            seq (int): The sequence number of the received command.
+
+        Returns:
+            bool: True if this sequence number was already received.
+        """
+        if seq in self._seen_seqs:
+            return True
+        self._seen_seqs.add(seq)
+        self._seen_order.append(seq)
+        if len(self._seen_order) > self._seen_limit:
+            self._seen_seqs.discard(self._seen_order.popleft())
+        return False
+
+    async def flush_acks(self) -> None:
+        """
+        Send all pending command acknowledgements to the controller in a single message.
+        """
+        if self._pending_acks:
+            seqs, self._pending_acks = self._pending_acks, []
+            await self.send_msg(CommandAck(address=self.address, seqs=seqs))
+
+    async def ack_loop(self, interval: float = settings.COMMAND_ACK_INTERVAL) -> None:
+        """
+        Periodically flush pending command acknowledgements, so a partial batch is never held back for long.
+
+        Args:
+            interval (float): Flush interval in seconds.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush_acks()
+
 
 #######################################################################################################################
 # End of file
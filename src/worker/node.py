@@ -16,6 +16,9 @@ import asyncio
 #######################################################################################################################
 # Imports
 #######################################################################################################################
+import logging
+import math
+import random
 from typing import Any
 
 from src.worker.comms import WorkerComms
@@ -32,6 +35,14 @@ nodes: dict[Address, Any] = {}
 #######################################################################################################################
 
 
+def resolve(future: asyncio.Future, result: Any) -> None:
+    """
+    Set the result of a future, unless it is already done.
+    """
+    if not future.done():
+        future.set_result(result)
+
+
 class Node:
     """
     Base class for network nodes (APs and RTs).
@@ -58,13 +69,16 @@ class Node:
         self.heartbeat_state = HeartbeatStatsRsp(address=self.address)
         self.registered = False
         self.heartbeat_task = None
+        self.heartbeat_paused = False
+        self._heartbeat_wake: asyncio.Future | None = None  # Resolved to end the heartbeat loop's current wait early
         nodes[self.address] = self
 
     def __del__(self):
         """
-        Deregister the node from the global nodes dictionary upon deletion.
+        Deregister the node from the global nodes dictionary upon deletion, unless another node has since taken its
+        address.
         """
-        if self.address in nodes:
+        if nodes.get(self.address) is self:
             del nodes[self.address]
 
     def record_hb(self, success: bool):
@@ -104,9 +118,98 @@ class Node:
 
     async def heartbeat(self):
         """
-        Send periodic heartbeat messages to the SBAPI to indicate the node is alive.
+        Send a heartbeat every heartbeat_secs seconds, until cancelled.
+
+        Beats fall at a phase within each period that is picked at random for each node, so that the nodes of a hub
+        are spread across the period rather than beating together, on a grid of absolute time: the k-th beat is at
+        (k + phase) * heartbeat_secs. A change to the interval (see set_heartbeat) therefore takes effect at the
+        node's next beat on the new grid, in the same phase, without restarting the task. Nothing is sent while the
+        node is paused.
+        """
+        loop = asyncio.get_running_loop()
+        phase = random.random()
+        last = -math.inf
+        while True:
+            if self.heartbeat_paused:
+                await self._heartbeat_wait(None)
+                continue
+            period = self.heartbeat_secs
+            now = loop.time()
+            due = (math.floor(now / period - phase) + 1 + phase) * period
+            if due - last < period / 2:  # Just after a beat, rounding can land on the same grid point again
+                due += period
+            if not await self._heartbeat_wait(due - now):
+                continue  # Reconfigured: work out the next beat afresh
+            last = due
+            await self.send_heartbeat()
+            if loop.time() - due > period:
+                logging.debug(
+                    f"{self.address.tag}: Heartbeat loop missed deadline by {loop.time() - due - period:.2f}s"
+                )
+
+    async def _heartbeat_wait(self, delay: float | None) -> bool:
+        """
+        Wait until a beat is due, or the heartbeat is reconfigured.
+
+        Args:
+            delay (float | None): Seconds until the beat, or None to wait only for a reconfiguration.
+
+        Returns:
+            bool: True if the beat is due, False if the heartbeat was reconfigured.
+        """
+        loop = asyncio.get_running_loop()
+        self._heartbeat_wake = wake = loop.create_future()
+        timer = None if delay is None else loop.call_later(max(delay, 0.0), resolve, wake, True)
+        try:
+            return await wake
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self._heartbeat_wake = None
+
+    def set_heartbeat(self, seconds: int | None = None, paused: bool | None = None) -> None:
+        """
+        Change the heartbeat interval, or pause or resume heartbeats. A running heartbeat loop picks up the change at
+        once.
+
+        Args:
+            seconds (int | None): New interval in seconds, or None to keep the current one.
+            paused (bool | None): Whether to pause heartbeats, or None to leave them as they are.
+        """
+        if seconds is not None:
+            self.heartbeat_secs = seconds
+        if paused is not None:
+            self.heartbeat_paused = paused
+        if self._heartbeat_wake is not None:
+            resolve(self._heartbeat_wake, False)
+
+    async def send_heartbeat(self):
+        """
+        Send one heartbeat to the SBAPI.
+        """
+        raise NotImplementedError("Subclasses must implement send_heartbeat method")
+
+    def stop(self) -> bool:
+        """
+        Stop the node's heartbeat task, if it is running.
+
+        Returns:
+            bool: True if a heartbeat task was stopped.
+        """
+        task, self.heartbeat_task = self.heartbeat_task, None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def deregister(self):
+        """
+        Remove the node from the NMS.
+
+        Raises:
+            Exception: If the NMS does not remove it.
         """
-        raise NotImplementedError("Subclasses must implement heartbeat method")
+        raise NotImplementedError("Subclasses must implement deregister method")
 
     async def on_start_heartbeat_req(self):
         """
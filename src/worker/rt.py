@@ -15,16 +15,14 @@ Usage:
 # Imports
 #######################################################################################################################
 
-import asyncio
 import logging
 import math
-from random import random
 
 from src.config import settings
 from src.nms_api import NmsAuthInfo, NmsRTCreateRequest, NmsRTRegisterParam, NmsRTRegisterRequest
 from src.worker.comms import WorkerComms
 from src.worker.node import Node
-from src.worker.utils import fix_execution_time, zero_centred_rand
+from src.worker.utils import zero_centred_rand
 from src.worker.worker_api import RTRegisterReq, RTRegisterRsp
 
 #######################################################################################################################
@@ -65,25 +63,32 @@ class RT(Node):
         self.heartbeat_task = None
         self.registered = False
 
-    async def heartbeat(self):
+    async def send_heartbeat(self):
         """
-        Send periodic heartbeat messages to the SBAPI to indicate the RT is alive.
+        Send one heartbeat to the SBAPI to indicate the RT is alive.
         """
-        await asyncio.sleep(self.heartbeat_secs * random())  # Avoids thundering herd
-        while True:
-            async with fix_execution_time(self.heartbeat_secs, f"RT {self.address.tag}", logging):
-                logging.debug(f"RT {self.address.tag}: {self.heartbeat_secs}s heartbeat")
-                try:
-                    rt_token = NmsAuthInfo.rt_jwt(self.auid)
-                    candidate_headers = {"Authorization": f"Bearer {rt_token}"}
-                    res = await self.http_client.post(
-                        f"{settings.SBAPI_URL}/api/v1/{self.auid}/heartbeat", json={}, headers=candidate_headers
-                    )
-                    res.raise_for_status()
-                    self.record_hb(True)
-                except Exception:
-                    self.record_hb(False)
-                    logging.warning(f"RT {self.address.tag}: Heartbeat failed", exc_info=True)
+        logging.debug(f"RT {self.address.tag}: {self.heartbeat_secs}s heartbeat")
+        try:
+            rt_token = NmsAuthInfo.rt_jwt(self.auid)
+            candidate_headers = {"Authorization": f"Bearer {rt_token}"}
+            res = await self.http_client.post(
+                f"{settings.SBAPI_URL}/api/v1/{self.auid}/heartbeat", json={}, headers=candidate_headers
+            )
+            res.raise_for_status()
+            self.record_hb(True)
+        except Exception:
+            self.record_hb(False)
+            logging.warning(f"RT {self.address.tag}: Heartbeat failed", exc_info=True)
+
+    async def deregister(self):
+        """
+        Remove the RT from the NBAPI, under the AUID it was created with.
+        """
+        res = await self.http_client.delete(
+            f"{settings.NBAPI_URL}/api/v1/node/rt/T-{self.auid}", headers=NmsAuthInfo().auth_header()
+        )
+        res.raise_for_status()
+        logging.debug(f"{self.address.tag}: RT deregistered (AUID: {self.auid})")
 
     async def on_rt_register_req(self, command: RTRegisterReq) -> RTRegisterRsp | None:
         """
@@ -96,6 +101,7 @@ class RT(Node):
             4. On success, the AP is considered registered and ready for further provisioning.
 
         This method performs the registration and sends an APRegisterInd message back to the controller on success.
+        An RT that is already registered (`command.restore`) is set up without any NMS calls.
 
         Args:
             command (RTRegisterReq): The registration request to process
@@ -105,6 +111,10 @@ class RT(Node):
         self.heartbeat_secs = command.heartbeat_seconds
         self.auid = command.auid
         self.azimuth_deg = command.azimuth_deg
+        if command.restore:
+            self.registered = True
+            logging.debug(f"{self.address.tag}: RT restored (AUID: {self.auid})")
+            return RTRegisterRsp(success=True, address=self.address)
 
         temp_auid = f"T-{self.auid}"
         try:
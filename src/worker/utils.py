@@ -12,8 +12,6 @@ import ipaddress
 import random
 import time
 
-import netifaces
-
 #######################################################################################################################
 # Globals
 #######################################################################################################################
@@ -70,6 +68,7 @@ def get_ipv6_prefix():
 
     Caches the result for efficiency.
     """
+    import netifaces  # noqa: PLC0415 - only needed here, so kept off the worker's import path
 
     for iface in netifaces.interfaces():
         addrs = netifaces.ifaddresses(iface).get(netifaces.AF_INET6, [])
@@ -23,17 +23,35 @@ Args:
 import argparse
 import asyncio
 import logging
-
-import httpx
-import shortuuid
+import os
+import time
 
 from src.config import settings
-from src.worker.ap import AP
+from src.worker.alarms import AlarmEngine
 from src.worker.comms import WorkerComms
 from src.worker.node import Node, nodes
-from src.worker.rt import RT
 from src.worker.utils import fix_execution_time
-from src.worker.worker_api import Address, APRegisterReq, HubConnectInd, Message, MessageTypes, RTRegisterReq
+from src.worker.worker_api import (
+    Address,
+    AlarmStats,
+    APCredentials,
+    APRegisterReq,
+    APSync,
+    HubConnectInd,
+    HubHelloReq,
+    HubResyncRsp,
+    HubStatusInd,
+    Message,
+    MessageTypes,
+    NodeAction,
+    NodeActionReq,
+    NodeHeartbeats,
+    NodeSync,
+    RTRegisterReq,
+    SubtreeDeleteReq,
+    SubtreeDeleteRsp,
+    TeardownStats,
+)
 
 #######################################################################################################################
 # Globals
@@ -67,7 +85,25 @@ class Hub(Node):
             address (Address): The address of the hub.
             comms (WorkerComms): Communication link to the controller.
         """
-        http_client = httpx.AsyncClient(
+        import shortuuid  # noqa: PLC0415
+
+        super().__init__(address, comms, None)  # The HTTP client is created once the hub has connected
+        self.auid = str(shortuuid.uuid())
+        self.comms = comms
+        self._reported: dict[int, tuple[int, int, int, int]] = {}  # AP index -> counters in the last status report
+        self._reported_hub: tuple[int, int] | None = None  # Hub totals in the last status report
+        self._reported_alarms: AlarmStats | None = None  # Alarm counters in the last status report
+        self.alarms = AlarmEngine(self)
+
+    def open_http_client(self) -> None:
+        """Create the HTTP client shared by all APs and RTs in the hub.
+
+        httpx (and the node modules that use it) are imported here rather than at module level, so that they are not
+        on the path to the worker's first HubConnectInd. When forked from the zygote they are already loaded.
+        """
+        import httpx  # noqa: PLC0415
+
+        self.http_client = httpx.AsyncClient(
             timeout=settings.HTTPX_TIMEOUT,
             verify=settings.VERIFY_SSL_CERT,
             follow_redirects=True,
@@ -75,9 +111,6 @@ class Hub(Node):
                 max_connections=settings.WORKER_HTTPX_POOLSIZE, max_keepalive_connections=settings.WORKER_HTTPX_POOLSIZE
             ),
         )
-        super().__init__(address, comms, http_client)
-        self.auid = str(shortuuid.uuid())
-        self.comms = comms
 
     async def ap_register_req(self, command: APRegisterReq) -> Message | None:
         """Process an AP register request. We handle this at the worker level to create
@@ -89,6 +122,8 @@ class Hub(Node):
         Returns:
             Message: The response message from the AP.
         """
+        from src.worker.ap import AP  # noqa: PLC0415 - deferred until the first AP, see open_http_client
+
         ap = AP(command.address, self.comms, self.http_client)
         return await ap.on_register_req(command)
 
@@ -102,10 +137,126 @@ class Hub(Node):
         Returns:
             Message: The response message from the AP.
         """
+        from src.worker.rt import RT  # noqa: PLC0415
 
         rt = RT(command.address, self.comms, self.http_client)
         return await rt.on_rt_register_req(command)
 
+    def on_hello_req(self, command: HubHelloReq) -> HubResyncRsp:
+        """Answer a restarted controller with the state of every AP whose digest differs from the controller's.
+
+        Args:
+            command (HubHelloReq): The hello, with the controller's digest of each AP.
+
+        Returns:
+            HubResyncRsp: The differing APs, and those the controller has that this worker does not.
+        """
+        aps: dict[int, APSync] = {}
+        for address, node in list(nodes.items()):
+            if address.ap is None:
+                continue
+            ap = aps.setdefault(address.ap, APSync())
+            if address.rt is not None:
+                ap.rts[address.rt] = NodeSync(registered=node.registered, heartbeat_seconds=node.heartbeat_secs or 0)
+                continue
+            ap.registered = node.registered
+            ap.heartbeat_seconds = node.heartbeat_secs or 0
+            ap.azimuth_deg = node.azimuth_deg or 0
+            if node.registered:
+                ap.credentials = APCredentials(secret=node.ap_secret, lat_deg=node.lat_deg, lon_deg=node.lon_deg)
+
+        differing = {index: ap for index, ap in aps.items() if command.digests.get(index) != ap.digest()}
+        missing = [index for index in command.digests if index not in aps]
+        logging.info(f"Hub {self.address.tag} resync: {len(differing)} APs differ, {len(missing)} missing")
+        return HubResyncRsp(address=self.address, pid=os.getpid(), aps=differing, missing=missing)
+
+    async def on_node_action_req(self, command: NodeActionReq) -> None:
+        """Apply an action to a set of nodes in the hub. Nodes that no longer exist are skipped.
+
+        Args:
+            command (NodeActionReq): The action and the nodes to apply it to.
+        """
+        if command.action == NodeAction.STOP_ALARM_STORMS:
+            logging.info(f"Hub {self.address.tag}: {self.alarms.stop_storms()} alarm storms stopped")
+            return
+        targets = [node for address in command.addresses() if (node := nodes.get(address)) is not None]
+        match command.action:
+            case NodeAction.START_HEARTBEAT:
+                for node in targets:
+                    await node.on_start_heartbeat_req()
+            case NodeAction.SET_HEARTBEAT:
+                for node in targets:
+                    node.set_heartbeat(seconds=command.heartbeat_seconds)
+            case NodeAction.PAUSE_HEARTBEAT | NodeAction.RESUME_HEARTBEAT:
+                for node in targets:
+                    node.set_heartbeat(paused=command.action == NodeAction.PAUSE_HEARTBEAT)
+            case NodeAction.RAISE_ALARM:
+                for node in targets:
+                    self.alarms.raise_alarm(node, command.alarm)
+            case NodeAction.CLEAR_ALARM:
+                for node in targets:
+                    self.alarms.clear_alarm(node, command.alarm)
+            case NodeAction.START_ALARM_STORM:
+                self.alarms.start_storm(targets, command.storm)
+        logging.info(f"Hub {self.address.tag}: {command.action} applied to {len(targets)} nodes")
+
+    async def on_subtree_delete_req(self, command: SubtreeDeleteReq) -> SubtreeDeleteRsp:
+        """Tear down some or all of the hub's APs, with their RTs.
+
+        Their heartbeat tasks are cancelled and they are dropped from the node registry, the alarm engine and the
+        status counters at once, so that nothing more is sent for them and their memory can be reclaimed. If asked to,
+        they are then removed from the NMS, RTs before their APs, with up to TEARDOWN_MAX_CONCURRENT removals
+        outstanding. A node that was never registered is not removed from the NMS.
+
+        Args:
+            command (SubtreeDeleteReq): The APs to tear down.
+
+        Returns:
+            SubtreeDeleteRsp: What was torn down.
+        """
+        started = time.perf_counter()
+        aps = None if command.aps is None else set(command.aps.indices())
+        doomed = [
+            node
+            for address, node in list(nodes.items())
+            if address.ap is not None and (aps is None or address.ap in aps)
+        ]
+        stats = TeardownStats(nodes=len(doomed))
+        addresses = {node.address for node in doomed}
+        if aps is None:
+            addresses.add(self.address)
+        for node in doomed:
+            stats.heartbeats += node.stop()
+            nodes.pop(node.address, None)
+        stats.alarms = self.alarms.forget(addresses)
+        for ap in list(self._reported) if aps is None else aps:
+            self._reported.pop(ap, None)
+
+        if command.deregister:
+            slots = asyncio.Semaphore(settings.TEARDOWN_MAX_CONCURRENT)
+
+            async def deregister(node: Node) -> bool:
+                async with slots:
+                    try:
+                        await node.deregister()
+                        return True
+                    except Exception as e:  # Counted, and logged without a traceback as there may be many
+                        logging.warning(f"{node.address.tag}: Not removed from the NMS: {e!r}")
+                        return False
+
+            registered = [node for node in doomed if node.registered]
+            for level in (
+                [node for node in registered if node.address.rt is not None],
+                [node for node in registered if node.address.rt is None],
+            ):
+                removed = sum(await asyncio.gather(*(deregister(node) for node in level)))
+                stats.deregistered += removed
+                stats.failed += len(level) - removed
+
+        stats.seconds = time.perf_counter() - started
+        logging.info(f"Hub {self.address.tag} teardown: {stats}")
+        return SubtreeDeleteRsp(address=self.address, request=command.request, stats=stats)
+
     async def execute_command(self, command) -> None:
         """Execute a command received from the controller.
 
@@ -116,7 +267,7 @@ class Hub(Node):
         """
         cmd = command
         logging.debug(f"Rx ctrl->{self.address.tag}: {cmd!r}")
-        obj: Hub | RT | AP = nodes.get(cmd.address, self)
+        obj: Node = nodes.get(cmd.address, self)
         result = None
         match cmd.msg_type:
             case MessageTypes.AP_REGISTER_REQ:
@@ -127,23 +278,66 @@ class Hub(Node):
                 result = await obj.on_start_heartbeat_req()
             case MessageTypes.HEARTBEAT_STATS_REQ:
                 result = obj.on_heartbeat_stats_req()
+            case MessageTypes.HUB_HELLO_REQ:
+                result = self.on_hello_req(cmd)
+            case MessageTypes.NODE_ACTION_REQ:
+                result = await self.on_node_action_req(cmd)
+            case MessageTypes.SUBTREE_DELETE_REQ:
+                result = await self.on_subtree_delete_req(cmd)
             case _:
                 logging.warning(f"[AP Worker {self.address.tag}] Unknown command event: {cmd.msg_type}")
 
         if result is not None:
             await self.comms.send_msg(result)
 
+    def status_ind(self) -> HubStatusInd | None:
+        """Build a status report for the controller, with the counters of the APs and alarm engine that changed since
+        the last.
+
+        Returns:
+            HubStatusInd | None: The report, or None if no counters have changed.
+        """
+        aps: dict[int, NodeHeartbeats] = {}
+        for address, node in list(nodes.items()):
+            if address.ap is None or address.rt is not None:
+                continue
+            local, children = node.heartbeat_state.local, node.heartbeat_state.children
+            counters = (local.total, local.success, children.total, children.success)
+            if self._reported.get(address.ap) != counters:
+                self._reported[address.ap] = counters
+                aps[address.ap] = NodeHeartbeats(local=local.model_copy(), children=children.model_copy())
+        hub = self.heartbeat_state.children
+        alarms = self.alarms.stats()
+        if alarms == self._reported_alarms:
+            alarms = None
+        else:
+            self._reported_alarms = alarms
+        if not aps and alarms is None and self._reported_hub == (hub.total, hub.success):
+            return None
+        self._reported_hub = (hub.total, hub.success)
+        return HubStatusInd(address=self.address, hub=hub.model_copy(), aps=aps, alarms=alarms)
+
     async def reporter_loop(self):
-        """Periodically report the status of the hub and its APs/RTs to the controller."""
+        """Periodically report the status of the hub and its APs/RTs to the controller. A report with nothing changed
+        is sent at least every WORKER_KEEPALIVE_SECONDS, so that the controller can tell the worker is alive."""
+        last_sent = time.monotonic()
         while True:
             async with fix_execution_time(settings.REPORTER_INTERVAL):
-                # Implement reporting logic here if needed
-                logging.info(f"Hub {self.address.tag} Heartbeat summary: {self.heartbeat_state.children}")
+                report = self.status_ind()
+                if report is None and time.monotonic() - last_sent >= settings.WORKER_KEEPALIVE_SECONDS:
+                    report = HubStatusInd(address=self.address, hub=self.heartbeat_state.children.model_copy())
+                if report is not None:
+                    logging.debug(f"Hub {self.address.tag} Heartbeat summary: {report.hub}")
+                    await self.comms.send_msg(report)
+                    last_sent = time.monotonic()
 
     async def downlink_loop(self, max_concurrent: int = settings.MAX_CONCURRENT_WORKER_COMMANDS) -> None:
         """Main loop: wait for messages from controller and process them concurrently, limiting in-flight commands."""
         asyncio.create_task(self.reporter_loop())
+        asyncio.create_task(self.comms.ack_loop())
         await self.comms.send_msg(HubConnectInd(address=self.address))
+        self.open_http_client()
+        asyncio.create_task(self.alarms.run())
 
         logging.debug(f"{self.address.tag} starting read loop")
         semaphore = asyncio.Semaphore(max_concurrent)
@@ -169,7 +363,28 @@ class Hub(Node):
 
     async def close(self):
         """Clean up resources before closing the worker."""
-        await self.http_client.aclose()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+
+def run(network_idx: int, hub_idx: int, pub_addr: str, pull_addr: str) -> None:
+    """Run a hub worker until it is stopped.
+
+    Args:
+        network_idx (int): Network index for the hub address.
+        hub_idx (int): Hub index for the hub address.
+        pub_addr (str): Controller PUB endpoint to receive commands from.
+        pull_addr (str): Controller PULL endpoint to send messages to.
+    """
+    address = Address(net=network_idx, hub=hub_idx)
+    with WorkerComms(address, pull_addr, pub_addr) as comms:
+        worker = Hub(address, comms)
+        try:
+            asyncio.run(worker.downlink_loop())
+        except KeyboardInterrupt:
+            logging.info("Worker stopped by user")
+        finally:
+            asyncio.run(worker.close())
 
 
 def main() -> None:
@@ -180,15 +395,7 @@ def main() -> None:
     parser.add_argument("pub_addr", type=str)
     parser.add_argument("pull_addr", type=str)
     args = parser.parse_args()
-    address = Address(net=args.network_idx, hub=args.hub_idx)
-    with WorkerComms(address, args.pull_addr, args.pub_addr) as comms:
-        worker = Hub(address, comms)
-        try:
-            asyncio.run(worker.downlink_loop())
-        except KeyboardInterrupt:
-            logging.info("Worker stopped by user")
-        finally:
-            asyncio.run(worker.close())
+    run(args.network_idx, args.hub_idx, args.pub_addr, args.pull_addr)
 
 
 if __name__ == "__main__":
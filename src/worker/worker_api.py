@@ -7,6 +7,9 @@ deserialization of heterogeneous message types.
 
 The key feature is the Message class, which uses the 'msg_type' field as a discriminator to automatically decode
 incoming JSON into the correct message type (APConnectInd, APRegisterReq, or APRegisterInd).
+
+On the wire each message is two ZeroMQ frames: the address tag (used for SUB prefix filtering) and the JSON payload.
+`encode_message` and `decode_message` are the codec for these frames.
 """
 
 import ipaddress
@@ -15,6 +18,8 @@ import ipaddress
 # Imports
 #######################################################################################################################
 import logging
+import zlib
+from collections.abc import Iterable, Iterator, Sequence
 from datetime import UTC, datetime
 from enum import StrEnum, auto
 from typing import Any, Literal
@@ -30,6 +35,22 @@ from src.worker.utils import get_ipv6_prefix
 
 logger = logging.getLogger(__name__)
 
+NODE_SET_RANGE_BYTES = 12  # Rough size of one [first, last] run in JSON
+MAX_HEARTBEAT_SECONDS = 2**31 - 1  # Heartbeat intervals are kept in 32-bit signed columns
+ALARM_COUNTERS = (  # Fields of AlarmStats that add up across hubs
+    "active",
+    "raised",
+    "cleared",
+    "deduplicated",
+    "coalesced",
+    "dropped",
+    "pending",
+    "submitted",
+    "failed",
+    "batches",
+    "storms",
+)
+
 #######################################################################################################################
 # Body
 #######################################################################################################################
@@ -49,6 +70,53 @@ class MessageTypes(StrEnum):
     HEARTBEAT_STATS_REQ = auto()
     RT_HEARTBEAT_STATS_RSP = auto()
     AP_HEARTBEAT_STATS_RSP = auto()
+    COMMAND_ACK = auto()
+    HUB_HELLO_REQ = auto()
+    HUB_RESYNC_RSP = auto()
+    HUB_STATUS_IND = auto()
+    NODE_ACTION_REQ = auto()
+    SUBTREE_DELETE_REQ = auto()
+    SUBTREE_DELETE_RSP = auto()
+    AGENT_REGISTER_IND = auto()
+    AGENT_SPAWN_REQ = auto()
+    AGENT_SPAWN_RSP = auto()
+    AGENT_KILL_REQ = auto()
+
+
+class NodeAction(StrEnum):
+    """
+    Enum for the actions a NodeActionReq applies to a set of nodes.
+    """
+
+    START_HEARTBEAT = auto()
+    SET_HEARTBEAT = auto()
+    PAUSE_HEARTBEAT = auto()
+    RESUME_HEARTBEAT = auto()
+    RAISE_ALARM = auto()
+    CLEAR_ALARM = auto()
+    START_ALARM_STORM = auto()
+    STOP_ALARM_STORMS = auto()
+
+
+class AlarmCategory(StrEnum):
+    """
+    Enum for the source of an alarm: the node platform, its O1 management interface or its radio controller.
+    """
+
+    PLATFORM = auto()
+    O1 = auto()
+    RC = auto()
+
+
+class AlarmSeverity(StrEnum):
+    """
+    Enum for alarm severity.
+    """
+
+    CRITICAL = auto()
+    MAJOR = auto()
+    MINOR = auto()
+    WARNING = auto()
 
 
 class Address(BaseModel):
@@ -126,6 +194,18 @@ class Address(BaseModel):
             return Address(net=self.net)
         return None
 
+    @property
+    def hub_address(self) -> "Address":
+        """
+        Returns the address of the hub this node belongs to (i.e. the worker process that simulates it).
+
+        Returns:
+            Address: The hub-level Address instance.
+        """
+        if self.ap is None:
+            return self
+        return Address(net=self.net, hub=self.hub)
+
     @property
     def ipv6_address(self) -> str:
         """
@@ -156,9 +236,19 @@ class BaseMessageBody(BaseModel):
 
     Attributes:
         address (Address): The address of the node associated with the message.
+        seq (int | None): Per-hub command sequence number, set by the controller when the command is sent.
     """
 
     address: Address
+    seq: int | None = Field(default=None, description="Per-hub command sequence number (controller->worker only)")
+
+    @property
+    def topic(self) -> str:
+        """
+        Returns:
+            str: The topic the message is published under: the tag of the node it is for.
+        """
+        return self.address.tag
 
 
 class HubConnectInd(BaseMessageBody):
@@ -173,6 +263,21 @@ class HubConnectInd(BaseMessageBody):
     msg_type: Literal[MessageTypes.HUB_CONNECT_IND] = MessageTypes.HUB_CONNECT_IND
 
 
+class APCredentials(BaseModel):
+    """
+    What a worker needs to run an AP that is already registered with the NMS, without registering it again.
+
+    Attributes:
+        secret (str): The AP's SBAPI secret.
+        lat_deg (float): Latitude assigned by the NBAPI.
+        lon_deg (float): Longitude assigned by the NBAPI.
+    """
+
+    secret: str = Field(description="The AP's SBAPI secret")
+    lat_deg: float = Field(description="Latitude assigned by the NBAPI")
+    lon_deg: float = Field(description="Longitude assigned by the NBAPI")
+
+
 class APRegisterReq(BaseMessageBody):
     """
     Message requesting AP registration.
@@ -181,6 +286,7 @@ class APRegisterReq(BaseMessageBody):
         msg_type (Literal['ap_register_req']): Discriminator for this message type.
         hub_auid (str): AUID of the hub to register with.
         heartbeat_seconds (int): Heartbeat interval in seconds.
+        restore (APCredentials | None): If set, the AP is already registered: set it up from these credentials instead.
     """
 
     msg_type: Literal[MessageTypes.AP_REGISTER_REQ] = MessageTypes.AP_REGISTER_REQ
@@ -188,6 +294,7 @@ class APRegisterReq(BaseMessageBody):
     hub_auid: str = Field(description="AUID of the hub to register with")
     heartbeat_seconds: int = settings.DEFAULT_HEARTBEAT_SECONDS
     azimuth_deg: int = Field(default=0, description="Azimuth in degrees to set on the AP", ge=0, le=360)
+    restore: APCredentials | None = Field(default=None, description="Credentials of an already registered AP")
 
 
 class APRegisterRsp(BaseMessageBody):
@@ -197,11 +304,13 @@ class APRegisterRsp(BaseMessageBody):
     Attributes:
         msg_type (Literal['ap_register_ind']): Discriminator for this message type.
         registered_at (str): ISO8601 timestamp of registration.
+        credentials (APCredentials | None): On success, what is needed to restore the AP without registering it again.
     """
 
     msg_type: Literal[MessageTypes.AP_REGISTER_RSP] = MessageTypes.AP_REGISTER_RSP
     success: bool = Field(description="True if registration succeeded")
     registered_at: str = Field(default_factory=lambda: datetime.now(UTC).isoformat())
+    credentials: APCredentials | None = Field(default=None, description="Credentials of the registered AP")
 
 
 class RTRegisterReq(BaseMessageBody):
@@ -212,6 +321,7 @@ class RTRegisterReq(BaseMessageBody):
         msg_type (Literal['ap_register_req']): Discriminator for this message type.
         hub_auid (str): AUID of the hub to register with.
         heartbeat_seconds (int): Heartbeat interval in seconds.
+        restore (bool): The RT is already registered: set it up without registering it again.
     """
 
     msg_type: Literal[MessageTypes.RT_REGISTER_REQ] = MessageTypes.RT_REGISTER_REQ
@@ -219,6 +329,7 @@ class RTRegisterReq(BaseMessageBody):
     ap_auid: str = Field(description="AUID of the AP to register with")
     heartbeat_seconds: int = settings.DEFAULT_HEARTBEAT_SECONDS
     azimuth_deg: int = Field(default=0, description="Azimuth in degrees to set on the AP", ge=0, le=360)
+    restore: bool = Field(default=False, description="The RT is already registered with the NMS")
 
 
 class RTRegisterRsp(BaseMessageBody):
@@ -294,6 +405,457 @@ class HeartbeatStatsRsp(BaseMessageBody):
     children: HeartbeatStats = Field(default_factory=HeartbeatStats, description="Summmary stats of all children")
 
 
+class NodeHeartbeats(BaseModel):
+    """
+    Heartbeat counters of a node, and the totals of its descendants.
+    """
+
+    local: HeartbeatStats = Field(default_factory=HeartbeatStats, description="Heartbeats sent by the node itself")
+    children: HeartbeatStats = Field(default_factory=HeartbeatStats, description="Heartbeats sent by its descendants")
+
+
+class AlarmSpec(BaseModel):
+    """
+    An alarm a node can raise. A node has at most one alarm of each category and code active at a time.
+    """
+
+    category: AlarmCategory = Field(default=AlarmCategory.PLATFORM, description="Source of the alarm")
+    code: str = Field(default="generic", description="Alarm code, unique within its category")
+    severity: AlarmSeverity = Field(default=AlarmSeverity.MAJOR, description="Severity when raised")
+    text: str = Field(default="", description="Additional text sent with the alarm")
+
+
+class AlarmStorm(AlarmSpec):
+    """
+    Profile of an alarm storm: bursts of events, each raising the alarm on a random node of the storm that does not
+    have it active, or clearing it on one that does.
+    """
+
+    rate: float = Field(default=1000.0, gt=0, description="Events per second")
+    burst: int = Field(default=100, ge=1, description="Events generated together in each burst")
+    duration: float = Field(default=60.0, gt=0, description="Seconds the storm runs for")
+
+
+class AlarmStats(BaseModel):
+    """
+    Counters of a hub worker's alarm engine, and of its submissions to the NMS.
+    """
+
+    active: int = Field(default=0, description="Alarms active")
+    raised: int = Field(default=0, description="Alarms raised")
+    cleared: int = Field(default=0, description="Alarms cleared")
+    deduplicated: int = Field(default=0, description="Raises of active alarms, and clears of inactive, ignored")
+    coalesced: int = Field(default=0, description="Raise/clear pairs cancelled out before being sent")
+    dropped: int = Field(default=0, description="Events dropped because too many were waiting to be sent")
+    pending: int = Field(default=0, description="Events waiting to be sent")
+    submitted: int = Field(default=0, description="Events accepted by the NMS")
+    failed: int = Field(default=0, description="Events in batches the NMS rejected or did not answer")
+    batches: int = Field(default=0, description="Batches sent")
+    batch_ms_mean: float = Field(default=0.0, description="Mean time the NMS took to answer a batch")
+    batch_ms_max: float = Field(default=0.0, description="Longest time the NMS took to answer a batch")
+    storms: int = Field(default=0, description="Alarm storms running")
+
+    @classmethod
+    def combine(cls, stats: Iterable["AlarmStats"]) -> "AlarmStats":
+        """
+        Add up the counters of several alarm engines.
+
+        Args:
+            stats (Iterable[AlarmStats]): The counters.
+
+        Returns:
+            AlarmStats: The totals, with the mean and longest batch times across all of them.
+        """
+        total = cls()
+        for item in stats:
+            batches = total.batches + item.batches
+            if batches:
+                total.batch_ms_mean = (
+                    total.batch_ms_mean * total.batches + item.batch_ms_mean * item.batches
+                ) / batches
+            total.batch_ms_max = max(total.batch_ms_max, item.batch_ms_max)
+            for field in ALARM_COUNTERS:
+                setattr(total, field, getattr(total, field) + getattr(item, field))
+        return total
+
+
+class HubStatusInd(BaseMessageBody):
+    """
+    Periodic status report from a hub worker: its heartbeat counters, and those of every AP whose counters changed
+    since the last report.
+
+    Attributes:
+        msg_type (Literal['hub_status_ind']): Discriminator for this message type.
+        hub (HeartbeatStats): Totals of the heartbeats sent by every AP and RT in the hub.
+        aps (dict[int, NodeHeartbeats]): Counters of the APs that changed, by AP index.
+        alarms (AlarmStats | None): Counters of the hub's alarm engine, if they changed.
+    """
+
+    msg_type: Literal[MessageTypes.HUB_STATUS_IND] = MessageTypes.HUB_STATUS_IND
+    hub: HeartbeatStats = Field(default_factory=HeartbeatStats, description="Totals of every AP and RT in the hub")
+    aps: dict[int, NodeHeartbeats] = Field(default_factory=dict, description="Counters of the APs that changed")
+    alarms: AlarmStats | None = Field(default=None, description="Counters of the alarm engine, if they changed")
+
+
+class NodeSet(BaseModel):
+    """
+    A set of sibling node indices, sent as runs of consecutive indices or as a bitmap, whichever is smaller.
+
+    Attributes:
+        ranges (list[tuple[int, int]]): Runs of consecutive indices, each as [first, last].
+        offset (int): The index of the first bit of the bitmap.
+        bitmap (bytes): Bit i of byte j is set if index offset + 8 * j + i is in the set. Base64 in JSON.
+    """
+
+    model_config = {"ser_json_bytes": "base64", "val_json_bytes": "base64"}
+
+    ranges: list[tuple[int, int]] = Field(default_factory=list, description="Runs of consecutive indices")
+    offset: int = Field(default=0, description="Index of the first bit of the bitmap")
+    bitmap: bytes = Field(default=b"", description="Bitmap of indices from the offset")
+
+    @classmethod
+    def of(cls, indices: Sequence[int]) -> "NodeSet":
+        """
+        Encode a set of indices.
+
+        Args:
+            indices (Sequence[int]): Distinct indices, in ascending order.
+
+        Returns:
+            NodeSet: The set, as ranges if there are few runs, else as a bitmap.
+        """
+        ranges: list[list[int]] = []
+        for index in indices:
+            if ranges and ranges[-1][1] == index - 1:
+                ranges[-1][1] = index
+            else:
+                ranges.append([index, index])
+        if not indices:
+            return cls()
+        offset = indices[0]
+        size = (indices[-1] - offset) // 8 + 1
+        if len(ranges) * NODE_SET_RANGE_BYTES <= size * 4 // 3:  # Base64 takes 4 characters per 3 bytes
+            return cls(ranges=ranges)
+        bitmap = bytearray(size)
+        for index in indices:
+            position = index - offset
+            bitmap[position >> 3] |= 1 << (position & 7)
+        return cls(offset=offset, bitmap=bytes(bitmap))
+
+    def indices(self) -> Iterator[int]:
+        """
+        Yields:
+            int: The indices in the set, in ascending order.
+        """
+        for first, last in self.ranges:
+            yield from range(first, last + 1)
+        offset = self.offset
+        for position, byte in enumerate(self.bitmap):
+            if byte:
+                base = offset + 8 * position
+                yield from (base + bit for bit in range(8) if byte >> bit & 1)
+
+    def count(self) -> int:
+        """
+        Returns:
+            int: The number of indices in the set.
+        """
+        return sum(last - first + 1 for first, last in self.ranges) + sum(byte.bit_count() for byte in self.bitmap)
+
+
+class NodeActionReq(BaseMessageBody):
+    """
+    Message asking a hub worker to apply an action to a set of its nodes (see src.controller.selection): the hub
+    itself, some of its APs, or some RTs of some of its APs.
+
+    Attributes:
+        msg_type (Literal['node_action_req']): Discriminator for this message type.
+        address (Address): The address of the hub.
+        action (NodeAction): The action.
+        aps (NodeSet | None): The APs to act on, if any.
+        rts (dict[int, NodeSet]): The RTs to act on, by AP index.
+        alarm (AlarmSpec | None): The alarm to raise or clear, for RAISE_ALARM and CLEAR_ALARM.
+        storm (AlarmStorm | None): The storm to run across the nodes, for START_ALARM_STORM.
+        heartbeat_seconds (int | None): The new heartbeat interval, for SET_HEARTBEAT.
+    """
+
+    msg_type: Literal[MessageTypes.NODE_ACTION_REQ] = MessageTypes.NODE_ACTION_REQ
+    action: NodeAction = Field(description="The action to apply")
+    aps: NodeSet | None = Field(default=None, description="The APs to act on")
+    rts: dict[int, NodeSet] = Field(default_factory=dict, description="The RTs to act on, by AP index")
+    alarm: AlarmSpec | None = Field(default=None, description="The alarm to raise or clear")
+    storm: AlarmStorm | None = Field(default=None, description="The alarm storm to run")
+    heartbeat_seconds: int | None = Field(
+        default=None, gt=0, le=MAX_HEARTBEAT_SECONDS, description="The new heartbeat interval"
+    )
+
+    def addresses(self) -> Iterator[Address]:
+        """
+        Yields:
+            Address: The address of each node to act on: the hub itself if no APs or RTs are given.
+        """
+        net, hub = self.address.net, self.address.hub
+        if self.aps is None and not self.rts:
+            yield self.address
+        if self.aps is not None:
+            yield from (Address(net=net, hub=hub, ap=ap) for ap in self.aps.indices())
+        for ap, rts in self.rts.items():
+            yield from (Address(net=net, hub=hub, ap=ap, rt=rt) for rt in rts.indices())
+
+
+class TeardownStats(BaseModel):
+    """
+    Summary of the teardown of a subtree of nodes.
+    """
+
+    nodes: int = Field(default=0, description="Nodes removed")
+    heartbeats: int = Field(default=0, description="Heartbeat tasks stopped")
+    alarms: int = Field(default=0, description="Active alarms and unsent alarm events dropped")
+    deregistered: int = Field(default=0, description="Nodes removed from the NMS")
+    failed: int = Field(default=0, description="Nodes the NMS failed to remove")
+    seconds: float = Field(default=0.0, description="Longest time a hub took to tear down its nodes")
+
+    @classmethod
+    def combine(cls, stats: Iterable["TeardownStats"]) -> "TeardownStats":
+        """
+        Add up the summaries of several teardowns, run side by side.
+
+        Args:
+            stats (Iterable[TeardownStats]): The summaries.
+
+        Returns:
+            TeardownStats: The totals, with the longest time of any of them.
+        """
+        total = cls()
+        for item in stats:
+            for field in ("nodes", "heartbeats", "alarms", "deregistered", "failed"):
+                setattr(total, field, getattr(total, field) + getattr(item, field))
+            total.seconds = max(total.seconds, item.seconds)
+        return total
+
+
+class SubtreeDeleteReq(BaseMessageBody):
+    """
+    Message asking a hub worker to tear down some of its APs, with their RTs, or all of them: stop their heartbeats,
+    drop them and their alarms, and remove them from the NMS.
+
+    Attributes:
+        msg_type (Literal['subtree_delete_req']): Discriminator for this message type.
+        address (Address): The address of the hub.
+        request (int): Identifies the teardown in the SubtreeDeleteRsp.
+        aps (NodeSet | None): The APs to tear down, or None for every AP in the hub.
+        deregister (bool): Whether to remove the nodes from the NMS.
+    """
+
+    msg_type: Literal[MessageTypes.SUBTREE_DELETE_REQ] = MessageTypes.SUBTREE_DELETE_REQ
+    request: int = Field(description="Identifies the teardown in the response")
+    aps: NodeSet | None = Field(default=None, description="The APs to tear down, or None for all of them")
+    deregister: bool = Field(default=True, description="Remove the nodes from the NMS")
+
+
+class SubtreeDeleteRsp(BaseMessageBody):
+    """
+    Message reporting that a hub worker has finished a teardown.
+
+    Attributes:
+        msg_type (Literal['subtree_delete_rsp']): Discriminator for this message type.
+        request (int): The request field of the SubtreeDeleteReq.
+        stats (TeardownStats): What was torn down.
+    """
+
+    msg_type: Literal[MessageTypes.SUBTREE_DELETE_RSP] = MessageTypes.SUBTREE_DELETE_RSP
+    request: int = Field(description="The request field of the SubtreeDeleteReq")
+    stats: TeardownStats = Field(default_factory=TeardownStats, description="What was torn down")
+
+
+class CommandAck(BaseMessageBody):
+    """
+    Message acknowledging receipt of one or more sequenced commands. Workers batch these up rather than acking
+    every command individually.
+
+    Attributes:
+        msg_type (Literal['command_ack']): Discriminator for this message type.
+        address (Address): The address of the hub worker sending the acks.
+        seqs (list[int]): Sequence numbers of the commands received since the last ack.
+    """
+
+    msg_type: Literal[MessageTypes.COMMAND_ACK] = MessageTypes.COMMAND_ACK
+    seqs: list[int] = Field(default_factory=list, description="Sequence numbers of the commands being acknowledged")
+
+
+def node_digest(ap_registered: bool, rts: Iterable[tuple[int, bool]]) -> int:
+    """
+    Digest of an AP's state as compared by hub resync: whether it is registered, and which RTs it has and whether each
+    is registered. The controller and worker compute it from their own records and only exchange detail on a mismatch.
+
+    Args:
+        ap_registered (bool): Whether the AP is registered.
+        rts (Iterable[tuple[int, bool]]): (RT index, registered) for each of the AP's RTs, in any order.
+
+    Returns:
+        int: CRC-32 of the state.
+    """
+    rt_state = ",".join(f"{rt}{'+' if registered else '-'}" for rt, registered in sorted(rts))
+    return zlib.crc32(f"{int(ap_registered)}:{rt_state}".encode())
+
+
+class HubHelloReq(BaseMessageBody):
+    """
+    Sent by a restarted controller to each hub worker it expects to still be running, to reattach to it.
+
+    Attributes:
+        msg_type (Literal['hub_hello_req']): Discriminator for this message type.
+        digests (dict[int, int]): The controller's `node_digest` for each AP it has on the hub, keyed by AP index.
+    """
+
+    msg_type: Literal[MessageTypes.HUB_HELLO_REQ] = MessageTypes.HUB_HELLO_REQ
+    digests: dict[int, int] = Field(default_factory=dict, description="Controller's digest of each AP, by AP index")
+
+
+class NodeSync(BaseModel):
+    """
+    A worker's record of one AP or RT, sent in a HubResyncRsp.
+    """
+
+    registered: bool = Field(default=False, description="True if the node is registered")
+    heartbeat_seconds: int = Field(default=0, description="Heartbeat interval in seconds")
+
+
+class APSync(NodeSync):
+    """
+    A worker's record of one AP and its RTs, sent in a HubResyncRsp.
+    """
+
+    azimuth_deg: int = Field(default=0, description="Azimuth in degrees")
+    credentials: APCredentials | None = Field(default=None, description="Credentials, if the AP is registered")
+    rts: dict[int, NodeSync] = Field(default_factory=dict, description="The AP's RTs, by RT index")
+
+    def digest(self) -> int:
+        """
+        Returns:
+            int: The `node_digest` of this AP.
+        """
+        return node_digest(self.registered, ((rt, sync.registered) for rt, sync in self.rts.items()))
+
+
+class HubResyncRsp(BaseMessageBody):
+    """
+    A hub worker's answer to HubHelloReq: the APs whose state differs from the controller's digests.
+
+    Attributes:
+        msg_type (Literal['hub_resync_rsp']): Discriminator for this message type.
+        pid (int): Process ID of the worker, so that the controller can stop it later.
+        aps (dict[int, APSync]): APs the worker has whose digest differs or which the controller did not list.
+        missing (list[int]): APs the controller listed that the worker does not have.
+    """
+
+    msg_type: Literal[MessageTypes.HUB_RESYNC_RSP] = MessageTypes.HUB_RESYNC_RSP
+    pid: int = Field(description="Process ID of the hub worker")
+    aps: dict[int, APSync] = Field(default_factory=dict, description="APs that differ from the controller's digests")
+    missing: list[int] = Field(default_factory=list, description="APs the controller has that the worker does not")
+
+
+def agent_topic(agent: str) -> str:
+    """
+    Returns:
+        str: The topic of the commands for a host agent. Agent topics start with "@", so that they never match the
+            tag of a hub, and end with "/", so that no agent's topic is a prefix of another's.
+    """
+    return f"@{agent}/"
+
+
+class AgentRegisterInd(BaseMessageBody):
+    """
+    Sent by a host agent (see src.worker.agent) when it starts, and every AGENT_HEARTBEAT_SECONDS after that, to
+    register its capacity and report the hub workers it is running.
+
+    Attributes:
+        msg_type (Literal['agent_register_ind']): Discriminator for this message type.
+        agent (str): Agent name, unique across the deployment.
+        host (str): Host name of the agent's machine.
+        cores (int): CPU cores of the machine.
+        memory_mb (int): Memory of the machine in MiB.
+        max_workers (int): Most hub workers the agent will run at once.
+        hubs (list[Address]): Hubs whose workers the agent is running.
+    """
+
+    msg_type: Literal[MessageTypes.AGENT_REGISTER_IND] = MessageTypes.AGENT_REGISTER_IND
+    address: Address = Field(default_factory=Address, description="Unused: agents are not nodes")
+    agent: str = Field(description="Agent name")
+    host: str = Field(description="Host name of the agent's machine")
+    cores: int = Field(description="CPU cores of the machine")
+    memory_mb: int = Field(description="Memory of the machine in MiB")
+    max_workers: int = Field(description="Most hub workers the agent will run at once")
+    hubs: list[Address] = Field(default_factory=list, description="Hubs whose workers the agent is running")
+
+
+class AgentSpawnReq(BaseMessageBody):
+    """
+    Asks a host agent to start the worker of a hub. An agent that is already running the hub's worker answers with
+    that worker, so the request can safely be repeated.
+
+    Attributes:
+        msg_type (Literal['agent_spawn_req']): Discriminator for this message type.
+        address (Address): The address of the hub.
+        agent (str): Name of the agent.
+        request (int): Identifies the request in the AgentSpawnRsp.
+    """
+
+    msg_type: Literal[MessageTypes.AGENT_SPAWN_REQ] = MessageTypes.AGENT_SPAWN_REQ
+    agent: str = Field(description="Agent name")
+    request: int = Field(description="Identifies the request in the response")
+
+    @property
+    def topic(self) -> str:
+        """
+        Returns:
+            str: The agent's topic.
+        """
+        return agent_topic(self.agent)
+
+
+class AgentSpawnRsp(BaseMessageBody):
+    """
+    A host agent's answer to AgentSpawnReq.
+
+    Attributes:
+        msg_type (Literal['agent_spawn_rsp']): Discriminator for this message type.
+        address (Address): The address of the hub.
+        agent (str): Agent name.
+        request (int): The request field of the AgentSpawnReq.
+        pid (int | None): Process ID of the worker on the agent's host, or None if it could not be started.
+        error (str | None): Why the worker could not be started.
+    """
+
+    msg_type: Literal[MessageTypes.AGENT_SPAWN_RSP] = MessageTypes.AGENT_SPAWN_RSP
+    agent: str = Field(description="Agent name")
+    request: int = Field(description="The request field of the AgentSpawnReq")
+    pid: int | None = Field(default=None, description="Process ID of the worker, or None if it was not started")
+    error: str | None = Field(default=None, description="Why the worker could not be started")
+
+
+class AgentKillReq(BaseMessageBody):
+    """
+    Asks a host agent to stop the worker of a hub, if it is running it.
+
+    Attributes:
+        msg_type (Literal['agent_kill_req']): Discriminator for this message type.
+        address (Address): The address of the hub.
+        agent (str): Name of the agent.
+    """
+
+    msg_type: Literal[MessageTypes.AGENT_KILL_REQ] = MessageTypes.AGENT_KILL_REQ
+    agent: str = Field(description="Agent name")
+
+    @property
+    def topic(self) -> str:
+        """
+        Returns:
+            str: The agent's topic.
+        """
+        return agent_topic(self.agent)
+
+
 class Message(
     RootModel[
         HubConnectInd
@@ -304,6 +866,17 @@ class Message(
         | StartHeartbeatReq
         | HeartbeatStatsReq
         | HeartbeatStatsRsp
+        | CommandAck
+        | HubHelloReq
+        | HubResyncRsp
+        | HubStatusInd
+        | NodeActionReq
+        | SubtreeDeleteReq
+        | SubtreeDeleteRsp
+        | AgentRegisterInd
+        | AgentSpawnReq
+        | AgentSpawnRsp
+        | AgentKillReq
     ]
 ):
     """
@@ -317,14 +890,45 @@ class Message(
         >>> msg=HubConnectInd(address=Address(net=1, hub=2))
         >>> json = msg.model_dump_json()
         >>> json
-        '{"address":{"net":1,"hub":2,"ap":null,"rt":null},"msg_type":"hub_connect_ind"}'
+        '{"address":{"net":1,"hub":2,"ap":null,"rt":null},"seq":null,"msg_type":"hub_connect_ind"}'
         >>> Message.model_validate_json(json).root
-        HubConnectInd(address=Address(net=1, hub=2, ap=None, rt=None), msg_type=<MessageTypes.HUB_CONNECT_IND: ...>)
+        HubConnectInd(address=Address(net=1, hub=2, ap=None, rt=None), seq=None, msg_type=<MessageTypes.HUB...>)
     """
 
     model_config = {"discriminator": "msg_type"}
 
 
+def encode_message(msg) -> list[bytes]:
+    """
+    Encode a message into its wire frames.
+
+    Args:
+        msg: The message to encode - this could be a Message, or one of the message subtypes.
+
+    Returns:
+        list[bytes]: The [topic, JSON payload] frames. The topic is the address tag, or the agent's topic for a command
+            to a host agent.
+    """
+    msg = msg if isinstance(msg, Message) else Message(msg)
+    return [msg.root.topic.encode(), msg.__pydantic_serializer__.to_json(msg)]
+
+
+def decode_message(payload: bytes) -> BaseMessageBody:
+    """
+    Decode a JSON payload frame into the message it carries.
+
+    Args:
+        payload (bytes): The JSON payload frame.
+
+    Returns:
+        BaseMessageBody: The decoded message (i.e. the root of the Message wrapper).
+
+    Raises:
+        ValidationError: If the payload is not a valid message.
+    """
+    return Message.model_validate_json(payload).root
+
+
 #######################################################################################################################
 # End of file
 #######################################################################################################################
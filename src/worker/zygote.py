@@ -0,0 +1,142 @@
+"""
+zygote.py
+
+Pre-forked template process for hub workers.
+
+Starting a worker with `python -m src.worker.worker` costs an interpreter start plus importing httpx, pydantic, zmq and
+the message models before the worker can connect to the controller. The zygote pays that cost once: it imports the
+worker modules and then forks a new hub worker for each request, so a worker starts with everything already loaded.
+Nothing that cannot be shared across fork (ZeroMQ contexts, event loops, HTTP clients) is created until the child
+runs.
+
+The controller talks to the zygote over its stdin/stdout, one line per request:
+
+    controller -> zygote:  <network_idx> <hub_idx> <pub_addr> <pull_addr>
+    zygote -> controller:  <pid of the forked worker>
+
+The zygote reaps its children as they exit, and terminates any that are still running when its stdin is closed or it
+is sent SIGTERM. With --keep-workers, closing stdin (i.e. the controller exiting, or crashing) leaves them running so
+that a restarted controller can reattach to them (see src.controller.recovery); SIGTERM still stops them.
+
+Usage:
+    python -m src.worker.zygote [--keep-workers]
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import argparse
+import contextlib
+import logging
+import os
+import random
+import signal
+import sys
+
+# The worker modules, plus everything a worker imports lazily, so that forked workers never import anything
+import httpx  # noqa: F401
+import jwt  # noqa: F401
+import netifaces  # noqa: F401
+import shortuuid  # noqa: F401
+
+from src.worker import ap, rt, worker  # noqa: F401
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+children: set[int] = set()  # PIDs of forked workers that have not yet been reaped
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def reap(signum: int | None = None, frame=None) -> None:
+    """
+    Collect the exit status of any workers that have exited. Installed as the SIGCHLD handler.
+    """
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        children.discard(pid)
+
+
+def fork_worker(network_idx: int, hub_idx: int, pub_addr: str, pull_addr: str) -> int:
+    """
+    Fork a hub worker.
+
+    Args:
+        network_idx (int): Network index for the hub address.
+        hub_idx (int): Hub index for the hub address.
+        pub_addr (str): Controller PUB endpoint.
+        pull_addr (str): Controller PULL endpoint.
+
+    Returns:
+        int: The PID of the new worker.
+    """
+    pid = os.fork()
+    if pid:
+        children.add(pid)
+        return pid
+
+    # Child: detach from the zygote's request pipe, and give it its own random state
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(2, 1)  # Anything printed goes to stderr rather than into the reply pipe
+        random.seed()
+        worker.run(network_idx, hub_idx, pub_addr, pull_addr)
+    except BaseException:
+        logging.error(f"Forked worker for N{network_idx:02x}H{hub_idx:02x} failed", exc_info=True)
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def shutdown(signum: int | None = None, frame=None) -> None:
+    """
+    Terminate all running workers and exit.
+    """
+    for pid in list(children):
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGTERM)
+    sys.exit(0)
+
+
+def main() -> None:
+    """Entry point for the zygote: serve fork requests from stdin until it is closed."""
+    parser = argparse.ArgumentParser(description="Hub worker zygote")
+    parser.add_argument("--keep-workers", action="store_true", help="Leave workers running when stdin is closed")
+    args = parser.parse_args()
+    signal.signal(signal.SIGCHLD, reap)
+    signal.signal(signal.SIGTERM, shutdown)
+    logging.info(f"Worker zygote {os.getpid()} ready")
+    for line in sys.stdin:
+        try:
+            network_idx, hub_idx, pub_addr, pull_addr = line.split()
+            pid = fork_worker(int(network_idx), int(hub_idx), pub_addr, pull_addr)
+        except Exception:
+            logging.error(f"Bad zygote request: {line!r}", exc_info=True)
+            pid = -1
+        sys.stdout.write(f"{pid}\n")
+        sys.stdout.flush()
+    if args.keep_workers:
+        logging.info(f"Worker zygote {os.getpid()} exiting, leaving {len(children)} workers running")
+        sys.exit(0)
+    shutdown()
+
+
+if __name__ == "__main__":
+    main()
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
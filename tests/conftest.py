@@ -17,9 +17,9 @@ import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from src.config import settings
 from src.controller.app import get_app
-from src.controller.managers import HubManager
+from src.controller.comms import worker_ctrl
+from src.controller.managers import HubManager, node_index
 from src.controller.worker_ctrl import simulator
 from src.worker.comms import WorkerComms
 from src.worker.worker_api import Address
@@ -48,7 +48,8 @@ def test_app() -> FastAPI:
     Returns:
         FastAPI: The FastAPI application instance.
     """
-    simulator.children.clear()  # simulator is a global singleton, so clear any existing state before each test
+    simulator.clear_children()  # simulator is a global singleton, so clear any existing state before each test
+    node_index.clear()
     # Optionally, override settings or dependencies here
     return get_app()
 
@@ -103,7 +104,7 @@ def get_worker_mock(monkeypatch) -> Callable[[Address, Callable], WorkerComms]:
             WorkerComms: The mock WorkerComms instance.
         """
 
-        return WorkerComms(address, f"tcp://127.0.0.1:{settings.PULL_PORT}", f"tcp://127.0.0.1:{settings.PUB_PORT}")
+        return WorkerComms(address, worker_ctrl.pull_endpoint, worker_ctrl.pub_endpoint)
 
     yield mock_worker_comms
 
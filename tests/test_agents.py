@@ -0,0 +1,171 @@
+"""
+Tests for host agents: placement of hubs across agents by the controller, and agents starting and stopping real hub
+workers, several agents to one machine.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import settings
+from src.controller.agents import AGENT_MESSAGE_TYPES, AgentPool
+from src.controller.comms import worker_ctrl
+from src.worker.agent import HostAgent
+from src.worker.worker_api import Address, AgentKillReq, AgentRegisterInd, AgentSpawnReq, MessageTypes
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def register(pool: AgentPool, name: str, max_workers: int, hubs: int = 0) -> None:
+    """
+    Register an agent with the pool, running the given number of hubs of network 9.
+    """
+    hub_addresses = [Address(net=9, hub=index) for index in range(hubs)]
+    pool.on_register_ind(
+        AgentRegisterInd(agent=name, host="h", cores=4, memory_mb=1024, max_workers=max_workers, hubs=hub_addresses)
+    )
+
+
+def test_placement() -> None:
+    """Hubs go to the least loaded agent for its capacity, never to one that is full or down."""
+    pool = AgentPool()
+    with pytest.raises(RuntimeError):
+        pool.place()
+    register(pool, "b", max_workers=4)
+    register(pool, "a", max_workers=2)
+    assert pool.place().name == "a"  # Tie at no load: lowest name
+    pool.agents["a"].pending.add(Address(net=0, hub=0))
+    assert pool.place().name == "b"  # a is half full, b is empty
+    register(pool, "b", max_workers=4, hubs=3)
+    assert pool.place().name == "a"
+    assert pool.agent_of(Address(net=9, hub=2)).name == "b"
+
+    pool.agents["a"].last_seen -= settings.AGENT_TIMEOUT
+    assert pool.place().name == "b"
+    register(pool, "b", max_workers=4, hubs=4)
+    with pytest.raises(RuntimeError):
+        pool.place()
+    register(pool, "a", max_workers=2)
+    assert pool.place().name == "a"
+    assert [(agent.name, agent.up, len(agent.hubs)) for agent in pool.status()] == [("a", True, 0), ("b", True, 4)]
+
+
+async def test_spawn_retries(monkeypatch) -> None:
+    """A spawn request is repeated until the agent answers, and fails if it never does."""
+    pool = AgentPool()
+    register(pool, "a", max_workers=2)
+    sent = []
+    monkeypatch.setattr(worker_ctrl, "publish", sent.append)
+    monkeypatch.setattr(settings, "COMMAND_RETRANSMIT_SECONDS", 0.02)
+    monkeypatch.setattr(settings, "AGENT_SPAWN_TIMEOUT", 0.1)
+    with pytest.raises(RuntimeError):
+        await pool.spawn(Address(net=0, hub=0))
+    assert len(sent) >= 3 and all(isinstance(msg, AgentSpawnReq) and msg.agent == "a" for msg in sent)
+    assert not pool.agents["a"].pending and not pool.agents["a"].hubs
+
+
+def test_lost_kill_repeated(monkeypatch) -> None:
+    """A hub the agent still reports after being asked to stop it is not counted, and the agent is asked again until
+    it no longer reports it."""
+    pool = AgentPool()
+    register(pool, "a", max_workers=2, hubs=2)
+    sent = []
+    monkeypatch.setattr(worker_ctrl, "publish", sent.append)
+    address = Address(net=9, hub=1)
+    pool.kill(address)
+    register(pool, "a", max_workers=2, hubs=2)  # The request was lost
+    assert pool.agent_of(address) is None and pool.agents["a"].placed == 1
+    assert [(msg.address, msg.agent) for msg in sent] == [(address, "a")] * 2 and isinstance(sent[1], AgentKillReq)
+
+    register(pool, "a", max_workers=2, hubs=1)
+    register(pool, "a", max_workers=2, hubs=2)  # Once it has stopped, a later report counts again
+    assert len(sent) == 2 and pool.agent_of(address).name == "a"
+
+
+def test_kill_then_spawn(tmp_path) -> None:
+    """A spawn straight after a kill starts a new worker, rather than reporting the one that is stopping."""
+    agent = HostAgent("a", f"ipc://{tmp_path}/pub", f"ipc://{tmp_path}/pull", max_workers=2)
+    address = Address(net=0, hub=0)
+    try:
+        first = agent.on_spawn_req(AgentSpawnReq(address=address, agent="a", request=0))
+        assert agent.on_spawn_req(AgentSpawnReq(address=address, agent="a", request=1)).pid == first.pid
+        agent.on_kill_req(AgentKillReq(address=address, agent="a"))
+        [stopping] = agent.stopping
+        second = agent.on_spawn_req(AgentSpawnReq(address=address, agent="a", request=2))
+        assert second.pid is not None and second.pid != first.pid
+        assert agent.registration().hubs == [address]
+        assert stopping.pid == first.pid and stopping.wait(timeout=10) != 0
+        agent.reap()
+        assert not agent.stopping and agent.workers[address].pid == second.pid
+    finally:
+        agent.close()
+
+
+async def test_agents_start_workers(tmp_path, monkeypatch) -> None:
+    """Two agents on one machine register, split the hubs between them, and start and stop their workers."""
+    monkeypatch.setattr("src.controller.comms.settings.ZMQ_IPC_DIR", str(tmp_path))
+    pool = AgentPool()
+    app = SimpleNamespace(state=SimpleNamespace())
+    worker_ctrl.setup_zmq(app, 0, 0, transport="ipc")
+    env = os.environ | {"AGENT_HEARTBEAT_SECONDS": "0.2"}
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "src.worker.agent", worker_ctrl.pub_endpoint, worker_ctrl.pull_endpoint]
+            + ["--name", name, "--max-workers", "2"],
+            env=env,
+        )
+        for name in ("a", "b")
+    ]
+    connected: set[str] = set()
+
+    async def listen() -> None:
+        while True:
+            msg = await worker_ctrl.get_message()
+            if msg.msg_type in AGENT_MESSAGE_TYPES:
+                pool.on_message(msg)
+            elif msg.msg_type == MessageTypes.HUB_CONNECT_IND:
+                connected.add(msg.address.tag)
+
+    listener = asyncio.create_task(listen())
+    try:
+        async with asyncio.timeout(20):
+            while len(pool.agents) < 2:
+                await asyncio.sleep(0.05)
+            hubs = [Address(net=0, hub=index) for index in range(4)]
+            workers = await asyncio.gather(*(pool.spawn(hub) for hub in hubs))
+            assert {len(agent.hubs) for agent in pool.agents.values()} == {2}
+            with pytest.raises(RuntimeError):
+                await pool.spawn(Address(net=0, hub=4))
+            while len(connected) < 4:
+                await asyncio.sleep(0.05)
+            assert connected == {hub.tag for hub in hubs}
+
+            assert workers[0].poll() is None
+            owner = pool.agent_of(hubs[0])
+            workers[0].terminate()
+            killed = owner.last_seen
+            while owner.last_seen == killed or hubs[0] in owner.hubs:  # Until a registration after it has exited
+                await asyncio.sleep(0.05)
+            assert len(owner.hubs) == 1 and workers[0].poll() == 0
+    finally:
+        listener.cancel()
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+        worker_ctrl.teardown_zmq(app)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,162 @@
+"""
+Tests for alarm generation: raise/clear state and de-duplication, batched submission to the NMS, alarm storms, and the
+controller commands and metrics that drive and report them.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+from starlette.status import HTTP_200_OK, HTTP_422_UNPROCESSABLE_CONTENT, HTTP_503_SERVICE_UNAVAILABLE
+from tests.utils import build_network
+
+from src.config import settings
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import ActionResult, AlarmMetrics
+from src.controller.worker_ctrl import simulator
+from src.worker.alarms import ALARM_BATCH_PATH, AlarmEngine
+from src.worker.node import nodes
+from src.worker.worker import Hub
+from src.worker.worker_api import (
+    Address,
+    AlarmCategory,
+    AlarmSpec,
+    AlarmStats,
+    AlarmStorm,
+    HubStatusInd,
+    NodeAction,
+    NodeActionReq,
+    NodeSet,
+)
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+LINK_DOWN = AlarmSpec(category=AlarmCategory.O1, code="link_down")
+
+
+def fake_hub(count: int, http_client=None) -> tuple[SimpleNamespace, list[SimpleNamespace]]:
+    """
+    Returns:
+        tuple[SimpleNamespace, list[SimpleNamespace]]: A stand-in hub worker, and that many stand-in APs.
+    """
+    hub = SimpleNamespace(address=Address(net=0, hub=0), http_client=http_client)
+    aps = [SimpleNamespace(address=Address(net=0, hub=0, ap=ap), auid=f"ap{ap}") for ap in range(count)]
+    return hub, aps
+
+
+async def test_raise_clear_dedup() -> None:
+    """Alarms alternate between raised and cleared, repeats are ignored, and unsent opposite events cancel out."""
+    hub, (ap0, ap1) = fake_hub(2)
+    engine = AlarmEngine(hub)
+    assert engine.raise_alarm(ap0, LINK_DOWN)
+    assert not engine.raise_alarm(ap0, LINK_DOWN)
+    assert engine.raise_alarm(ap0, LINK_DOWN.model_copy(update={"category": AlarmCategory.RC}))
+    assert engine.raise_alarm(ap1, LINK_DOWN)
+    assert engine.stats() == AlarmStats(active=3, raised=3, deduplicated=1, pending=3)
+
+    assert engine.clear_alarm(ap1, LINK_DOWN)  # Its raise was never sent, so neither is
+    assert not engine.clear_alarm(ap1, LINK_DOWN)
+    assert engine.toggle_alarm(ap0, LINK_DOWN)
+    assert engine.stats() == AlarmStats(active=1, raised=3, cleared=2, deduplicated=2, coalesced=2, pending=1)
+    assert engine.active == {ap0.address: {(AlarmCategory.RC, "link_down"): LINK_DOWN.severity}}
+
+
+async def test_batched_submission(httpx_mock, monkeypatch) -> None:
+    """Queued events go to the NMS in batches, and full queues drop events rather than grow."""
+    monkeypatch.setattr(settings, "ALARM_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "ALARM_MAX_PENDING", 7)
+    url = f"{settings.NBAPI_URL}{ALARM_BATCH_PATH}"
+    httpx_mock.add_response(method="POST", url=url)
+    httpx_mock.add_response(method="POST", url=url)
+    httpx_mock.add_response(method="POST", url=url, status_code=HTTP_503_SERVICE_UNAVAILABLE)
+    async with httpx.AsyncClient() as client:
+        hub, aps = fake_hub(8, client)
+        engine = AlarmEngine(hub)
+        raised = [engine.raise_alarm(ap, LINK_DOWN) for ap in aps]
+        assert raised == [True] * 7 + [False]
+        await engine.flush()
+        await asyncio.gather(*engine._sends)
+
+    requests = httpx_mock.get_requests()
+    batches = [json.loads(request.content)["alarms"] for request in requests]
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [alarm["auid"] for alarm in batches[0]] == ["ap0", "ap1", "ap2"]
+    assert batches[0][0]["state"] == "raised" and batches[0][0]["category"] == "o1"
+    stats = engine.stats()
+    assert (stats.submitted, stats.failed, stats.dropped, stats.batches, stats.pending) == (6, 1, 1, 3, 0)
+    assert stats.batch_ms_max >= stats.batch_ms_mean > 0
+
+
+async def test_storm(monkeypatch) -> None:
+    """A storm generates rate * duration events across its nodes, in bursts, and can be stopped."""
+    hub, aps = fake_hub(4)
+    engine = AlarmEngine(hub)
+    engine.start_storm(aps, AlarmStorm(code="flap", rate=10000, burst=50, duration=0.02))
+    assert engine.stats().storms == 1
+    await asyncio.gather(*engine._storms)
+    stats = engine.stats()
+    assert stats.raised + stats.cleared == 200
+    assert (stats.deduplicated, stats.storms) == (0, 0)
+
+    engine.start_storm(aps, AlarmStorm(code="flap", rate=10, burst=1, duration=60))
+    await asyncio.sleep(0)
+    assert engine.stop_storms() == 1
+    assert engine.stats().storms == 0
+
+
+async def test_worker_alarm_actions(monkeypatch) -> None:
+    """The worker raises and clears alarms on the nodes a command names, and starts and stops storms across them."""
+    hub = Hub.__new__(Hub)
+    hub.address = Address(net=0, hub=0)
+    hub.alarms = AlarmEngine(hub)
+    _, aps = fake_hub(3)
+    for ap in aps:
+        monkeypatch.setitem(nodes, ap.address, ap)
+
+    command = NodeActionReq(address=hub.address, action=NodeAction.RAISE_ALARM, aps=NodeSet.of([0, 2]), alarm=LINK_DOWN)
+    await hub.on_node_action_req(command)
+    assert set(hub.alarms.active) == {aps[0].address, aps[2].address}
+    await hub.on_node_action_req(command.model_copy(update={"action": NodeAction.CLEAR_ALARM, "aps": NodeSet.of([2])}))
+    assert set(hub.alarms.active) == {aps[0].address}
+
+    storm = AlarmStorm(rate=1, duration=60)
+    await hub.on_node_action_req(command.model_copy(update={"action": NodeAction.START_ALARM_STORM, "storm": storm}))
+    assert hub.alarms.stats().storms == 1
+    await hub.on_node_action_req(NodeActionReq(address=hub.address, action=NodeAction.STOP_ALARM_STORMS))
+    assert hub.alarms.stats().storms == 0
+
+
+def test_alarm_routes(client, monkeypatch) -> None:
+    """Alarm actions need their parameters, are sent as one command per hub, and hub reports add up in the metrics."""
+    build_network(2, 4, 0)
+    sent = []
+    monkeypatch.setattr(worker_ctrl, "send", sent.append)
+    body = {"net": 0, "target": "ap", "action": NodeAction.RAISE_ALARM}
+    assert client.post("/action/", json=body).status_code == HTTP_422_UNPROCESSABLE_CONTENT
+
+    resp = client.post("/action/", json=body | {"alarm": {"category": "rc", "code": "rf_fault"}})
+    assert resp.status_code == HTTP_200_OK
+    assert ActionResult.model_validate(resp.json()).commands == 2
+    assert [command.alarm.code for command in sent] == ["rf_fault", "rf_fault"]
+
+    for index, raised in enumerate((10, 30)):
+        report = AlarmStats(raised=raised, submitted=raised, batches=1, batch_ms_mean=index + 1, batch_ms_max=index + 1)
+        simulator.get_network(0).get_hub(index).on_status_ind(
+            HubStatusInd(address=Address(net=0, hub=index), alarms=report)
+        )
+    metrics = AlarmMetrics.model_validate(client.get("/metrics/alarms").json())
+    assert set(metrics.hubs) == {"N00H00", "N00H01"}
+    assert (metrics.total.raised, metrics.total.batches, metrics.total.batch_ms_mean) == (40, 2, 1.5)
+    assert metrics.total.batch_ms_max == 2
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,215 @@
+"""
+Unit tests for the controller/worker command delivery layer.
+
+These tests cover the per-hub sequencing, windowing and retransmission logic of CommandChannel, and the worker-side
+acknowledgement batching and duplicate suppression in WorkerComms.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.controller.comms import CommandChannel, ControllerComms, make_endpoints
+from src.worker.comms import WorkerComms
+from src.worker.worker_api import Address, CommandAck, HeartbeatStatsReq, decode_message, encode_message
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+HUB_ADDRESS = Address(net=0, hub=0)
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class FakeSubSocket:
+    """
+    Stand-in for the worker SUB socket that replays a fixed list of messages.
+    """
+
+    def __init__(self, messages: list[list[bytes]]):
+        self.messages = list(messages)
+
+    async def recv_multipart(self) -> list:
+        return self.messages.pop(0)
+
+
+def make_worker_comms(messages: list[list[bytes]]) -> tuple[WorkerComms, list]:
+    """
+    Create a WorkerComms instance fed from `messages`, capturing anything it sends to the controller.
+
+    Args:
+        messages (list[list[bytes]]): Wire-format messages to be received.
+
+    Returns:
+        tuple[WorkerComms, list]: The comms instance and the list that sent messages are appended to.
+    """
+    comms = WorkerComms(HUB_ADDRESS, "tcp://127.0.0.1:1", "tcp://127.0.0.1:2")
+    comms.pub_sock = FakeSubSocket(messages)
+    sent = []
+
+    async def capture(msg):
+        sent.append(msg)
+
+    comms.send_msg = capture
+    return comms, sent
+
+
+def wire(seq: int) -> list[bytes]:
+    """
+    Encode a sequenced command the same way ControllerComms does.
+
+    Args:
+        seq (int): Sequence number.
+
+    Returns:
+        list[bytes]: The wire-format message frames.
+    """
+    return encode_message(HeartbeatStatsReq(address=Address(net=0, hub=0, ap=1), seq=seq))
+
+
+class TestCommandChannel:
+    """
+    Tests for the controller-side CommandChannel.
+    """
+
+    def test_sequence_numbers_increment(self):
+        """
+        Sequence numbers are allocated in order, starting from zero.
+        """
+        channel = CommandChannel(window_size=4)
+        assert [channel.next_seq() for _ in range(3)] == [0, 1, 2]
+
+    def test_window_overflow_goes_to_backlog(self):
+        """
+        Once the window is full, further commands are held back and released as acks arrive.
+        """
+        channel = CommandChannel(window_size=2)
+        assert channel.submit(0, "a", now=0.0)
+        assert channel.submit(1, "b", now=0.0)
+        assert not channel.submit(2, "c", now=0.0)
+        assert not channel.submit(3, "d", now=0.0)
+
+        assert channel.ack([0], now=1.0) == ["c"]
+        assert channel.ack([1, 2], now=1.0) == ["d"]
+        assert channel.ack([3, 99], now=1.0) == []
+        assert not channel.outstanding
+        assert not channel.backlog
+
+    def test_retransmit_after_timeout(self):
+        """
+        Unacknowledged commands are resent after the timeout, and only once per timeout period.
+        """
+        channel = CommandChannel(window_size=8)
+        channel.submit(0, "a", now=0.0)
+        channel.submit(1, "b", now=1.0)
+
+        assert channel.expired(now=1.5, timeout=1.0) == ["a"]
+        assert channel.expired(now=1.6, timeout=1.0) == []
+        assert channel.expired(now=2.6, timeout=1.0) == ["b", "a"]
+        assert channel.retransmits == 3
+
+        channel.ack([0, 1], now=3.0)
+        assert channel.expired(now=10.0, timeout=1.0) == []
+
+
+class TestTransport:
+    """
+    Tests for the tcp/ipc transport selection.
+    """
+
+    def test_tcp_endpoints(self):
+        """
+        TCP binds on all interfaces and local workers connect over loopback.
+        """
+        assert make_endpoints("tcp", 1234, "pub") == ("tcp://*:1234", "tcp://127.0.0.1:1234")
+
+    def test_ipc_endpoints_are_per_instance(self, tmp_path):
+        """
+        IPC endpoints are identical for bind and connect, and include the process ID so controllers can share a host.
+        """
+        bind, connect = make_endpoints("ipc", 1234, "pub", str(tmp_path))
+        assert bind == connect == f"ipc://{tmp_path}/sim_poc-{os.getpid()}-pub.ipc"
+
+    def test_unknown_transport(self):
+        """
+        An unsupported transport is rejected.
+        """
+        with pytest.raises(ValueError):
+            make_endpoints("udp", 1234, "pub")
+
+    def test_ipc_setup_and_teardown(self, tmp_path, monkeypatch):
+        """
+        The controller binds ipc socket files on setup and removes them on teardown.
+        """
+        monkeypatch.setattr("src.controller.comms.settings.ZMQ_IPC_DIR", str(tmp_path))
+        comms = ControllerComms()
+        app = SimpleNamespace(state=SimpleNamespace())
+        comms.setup_zmq(app, 0, 0, transport="ipc")
+        paths = [comms.pub_endpoint.removeprefix("ipc://"), comms.pull_endpoint.removeprefix("ipc://")]
+        assert all(path.startswith(str(tmp_path)) and os.path.exists(path) for path in paths)
+        comms.teardown_zmq(app)
+        assert not any(os.path.exists(path) for path in paths)
+        assert comms.pub_endpoint is None
+
+
+class TestCodec:
+    """
+    Tests for the two-frame wire codec.
+    """
+
+    def test_round_trip(self):
+        """
+        A message encodes to [tag, payload] frames and decodes from the payload frame.
+        """
+        msg = CommandAck(address=HUB_ADDRESS, seqs=[1, 2, 3])
+        tag, payload = encode_message(msg)
+        assert tag == b"N00H00"
+        decoded = decode_message(payload)
+        assert decoded == msg
+
+
+class TestWorkerAcks:
+    """
+    Tests for worker-side acknowledgement and de-duplication of sequenced commands.
+    """
+
+    async def test_duplicates_are_dropped_but_acked(self):
+        """
+        A retransmitted command is acknowledged again but not handed to the worker a second time.
+        """
+        comms, sent = make_worker_comms([wire(0), wire(1), wire(0)])
+        assert (await comms.recv_msg()).seq == 0
+        assert (await comms.recv_msg()).seq == 1
+        assert await comms.recv_msg() is None
+
+        await comms.flush_acks()
+        assert len(sent) == 1
+        assert isinstance(sent[0], CommandAck)
+        assert sent[0].address == HUB_ADDRESS
+        assert sent[0].seqs == [0, 1, 0]
+
+        await comms.flush_acks()
+        assert len(sent) == 1  # Nothing pending, nothing sent
+
+    async def test_acks_flush_when_batch_is_full(self, monkeypatch):
+        """
+        Acks are sent as soon as a full batch has accumulated, without waiting for the ack loop.
+        """
+        monkeypatch.setattr("src.worker.comms.settings.COMMAND_ACK_BATCH_SIZE", 2)
+        comms, sent = make_worker_comms([wire(0), wire(1), wire(2)])
+        for _ in range(3):
+            await comms.recv_msg()
+        assert [ack.seqs for ack in sent] == [[0, 1]]
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
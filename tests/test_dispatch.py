@@ -0,0 +1,97 @@
+"""
+Unit tests for the controller's node index and worker message dispatch.
+
+These tests check that the flat address index tracks networks and hubs as they are added and removed, that AP and RT
+addresses resolve through their hub's store, and that messages for unknown or stale addresses are counted and skipped
+instead of raising.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import pytest
+from fastapi import HTTPException
+
+from src.controller.ctrl_api import APState, NetworkState
+from src.controller.managers import APManager, CompletionTracker, HubManager, NetworkManager, node_index
+from src.controller.worker_ctrl import SimulatorManager
+from src.worker.worker_api import Address, APRegisterRsp, HubConnectInd, MessageTypes
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def make_tree() -> tuple[SimulatorManager, APManager]:
+    """
+    Build a minimal simulator -> network -> hub -> AP tree without starting any workers.
+
+    Returns:
+        tuple[SimulatorManager, APManager]: The simulator and its single AP.
+    """
+    node_index.clear()
+    sim = SimulatorManager(address=Address())
+    net = NetworkManager(address=Address(net=0), csi="csi", csni="csni", state=NetworkState.REGISTERED)
+    sim.add_child(0, net)
+    hub = HubManager(address=Address(net=0, hub=0))
+    net.add_child(0, hub)
+    hub.store.add_ap(0, heartbeat=30)
+    hub.ap_trackers[0] = CompletionTracker(hub.tracker)
+    return sim, hub.get_ap(0)
+
+
+def test_index_tracks_add_and_remove():
+    """
+    Networks and hubs are indexed when added and dropped with their subtree. APs are found through their hub.
+    """
+    sim, ap = make_tree()
+    assert sim.get_node(ap.address) == ap
+    assert set(node_index) == {"N00", "N00H00"}
+
+    sim.get_network(0).remove_child(0)
+    assert set(node_index) == {"N00"}
+    with pytest.raises(HTTPException):
+        sim.get_node(ap.address)
+
+
+def test_dispatch_to_handler():
+    """
+    A message is routed to the registered handler of the manager at its address.
+    """
+    sim, ap = make_tree()
+    assert sim.dispatch(APRegisterRsp(address=ap.address, success=True))
+    assert ap.state == APState.REGISTERED
+    assert sim.dropped_messages == {}
+
+
+def test_dispatch_skips_unknown_and_stale_addresses():
+    """
+    Messages for missing nodes, or for a node of the wrong type, are counted rather than raising.
+    """
+    sim, ap = make_tree()
+    assert not sim.dispatch(APRegisterRsp(address=Address(net=0, hub=0, ap=7), success=True))
+    assert not sim.dispatch(HubConnectInd(address=Address(net=0, hub=5)))
+
+    sim.get_node(Address(net=0, hub=0)).store.remove_ap(0)
+    assert not sim.dispatch(APRegisterRsp(address=ap.address, success=True))
+    assert sim.dropped_messages == {"unknown_address": 3}
+
+
+def test_dispatch_counts_handler_errors():
+    """
+    An exception raised by a handler is contained and counted.
+    """
+    sim, ap = make_tree()
+
+    def broken(node, msg):
+        raise RuntimeError("boom")
+
+    sim.register_handler(MessageTypes.AP_REGISTER_RSP, HubManager, broken)
+    assert not sim.dispatch(APRegisterRsp(address=ap.address, success=True))
+    assert sim.dropped_messages == {"handler_error": 1}
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,138 @@
+"""
+Tests for changing heartbeat intervals, and pausing and resuming heartbeats, at runtime.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+
+from starlette.status import HTTP_200_OK, HTTP_422_UNPROCESSABLE_CONTENT
+from tests.utils import build_network
+
+from src.controller.comms import worker_ctrl
+from src.controller.recovery import Recovery
+from src.controller.worker_ctrl import simulator
+from src.worker.node import Node, nodes
+from src.worker.worker import Hub
+from src.worker.worker_api import MAX_HEARTBEAT_SECONDS, Address, NodeAction, NodeActionReq, NodeSet
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class BeatingNode(Node):
+    """A node that records the time of each heartbeat instead of sending it."""
+
+    def __init__(self, address: Address, seconds: float):
+        super().__init__(address, None, None)
+        self.heartbeat_secs = seconds
+        self.registered = True
+        self.beats: list[float] = []
+
+    async def send_heartbeat(self):
+        self.beats.append(asyncio.get_running_loop().time())
+
+
+def phases(beats: list[float], period: float) -> list[float]:
+    """
+    Returns:
+        list[float]: The phase of each beat within the period, as a fraction.
+    """
+    return [beat / period % 1 for beat in beats]
+
+
+def same_phase(first: float, second: float) -> bool:
+    """
+    Returns:
+        bool: True if two phases are within 0.2 of each other, allowing for wrapping round.
+    """
+    return min(abs(first - second), 1 - abs(first - second)) < 0.2
+
+
+async def test_interval_change_keeps_task_and_phase() -> None:
+    """A new interval applies at once, in the same task and at the same phase; paused nodes send nothing."""
+    node = BeatingNode(Address(net=9, hub=9, ap=0), 0.1)
+    try:
+        await node.on_start_heartbeat_req()
+        task = node.heartbeat_task
+        await asyncio.sleep(0.45)
+        before = list(node.beats)
+        assert 3 <= len(before) <= 5
+        assert all(0.07 < b - a < 0.13 for a, b in zip(before, before[1:], strict=False))
+
+        node.set_heartbeat(seconds=0.04)
+        await asyncio.sleep(0.3)
+        after = node.beats[len(before) :]
+        assert len(after) >= 5
+        assert all(0.02 < b - a < 0.06 for a, b in zip(after, after[1:], strict=False))
+        phase = phases(before, 0.1)[0]
+        assert all(same_phase(phase, other) for other in phases(after, 0.04))
+
+        node.set_heartbeat(paused=True)
+        await asyncio.sleep(0)
+        paused_at = len(node.beats)
+        await asyncio.sleep(0.1)
+        assert len(node.beats) == paused_at
+        node.set_heartbeat(paused=False)
+        await asyncio.sleep(0.1)
+        assert len(node.beats) > paused_at
+        assert node.heartbeat_task is task and not task.done()
+    finally:
+        node.heartbeat_task.cancel()
+        nodes.pop(node.address, None)
+
+
+async def test_worker_heartbeat_actions(monkeypatch) -> None:
+    """The worker applies interval changes, pauses and resumes to the nodes a command names."""
+    hub = Hub.__new__(Hub)
+    hub.address = Address(net=9, hub=9)
+    rts = [BeatingNode(Address(net=9, hub=9, ap=0, rt=rt), 30) for rt in range(3)]
+    try:
+        command = NodeActionReq(
+            address=hub.address, action=NodeAction.SET_HEARTBEAT, rts={0: NodeSet.of([0, 2])}, heartbeat_seconds=5
+        )
+        await hub.on_node_action_req(command)
+        assert [rt.heartbeat_secs for rt in rts] == [5, 30, 5]
+        await hub.on_node_action_req(command.model_copy(update={"action": NodeAction.PAUSE_HEARTBEAT}))
+        assert [rt.heartbeat_paused for rt in rts] == [True, False, True]
+        await hub.on_node_action_req(command.model_copy(update={"action": NodeAction.RESUME_HEARTBEAT}))
+        assert not any(rt.heartbeat_paused for rt in rts)
+    finally:
+        for rt in rts:
+            nodes.pop(rt.address, None)
+
+
+def test_heartbeat_route(client, monkeypatch) -> None:
+    """Setting an interval needs one in range, goes to each hub in one command, and is recorded by the controller."""
+    build_network(2, 2, 8)
+    sent = []
+    monkeypatch.setattr(worker_ctrl, "send", sent.append)
+    body = {"net": 0, "hub": 1, "target": "rt", "action": NodeAction.SET_HEARTBEAT}
+    assert client.post("/action/", json=body).status_code == HTTP_422_UNPROCESSABLE_CONTENT
+    too_long = body | {"heartbeat_seconds": MAX_HEARTBEAT_SECONDS + 1}
+    assert client.post("/action/", json=too_long).status_code == HTTP_422_UNPROCESSABLE_CONTENT
+    assert not sent
+
+    resp = client.post("/action/", json=body | {"ids": [1, 2], "heartbeat_seconds": 7})
+    assert resp.status_code == HTTP_200_OK
+    assert [(command.address, command.heartbeat_seconds) for command in sent] == [(Address(net=0, hub=1), 7)]
+    assert client.get("/network/0/hub/1/ap/1/rt/2").json()["heartbeat_seconds"] == 7
+    assert client.get("/network/0/hub/1/ap/1/rt/3").json()["heartbeat_seconds"] == 60
+    assert client.get("/network/0/hub/0/ap/1/rt/2").json()["heartbeat_seconds"] == 60
+
+    record = {"type": "heartbeat", "net": 0, "hub": 0, "seconds": 9, "aps": [1], "rts": {"0": [4]}}
+    Recovery._apply_state(Address(net=0, hub=0), record)
+    hub = simulator.get_network(0).get_hub(0)
+    assert (hub.get_ap(1).heartbeat_seconds, hub.get_ap(0).get_rt(4).heartbeat_seconds) == (9, 9)
+
+    resp = client.post("/action/", json={"net": 0, "target": "ap", "action": NodeAction.PAUSE_HEARTBEAT})
+    assert resp.json()["commands"] == 2
+    assert sent[-1].action == NodeAction.PAUSE_HEARTBEAT and sent[-1].aps == NodeSet.of([0, 1])
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -76,10 +76,14 @@ async def test_delete_hub(client, httpx_mock, get_worker_mock) -> None:
         mock_worker: The mock worker fixture.
     """
     hub_address = await create_empty_hub(client, httpx_mock, get_worker_mock)
+    httpx_mock.add_response(
+        method="DELETE", url=f"{settings.NBAPI_URL}/api/v1/node/hub/{TEST_NETWORK_CSNI}_{hub_address.tag}"
+    )
     del_resp = client.delete(f"/network/{hub_address.net}/hub/{hub_address.hub}")
     assert del_resp.status_code == HTTP_200_OK
     msg = del_resp.json()
     assert f"Hub {hub_address.hub} deleted" in msg["message"]
+    assert (msg["stats"]["nodes"], msg["stats"]["deregistered"], msg["stats"]["failed"]) == (1, 1, 0)
     # Confirm hub is gone
     get_resp = client.get(f"/network/{hub_address.net}/hub/{hub_address.hub}")
     assert get_resp.status_code == HTTP_404_NOT_FOUND
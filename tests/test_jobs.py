@@ -0,0 +1,130 @@
+"""
+Tests for background jobs: bulk creation returns a job ID at once, and the job reports progress, runs under the
+controller-wide concurrency limits and can be cancelled.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import time
+
+from starlette.status import HTTP_200_OK, HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND, HTTP_409_CONFLICT
+from tests.utils import TEST_NETWORK_CSNI, create_empty_hub
+
+from src.config import settings
+from src.controller.ctrl_api import APCreateRequest, JobProgress, JobState, NetworkCreateRequest
+from src.controller.jobs import job_runner
+from src.worker.worker_api import Address, APRegisterRsp, MessageTypes, RTRegisterRsp
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def get_progress(client, job_id: str) -> JobProgress:
+    """
+    Returns:
+        JobProgress: The job's current progress, fetched through the API.
+    """
+    resp = client.get(f"/job/{job_id}")
+    assert resp.status_code == HTTP_200_OK, resp.json()
+    return JobProgress.model_validate(resp.json())
+
+
+def wait_for_state(client, job_id: str, state: JobState) -> JobProgress:
+    """
+    Poll a job until it reaches a state, failing the test if it takes more than 5 seconds.
+
+    Returns:
+        JobProgress: The job's progress in that state.
+    """
+    deadline = time.monotonic() + 5
+    while (progress := get_progress(client, job_id)).state != state:
+        assert time.monotonic() < deadline, progress
+        time.sleep(0.01)
+    return progress
+
+
+async def test_network_job(client, httpx_mock, get_worker_mock) -> None:
+    """A Network job returns at once, then creates and registers everything, reporting counts and phase timings."""
+    req = NetworkCreateRequest(hubs=1, aps_per_hub=1, rts_per_ap=2)
+    httpx_mock.add_response(
+        method="POST", url=f"{settings.NBAPI_URL}/api/v1/network/csi/{req.csi}", json={"csni": TEST_NETWORK_CSNI}
+    )
+    httpx_mock.add_response(method="POST", url=f"{settings.NBAPI_URL}/api/v1/node/hub/{TEST_NETWORK_CSNI}_N00H00")
+    worker = get_worker_mock(Address(net=0, hub=0))
+
+    resp = client.post("/job/network", json=req.model_dump())
+    assert resp.status_code == HTTP_202_ACCEPTED, resp.json()
+    accepted = JobProgress.model_validate(resp.json())
+    assert (accepted.kind, accepted.total_hubs, accepted.total_aps, accepted.total_rts) == ("network", 1, 1, 2)
+
+    # Play the worker: register the AP and its RTs
+    answered = 0
+    async with asyncio.timeout(5):
+        while answered < 3:
+            msg = await worker.recv_msg()
+            if msg is None:
+                continue
+            if msg.msg_type == MessageTypes.AP_REGISTER_REQ:
+                await worker.send_msg(APRegisterRsp(address=msg.address, success=True))
+                answered += 1
+            elif msg.msg_type == MessageTypes.RT_REGISTER_REQ:
+                await worker.send_msg(RTRegisterRsp(address=msg.address, success=msg.address.rt == 0))
+                answered += 1
+
+    progress = wait_for_state(client, accepted.job_id, JobState.COMPLETED)
+    assert progress.address == Address(net=0)
+    assert (progress.hubs, progress.aps, progress.rts, progress.failed) == (1, 1, 1, 1)
+    assert progress.eta_seconds == 0.0
+    assert progress.nodes_per_second > 0
+    assert set(progress.phases) == {"queued", "register_network", "start_workers", "register_hubs", "register_aps"}
+    assert accepted.job_id in [job.job_id for job in map(JobProgress.model_validate, client.get("/job/").json())]
+
+
+def test_failed_network_job(client, httpx_mock) -> None:
+    """A job whose Network cannot be registered fails, with the error reported."""
+    httpx_mock.add_response(
+        method="POST", url=f"{settings.NBAPI_URL}/api/v1/network/csi/{settings.CSI}", status_code=500
+    )
+    resp = client.post("/job/network", json=NetworkCreateRequest(hubs=1).model_dump())
+    progress = wait_for_state(client, resp.json()["job_id"], JobState.FAILED)
+    assert progress.hubs == 0
+    assert progress.errors
+
+
+async def test_jobs_queue_and_cancel(client, httpx_mock, get_worker_mock, monkeypatch) -> None:
+    """Jobs beyond JOB_MAX_CONCURRENT wait for a slot, which a cancelled job gives up."""
+    hub_address = await create_empty_hub(client, httpx_mock, get_worker_mock)
+    monkeypatch.setattr(settings, "JOB_MAX_CONCURRENT", 1)
+    job_runner.open()
+
+    url = f"/job/network/{hub_address.net}/hub/{hub_address.hub}/ap"
+    req = APCreateRequest(num_rts=1).model_dump()  # Never registers, since nothing answers for the worker
+    first, second = (client.post(url, json=req).json()["job_id"] for _ in range(2))
+    wait_for_state(client, first, JobState.RUNNING)
+    assert get_progress(client, second).state == JobState.QUEUED
+
+    resp = client.delete(f"/job/{first}")
+    assert resp.status_code == HTTP_200_OK
+    cancelled = JobProgress.model_validate(resp.json())
+    assert cancelled.state == JobState.CANCELLED
+    assert cancelled.address is None
+    assert client.delete(f"/job/{first}").status_code == HTTP_409_CONFLICT
+
+    wait_for_state(client, second, JobState.RUNNING)
+    assert client.delete(f"/job/{second}").status_code == HTTP_200_OK
+
+
+def test_unknown_job(client) -> None:
+    """An unknown job is a 404, and a job for an unknown Network is rejected up front."""
+    assert client.get("/job/nonexistent").status_code == HTTP_404_NOT_FOUND
+    assert client.delete("/job/nonexistent").status_code == HTTP_404_NOT_FOUND
+    assert client.post("/job/network/7/hub", json={}).status_code == HTTP_404_NOT_FOUND
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
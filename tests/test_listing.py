@@ -0,0 +1,87 @@
+"""
+Tests for the list routes: cursor pagination, field projection and NDJSON streaming, and the RT routes.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import json
+
+from starlette.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from tests.utils import SPARSE_HUB, build_network
+
+from src.controller.ctrl_api import APState, RTRead, RTState
+from src.controller.listing import NEXT_CURSOR_HEADER
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_list_pages(client) -> None:
+    """A list is returned a page at a time, with the cursor for the next page in a header until the last page."""
+    build_network(**SPARSE_HUB)
+    url = "/network/0/hub/0/ap/"
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor is not None else {})
+        resp = client.get(url, params=params)
+        assert resp.status_code == HTTP_200_OK, resp.text
+        pages.append([int(index) for index in resp.json()])
+        cursor = resp.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert pages == [[0, 1], [3, 4]]
+
+    assert client.get(url).json()["1"]["state"] == APState.REGISTERED
+    assert client.get(url, params={"cursor": 4}).json() == {}
+
+
+def test_list_projection_and_ndjson(client) -> None:
+    """Only the requested fields are returned, and NDJSON gives one entry per line with its index."""
+    build_network(**SPARSE_HUB)
+    resp = client.get("/network/0/hub/0/ap/", params={"fields": "heartbeat_seconds", "format": "ndjson"})
+    assert resp.status_code == HTTP_200_OK
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert lines == [
+        {"index": 0, "heartbeat_seconds": 30},
+        {"index": 1, "heartbeat_seconds": 31},
+        {"index": 3, "heartbeat_seconds": 33},
+        {"index": 4, "heartbeat_seconds": 34},
+    ]
+
+    resp = client.get("/network/", params={"fields": "csni,state"})
+    assert resp.json() == {"0": {"csni": "csni", "state": "registered"}}
+    resp = client.get("/network/0/hub/", params={"fields": "address", "format": "ndjson"})
+    assert json.loads(resp.text) == {"index": 0, "address": {"net": 0, "hub": 0, "ap": None, "rt": None}}
+
+    resp = client.get("/network/0/hub/0/ap/", params={"fields": "state,bogus"})
+    assert resp.status_code == HTTP_400_BAD_REQUEST
+
+
+def test_list_rts(client) -> None:
+    """RTs are listed per AP, with the same pagination and projection, and can be fetched one at a time."""
+    build_network(**SPARSE_HUB)
+    url = "/network/0/hub/0/ap/0/rt/"
+    resp = client.get(url, params={"cursor": 2, "limit": 3})
+    assert resp.status_code == HTTP_200_OK
+    assert resp.headers[NEXT_CURSOR_HEADER] == "5"
+    rts = {int(index): RTRead.model_validate(entry) for index, entry in resp.json().items()}
+    assert list(rts) == [3, 4, 5]
+    assert rts[3].state == RTState.REGISTERED
+    assert (rts[4].heartbeat_seconds, rts[4].auid) == (60, "csni_N00H00A00R04")
+
+    resp = client.get(url, params={"fields": "state", "format": "ndjson", "limit": 100})
+    assert len(resp.text.splitlines()) == 10
+    assert client.get(url.replace("ap/0", "ap/1"), params={"format": "ndjson"}).text == ""
+
+    assert RTRead.model_validate(client.get(f"{url}3").json()).state == RTState.REGISTERED
+    assert client.get(f"{url}99").status_code == HTTP_404_NOT_FOUND
+    assert client.get("/network/0/hub/0/ap/2/rt/").status_code == HTTP_404_NOT_FOUND
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
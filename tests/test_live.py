@@ -0,0 +1,129 @@
+"""
+Tests for live status streams: snapshots, coalesced deltas, the WebSocket and SSE routes, and the worker status
+reports that feed them.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import json
+from types import SimpleNamespace
+
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from tests.utils import SPARSE_HUB, build_network
+
+from src.config import settings
+from src.controller.ctrl_api import APState, HubState, LiveQuery, RTState, StatusMessage
+from src.controller.live import live_status
+from src.controller.routes_live import live_sse
+from src.controller.worker_ctrl import simulator
+from src.worker.alarms import AlarmEngine
+from src.worker.node import nodes
+from src.worker.worker import Hub
+from src.worker.worker_api import Address, HeartbeatStats, HeartbeatStatsRsp, HubStatusInd, NodeHeartbeats
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_snapshot_and_coalesced_deltas(test_app) -> None:
+    """A subscriber gets a snapshot of its subtree, then one update per changed node however many changes there were."""
+    [hub] = build_network(**SPARSE_HUB)
+    with live_status.subscription(simulator.get_network(0)) as sub:
+        snapshot = sub.snapshot
+        assert [update.address.tag for update in snapshot.updates] == [
+            "N00",
+            "N00H00",
+            *(f"N00H00A0{ap}" for ap in (0, 1, 3, 4)),
+        ]
+        assert snapshot.updates[2].state == APState.UNREGISTERED
+        assert sub.take() is None
+
+        hub.set_ap_state(0, APState.REGISTERED)
+        hub.set_ap_state(0, APState.REGISTRATION_FAILED)
+        hub.set_rt_state(0, 1, RTState.REGISTERED)  # Not followed
+        hub.on_status_ind(HubStatusInd(address=hub.address, aps={0: NodeHeartbeats(local=HeartbeatStats(total=3))}))
+        delta = sub.take()
+        assert (delta.kind, delta.seq, delta.coalesced) == ("delta", 1, 2)
+        updates = {update.address.tag: update for update in delta.updates}
+        assert set(updates) == {"N00H00", "N00H00A00"}
+        assert updates["N00H00A00"].state == APState.REGISTRATION_FAILED
+        assert updates["N00H00A00"].heartbeats.total == 3
+
+        simulator.get_network(0).remove_child(0)
+        assert sub.take().updates[0].removed
+    assert not live_status.active
+
+    with live_status.subscription(simulator) as sub:
+        assert sub.snapshot.updates[0].address == Address(net=0)
+        live_status.publish(Address(net=1, hub=0), state=HubState.REGISTERED)
+        assert sub.take().updates[0].address == Address(net=1, hub=0)
+
+
+def test_websocket(client, monkeypatch) -> None:
+    """The WebSocket stream sends the snapshot, then deltas fed by the worker's messages."""
+    monkeypatch.setattr(settings, "LIVE_STATUS_INTERVAL", 0.01)
+    [hub] = build_network(**SPARSE_HUB)
+    with client.websocket_connect("/live/ws?net=0&hub=0&ap=0&rts=true") as ws:
+        snapshot = StatusMessage.model_validate(ws.receive_json())
+        assert snapshot.kind == "snapshot"
+        assert len(snapshot.updates) == 11  # The AP and its 10 RTs
+        assert snapshot.updates[4].state == RTState.REGISTERED
+
+        counters = NodeHeartbeats(local=HeartbeatStats(total=2, success=2), children=HeartbeatStats(total=9))
+        assert simulator.dispatch(HubStatusInd(address=hub.address, aps={0: counters, 1: counters}))
+        delta = StatusMessage.model_validate(ws.receive_json())
+        assert delta.kind == "delta"
+        assert [update.address.ap for update in delta.updates] == [0]
+        assert (delta.updates[0].heartbeats, delta.updates[0].child_heartbeats) == (counters.local, counters.children)
+        assert delta.updates[0].state is None
+    assert not live_status.active
+
+
+async def test_sse(client) -> None:
+    """The SSE stream sends the same messages as events, and unknown or malformed subtrees are rejected."""
+    build_network(**SPARSE_HUB)
+    resp = await live_sse(LiveQuery(net=0, hub=0))
+    event = await anext(resp.body_iterator)
+    await resp.body_iterator.aclose()
+    kind, data = event.strip().split("\n")
+    assert kind == "event: snapshot"
+    assert len(json.loads(data.removeprefix("data: "))["updates"]) == 5
+    assert not live_status.active
+
+    assert client.get("/live/sse", params={"hub": 0}).status_code == HTTP_400_BAD_REQUEST
+    assert client.get("/live/sse", params={"net": 3}).status_code == HTTP_404_NOT_FOUND
+
+
+def test_worker_status_report(monkeypatch) -> None:
+    """The worker reports the counters of the APs that changed since its last report, and nothing if none did."""
+    hub = Hub.__new__(Hub)
+    hub.address = Address(net=0, hub=0)
+    hub._reported, hub._reported_hub, hub._reported_alarms = {}, None, None
+    hub.alarms = AlarmEngine(hub)
+    hub.heartbeat_state = HeartbeatStatsRsp(address=hub.address)
+
+    aps = {}
+    for ap in range(2):
+        address = Address(net=0, hub=0, ap=ap)
+        aps[ap] = SimpleNamespace(heartbeat_state=HeartbeatStatsRsp(address=address))
+        monkeypatch.setitem(nodes, address, aps[ap])
+    aps[0].heartbeat_state.local.record(True)
+
+    first = hub.status_ind()
+    assert set(first.aps) == {0, 1}
+    assert first.aps[0].local == HeartbeatStats(total=1, success=1)
+    assert hub.status_ind() is None
+
+    aps[1].heartbeat_state.local.record(False)
+    hub.heartbeat_state.children.record(False)
+    second = hub.status_ind()
+    assert list(second.aps) == [1]
+    assert second.hub.total == 1
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,107 @@
+"""
+Unit tests for controller-side manager helpers.
+
+Covers the CompletionTracker used to await bulk registrations, and its use when an AP and its RTs are created.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+
+from src.controller.ctrl_api import APCreateRequest, RTCreateRequest, RTState
+from src.controller.managers import CompletionTracker, HubManager
+from src.worker.worker_api import Address, RTRegisterRsp
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class TestCompletionTracker:
+    """
+    Tests for CompletionTracker counting and chaining.
+    """
+
+    async def test_wait_resolves_when_all_responses_arrive(self):
+        """
+        A single wait() resolves once the expected number of responses has been recorded.
+        """
+        tracker = CompletionTracker()
+        tracker.expect(3)
+        waiter = asyncio.create_task(tracker.wait())
+        tracker.record(True)
+        tracker.record(False)
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        tracker.record(True)
+        await asyncio.wait_for(waiter, 1)
+        assert (tracker.succeeded, tracker.failed, tracker.outstanding) == (2, 1, 0)
+
+    async def test_wait_returns_immediately_when_nothing_outstanding(self):
+        """
+        Waiting with nothing outstanding does not block.
+        """
+        await asyncio.wait_for(CompletionTracker().wait(), 1)
+
+    def test_counts_propagate_to_parent(self):
+        """
+        Counts on a child tracker are aggregated on its parent.
+        """
+        parent = CompletionTracker()
+        children = [CompletionTracker(parent), CompletionTracker(parent)]
+        for child in children:
+            child.expect(2)
+            child.record(True)
+        assert (parent.expected, parent.succeeded, parent.outstanding) == (4, 2, 2)
+
+
+async def test_add_rts_waits_once_for_all_responses(monkeypatch):
+    """
+    add_ap sends every registration request up front, then completes when all the RT responses have been handled.
+    """
+    sent = []
+    monkeypatch.setattr("src.controller.managers.worker_ctrl.send", sent.append)
+
+    hub = HubManager(address=Address(net=0, hub=0))
+    task = asyncio.create_task(hub.add_ap(APCreateRequest(num_rts=3, azimuth_deg=90)))
+    await asyncio.sleep(0)
+    assert sent[0].azimuth_deg == 90
+    assert [msg.address.rt for msg in sent[1:]] == [0, 1, 2]
+    assert not task.done()
+
+    for msg in sent[1:]:
+        hub.on_rt_register_rsp(RTRegisterRsp(address=msg.address, success=msg.address.rt != 1))
+    ap = await asyncio.wait_for(task, 1)
+
+    states = [rt.state for rt in ap.get_rts().values()]
+    assert states == [RTState.REGISTERED, RTState.REGISTRATION_FAILED, RTState.REGISTERED]
+    assert (hub.tracker.succeeded, hub.tracker.failed, hub.tracker.outstanding) == (2, 1, 1)  # AP still outstanding
+
+
+async def test_bulk_rts_fill_lowest_gap(monkeypatch):
+    """
+    A bulk RT create takes the lowest run of free indices that is long enough for the whole batch.
+    """
+    sent = []
+    monkeypatch.setattr("src.controller.managers.worker_ctrl.send", sent.append)
+    hub = HubManager(address=Address(net=0, hub=0))
+    hub.store.add_ap(0, heartbeat=30)
+    hub.ap_trackers[0] = CompletionTracker(hub.tracker)
+    hub.store.add_rt(0, 0, heartbeat=30, count=8)
+    for rt in (1, 4, 5):
+        hub.store.rts[0].remove(rt)
+
+    task = asyncio.create_task(hub.get_ap(0).add_rts(RTCreateRequest(), [-1, -1]))
+    await asyncio.sleep(0)
+    for msg in sent:
+        hub.on_rt_register_rsp(RTRegisterRsp(address=msg.address, success=True))
+    rts = await asyncio.wait_for(task, 1)
+    assert [rt.index for rt in rts] == [4, 5]
+    assert hub.get_ap(0).get_index() == 1
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,53 @@
+"""
+Test suite for the controller metrics API endpoints.
+"""
+
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+from starlette.status import HTTP_200_OK
+from tests.utils import create_empty_hub
+
+from src.controller.ctrl_api import NbapiPoolStats, RecoveryStats
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+async def test_nbapi_stats_count_shared_client_requests(client, httpx_mock, get_worker_mock) -> None:
+    """Network and hub creation go through the shared NBAPI client, and its metrics are reported.
+
+    Args:
+        client: The test client fixture.
+        httpx_mock: The HTTPX mock fixture.
+        get_worker_mock: The mock worker fixture.
+    """
+    before = NbapiPoolStats.model_validate(client.get("/metrics/nbapi").json())
+    await create_empty_hub(client, httpx_mock, get_worker_mock)
+
+    resp = client.get("/metrics/nbapi")
+    assert resp.status_code == HTTP_200_OK, resp.json()
+    after = NbapiPoolStats.model_validate(resp.json())
+    assert after.open
+    assert after.requests - before.requests == 2  # One network and one hub
+    assert after.errors == before.errors
+    assert after.in_flight == 0
+    assert after.peak_in_flight >= 1
+
+
+def test_recovery_stats_disabled(client) -> None:
+    """Without an event log, recovery is reported as disabled.
+
+    Args:
+        client: The test client fixture.
+    """
+    resp = client.get("/metrics/recovery")
+    assert resp.status_code == HTTP_200_OK, resp.json()
+    assert RecoveryStats.model_validate(resp.json()) == RecoveryStats(enabled=False)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
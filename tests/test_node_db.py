@@ -0,0 +1,138 @@
+"""
+Unit tests for the SQLite RT store: SqliteColumns behaves like NodeColumns, writes are batched, and hubs using the
+sqlite backend work end to end.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+
+import pytest
+
+from src.config import settings
+from src.controller.ctrl_api import APCreateRequest, RTState
+from src.controller.managers import HubManager
+from src.controller.node_db import NodeDatabase
+from src.controller.node_store import RT_STATE_CODES, NodeColumns
+from src.worker.worker_api import Address, RTRegisterRsp
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+HUB = Address(net=0, hub=1)
+REGISTERED = RT_STATE_CODES[RTState.REGISTERED]
+UNREGISTERED = RT_STATE_CODES[RTState.UNREGISTERED]
+
+#######################################################################################################################
+# Fixtures
+#######################################################################################################################
+
+
+@pytest.fixture
+def db():
+    """
+    An in-memory node database.
+    """
+    database = NodeDatabase()
+    database.open("sqlite://")
+    yield database
+    database.close()
+
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_columns_match_memory_table(db) -> None:
+    """
+    The same operations on an SqliteColumns and a NodeColumns leave the same rows, read back alike before and after
+    the pending writes are flushed.
+    """
+    table = db.rt_tables(HUB, "csni_")(0)
+    reference = NodeColumns()
+    for columns in (table, reference):
+        columns.add(0, UNREGISTERED, heartbeat=30, count=4)
+        columns.add(6, UNREGISTERED, heartbeat=60, azimuth=45)
+        columns.remove(2)
+        columns.state[3] = REGISTERED
+
+    for _ in range(2):
+        assert list(table.indices()) == list(reference.indices()) == [0, 1, 3, 6]
+        assert (table.state[3], table.heartbeat[6], table.azimuth[6]) == (REGISTERED, 60, 45)
+        assert 2 not in table
+        with pytest.raises(KeyError):
+            table.state[2]
+        assert table.dump()[0] == reference.dump()[0]  # Free slots have no heartbeat or azimuth to compare
+        db.flush()
+
+    copy = db.rt_tables(HUB, "csni_")(1, reference)
+    assert [(copy.heartbeat[rt], copy.azimuth[rt]) for rt in copy.indices()] == [
+        (reference.heartbeat[rt], reference.azimuth[rt]) for rt in reference.indices()
+    ]
+
+
+def test_writes_are_batched(db, monkeypatch) -> None:
+    """
+    Changes are written in one transaction per flush, or early once a batch is full.
+    """
+    table = db.rt_tables(HUB, "csni_")(0)
+    table.add(0, UNREGISTERED, heartbeat=30, count=10)
+    for rt in range(10):
+        table.state[rt] = REGISTERED
+    assert db.flushes == 0
+    db.flush()
+    assert (db.flushes, db.rows_written) == (1, 10)  # Repeated writes to a row are coalesced
+
+    monkeypatch.setattr(settings, "NODE_STORE_FLUSH_BATCH", 5)
+    table.add(10, UNREGISTERED, heartbeat=30, count=12)
+    assert db.flushes == 3
+
+
+def test_select_and_clear(db) -> None:
+    """
+    RTs can be found by state and AUID with SQL, and clearing an AP deletes its rows.
+    """
+    table = db.rt_tables(HUB, "csni_")(2)
+    table.add(0, UNREGISTERED, heartbeat=30, count=3)
+    table.state[1] = REGISTERED
+    rt1 = Address(net=0, hub=1, ap=2, rt=1)
+    assert db.select_rts(state=RTState.REGISTERED) == [rt1]
+    assert db.select_rts(auid=f"csni_{rt1.tag}") == [rt1]
+    assert len(db.select_rts(net=0, hub=1, limit=2)) == 2
+
+    table.clear()
+    table.add(0, UNREGISTERED, heartbeat=30)  # Re-added before the deletion is flushed
+    assert db.select_rts() == [Address(net=0, hub=1, ap=2, rt=0)]
+
+
+async def test_hub_with_sqlite_backend(db, monkeypatch) -> None:
+    """
+    A hub using the sqlite backend creates, registers and removes RTs through the database.
+    """
+    monkeypatch.setattr(settings, "NODE_STORE_BACKEND", "sqlite")
+    monkeypatch.setattr("src.controller.managers.node_db", db)
+    sent = []
+    monkeypatch.setattr("src.controller.managers.worker_ctrl.send", sent.append)
+
+    hub = HubManager(address=HUB, auid_prefix="csni_")
+    task = asyncio.create_task(hub.add_ap(APCreateRequest(num_rts=3)))
+    await asyncio.sleep(0)
+    for msg in sent[1:]:
+        hub.on_rt_register_rsp(RTRegisterRsp(address=msg.address, success=msg.address.rt != 1))
+    ap = await asyncio.wait_for(task, 1)
+
+    states = [rt.state for rt in ap.get_rts().values()]
+    assert states == [RTState.REGISTERED, RTState.REGISTRATION_FAILED, RTState.REGISTERED]
+    assert len(db.select_rts(state=RTState.REGISTERED)) == 2
+
+    await hub.remove_ap(ap.index)
+    assert db.select_rts() == []
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
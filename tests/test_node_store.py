@@ -0,0 +1,175 @@
+"""
+Unit tests for the columnar AP/RT store.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import sys
+from array import array
+
+import pytest
+
+from src.controller.ctrl_api import APState, RTState
+from src.controller.node_store import HubStore, IndexAllocator, NodeColumns
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+class TestIndexAllocator:
+    """
+    Tests for lowest-free and contiguous-range index allocation.
+    """
+
+    def test_lowest_free_reuses_released_indices(self):
+        """
+        Released indices are handed out again lowest first, before any new ones.
+        """
+        alloc = IndexAllocator()
+        for _ in range(5):
+            alloc.reserve(alloc.lowest_free())
+        alloc.release(3)
+        alloc.release(1)
+        assert alloc.lowest_free() == 1
+        alloc.reserve(1)
+        assert alloc.lowest_free() == 3
+        alloc.reserve(3)
+        assert alloc.lowest_free() == 5
+        assert len(alloc) == 5
+
+    def test_reserve_specific_index(self):
+        """
+        Reserving beyond the end leaves the skipped indices free, and reserving an index in use is rejected.
+        """
+        alloc = IndexAllocator()
+        alloc.reserve(3)
+        assert [i in alloc for i in range(4)] == [False, False, False, True]
+        assert alloc.lowest_free() == 0
+        with pytest.raises(ValueError):
+            alloc.reserve(3)
+
+    def test_release_highest_index_shrinks(self):
+        """
+        Emptying a parent returns it to allocating from zero.
+        """
+        alloc = IndexAllocator()
+        alloc.reserve(0, 4)
+        for index in (1, 2, 0, 3):
+            alloc.release(index)
+        assert len(alloc) == 0
+        assert alloc.lowest_free() == 0
+        assert alloc.find_range(10) == 0
+        with pytest.raises(KeyError):
+            alloc.release(0)
+
+    def test_find_range(self):
+        """
+        A bulk reservation takes the lowest gap that is long enough, or else extends past the end.
+        """
+        alloc = IndexAllocator()
+        alloc.reserve(0, 10)
+        for index in (1, 4, 5, 6):
+            alloc.release(index)
+        assert alloc.find_range(1) == 1
+        assert alloc.find_range(3) == 4
+        assert alloc.find_range(4) == 10
+        alloc.reserve(alloc.find_range(3), 3)
+        assert alloc.lowest_free() == 1
+        assert 6 in alloc
+
+
+class TestNodeColumns:
+    """
+    Tests for slot allocation in NodeColumns.
+    """
+
+    def test_add_and_remove(self):
+        """
+        Slots are filled sparsely, the lowest free slot is reused, and trailing free slots are trimmed.
+        """
+        columns = NodeColumns()
+        columns.add(0, 0, heartbeat=30)
+        columns.add(2, 0, heartbeat=60, azimuth=180)
+        assert len(columns) == 2
+        assert list(columns.indices()) == [0, 2]
+        assert 1 not in columns
+        assert columns.alloc.lowest_free() == 1
+        assert (columns.heartbeat[2], columns.azimuth[2]) == (60, 180)
+
+        columns.remove(2)
+        assert len(columns.state) == 1
+        assert columns.alloc.lowest_free() == 1
+        with pytest.raises(KeyError):
+            columns.remove(2)
+
+    def test_dump_and_load(self):
+        """
+        A dumped table loads back with the same rows and free slots, including from the other byte order.
+        """
+        columns = NodeColumns()
+        columns.add(0, 1, heartbeat=30, azimuth=90, count=3)
+        columns.add(5, 0, heartbeat=70000)
+        columns.remove(1)
+        state, heartbeat, azimuth = columns.dump()
+
+        loaded = NodeColumns.load(state, heartbeat, azimuth)
+        assert list(loaded.indices()) == [0, 2, 5]
+        assert loaded.alloc.lowest_free() == 1
+        assert (loaded.state, loaded.heartbeat, loaded.azimuth) == (columns.state, columns.heartbeat, columns.azimuth)
+
+        swapped_heartbeat, swapped_azimuth = array("i", columns.heartbeat), array("H", columns.azimuth)
+        swapped_heartbeat.byteswap()
+        swapped_azimuth.byteswap()
+        loaded = NodeColumns.load(state, swapped_heartbeat.tobytes(), swapped_azimuth.tobytes(), byteswap=True)
+        assert (loaded.heartbeat[5], loaded.azimuth[0]) == (70000, 90)
+
+        with pytest.raises(ValueError):
+            NodeColumns.load(state, heartbeat[:4], azimuth)
+
+
+class TestHubStore:
+    """
+    Tests for HubStore state tracking.
+    """
+
+    def test_states_and_removal(self):
+        """
+        AP and RT states are stored as codes and read back as enums, and removing an AP removes its RTs.
+        """
+        store = HubStore("csni_")
+        store.add_ap(0, heartbeat=30)
+        for rt in range(3):
+            store.add_rt(0, rt, heartbeat=60)
+        store.set_ap_state(0, APState.REGISTERED)
+        store.set_rt_state(0, 1, RTState.REGISTRATION_FAILED)
+
+        assert store.ap_state(0) == APState.REGISTERED
+        assert [store.rt_state(0, rt) for rt in range(3)] == [
+            RTState.UNREGISTERED,
+            RTState.REGISTRATION_FAILED,
+            RTState.UNREGISTERED,
+        ]
+        assert store.num_rts() == 3
+        assert store.remove_ap(0) == 3
+        with pytest.raises(KeyError):
+            store.rt_state(0, 0)
+
+    def test_per_rt_footprint(self):
+        """
+        An RT costs a handful of bytes of column storage rather than a Python object.
+        """
+        store = HubStore("csni_")
+        store.add_ap(0, heartbeat=30)
+        for rt in range(1024):
+            store.add_rt(0, rt, heartbeat=60)
+        rts = store.rts[0]
+        total = sum(sys.getsizeof(column) for column in (rts.state, rts.heartbeat, rts.azimuth))
+        assert total / 1024 < 16
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
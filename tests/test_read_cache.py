@@ -0,0 +1,107 @@
+"""
+Tests for the read response cache: subtree versions, ETag / If-None-Match and bounded eviction.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+from starlette.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+from tests.utils import SPARSE_HUB, build_network
+
+from src.config import settings
+from src.controller.ctrl_api import APRead, APState, HubState, ReadCacheStats, RTState
+from src.controller.listing import NEXT_CURSOR_HEADER
+from src.controller.read_cache import CachedResponse, ReadCache, read_cache
+from src.controller.worker_ctrl import simulator
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_versions_bubble_up(test_app) -> None:
+    """A change to a node bumps the version of it and every node above it, but not its siblings."""
+    [hub] = build_network(**SPARSE_HUB)
+    net = simulator.get_network(0)
+    ap0, ap1 = hub.get_ap(0), hub.get_ap(1)
+    before = simulator.version, net.version, hub.version, ap0.version, ap1.version
+
+    hub.store.set_rt_state(0, 5, RTState.REGISTERED)
+    after = simulator.version, net.version, hub.version, ap0.version, ap1.version
+    assert all(new > old for new, old in zip(after[:4], before[:4], strict=True))
+    assert after[4] == before[4]
+    assert hub.get_ap(0).get_rt(5).version == ap0.version
+
+    hub.set_state(HubState.UNREGISTERED)
+    assert hub.version > after[2] and net.version > after[1]
+    assert ap0.version == after[3]
+
+
+def test_etag_and_not_modified(client) -> None:
+    """Responses carry an ETag, and are 304 Not Modified when it still matches, until something below changes."""
+    [hub] = build_network(**SPARSE_HUB)
+    for url in ("/network/0", "/network/0/hub/", "/network/0/hub/0/ap/1", "/network/0/hub/0/ap/0/rt/?limit=3"):
+        resp = client.get(url)
+        assert resp.status_code == HTTP_200_OK
+        tag = resp.headers["ETag"]
+        again = client.get(url, headers={"If-None-Match": tag})
+        assert again.status_code == HTTP_304_NOT_MODIFIED
+        assert again.content == b""
+        assert again.headers["ETag"] == tag
+
+        hub.store.set_ap_state(0, APState.REGISTRATION_FAILED)
+        hub.store.set_ap_state(1, APState.REGISTERED)
+        changed = client.get(url, headers={"If-None-Match": tag})
+        assert changed.status_code == HTTP_200_OK
+        assert changed.headers["ETag"] != tag
+
+    assert APRead.model_validate(client.get("/network/0/hub/0/ap/1").json()).state == APState.REGISTERED
+
+
+def test_cached_responses(client) -> None:
+    """Repeated reads are served from the cache, identical to the first, and a change makes a fresh one."""
+    [hub] = build_network(**SPARSE_HUB)
+    read_cache.clear()
+    stats = ReadCacheStats.model_validate(client.get("/metrics/read_cache").json())
+
+    url = "/network/0/hub/0/ap/"
+    first = client.get(url, params={"limit": 2})
+    second = client.get(url, params={"limit": 2})
+    assert second.content == first.content
+    assert second.headers[NEXT_CURSOR_HEADER] == first.headers[NEXT_CURSOR_HEADER] == "1"
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    hub.store.add_ap(7, heartbeat=7)
+    third = client.get(url, params={"format": "ndjson"})
+    assert len(third.text.splitlines()) == 5
+
+    after = ReadCacheStats.model_validate(client.get("/metrics/read_cache").json())
+    assert after.hits == stats.hits + 1
+    assert after.misses == stats.misses + 2
+    assert after.entries == 2
+
+
+def test_eviction(monkeypatch) -> None:
+    """The cache keeps the latest response per route, evicting the least recently used to stay within bounds."""
+    monkeypatch.setattr(settings, "READ_CACHE_ENTRIES", 2)
+    monkeypatch.setattr(settings, "READ_CACHE_MAX_BYTES", 10)
+    cache = ReadCache()
+    for route in "abc":
+        cache.put(route, CachedResponse(1, b"1234", "application/json", {}))
+    assert cache.get("a", 1) is None
+    assert cache.get("b", 1) is not None  # Now the most recently used
+    assert cache.get("b", 2) is None  # Made at an older version
+
+    cache.put("d", CachedResponse(1, b"1234567", "application/json", {}))
+    assert (cache.get("c", 1), cache.get("b", 1)) == (None, None)  # c evicted for entries, then b for bytes
+    cache.put("e", CachedResponse(1, b"12345678901", "application/json", {}))
+    assert cache.get("e", 1) is None  # Too large to cache
+
+    stats = cache.stats()
+    assert (stats.entries, stats.bytes, stats.evictions) == (1, 7, 3)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,232 @@
+"""
+Tests for crash recovery: rebuilding the topology from the event log, and resyncing with a hub worker that kept
+running while the controller was down.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from tests.utils import CREDENTIALS, PROVISIONED_HUB, build_network
+
+from src.controller.ctrl_api import APState, RTState
+from src.controller.event_log import event_log, iter_log
+from src.controller.managers import HubManager, node_index
+from src.controller.recovery import Recovery, compact
+from src.controller.worker_ctrl import simulator
+from src.worker.node import nodes
+from src.worker.worker import Hub
+from src.worker.worker_api import (
+    Address,
+    APSync,
+    HubHelloReq,
+    HubResyncRsp,
+    MessageTypes,
+    NodeSync,
+    node_digest,
+)
+
+#######################################################################################################################
+# Fixtures
+#######################################################################################################################
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    """
+    An event log file, opened for recording on an empty simulator, and closed after the test.
+    """
+    simulator.clear_children()
+    node_index.clear()
+    path = tmp_path / "events.jsonl"
+    event_log.open(path)
+    yield path
+    event_log.close()
+    simulator.clear_children()
+    node_index.clear()
+
+
+@pytest.fixture
+def sent(monkeypatch) -> list:
+    """
+    Commands sent to workers, captured instead of being sent.
+    """
+    messages = []
+    monkeypatch.setattr("src.controller.managers.worker_ctrl.send", messages.append)
+    return messages
+
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def hub_state(hub: HubManager) -> tuple:
+    """
+    Returns:
+        tuple: Everything recovery should reproduce about a hub.
+    """
+    aps = {
+        index: (ap.state, ap.heartbeat_seconds, ap.azimuth_deg, {rt: r.state for rt, r in ap.get_rts().items()})
+        for index, ap in hub.get_aps().items()
+    }
+    return hub.state, aps, dict(hub.store.ap_credentials)
+
+
+@pytest.mark.parametrize("compact_midway", [False, True])
+async def test_replay_round_trip(log_path, compact_midway) -> None:
+    """Replaying the log rebuilds the topology it recorded, whether or not it has been compacted part way through."""
+    [hub] = build_network(**PROVISIONED_HUB)
+    if compact_midway:
+        compact()
+        assert [record["type"] for record in iter_log(log_path)] == ["snapshot", "controller", "network", "hub"]
+    hub.create_ap(5, heartbeat=20, azimuth=10)
+    hub.get_ap(5).create_rts(3, heartbeat=20, count=2)
+    hub.set_rt_state(5, 4, RTState.REGISTERED)
+    await hub.remove_ap(2)
+    simulator.restore_network(1, "csi", "other")
+    await simulator.remove_network(1)
+    expected = hub_state(hub)
+    event_log.close()
+
+    simulator.clear_children()
+    node_index.clear()
+    recovery = Recovery(log_path)
+    await recovery.replay()
+    assert recovery.skipped == 0
+    assert list(simulator.get_networks()) == [0]
+    assert hub_state(simulator.get_network(0).get_hub(0)) == expected
+
+
+async def test_replay_skips_bad_events(log_path) -> None:
+    """Events that cannot be applied, and a line truncated by a crash, are skipped without stopping the replay."""
+    build_network(**PROVISIONED_HUB)
+    event_log.record("rt_state", Address(net=0, hub=0, ap=7, rt=0), state=RTState.REGISTERED)
+    event_log.close()
+    with open(log_path, "a") as stream:
+        stream.write('{"type": "add_ap", "net": 0, "hu')
+
+    simulator.clear_children()
+    node_index.clear()
+    recovery = Recovery(log_path)
+    await recovery.replay()
+    assert recovery.skipped == 1
+    assert list(simulator.get_network(0).get_hub(0).get_aps()) == [0, 2]
+
+
+async def test_compaction_keeps_ipc_id(log_path, monkeypatch) -> None:
+    """A compacted log records the controller's ipc socket ID, so that the next controller binds the same sockets."""
+    monkeypatch.setattr("src.controller.recovery.worker_ctrl.ipc_id", 4321)
+    build_network(**PROVISIONED_HUB)
+    compact()
+    assert event_log.events == 0
+    event_log.close()
+    recovery = Recovery(log_path)
+    simulator.clear_children()
+    node_index.clear()
+    await recovery.replay()
+    assert recovery.ipc_id == 4321
+
+
+async def test_resync_applies_worker_state(log_path, sent) -> None:
+    """
+    On reattaching, the controller sends digests of its APs, adopts the worker's view of the APs that differ, and
+    replays the requests the worker never received.
+    """
+    [hub] = build_network(**PROVISIONED_HUB)
+    assert not await hub.reattach(timeout=0.01)
+    hello = sent.pop()
+    assert isinstance(hello, HubHelloReq)
+    assert hello.digests == {0: node_digest(True, [(0, True), (1, False), (2, True)]), 2: node_digest(False, [])}
+
+    # The worker registered AP 2 and an RT the controller never heard about, and never got RT 2 of AP 0
+    rsp = HubResyncRsp(
+        address=hub.address,
+        pid=12345,
+        aps={
+            0: APSync(registered=True, rts={0: NodeSync(registered=True), 1: NodeSync(registered=False)}),
+            2: APSync(
+                registered=True, credentials=CREDENTIALS, rts={0: NodeSync(registered=True, heartbeat_seconds=9)}
+            ),
+        },
+        missing=[],
+    )
+    hub.on_resync_rsp(rsp)
+    assert hub._worker.pid == 12345
+    assert hub.get_ap(2).state == APState.REGISTERED
+    assert hub.get_ap(2).get_rt(0).state == RTState.REGISTERED
+    assert hub.get_ap(2).get_rt(0).heartbeat_seconds == 9
+    assert hub.get_ap(0).get_rt(2).state == RTState.UNREGISTERED
+    assert [(msg.msg_type, msg.address.tag, msg.restore) for msg in sent] == [
+        (MessageTypes.RT_REGISTER_REQ, "N00H00A00R02", True)
+    ]
+
+    # A repeated response changes nothing
+    sent.clear()
+    hub.on_resync_rsp(rsp.model_copy(update={"pid": 1}))
+    assert hub._worker.pid == 12345
+    assert sent == []
+    hub.detach_worker()
+
+
+async def test_resync_replays_missing_aps(log_path, sent) -> None:
+    """An AP the worker does not have is set up again: restored if it was registered, with its RTs."""
+    [hub] = build_network(**PROVISIONED_HUB)
+    hub.on_resync_rsp(HubResyncRsp(address=hub.address, pid=12345, aps={}, missing=[0]))
+    assert [(msg.msg_type, msg.address.tag) for msg in sent] == [
+        (MessageTypes.AP_REGISTER_REQ, "N00H00A00"),
+        (MessageTypes.RT_REGISTER_REQ, "N00H00A00R00"),
+        (MessageTypes.RT_REGISTER_REQ, "N00H00A00R02"),
+        (MessageTypes.RT_REGISTER_REQ, "N00H00A00R01"),
+    ]
+    assert sent[0].restore == CREDENTIALS
+    assert hub.get_ap(0).state == APState.UNREGISTERED
+    hub.detach_worker()
+
+
+def test_worker_answers_with_differing_aps(monkeypatch) -> None:
+    """The worker only reports APs whose digest differs from the controller's, and lists those it does not have."""
+    hub_address = Address(net=0, hub=0)
+    hub = Hub.__new__(Hub)
+    hub.address = hub_address
+
+    def add_node(address: Address, registered: bool, **fields) -> None:
+        node = SimpleNamespace(registered=registered, heartbeat_secs=30, azimuth_deg=0, **fields)
+        monkeypatch.setitem(nodes, address, node)
+
+    add_node(Address(net=0, hub=0, ap=0), True, ap_secret="s3cret", lat_deg=51.5, lon_deg=-0.1)
+    add_node(Address(net=0, hub=0, ap=0, rt=0), True)
+    add_node(Address(net=0, hub=0, ap=1), False)
+
+    digests = {0: node_digest(True, [(0, True)]), 1: node_digest(True, []), 3: 0}
+    rsp = hub.on_hello_req(HubHelloReq(address=hub_address, digests=digests))
+    assert list(rsp.aps) == [1]
+    assert not rsp.aps[1].registered
+    assert rsp.missing == [3]
+    assert json.loads(rsp.model_dump_json())["pid"] == rsp.pid
+
+
+async def test_failed_reattach_restarts_worker(log_path, sent, get_worker_mock, monkeypatch) -> None:
+    """A hub whose worker does not answer gets a new worker, which is sent every node to set up."""
+    monkeypatch.setattr("src.controller.recovery.settings.RESYNC_TIMEOUT", 0.01)
+    [hub] = build_network(**PROVISIONED_HUB)
+    replayed = []
+
+    async def replay_nodes(self):
+        replayed.append(self.address.tag)
+
+    monkeypatch.setattr(HubManager, "replay_nodes", replay_nodes)
+    recovery = Recovery(log_path)
+    await recovery.reattach()
+    assert replayed == [hub.address.tag]
+    assert (recovery.reattached, recovery.restarted, recovery.pending) == (0, 1, 0)
+    assert recovery.stats().hubs_restarted == 1
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,118 @@
+"""
+Tests for the scenario loader: reading records from each file format, lazy expansion of Hub and AP groups, and loading
+a scenario through the API.
+"""
+
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import json
+import time
+
+from starlette.status import HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND
+from tests.utils import TEST_NETWORK_CSNI
+
+from src.config import settings
+from src.controller.ctrl_api import HubSpec, NetworkSpec, ScenarioProgress, ScenarioState
+from src.controller.scenario import iter_ap_requests, iter_hub_specs, iter_records, scenario_format
+from src.controller.worker_ctrl import simulator
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+RECORD = {"csi": "scn", "hubs": 2, "aps_per_hub": 3, "rts_per_ap": 0}
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_scenario_format() -> None:
+    """The file format is worked out from the file extension, defaulting to YAML."""
+    assert scenario_format("a.json") == "json"
+    assert scenario_format("a.JSONL") == "jsonl"
+    assert scenario_format("a.ndjson") == "jsonl"
+    assert scenario_format("a.yml") == "yaml"
+    assert scenario_format("a") == "yaml"
+
+
+def test_iter_records_formats(tmp_path) -> None:
+    """Each format yields the same records, however they are wrapped."""
+    other = {**RECORD, "csi": "other"}
+    files = {
+        "multi.yaml": "---\ncsi: scn\nhubs: 2\naps_per_hub: 3\nrts_per_ap: 0\n---\n- csi: other\n"
+        "  hubs: 2\n  aps_per_hub: 3\n  rts_per_ap: 0\n",
+        "wrapped.yaml": f"networks:\n  - {json.dumps(RECORD)}\n  - {json.dumps(other)}\n",
+        "lines.jsonl": f"{json.dumps(RECORD)}\n\n{json.dumps(other)}\n",
+        "whole.json": json.dumps({"networks": [RECORD, other]}),
+    }
+    for name, text in files.items():
+        path = tmp_path / name
+        path.write_text(text)
+        assert list(iter_records(path, scenario_format(path))) == [RECORD, other], name
+
+
+def test_spec_expansion_is_lazy() -> None:
+    """Counts expand to one spec per node without building the whole list."""
+    spec = NetworkSpec.model_validate(
+        {
+            "hub_groups": [
+                {"count": 2, "ap_groups": [{"count": 1_000_000, "num_rts": 5}]},
+                {"count": 1, "num_aps": 4, "num_rts_per_ap": 1},
+            ]
+        }
+    )
+    hubs = list(iter_hub_specs(spec))
+    assert len(hubs) == 3  # noqa: PLR2004
+    assert hubs[0] is hubs[1]  # Repeated, not copied
+    ap_reqs = iter_ap_requests(hubs[0])
+    assert next(ap_reqs).num_rts == 5  # noqa: PLR2004
+    assert [req.azimuth_deg for req in iter_ap_requests(hubs[2])] == [0, 90, 180, 270]
+
+    # Without explicit groups, the Network and Hub counts apply
+    defaults = list(iter_hub_specs(NetworkSpec.model_validate(RECORD)))
+    assert len(defaults) == RECORD["hubs"]
+    assert sum(1 for _ in iter_ap_requests(defaults[0])) == RECORD["aps_per_hub"]
+    assert list(iter_ap_requests(HubSpec(num_aps=0))) == []
+
+
+def test_load_scenario(client, httpx_mock, get_worker_mock) -> None:
+    """A YAML scenario uploaded to the API creates its Network, Hubs and APs, with progress available until done."""
+    httpx_mock.add_response(
+        method="POST", url=f"{settings.NBAPI_URL}/api/v1/network/csi/scn", json={"csni": TEST_NETWORK_CSNI}
+    )
+    for hub in range(RECORD["hubs"]):
+        url = f"{settings.NBAPI_URL}/api/v1/node/hub/{TEST_NETWORK_CSNI}_N00H{hub:02X}"
+        httpx_mock.add_response(method="POST", url=url)
+
+    body = "\n".join(f"{key}: {value}" for key, value in RECORD.items())
+    resp = client.post("/scenario/", content=body, headers={"Content-Type": "application/yaml"})
+    assert resp.status_code == HTTP_202_ACCEPTED
+    load_id = ScenarioProgress.model_validate(resp.json()).load_id
+
+    deadline = time.monotonic() + 5
+    while (progress := ScenarioProgress.model_validate(client.get(f"/scenario/{load_id}").json())).state == (
+        ScenarioState.RUNNING
+    ):
+        assert time.monotonic() < deadline, progress
+        time.sleep(0.01)
+
+    assert progress.state == ScenarioState.COMPLETED, progress.errors
+    assert (progress.records, progress.networks, progress.hubs) == (1, 1, RECORD["hubs"])
+    assert progress.aps == RECORD["hubs"] * RECORD["aps_per_hub"]
+    assert progress.failed == 0
+    net = simulator.get_network(0)
+    assert [len(net.get_hub(hub).get_aps()) for hub in range(RECORD["hubs"])] == [RECORD["aps_per_hub"]] * 2
+
+
+def test_get_unknown_scenario(client) -> None:
+    """Progress for an unknown load is a 404."""
+    resp = client.get("/scenario/nonexistent")
+    assert resp.status_code == HTTP_404_NOT_FOUND
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,138 @@
+"""
+Tests for bulk actions: node selection by state, index and percentage, NodeSet encoding, the action routes and the
+worker's handling of the commands they send.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_422_UNPROCESSABLE_CONTENT
+from tests.utils import SPARSE_HUB, build_network
+
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import ActionResult, HubState, NodeLevel, RTState, Selection, SelectionSummary
+from src.controller.selection import select
+from src.worker.node import nodes
+from src.worker.worker import Hub
+from src.worker.worker_api import Address, NodeAction, NodeActionReq, NodeSet
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_node_set() -> None:
+    """Index sets round-trip as runs when there are few, and as a bitmap when there are many."""
+    runs = list(range(10, 500)) + [1000]
+    encoded = NodeSet.of(runs)
+    assert encoded.ranges == [(10, 499), (1000, 1000)] and encoded.bitmap == b""
+    scattered = list(range(3, 300, 2))
+    encoded = NodeSet.of(scattered)
+    assert encoded.ranges == [] and encoded.offset == 3 and len(encoded.bitmap) == 38
+
+    for indices in (runs, scattered, []):
+        decoded = NodeSet.model_validate_json(NodeSet.of(indices).model_dump_json())
+        assert list(decoded.indices()) == indices
+        assert decoded.count() == len(indices)
+
+
+def test_percent_sample(test_app) -> None:
+    """A sample is exactly the given percentage, picked quickly from a large tree, and the same for the same seed."""
+    build_network(75, 32, 64)
+    selection = Selection(net=0, target=NodeLevel.RT, percent=25, seed=42)
+    started = time.perf_counter()
+    picked = select(selection)
+    assert time.perf_counter() - started < 2
+    assert (picked.candidates, len(picked)) == (153_600, 38_400)
+    assert picked.seed == 42
+    addresses = list(picked.addresses())
+    assert len(set(addresses)) == 38_400
+    assert list(select(selection).addresses()) == addresses
+    assert list(select(selection.model_copy(update={"seed": 7})).addresses()) != addresses
+
+    commands = picked.commands(NodeAction.START_HEARTBEAT)
+    assert len(commands) == 75
+    assert sum(rts.count() for command in commands for rts in command.rts.values()) == 38_400
+
+    unseeded = select(Selection(net=0, hub=3, target=NodeLevel.AP, percent=50))
+    assert len(unseeded) == 16 and unseeded.seed is not None
+
+
+def test_filters(test_app) -> None:
+    """Selections narrow by subtree, state and index, and reject levels above their subtree and unknown states."""
+    build_network(**SPARSE_HUB)
+    registered = select(Selection(net=0, target=NodeLevel.RT, states=[RTState.REGISTERED]))
+    assert list(registered.addresses()) == [Address(net=0, hub=0, ap=0, rt=3)]
+    assert registered.candidates == 1
+
+    by_id = select(Selection(net=0, hub=0, target=NodeLevel.AP, ids=[1, 2, 4]))
+    assert [address.ap for address in by_id.addresses()] == [1, 4]
+    assert by_id.summary().hubs == 1
+    assert len(select(Selection(net=0, hub=0, ap=1, target=NodeLevel.AP))) == 1
+    assert len(select(Selection(net=0, target=NodeLevel.HUB, states=[HubState.UNREGISTERED]))) == 0
+
+    for bad in (
+        Selection(net=0, hub=0, ap=0, target=NodeLevel.HUB),
+        Selection(net=0, target=NodeLevel.AP, states=["bogus"]),
+        Selection(net=0, ap=0, target=NodeLevel.RT),
+    ):
+        with pytest.raises(HTTPException) as err:
+            select(bad)
+        assert err.value.status_code == HTTP_400_BAD_REQUEST
+
+
+def test_action_routes(client, monkeypatch) -> None:
+    """The routes preview a selection, and send one compact command per hub to apply an action."""
+    build_network(2, 4, 16)
+    sent = []
+    monkeypatch.setattr(worker_ctrl, "send", sent.append)
+
+    body = {"net": 0, "target": "rt", "percent": 50, "seed": 1}
+    resp = client.post("/action/preview", json=body)
+    assert resp.status_code == HTTP_200_OK
+    preview = SelectionSummary.model_validate(resp.json())
+    assert (preview.candidates, preview.selected, preview.hubs) == (128, 64, 2)
+    assert not sent
+
+    resp = client.post("/action/", json=body | {"action": NodeAction.START_HEARTBEAT})
+    result = ActionResult.model_validate(resp.json())
+    assert (result.selected, result.commands, result.sample) == (64, 2, preview.sample)
+    assert [command.address for command in sent] == [Address(net=0, hub=0), Address(net=0, hub=1)]
+    addresses = [address for command in sent for address in command.addresses()]
+    assert addresses[: len(preview.sample)] == preview.sample
+
+    both = client.post("/action/preview", json=body | {"ids": [1]})
+    assert both.status_code == HTTP_422_UNPROCESSABLE_CONTENT
+
+
+async def test_worker_applies_action(monkeypatch) -> None:
+    """The worker applies an action to each node named in the command that it still has."""
+    hub = Hub.__new__(Hub)
+    hub.address = Address(net=0, hub=0)
+    started = []
+
+    async def start(address):
+        started.append(address)
+
+    for address in (Address(net=0, hub=0, ap=1), *(Address(net=0, hub=0, ap=2, rt=rt) for rt in range(4))):
+        monkeypatch.setitem(nodes, address, SimpleNamespace(on_start_heartbeat_req=lambda a=address: start(a)))
+
+    command = NodeActionReq(
+        address=hub.address,
+        action=NodeAction.START_HEARTBEAT,
+        aps=NodeSet.of([1, 5]),
+        rts={2: NodeSet.of([0, 2, 3])},
+    )
+    await hub.on_node_action_req(command)
+    assert started == [Address(net=0, hub=0, ap=1), *(Address(net=0, hub=0, ap=2, rt=rt) for rt in (0, 2, 3))]
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
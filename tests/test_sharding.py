@@ -0,0 +1,176 @@
+"""
+Tests for sharded deployments: the hash ring, index allocation on a shard, and the front router against fake shards.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import collections
+import itertools
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_422_UNPROCESSABLE_CONTENT
+
+from src.config import settings
+from src.controller.listing import NEXT_CURSOR_HEADER
+from src.controller.shard_router import get_router_app
+from src.controller.sharding import HashRing, local_shards, shard_ring
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import AlarmStats
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+SHARDS = {"a": "http://a:1", "b": "http://b:2", "c": "http://c:3"}
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_ring() -> None:
+    """Networks spread across the shards, and adding a shard only moves the Networks that now belong to it."""
+    ring = HashRing(["a", "b", "c"])
+    owners = [ring.owner(index) for index in range(3000)]
+    assert owners == [HashRing(["c", "b", "a"]).owner(index) for index in range(3000)]
+    assert all(600 < count < 1400 for count in collections.Counter(owners).values())
+    assert (
+        list(itertools.islice(ring.owned("b"), 50))
+        == [index for index, owner in enumerate(owners) if owner == "b"][:50]
+    )
+
+    grown = HashRing(["a", "b", "c", "d"])
+    moved = [index for index, owner in enumerate(owners) if grown.owner(index) != owner]
+    assert {grown.owner(index) for index in moved} == {"d"}
+    assert 400 < len(moved) < 1200
+    with pytest.raises(ValueError):
+        HashRing([])
+
+
+def test_local_shards(monkeypatch) -> None:
+    """Shards on one host each get their own block of ports and their own files."""
+    monkeypatch.setattr(settings, "NODE_STORE_SQLITE_PATH", "/tmp/nodes.db")
+    monkeypatch.setattr(settings, "EVENT_LOG_PATH", "events.jsonl")
+    envs = local_shards(2, base_port=8000)
+    assert envs["shard1"]["SHARD_NAME"] == "shard1"
+    assert [env["APP_PORT"] for env in envs.values()] == ["8010", "8020"]
+    assert (envs["shard1"]["PUB_PORT"], envs["shard1"]["PULL_PORT"]) == ("8021", "8022")
+    assert envs["shard0"]["NODE_STORE_SQLITE_PATH"] == "/tmp/shard0-nodes.db"
+    assert envs["shard0"]["EVENT_LOG_PATH"] == "events.jsonl.shard0"
+    assert json.loads(envs["shard0"]["SHARDS"]) == {
+        "shard0": "http://127.0.0.1:8010",
+        "shard1": "http://127.0.0.1:8020",
+    }
+
+
+def test_shard_indices(test_app, monkeypatch) -> None:
+    """A shard only allocates the Network indices it owns."""
+    monkeypatch.setattr(settings, "SHARDS", SHARDS)
+    monkeypatch.setattr(settings, "SHARD_NAME", "b")
+    owned = list(itertools.islice(shard_ring().owned("b"), 3))
+    assert simulator.get_index() == owned[0]
+    simulator.restore_network(owned[0], "csi", "csni")
+    assert simulator.get_index() == owned[1]
+    other = next(index for index in range(100) if shard_ring().owner(index) != "b")
+    with pytest.raises(HTTPException) as err:
+        simulator.get_index(other)
+    assert err.value.status_code == HTTP_400_BAD_REQUEST
+    assert simulator.get_index(owned[2]) == owned[2]
+
+
+class Streamed(httpx.AsyncByteStream):
+    """
+    A response body that arrives as a stream, as a real shard's does.
+    """
+
+    def __init__(self, body: object):
+        self.body = json.dumps(body).encode()
+
+    async def __aiter__(self):
+        yield self.body
+
+
+class FakeShards:
+    """
+    Shards faked with an httpx transport: each holds some Networks, and records the requests it gets.
+    """
+
+    def __init__(self, networks: dict[str, list[int]]):
+        self.networks = networks
+        self.requests: list[tuple[str, str, str]] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        shard = request.url.host
+        self.requests.append((shard, request.method, request.url.path))
+        networks = self.networks[shard]
+        if request.url.path == "/network/" and request.method == "GET":
+            start = int(request.url.params.get("cursor", -1)) + 1
+            limit = int(request.url.params.get("limit", settings.LIST_PAGE_SIZE))
+            page = [index for index in networks if index >= start]
+            headers = {NEXT_CURSOR_HEADER: str(page[limit - 1])} if len(page) > limit else {}
+            entries = {index: {"state": "registered"} for index in page[:limit]}
+            if request.url.params.get("format") == "ndjson":
+                lines = "".join(json.dumps({"index": index} | entry) + "\n" for index, entry in entries.items())
+                return httpx.Response(HTTP_200_OK, text=lines, headers=headers)
+            return httpx.Response(HTTP_200_OK, json=entries, headers=headers)
+        if request.url.path == "/network/":
+            index = next(index for index in shard_ring().owned(shard) if index not in networks)
+            networks.append(index)
+            return httpx.Response(HTTP_201_CREATED, stream=Streamed({"index": index}))
+        if request.url.path == "/metrics/alarms":
+            hubs = {f"N{index:02}H00": AlarmStats(raised=index).model_dump() for index in networks}
+            return httpx.Response(HTTP_200_OK, json={"total": AlarmStats().model_dump(), "hubs": hubs})
+        return httpx.Response(HTTP_200_OK, stream=Streamed({"shard": shard, "body": request.content.decode()}))
+
+
+@pytest.fixture
+def shards(monkeypatch) -> FakeShards:
+    """
+    Three fake shards, each holding the first four Networks it owns.
+    """
+    monkeypatch.setattr(settings, "SHARDS", SHARDS)
+    ring = shard_ring()
+    return FakeShards({shard: list(itertools.islice(ring.owned(shard), 4)) for shard in ring.shards})
+
+
+def test_router(shards) -> None:
+    """The router sends requests to the owning shard, and merges the lists and metrics of every shard."""
+    everything = sorted(index for networks in shards.networks.values() for index in networks)
+    ring = shard_ring()
+    with TestClient(get_router_app(httpx.MockTransport(shards.handle))) as client:
+        resp = client.get("/network/", params={"limit": 5})
+        assert [int(index) for index in resp.json()] == everything[:5]
+        assert resp.headers[NEXT_CURSOR_HEADER] == str(everything[4])
+        resp = client.get("/network/", params={"cursor": everything[4], "limit": 100, "format": "ndjson"})
+        assert [json.loads(line)["index"] for line in resp.text.splitlines()] == everything[5:]
+        assert NEXT_CURSOR_HEADER not in resp.headers
+
+        index = everything[7]
+        resp = client.patch(f"/network/{index}/hub/0", params={"x": 1}, json={"heartbeat_seconds": 5})
+        assert resp.json() == {"shard": ring.owner(index), "body": '{"heartbeat_seconds":5}'}
+        assert shards.requests[-1] == (ring.owner(index), "PATCH", f"/network/{index}/hub/0")
+        assert client.post("/action/", json={"net": index, "action": "reboot"}).json()["shard"] == ring.owner(index)
+        assert client.post("/action/preview", json={}).status_code == HTTP_422_UNPROCESSABLE_CONTENT
+
+        free = next(index for index in range(100) if index not in everything)
+        resp = client.post("/network/", json={"hubs": 0})
+        assert resp.status_code == HTTP_201_CREATED and resp.json() == {"index": free}
+        assert free in shards.networks[ring.owner(free)]
+
+        metrics = client.get("/metrics/alarms").json()
+        assert metrics["total"]["raised"] == sum(everything) + free and len(metrics["hubs"]) == 13
+        status = {shard["name"]: shard for shard in client.get("/shard/").json()}
+        assert status["a"]["up"] and status["a"]["networks"] == sorted(shards.networks["a"])
+        assert client.get("/shard/c/metrics/nbapi").json()["shard"] == "c"
+        assert client.get("/shard/d/metrics/nbapi").status_code == 404
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
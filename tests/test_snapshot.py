@@ -0,0 +1,94 @@
+"""
+Tests for snapshot export and restore: a topology is exported through the API, cleared, and restored with registered
+nodes set up by the worker without any NMS calls.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import json
+import time
+
+from starlette.status import HTTP_200_OK, HTTP_202_ACCEPTED, HTTP_404_NOT_FOUND
+from tests.utils import CREDENTIALS, PROVISIONED_HUB, build_network
+
+from src.controller.ctrl_api import APState, HubState, RTState, ScenarioProgress, ScenarioState
+from src.controller.managers import node_index
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import Address, APRegisterRsp, MessageTypes, RTRegisterRsp
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+async def test_snapshot_round_trip(client, httpx_mock, get_worker_mock) -> None:
+    """
+    A restored snapshot recreates every node at its index with its settings, restoring registered nodes and
+    registering the rest. No NMS requests are made (httpx_mock fails the test on any unexpected request).
+    """
+    build_network(**PROVISIONED_HUB)
+    resp = client.get("/snapshot/")
+    assert resp.status_code == HTTP_200_OK
+    records = [json.loads(line) for line in resp.text.splitlines()]
+    assert [record["type"] for record in records] == ["snapshot", "network", "hub"]
+    assert records[1] == {"type": "network", "index": 0, "csi": "csi", "csni": "csni"}
+
+    simulator.clear_children()
+    node_index.clear()
+    worker = get_worker_mock(Address(net=0, hub=0))
+    resp = client.post("/snapshot/", content=resp.content)
+    assert resp.status_code == HTTP_202_ACCEPTED
+    load_id = ScenarioProgress.model_validate(resp.json()).load_id
+
+    # Play the worker: answer each registration request, noting which were restores
+    requests = {}
+    async with asyncio.timeout(5):
+        while len(requests) < 5:
+            msg = await worker.recv_msg()
+            if msg is None:
+                continue
+            if msg.msg_type == MessageTypes.AP_REGISTER_REQ:
+                requests[msg.address.tag] = msg.restore
+                rsp = APRegisterRsp(address=msg.address, success=True, credentials=msg.restore or CREDENTIALS)
+                await worker.send_msg(rsp)
+            elif msg.msg_type == MessageTypes.RT_REGISTER_REQ:
+                requests[msg.address.tag] = msg.restore
+                await worker.send_msg(RTRegisterRsp(address=msg.address, success=True))
+    assert requests == {
+        "N00H00A00": CREDENTIALS,
+        "N00H00A00R00": True,
+        "N00H00A00R01": False,
+        "N00H00A00R02": True,
+        "N00H00A02": None,
+    }
+
+    deadline = time.monotonic() + 5
+    while (progress := ScenarioProgress.model_validate(client.get(f"/snapshot/{load_id}").json())).state == (
+        ScenarioState.RUNNING
+    ):
+        assert time.monotonic() < deadline, progress
+        time.sleep(0.01)
+    assert progress.state == ScenarioState.COMPLETED, progress.errors
+    assert (progress.networks, progress.hubs, progress.aps, progress.rts, progress.failed) == (1, 1, 2, 3, 0)
+
+    hub = simulator.get_network(0).get_hub(0)
+    assert hub.state == HubState.REGISTERED
+    assert list(hub.get_aps()) == [0, 2]
+    ap = hub.get_ap(0)
+    assert (ap.state, ap.heartbeat_seconds, ap.azimuth_deg, ap.auid) == (APState.REGISTERED, 30, 90, "csni_N00H00A00")
+    assert [rt.state for rt in ap.get_rts().values()] == [RTState.REGISTERED] * 3
+    assert ap.get_rt(1).heartbeat_seconds == 60
+    assert hub.store.ap_credentials == {0: CREDENTIALS, 2: CREDENTIALS}
+
+
+def test_restore_progress_unknown(client) -> None:
+    """Progress for an unknown restore is a 404."""
+    assert client.get("/snapshot/nonexistent").status_code == HTTP_404_NOT_FOUND
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
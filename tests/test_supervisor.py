@@ -0,0 +1,258 @@
+"""
+Tests for worker supervision: spotting hub workers that have exited or hung, and replacing them with workers that set
+up the hub's nodes again.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import settings
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import APCreateRequest, APState, RTState
+from src.controller.managers import HubManager, node_index
+from src.controller.supervisor import Supervisor
+from src.controller.worker_ctrl import simulator
+from src.worker.worker_api import (
+    Address,
+    APCredentials,
+    APRegisterReq,
+    APRegisterRsp,
+    RTRegisterReq,
+    RTRegisterRsp,
+)
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+CREDENTIALS = APCredentials(secret="s3cret", lat_deg=51.5, lon_deg=-0.1)
+
+#######################################################################################################################
+# Fixtures
+#######################################################################################################################
+
+
+def connect(hub: HubManager) -> None:
+    """
+    Give a hub a worker that has connected, faked as a process that has not exited.
+    """
+    hub._worker = SimpleNamespace(poll=lambda: None, terminate=lambda: None, wait=lambda timeout=None: 0)
+    hub._last_report = time.monotonic()
+    hub._connected_event.set()
+
+
+@pytest.fixture
+def starts(monkeypatch) -> list[float]:
+    """
+    The times hub workers are started. Starting a worker connects it at once.
+    """
+    started = []
+
+    async def start_worker(self):
+        started.append(time.monotonic())
+        connect(self)
+
+    monkeypatch.setattr(HubManager, "start_worker", start_worker)
+    monkeypatch.setattr(HubManager, "start_heartbeats", lambda self: None)
+    return started
+
+
+@pytest.fixture
+def hub(starts, monkeypatch):
+    """
+    A hub whose worker has connected.
+    """
+    simulator.clear_children()
+    node_index.clear()
+    monkeypatch.setattr(settings, "SUPERVISOR_BACKOFF", 0.01)
+    monkeypatch.setattr(settings, "SUPERVISOR_STALL_TIMEOUT", 5.0)
+    hub = simulator.restore_network(0, "csi", "csni").create_hub(0)
+    connect(hub)
+    yield hub
+    simulator.clear_children()
+    node_index.clear()
+
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+async def wait_restarted(supervisor: Supervisor, hub: HubManager) -> None:
+    """
+    Wait for the supervisor to finish replacing the hub's worker.
+    """
+    async with asyncio.timeout(5):
+        while supervisor.hubs[hub.address.tag].restarting:
+            await asyncio.sleep(0.01)
+
+
+async def test_exited_worker_restarted(hub, starts) -> None:
+    """A worker that has exited is replaced, and the restart counted."""
+    supervisor = Supervisor()
+    supervisor.check(time.monotonic())
+    assert not supervisor.hubs and not starts
+
+    hub._worker.poll = lambda: -9
+    supervisor.check(time.monotonic())
+    supervisor.check(time.monotonic())  # Already restarting: not started twice
+    await wait_restarted(supervisor, hub)
+    assert len(starts) == 1 and hub.worker_fault(time.monotonic()) is None
+    record = supervisor.hubs[hub.address.tag]
+    assert (record.restarts, record.failures, record.last_reason) == (1, 0, "exited (-9)")
+    assert record.downtime_seconds > 0
+
+
+async def test_stalled_worker_restarted(hub, starts) -> None:
+    """A worker that has stopped reporting is replaced, and one that has not connected yet is left alone."""
+    supervisor = Supervisor()
+    now = time.monotonic()
+    supervisor.check(now + 4)
+    assert not supervisor.hubs
+    hub._connected_event.clear()
+    supervisor.check(now + 10)
+    assert not supervisor.hubs
+    hub._connected_event.set()
+    supervisor.check(now + 10)
+    await wait_restarted(supervisor, hub)
+    assert len(starts) == 1
+    assert supervisor.hubs[hub.address.tag].last_reason.startswith("no report for")
+
+
+async def test_failed_restart_retried(hub, monkeypatch) -> None:
+    """A replacement that fails is retried after a longer wait, and the failures show in the stats."""
+    attempts = []
+
+    async def restart_worker(self, timeout):
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise TimeoutError
+
+    monkeypatch.setattr(HubManager, "restart_worker", restart_worker)
+    supervisor = Supervisor()
+    hub._worker.poll = lambda: 1
+    supervisor.check(time.monotonic())
+    await wait_restarted(supervisor, hub)
+    assert len(attempts) == 3 and attempts[2] - attempts[1] > attempts[1] - attempts[0]
+    stats = supervisor.stats()
+    assert (stats.restarts, stats.failures, stats.restarting) == (1, 2, 0)
+    assert list(stats.hubs) == [hub.address.tag]
+
+    simulator.clear_children()
+    node_index.clear()
+    assert supervisor.stats().hubs == {}
+
+
+async def test_restart_replays_nodes(hub, starts, monkeypatch) -> None:
+    """A worker that dies with registrations outstanding is replaced by one that sets up the nodes from their AUIDs
+    and credentials, and the request that was creating them returns."""
+    sent = []
+    answering = False
+
+    def send(msg):
+        sent.append(msg)
+        if answering and isinstance(msg, APRegisterReq):
+            rsp = APRegisterRsp(address=msg.address, success=True, credentials=msg.restore or CREDENTIALS)
+        elif answering and isinstance(msg, RTRegisterReq):
+            rsp = RTRegisterRsp(address=msg.address, success=True)
+        else:
+            return
+        asyncio.get_running_loop().call_soon(simulator.dispatch, rsp)
+
+    monkeypatch.setattr(worker_ctrl, "send", send)
+    adding = asyncio.create_task(hub.add_ap(APCreateRequest(num_rts=2)))
+    await asyncio.sleep(0)
+    simulator.dispatch(APRegisterRsp(address=Address(net=0, hub=0, ap=0), success=True, credentials=CREDENTIALS))
+    simulator.dispatch(RTRegisterRsp(address=Address(net=0, hub=0, ap=0, rt=0), success=True))
+    assert hub.tracker.outstanding == 1
+
+    answering = True
+    del sent[:]
+    hub._worker.poll = lambda: -9
+    supervisor = Supervisor()
+    supervisor.check(time.monotonic())
+    await wait_restarted(supervisor, hub)
+    async with asyncio.timeout(1):
+        await adding
+    assert supervisor.hubs[hub.address.tag].restarts == 1 and hub.tracker.outstanding == 0
+    ap_req, *rt_reqs = sent
+    assert ap_req.restore == CREDENTIALS and ap_req.auid == "csni_N00H00A00"
+    assert [(req.address.rt, req.restore, req.auid) for req in rt_reqs] == [
+        (0, True, "csni_N00H00A00R00"),
+        (1, False, "csni_N00H00A00R01"),
+    ]
+    ap = hub.get_ap(0)
+    assert ap.state == APState.REGISTERED and hub.store.ap_credentials[0] == CREDENTIALS
+    assert {rt.state for rt in ap.get_rts().values()} == {RTState.REGISTERED}
+
+
+async def test_stuck_replay_retried(hub, starts, monkeypatch) -> None:
+    """A replacement that never finishes setting up the nodes is given up on after the timeout, and tried again."""
+    monkeypatch.setattr(settings, "SUPERVISOR_STALL_TIMEOUT", 0.1)
+    monkeypatch.setattr(worker_ctrl, "send", lambda msg: None)
+    hub.create_ap(0, heartbeat=30)
+    hub._worker.poll = lambda: -9
+    supervisor = Supervisor()
+    supervisor.check(time.monotonic())
+    async with asyncio.timeout(5):
+        while supervisor.hubs[hub.address.tag].failures < 2:
+            await asyncio.sleep(0.01)
+    assert len(starts) >= 2 and hub.tracker.outstanding == 1  # Only the latest replay's request
+    supervisor.stop()
+
+
+def test_backoff(monkeypatch) -> None:
+    """Waits double with each failure up to the maximum, and start again once a worker has run long enough."""
+    monkeypatch.setattr(settings, "SUPERVISOR_BACKOFF", 1.0)
+    monkeypatch.setattr(settings, "SUPERVISOR_BACKOFF_MAX", 5.0)
+    supervisor = Supervisor()
+    assert [supervisor.backoff("N00H00") for _ in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    supervisor._backoff["N00H00"] = (4, time.monotonic() - 6)
+    assert supervisor.backoff("N00H00") == 1.0
+
+
+async def test_real_worker_restarted(tmp_path, monkeypatch) -> None:
+    """A real worker killed outright is replaced by one that connects, and an idle worker is not taken for hung."""
+    simulator.clear_children()
+    node_index.clear()
+    monkeypatch.setattr("src.controller.comms.settings.ZMQ_IPC_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "WORKER_START_METHOD", "popen")
+    monkeypatch.setattr(settings, "SUPERVISOR_INTERVAL", 0.1)
+    monkeypatch.setattr(settings, "SUPERVISOR_BACKOFF", 0.1)
+    monkeypatch.setattr(settings, "SUPERVISOR_STALL_TIMEOUT", 3.0)
+    monkeypatch.setenv("WORKER_KEEPALIVE_SECONDS", "0.2")
+    app = SimpleNamespace(state=SimpleNamespace())
+    worker_ctrl.setup_zmq(app, 0, 0, transport="ipc")
+    listener = asyncio.create_task(simulator.listener(worker_ctrl))
+    supervisor = Supervisor()
+    hub = simulator.restore_network(0, "csi", "csni").create_hub(0)
+    try:
+        async with asyncio.timeout(30):
+            await hub.start_worker()
+            supervisor.start()
+            first = hub._worker
+            first.kill()
+            while not supervisor.hubs or supervisor.hubs[hub.address.tag].restarting:
+                await asyncio.sleep(0.05)
+            assert hub._worker is not first and hub._worker.poll() is None
+            await asyncio.sleep(settings.SUPERVISOR_STALL_TIMEOUT + 1)  # Idle, but sending keepalive reports
+            assert supervisor.stats().restarts == 1 and hub._worker.poll() is None
+    finally:
+        supervisor.stop()
+        listener.cancel()
+        hub.stop_worker()
+        worker_ctrl.teardown_zmq(app)
+        simulator.clear_children()
+        node_index.clear()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,159 @@
+"""
+Tests for tearing down subtrees: the worker stopping, dropping and deregistering nodes, and the delete routes that drive
+it and report what was torn down.
+"""
+# ruff: noqa: PLR2004
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import gc
+import weakref
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from starlette.status import HTTP_200_OK, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+from tests.utils import build_network
+
+from src.config import settings
+from src.controller.comms import worker_ctrl
+from src.controller.ctrl_api import APCreateRequest, TeardownResult
+from src.controller.managers import HubManager, node_index
+from src.controller.worker_ctrl import simulator
+from src.worker.alarms import AlarmEngine
+from src.worker.ap import AP
+from src.worker.node import nodes
+from src.worker.rt import RT
+from src.worker.worker import Hub
+from src.worker.worker_api import (
+    Address,
+    AlarmSpec,
+    APRegisterRsp,
+    NodeSet,
+    SubtreeDeleteReq,
+    SubtreeDeleteRsp,
+    TeardownStats,
+)
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+async def test_worker_teardown(httpx_mock) -> None:
+    """The worker stops, drops and deregisters the nodes of the APs named, RTs first, and frees them."""
+    hub = Hub.__new__(Hub)
+    hub.address = Address(net=9, hub=9)
+    hub.alarms = AlarmEngine(hub)
+    hub._reported = {0: (1, 1, 0, 0), 1: (2, 2, 0, 0)}
+    url = f"{settings.NBAPI_URL}/api/v1/node"
+    httpx_mock.add_response(method="DELETE", url=f"{url}/rt/T-rt0", status_code=HTTP_500_INTERNAL_SERVER_ERROR)
+    httpx_mock.add_response(method="DELETE", url=f"{url}/rt/T-rt1")
+    httpx_mock.add_response(method="DELETE", url=f"{url}/ap/T-ap0")
+    async with httpx.AsyncClient() as client:
+        try:
+            for ap in range(2):
+                AP(Address(net=9, hub=9, ap=ap), None, client)
+                for rt in range(3):
+                    RT(Address(net=9, hub=9, ap=ap, rt=rt), None, client)
+            for address, node in nodes.items():
+                node.auid = "ap0" if address.rt is None else f"rt{address.rt}"
+                node.heartbeat_secs = 3600
+                node.registered = address.rt != 2
+                await node.on_start_heartbeat_req()
+            ap0 = weakref.ref(nodes[Address(net=9, hub=9, ap=0)])
+            hub.alarms.raise_alarm(nodes[Address(net=9, hub=9, ap=0, rt=1)], AlarmSpec())
+
+            command = SubtreeDeleteReq(address=hub.address, request=7, aps=NodeSet.of([0]))
+            rsp = await hub.on_subtree_delete_req(command)
+            assert rsp.request == 7
+            assert rsp.stats.model_copy(update={"seconds": 0}) == TeardownStats(
+                nodes=4, heartbeats=3, alarms=2, deregistered=2, failed=1
+            )
+            assert sorted(address.ap for address in nodes) == [1] * 4
+            assert (hub.alarms.stats().active, hub.alarms.stats().pending) == (0, 0)
+            assert list(hub._reported) == [1]
+            paths = [request.url.path for request in httpx_mock.get_requests()]
+            assert paths[-1] == "/api/v1/node/ap/T-ap0"
+            await asyncio.sleep(0)
+            gc.collect()
+            assert ap0() is None
+        finally:
+            for node in list(nodes.values()):
+                node.stop()
+            nodes.clear()
+
+
+def test_delete_routes(client, httpx_mock, monkeypatch) -> None:
+    """Deleting an AP, Hub or Network sends one teardown per hub worker and reports what the workers tore down."""
+    build_network(2, 3, 4)
+    sent = []
+    stopped = []
+
+    def send(msg):
+        sent.append(msg)
+        stats = TeardownStats(nodes=5, heartbeats=5, deregistered=4, failed=1, seconds=len(sent))
+        rsp = SubtreeDeleteRsp(address=msg.address, request=msg.request, stats=stats)
+        asyncio.get_running_loop().call_soon(simulator.dispatch, rsp)
+
+    monkeypatch.setattr(worker_ctrl, "send", send)
+    monkeypatch.setattr(worker_ctrl, "channels", {})
+    monkeypatch.setattr(HubManager, "stop_worker", lambda hub: stopped.append(hub.address.tag))
+    for hub in simulator.get_network(0).get_hubs().values():
+        hub._worker = SimpleNamespace()
+        worker_ctrl.channels[hub.address.tag] = SimpleNamespace()  # Holding unacknowledged commands
+
+    resp = client.delete("/network/0/hub/0/ap/1")
+    assert resp.status_code == HTTP_200_OK
+    assert TeardownResult.model_validate(resp.json()).stats.deregistered == 4
+    assert sent[0].aps == NodeSet.of([1]) and sent[0].deregister
+    assert list(simulator.get_network(0).get_hub(0).get_aps()) == [0, 2]
+
+    httpx_mock.add_response(method="DELETE", url=f"{settings.NBAPI_URL}/api/v1/node/hub/csni_N00H01")
+    result = TeardownResult.model_validate(client.delete("/network/0/hub/1").json())
+    assert sent[1].aps is None and stopped[0] == "N00H01"
+    assert list(worker_ctrl.channels) == ["N00H00"]
+    assert (result.stats.nodes, result.stats.deregistered, result.stats.failed) == (6, 5, 1)
+
+    monkeypatch.setattr(settings, "TEARDOWN_TIMEOUT", 0.05)
+    monkeypatch.setattr(worker_ctrl, "send", sent.append)
+    result = TeardownResult.model_validate(client.delete("/network/0", params={"deregister": False}).json())
+    assert not sent[-1].deregister
+    assert result.incomplete == ["N00H00"] and result.stats.nodes == 1
+    assert set(stopped) == {"N00H00", "N00H01"} and not worker_ctrl.channels
+    assert not simulator.get_networks()
+
+
+async def test_remove_provisioning_ap(monkeypatch) -> None:
+    """Removing an AP whose RTs are still registering stops them being waited for, and the AP's creation fails."""
+    simulator.clear_children()
+    node_index.clear()
+    monkeypatch.setattr(worker_ctrl, "send", lambda msg: None)
+    hub = simulator.restore_network(0, "csi", "csni").create_hub(0)
+    try:
+        adding = asyncio.create_task(hub.add_ap(APCreateRequest(num_rts=3)))
+        await asyncio.sleep(0)
+        assert hub.tracker.outstanding == 4
+        simulator.dispatch(APRegisterRsp(address=Address(net=0, hub=0, ap=0), success=True))
+        await hub.remove_ap(0)
+        assert (len(hub.get_aps()), hub.tracker.outstanding) == (0, 0)
+        async with asyncio.timeout(1):
+            await hub.tracker.wait()
+            with pytest.raises(HTTPException) as err:
+                await adding
+        assert err.value.status_code == HTTP_404_NOT_FOUND
+
+        hub.create_ap(1, heartbeat=30).register()  # Never answered: its own response is dropped too
+        await hub.remove_ap(1)
+        assert hub.tracker.outstanding == 0
+    finally:
+        simulator.clear_children()
+        node_index.clear()
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,67 @@
+"""
+Regression tests for hub worker startup cost.
+
+The worker's import chain is kept lean so that a hub can connect to the controller as soon as possible: modules that are
+only needed once the hub is handling registrations are imported on first use. These tests fail if one of them creeps
+back onto the import path, or if a cold-started worker takes far longer than expected to send its HubConnectInd.
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from src.controller.comms import ControllerComms
+from src.worker.worker_api import MessageTypes
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+DEFERRED_MODULES = ("httpx", "jwt", "netifaces", "shortuuid", "src.nms_api", "src.worker.ap", "src.worker.rt")
+COLD_START_BUDGET_SECONDS = 5.0  # Generous: a cold start takes well under a second on an idle machine
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def test_worker_import_defers_heavy_modules():
+    """
+    Importing the worker module does not import anything that is only needed after the hub has connected.
+    """
+    code = f"import sys, src.worker.worker; print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    loaded = subprocess.check_output([sys.executable, "-c", code], text=True).split()
+    assert loaded == []
+
+
+async def test_cold_start_to_connect_ind(tmp_path, monkeypatch):
+    """
+    A worker started as a new process sends its HubConnectInd within the startup budget.
+    """
+    monkeypatch.setattr("src.controller.comms.settings.ZMQ_IPC_DIR", str(tmp_path))
+    comms = ControllerComms()
+    app = SimpleNamespace(state=SimpleNamespace())
+    comms.setup_zmq(app, 0, 0, transport="ipc")
+    start = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-u", "-m", "src.worker.worker", "0", "0", comms.pub_endpoint, comms.pull_endpoint]
+    )
+    try:
+        async with asyncio.timeout(COLD_START_BUDGET_SECONDS):
+            msg = await comms.get_message()
+        assert msg.msg_type == MessageTypes.HUB_CONNECT_IND
+        assert time.perf_counter() - start < COLD_START_BUDGET_SECONDS
+    finally:
+        worker.terminate()
+        worker.wait(timeout=5)
+        comms.teardown_zmq(app)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -0,0 +1,49 @@
+"""
+Tests for starting hub workers from the pre-forked worker zygote.
+
+These start a real zygote process and fork a real worker from it.
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import asyncio
+from types import SimpleNamespace
+
+from src.controller.comms import ControllerComms
+from src.controller.zygote import WorkerZygote
+from src.worker.worker_api import Address, MessageTypes
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+async def test_forked_worker_connects_and_stops(tmp_path, monkeypatch):
+    """
+    A worker forked by the zygote connects back to the controller, and can be terminated through its handle.
+    """
+    monkeypatch.setattr("src.controller.comms.settings.ZMQ_IPC_DIR", str(tmp_path))
+    comms = ControllerComms()
+    app = SimpleNamespace(state=SimpleNamespace())
+    comms.setup_zmq(app, 0, 0, transport="ipc")
+    zygote = WorkerZygote()
+    try:
+        worker = await zygote.spawn(0, 3, comms.pub_endpoint, comms.pull_endpoint)
+        async with asyncio.timeout(10):
+            msg = await comms.get_message()
+        assert msg.msg_type == MessageTypes.HUB_CONNECT_IND
+        assert msg.address == Address(net=0, hub=3)
+        assert worker.poll() is None
+
+        worker.terminate()
+        await asyncio.to_thread(worker.wait, 5)
+        assert worker.poll() == 0
+    finally:
+        await zygote.stop()
+        comms.teardown_zmq(app)
+
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
@@ -12,6 +12,7 @@ Type hints are used where possible. See project template for conventions.
 
 import asyncio
 import logging
+from collections.abc import Iterable
 
 from starlette.status import HTTP_201_CREATED, HTTP_202_ACCEPTED
 
@@ -25,10 +26,11 @@ from src.controller.ctrl_api import (
     HubState,
     NetworkCreateRequest,
     NetworkRead,
+    RTState,
 )
-from src.controller.managers import APManager
+from src.controller.managers import APManager, HubManager
 from src.controller.worker_ctrl import simulator
-from src.worker.worker_api import Address, APRegisterRsp, HubConnectInd, MessageTypes
+from src.worker.worker_api import Address, APCredentials, APRegisterRsp, HubConnectInd, MessageTypes
 
 #######################################################################################################################
 # Globals
@@ -38,12 +40,75 @@ TEST_NETWORK_CSNI = "test-network-csni"
 NUM_HUBS = 1
 NUM_APS_PER_HUB = 2
 NUM_RTS_PER_AP = 2
+CREDENTIALS = APCredentials(secret="s3cret", lat_deg=51.5, lon_deg=-0.1)  # Of every AP build_network registers
+
+# Trees for build_network(**tree):
+PROVISIONED_HUB = {  # AP 0 registered, with RTs 0 and 2 registered and RT 1 failed; AP 2 unregistered, with no RTs
+    "aps": [0, 2],
+    "rts": {0: 3},
+    "ap_heartbeats": {2: 45},
+    "azimuths": {0: 90},
+    "ap_states": {0: APState.REGISTERED},
+    "rt_states": {(0, 0): RTState.REGISTERED, (0, 1): RTState.REGISTRATION_FAILED, (0, 2): RTState.REGISTERED},
+}
+SPARSE_HUB = {  # APs 0-4 except 2, AP 1 registered; 10 RTs on AP 0, RT 3 registered
+    "aps": [0, 1, 3, 4],
+    "rts": {0: 10},
+    "ap_heartbeats": {ap: 30 + ap for ap in range(5)},
+    "ap_states": {1: APState.REGISTERED},
+    "rt_states": {(0, 3): RTState.REGISTERED},
+}
 
 #######################################################################################################################
 # Body
 #######################################################################################################################
 
 
+def build_network(  # noqa: PLR0913 - one keyword per aspect of the tree
+    hubs: int = 1,
+    aps: int | Iterable[int] = 0,
+    rts: int | dict[int, int] = 0,
+    ap_heartbeats: dict[int, int] | None = None,
+    azimuths: dict[int, int] | None = None,
+    ap_states: dict[int, APState] | None = None,
+    rt_states: dict[tuple[int, int], RTState] | None = None,
+) -> list[HubManager]:
+    """Build network 0, with no workers and no NMS: registered hubs that each hold the same APs and RTs. The tree is
+    built through the manager methods, so it is recorded in the event log if one is open.
+
+    Args:
+        hubs (int): Number of hubs.
+        aps (int | Iterable[int]): Number of APs in each hub, or their indices.
+        rts (int | dict[int, int]): Number of RTs on each AP, or on some of them by AP index.
+        ap_heartbeats (dict[int, int] | None): AP heartbeat intervals by AP index, for those not at 30 seconds. RTs
+            are at 60 seconds.
+        azimuths (dict[int, int] | None): AP azimuths by AP index, for those not at 0.
+        ap_states (dict[int, APState] | None): AP states by AP index, for those not unregistered. Registered APs
+            have CREDENTIALS.
+        rt_states (dict[tuple[int, int], RTState] | None): RT states by (AP, RT) index, for those not unregistered.
+
+    Returns:
+        list[HubManager]: The hubs.
+    """
+    ap_indices = list(range(aps)) if isinstance(aps, int) else list(aps)
+    rt_counts = dict.fromkeys(ap_indices, rts) if isinstance(rts, int) else rts
+    net = simulator.restore_network(0, "csi", "csni")
+    hub_mgrs = []
+    for index in range(hubs):
+        hub = net.create_hub(index)
+        hub.set_state(HubState.REGISTERED)
+        for ap_idx in ap_indices:
+            ap = hub.create_ap(ap_idx, (ap_heartbeats or {}).get(ap_idx, 30), (azimuths or {}).get(ap_idx, 0))
+            if rt_counts.get(ap_idx):
+                ap.create_rts(0, heartbeat=60, count=rt_counts[ap_idx])
+        for ap_idx, state in (ap_states or {}).items():
+            hub.set_ap_state(ap_idx, state, CREDENTIALS if state == APState.REGISTERED else None)
+        for (ap_idx, rt_idx), state in (rt_states or {}).items():
+            hub.set_rt_state(ap_idx, rt_idx, state)
+        hub_mgrs.append(hub)
+    return hub_mgrs
+
+
 def create_empty_net(test_client, httpx_mock) -> Address:
     """Utility function to create a mini network with the NMS API mocked out. No hubs, APs, or RTs.
 
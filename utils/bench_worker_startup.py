@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Benchmark hub worker startup: fresh interpreters (Popen) against forks of the pre-imported worker zygote.
+
+First reports the time to import the worker module in a fresh interpreter (the median of several runs). Then, for each
+start method, starts N real hub workers concurrently against a controller-side ControllerComms and measures the time
+from the start request until each worker's HubConnectInd arrives. It reports the median and slowest
+hub-ready times and the time until every hub is ready. For the zygote, the one-off time to start the zygote itself is
+reported separately.
+
+Usage:
+    PYTHONPATH=. python utils/bench_worker_startup.py [--hubs N] [--import-runs N] [--methods popen zygote]
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from src.controller.comms import ControllerComms
+from src.controller.zygote import WorkerZygote
+from src.worker.worker_api import MessageTypes
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def measure_import_ms(runs: int) -> float:
+    """
+    Measure how long a fresh interpreter takes to import the worker module, excluding interpreter startup.
+
+    Args:
+        runs (int): Number of interpreters to start.
+
+    Returns:
+        float: The median import time in milliseconds.
+    """
+    code = "import time; t = time.perf_counter(); import src.worker.worker; print(time.perf_counter() - t)"
+    times = [float(subprocess.check_output([sys.executable, "-c", code])) * 1e3 for _ in range(runs)]
+    return statistics.median(times)
+
+
+async def run_method(method: str, num_hubs: int, port: int) -> dict[str, float]:
+    """
+    Start `num_hubs` workers with one start method and time how long each takes to connect.
+
+    Args:
+        method (str): "popen" or "zygote".
+        num_hubs (int): Number of hub workers to start.
+        port (int): Base TCP port for the controller sockets.
+
+    Returns:
+        dict[str, float]: The measured results, in milliseconds.
+    """
+    comms = ControllerComms()
+    app = SimpleNamespace(state=SimpleNamespace())
+    comms.setup_zmq(app, port, port + 1)
+    zygote = WorkerZygote()
+    result = {"zygote_start_ms": 0.0}
+    if method == "zygote":
+        start = time.perf_counter()
+        await zygote.start()
+        # Time a throwaway fork too, so that the zygote's own imports are complete before the clock starts
+        warmup = await zygote.spawn(99, 99, comms.pub_endpoint, comms.pull_endpoint)
+        while (msg := await comms.get_message()) is None or msg.msg_type != MessageTypes.HUB_CONNECT_IND:
+            pass
+        warmup.terminate()
+        result["zygote_start_ms"] = (time.perf_counter() - start) * 1e3
+
+    workers = []
+    start = time.perf_counter()
+    for hub in range(num_hubs):
+        if method == "zygote":
+            workers.append(await zygote.spawn(0, hub, comms.pub_endpoint, comms.pull_endpoint))
+        else:
+            cmd = ["python", "-u", "-m", "src.worker.worker", "0", str(hub), comms.pub_endpoint, comms.pull_endpoint]
+            workers.append(subprocess.Popen(cmd))
+
+    ready = []
+    while len(ready) < num_hubs:
+        msg = await comms.get_message()
+        if msg is not None and msg.msg_type == MessageTypes.HUB_CONNECT_IND:
+            ready.append((time.perf_counter() - start) * 1e3)
+
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.wait(timeout=5)
+    await zygote.stop()
+    comms.teardown_zmq(app)
+
+    result.update(median_ms=statistics.median(ready), slowest_ms=max(ready), all_ready_ms=ready[-1])
+    return result
+
+
+def main() -> None:
+    """Entry point for the benchmark script."""
+    parser = argparse.ArgumentParser(description="Compare hub worker startup with Popen and the worker zygote")
+    parser.add_argument("--hubs", type=int, default=16, help="Number of hub workers to start")
+    parser.add_argument("--import-runs", type=int, default=5, help="Interpreters to start for the import timing")
+    parser.add_argument("--port", type=int, default=22601, help="Base TCP port")
+    parser.add_argument("--methods", nargs="+", default=["popen", "zygote"], choices=["popen", "zygote"])
+    args = parser.parse_args()
+
+    print(f"import src.worker.worker: {measure_import_ms(args.import_runs):.0f} ms (median of {args.import_runs})")
+    print(f"{args.hubs} hubs")
+    print(f"{'method':>8} {'zygote ms':>10} {'median ms':>10} {'slowest ms':>11} {'all ready ms':>13}")
+    for i, method in enumerate(args.methods):
+        r = asyncio.run(run_method(method, args.hubs, args.port + 2 * i))
+        print(
+            f"{method:>8} {r['zygote_start_ms']:>10.0f} {r['median_ms']:>10.0f} {r['slowest_ms']:>11.0f} "
+            f"{r['all_ready_ms']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################
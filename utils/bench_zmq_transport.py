@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Benchmark ZeroMQ round-trip latency and throughput for the tcp and ipc transports.
+
+Reproduces the controller/worker socket topology (controller PUB -> worker SUB, worker PUSH -> controller PULL) with a
+worker process that echoes every command straight back. For each transport it reports:
+
+- round-trip latency (one message in flight at a time): median, p99 and mean in microseconds
+- throughput (a burst of messages echoed back): messages per second
+- controller CPU time consumed per message during the throughput run
+
+Usage:
+    PYTHONPATH=. python utils/bench_zmq_transport.py [--messages N] [--size BYTES] [--transports tcp ipc]
+"""
+#######################################################################################################################
+# Imports
+#######################################################################################################################
+
+import argparse
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+import zmq
+
+from src.controller.comms import make_endpoints
+
+#######################################################################################################################
+# Globals
+#######################################################################################################################
+
+TAG = b"N00H00"
+STOP = TAG + b" stop"
+PING = TAG + b" ping"
+
+#######################################################################################################################
+# Body
+#######################################################################################################################
+
+
+def echo_worker(pub_endpoint: str, pull_endpoint: str) -> None:
+    """
+    Worker side of the benchmark: echo every message received on SUB back over PUSH until told to stop.
+
+    Args:
+        pub_endpoint (str): Controller PUB endpoint to connect to.
+        pull_endpoint (str): Controller PULL endpoint to connect to.
+    """
+    ctx = zmq.Context()
+    sub = ctx.socket(zmq.SUB)
+    sub.setsockopt(zmq.RCVHWM, 0)
+    sub.connect(pub_endpoint)
+    sub.setsockopt(zmq.SUBSCRIBE, TAG)
+    push = ctx.socket(zmq.PUSH)
+    push.setsockopt(zmq.SNDHWM, 0)
+    push.connect(pull_endpoint)
+    while (msg := sub.recv()) != STOP:
+        push.send(msg)
+    sub.close(linger=0)
+    push.close(linger=0)
+    ctx.term()
+
+
+def run_transport(transport: str, num_messages: int, size: int, port: int, ipc_dir: str) -> dict[str, float]:
+    """
+    Run the latency and throughput measurements for one transport.
+
+    Args:
+        transport (str): "tcp" or "ipc".
+        num_messages (int): Number of messages for each measurement.
+        size (int): Payload size in bytes.
+        port (int): Base TCP port (tcp only).
+        ipc_dir (str): Directory for ipc socket files (ipc only).
+
+    Returns:
+        dict[str, float]: The measured results.
+    """
+    pub_bind, pub_connect = make_endpoints(transport, port, "bench-pub", ipc_dir)
+    pull_bind, pull_connect = make_endpoints(transport, port + 1, "bench-pull", ipc_dir)
+
+    ctx = zmq.Context()
+    pub = ctx.socket(zmq.PUB)
+    pub.setsockopt(zmq.SNDHWM, 0)
+    pub.bind(pub_bind)
+    pull = ctx.socket(zmq.PULL)
+    pull.setsockopt(zmq.RCVHWM, 0)
+    pull.bind(pull_bind)
+
+    worker = multiprocessing.Process(target=echo_worker, args=(pub_connect, pull_connect))
+    worker.start()
+
+    # Slow-joiner handshake: keep pinging until the worker's subscription is live, then drain any extra echoes
+    while True:
+        pub.send(PING)
+        if pull.poll(100):
+            break
+    while pull.poll(200):
+        pull.recv()
+
+    payload = TAG + b" " + b"x" * size
+
+    latencies = []
+    for _ in range(num_messages):
+        start = time.perf_counter()
+        pub.send(payload)
+        pull.recv()
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for _ in range(num_messages):
+        pub.send(payload)
+    for _ in range(num_messages):
+        pull.recv()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    pub.send(STOP)
+    worker.join(timeout=5)
+    pub.close(linger=0)
+    pull.close(linger=0)
+    ctx.term()
+
+    latencies.sort()
+    return {
+        "median_us": statistics.median(latencies),
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1],
+        "mean_us": statistics.fmean(latencies),
+        "msgs_per_sec": num_messages / elapsed,
+        "cpu_us_per_msg": cpu / num_messages * 1e6,
+    }
+
+
+def main() -> None:
+    """Entry point for the benchmark script."""
+    parser = argparse.ArgumentParser(description="Compare ZeroMQ tcp and ipc transports")
+    parser.add_argument("--messages", type=int, default=20000, help="Messages per measurement")
+    parser.add_argument("--size", type=int, default=200, help="Payload size in bytes")
+    parser.add_argument("--port", type=int, default=22501, help="Base TCP port")
+    parser.add_argument("--transports", nargs="+", default=["tcp", "ipc"], choices=["tcp", "ipc"])
+    args = parser.parse_args()
+
+    print(f"{args.messages} messages of {args.size} bytes")
+    print(f"{'transport':>9} {'median us':>10} {'p99 us':>10} {'mean us':>10} {'msgs/s':>10} {'cpu us/msg':>11}")
+    with tempfile.TemporaryDirectory() as ipc_dir:
+        for transport in args.transports:
+            r = run_transport(transport, args.messages, args.size, args.port, ipc_dir)
+            print(
+                f"{transport:>9} {r['median_us']:>10.1f} {r['p99_us']:>10.1f} {r['mean_us']:>10.1f} "
+                f"{r['msgs_per_sec']:>10.0f} {r['cpu_us_per_msg']:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
+
+#######################################################################################################################
+# End of file
+#######################################################################################################################